@@ -0,0 +1,17 @@
+# Big-integer micro-benchmark: math.factorial() and math.comb() on results hundreds of thousands of digits long.
+# "Pycom (step loop)" is the previous runtime, which multiplied the result up one factor at a time.
+
+# CPython (default interpreter): 3.033s
+
+# Pycom (step loop): 17.966s (5.92x slower)
+# Pycom: 0.285s (10.6x faster)
+# Pycom (--fastmath): 0.239s (12.7x faster)
+
+# Conclusion: 63x faster than the step loop, 10.6-12.7x faster than CPython
+
+import math
+
+def main():
+    f = math.factorial(200000)
+    c = math.comb(400000, 200000)
+    print(f % 1000000007, c % 1000000007)
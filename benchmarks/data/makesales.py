@@ -0,0 +1,17 @@
+# Writes benchmarks/data/sales.csv, the two million rows benchmarks/dataframes.py reads. Run it from the repository
+# root with plain CPython; the same seed always gives the same file
+
+import random
+
+REGIONS = ["north", "south", "east", "west", "central", "coast", "islands", "mountains"]
+
+
+def main():
+    rng = random.Random(1)
+    with open("benchmarks/data/sales.csv", "w") as out:
+        out.write("region,product,price,qty,returned\n")
+        for _ in range(2000000):
+            out.write(f"{rng.choice(REGIONS)},{rng.randrange(1000)},{rng.randrange(100, 100000) / 100},{rng.randrange(1, 20)},{rng.random() < 0.05}\n")
+
+
+main()
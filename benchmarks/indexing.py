@@ -0,0 +1,32 @@
+# List indexing micro-benchmark: the longest common subsequence of two 6000-long lists, 36 million indexed reads and
+# writes in the inner loop, then a couple of negative indices and slices on the result.
+
+# CPython (default interpreter): 6.832s
+
+# Pycom: 0.363s (18.8x faster)
+# Pycom (--unchecked-index): 0.326s (21.0x faster)
+# Pycom (--fastmath): 0.391s (17.5x faster)
+# Pycom (--fastmath --unchecked-index): 0.344s (19.9x faster)
+
+# Conclusion: 17.5-21x faster than CPython; checking each index costs about 10%. Slices are clamped either way, but
+# a negative index (a[-1]) is only correct with the checks on, which is why the result is read as prev[n]
+
+def main():
+    n = 6000
+    a = []
+    b = []
+    for i in range(n):
+        a.append(i * 7 % 13)
+        b.append(i * 5 % 11)
+    prev = [0] * (n + 1)
+    for i in range(1, n + 1):
+        cur = [0] * (n + 1)
+        for j in range(1, n + 1):
+            if a[i - 1] == b[j - 1]:
+                cur[j] = prev[j - 1] + 1
+            elif prev[j] > cur[j - 1]:
+                cur[j] = prev[j]
+            else:
+                cur[j] = cur[j - 1]
+        prev = cur
+    print(prev[n], a[-3:], b[::1000])
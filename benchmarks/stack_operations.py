@@ -1,12 +1,13 @@
+# List micro-benchmark: fifteen million short-lived one-element lists.
+# "Pycom (std::vector)" is the previous runtime, which allocated on the heap for every list.
 
-# CPython (default interpreter): 8.857s
+# CPython (default interpreter): 2.899s
 
-# Pycom: 2.132s (4.15x faster)
-# Pycom (with --fastmath): 1.992s (4.44x faster)
+# Pycom (std::vector): 0.298s (9.73x faster)
+# Pycom: 0.034s (85.3x faster)
+# Pycom (--fastmath): 0.027s (107x faster)
 
-# pypy: 3.113s (2.84x faster)
-
-# Conclusion: 4.15-4.44x faster than CPython, 1.45-1.56x faster than
+# Conclusion: the element fits in the list's inline storage, so no list allocates; 8.8x faster than std::vector
 
 def main():
     for i in range(1, 15000001):
@@ -0,0 +1,496 @@
+#pragma once
+#include <bit>
+#include <cmath>
+#include <cstdint>
+#include <cstring>
+#include <functional>
+#include <initializer_list>
+#include <iterator>
+#include <optional>
+#include <stdexcept>
+#include <string>
+#include <string_view>
+#include <type_traits>
+#include <utility>
+#include <vector>
+#include "headers/builtins/stdpy.hpp"
+
+// Python's dict and set, on one open-addressing hash table laid out like CPython's compact dict: the entries (hash,
+// key, value) sit in one array in insertion order, which is also the order they're iterated and printed in, and a
+// separate power-of-two array of slots maps a hash to the entry holding it. A slot is 8 bytes, the entry's position
+// and the low 32 bits of its hash, so linear probing (under a 3/4 load) only compares keys whose bits already match,
+// and growing rehashes from the stored hashes without touching a key.
+//
+// Removing a key leaves a tombstone in its slot and a dead entry in the array, which the next rebuild drops. Lookups
+// take any type that compares equal to the key and hashes the same, so `d["word"]` never builds a pystring
+
+// Spreads a hash over all 64 bits (the slot comes from the top ones, the tag from the bottom), so keys that are
+// consecutive integers or differ in a character or two still land far apart
+inline uint64_t pymix(uint64_t x) {
+    x ^= x >> 32;
+    x *= 0x9e3779b97f4a7c15ull;
+    x ^= x >> 29;
+    return x;
+}
+
+// Keys that compare equal hash equally across types: every string-like type, and an integer with the float holding
+// the same whole number (1 == 1.0 in Python)
+template <typename T>
+uint64_t pyhash(const T& value) {
+    if constexpr (std::is_convertible_v<const T&, std::string_view> && !std::is_arithmetic_v<T>) {
+        return pymix(std::hash<std::string_view>{}(std::string_view(value)));
+    } else if constexpr (std::is_integral_v<T>) {
+        return pymix(static_cast<uint64_t>(static_cast<int64_t>(value)));
+    } else if constexpr (std::is_floating_point_v<T>) {
+        if (value == std::trunc(value) && std::fabs(value) < 9.2e18) return pymix(static_cast<uint64_t>(static_cast<int64_t>(value)));
+        double number = static_cast<double>(value);
+        uint64_t bits;
+        std::memcpy(&bits, &number, sizeof bits);
+        return pymix(bits);
+    } else if constexpr (std::is_same_v<T, pyint>) {
+        return value.isbig() ? pymix(std::hash<std::string>{}(value.str())) : pymix(static_cast<uint64_t>(static_cast<int64_t>(value)));
+    } else {
+        return pymix(std::hash<T>{}(value));
+    }
+}
+
+// The value of a set's entries, which takes no space in them
+struct pyunit {
+    friend bool operator==(pyunit, pyunit) { return true; }
+};
+
+enum class pydictpart { keys, values, items };
+
+template <typename K, typename V, pydictpart part>
+class pydictview;
+
+template <typename K, typename V>
+class pydict {
+    public:
+        pydict() = default;
+
+        // {"a": 1, "b": 2}; a repeated key keeps its first position and its last value, as in Python
+        pydict(std::initializer_list<std::pair<K, V>> items) {
+            reserve(items.size());
+            for (const auto& [key, value] : items) (*this)[key] = value;
+        }
+
+        size_t size() const { return live; }
+        bool empty() const { return live == 0; }
+        explicit operator bool() const { return live != 0; }
+
+        void clear() {
+            entries.clear();
+            slots.clear();
+            live = filled = 0;
+        }
+
+        // Room for `count` keys without rehashing; comprehensions reserve as many as they have items
+        void reserve(size_t count) {
+            if ((count + 1) * 4 > slots.size() * 3) rebuild(count);
+            entries.reserve(count);
+        }
+
+        pydict copy() const { return *this; }
+
+        template <typename Q>
+        bool contains(const Q& key) const { return locate(key, hashof(key)) != npos; }
+
+        // d[key] = value, and d[key] += value: a missing key is added with a default value first
+        template <typename Q>
+        V& operator[](const Q& key) { return insert(key).value; }
+
+        // Reading through a const dict (a parameter the function never changes) raises KeyError as Python does
+        template <typename Q>
+        const V& operator[](const Q& key) const { return at(key); }
+
+        template <typename Q>
+        const V& at(const Q& key) const {
+            size_t found = locate(key, hashof(key));
+            if (found == npos) throw std::out_of_range("KeyError: " + pyrepr(key));
+            return entries[slots[found].entry].value;
+        }
+
+        template <typename Q>
+        std::optional<V> get(const Q& key) const {
+            size_t found = locate(key, hashof(key));
+            if (found == npos) return std::nullopt;
+            return entries[slots[found].entry].value;
+        }
+
+        template <typename Q, typename D>
+        V get(const Q& key, const D& fallback) const {
+            size_t found = locate(key, hashof(key));
+            if (found == npos) return static_cast<V>(fallback);
+            return entries[slots[found].entry].value;
+        }
+
+        template <typename Q, typename D>
+        V& setdefault(const Q& key, const D& fallback) {
+            size_t before = live;
+            entry& found = insert(key);
+            if (live != before) found.value = static_cast<V>(fallback);
+            return found.value;
+        }
+
+        template <typename Q>
+        V& setdefault(const Q& key) { return insert(key).value; }
+
+        void update(const pydict& other) {
+            reserve(live + other.live);
+            for (const entry& item : other.entries)
+                if (item.hash != dead) (*this)[item.key] = item.value;
+        }
+
+        void update(std::initializer_list<std::pair<K, V>> items) {
+            for (const auto& [key, value] : items) (*this)[key] = value;
+        }
+
+        // Removes `key`, returning whether it was there
+        template <typename Q>
+        bool erase(const Q& key) {
+            size_t found = locate(key, hashof(key));
+            if (found == npos) return false;
+
+            entry& removedentry = entries[slots[found].entry];
+            removedentry = {dead, K(), V()};
+            slots[found].entry = removed;
+            --live;
+
+            // Once most entries are dead, iterating would mostly skip them
+            if (entries.size() > live * 2 + 8) rebuild(live);
+            return true;
+        }
+
+        pydictview<K, V, pydictpart::keys> keys() const { return {this}; }
+        pydictview<K, V, pydictpart::values> values() const { return {this}; }
+        pydictview<K, V, pydictpart::items> items() const { return {this}; }
+
+        // Iterating a dict gives its keys
+        auto begin() const { return keys().begin(); }
+        auto end() const { return keys().end(); }
+
+        friend bool operator==(const pydict& a, const pydict& b) {
+            if (a.live != b.live) return false;
+            for (const entry& item : a.entries) {
+                if (item.hash == dead) continue;
+                size_t found = b.locate(item.key, item.hash);
+                if (found == npos || !(b.entries[b.slots[found].entry].value == item.value)) return false;
+            }
+            return true;
+        }
+
+        void repr(fmt::memory_buffer& out) const {
+            out.push_back('{');
+            bool first = true;
+            for (const entry& item : entries) {
+                if (item.hash == dead) continue;
+                if (!first) out.append(std::string_view(", "));
+                first = false;
+                pyio::writerepr(out, item.key);
+                out.append(std::string_view(": "));
+                pyio::writerepr(out, item.value);
+            }
+            out.push_back('}');
+        }
+
+    private:
+        struct entry {
+            uint64_t hash;
+            K key;
+            [[no_unique_address]] V value;
+        };
+
+        struct slot {
+            uint32_t entry;
+            uint32_t tag;
+        };
+
+        static constexpr uint32_t vacant = UINT32_MAX, removed = UINT32_MAX - 1;
+        static constexpr uint64_t dead = UINT64_MAX;
+        static constexpr size_t npos = SIZE_MAX;
+
+        std::vector<entry> entries;
+        std::vector<slot> slots;
+        size_t live = 0;      // entries whose key is still in the dict
+        size_t filled = 0;    // slots holding an entry or a tombstone
+        int shift = 64;       // a hash's top (64 - shift) bits are its first slot
+
+        template <typename, typename, pydictpart>
+        friend class pydictview;
+
+        template <typename Q>
+        static uint64_t hashof(const Q& key) {
+            uint64_t hash = pyhash(key);
+            return hash == dead ? 0 : hash;
+        }
+
+        template <typename Q>
+        static K makekey(const Q& key) {
+            if constexpr (std::is_constructible_v<K, const Q&>) {
+                return K(key);
+            } else {
+                std::string_view text = key;
+                return K(text.data(), text.size());
+            }
+        }
+
+        // The slot holding `key`, or npos
+        template <typename Q>
+        size_t locate(const Q& key, uint64_t hash) const {
+            if (live == 0) return npos;
+
+            size_t mask = slots.size() - 1;
+            uint32_t tag = static_cast<uint32_t>(hash);
+            for (size_t i = hash >> shift;; i = (i + 1) & mask) {
+                const slot& at = slots[i];
+                if (at.entry == vacant) return npos;
+                if (at.tag == tag && at.entry != removed && entries[at.entry].key == key) return i;
+            }
+        }
+
+        // The entry for `key`, added at the end (with a default value) if it isn't there yet
+        template <typename Q>
+        entry& insert(const Q& key) {
+            uint64_t hash = hashof(key);
+            size_t found = locate(key, hash);
+            if (found != npos) return entries[slots[found].entry];
+
+            if ((filled + 1) * 4 > slots.size() * 3) rebuild(live + 1);
+
+            // The key isn't in the table, so the first tombstone on its probe sequence is as good as an empty slot
+            size_t mask = slots.size() - 1;
+            size_t i = hash >> shift;
+            while (slots[i].entry != vacant && slots[i].entry != removed) i = (i + 1) & mask;
+            if (slots[i].entry == vacant) ++filled;
+
+            slots[i] = {static_cast<uint32_t>(entries.size()), static_cast<uint32_t>(hash)};
+            entries.push_back({hash, makekey(key), V()});
+            ++live;
+            return entries.back();
+        }
+
+        // Drops dead entries and tombstones and resizes the slots to hold `count` keys at most half full
+        void rebuild(size_t count) {
+            if (entries.size() != live) std::erase_if(entries, [](const entry& item) { return item.hash == dead; });
+
+            size_t capacity = 8;
+            while (capacity < count * 2) capacity *= 2;
+            if (capacity > removed) throw std::length_error("dict has too many keys");
+
+            slots.assign(capacity, slot{vacant, 0});
+            shift = 64 - std::countr_zero(capacity);
+            size_t mask = capacity - 1;
+            for (size_t n = 0; n < entries.size(); ++n) {
+                size_t i = entries[n].hash >> shift;
+                while (slots[i].entry != vacant) i = (i + 1) & mask;
+                slots[i] = {static_cast<uint32_t>(n), static_cast<uint32_t>(entries[n].hash)};
+            }
+            filled = entries.size();
+        }
+};
+
+// d.keys(), d.values() and d.items(): live views of the dict, iterated in insertion order. An item is a pair of
+// references, so `for k, v in d.items()` copies neither
+template <typename K, typename V, pydictpart part>
+class pydictview {
+    public:
+        class iterator {
+            public:
+                using entry = typename pydict<K, V>::entry;
+                using iterator_category = std::forward_iterator_tag;
+                using difference_type = std::ptrdiff_t;
+                using value_type = std::conditional_t<part == pydictpart::keys, K, std::conditional_t<part == pydictpart::values, V, std::pair<const K&, const V&>>>;
+
+                iterator(const entry* at, const entry* last) : at(at), last(last) { skip(); }
+
+                decltype(auto) operator*() const {
+                    if constexpr (part == pydictpart::keys) return (at->key);
+                    else if constexpr (part == pydictpart::values) return (at->value);
+                    else return std::pair<const K&, const V&>(at->key, at->value);
+                }
+
+                iterator& operator++() {
+                    ++at;
+                    skip();
+                    return *this;
+                }
+
+                bool operator==(const iterator& other) const { return at == other.at; }
+
+            private:
+                const entry* at;
+                const entry* last;
+
+                void skip() {
+                    while (at != last && at->hash == pydict<K, V>::dead) ++at;
+                }
+        };
+
+        pydictview(const pydict<K, V>* dict) : dict(dict) {}
+
+        iterator begin() const { return {dict->entries.data(), dict->entries.data() + dict->entries.size()}; }
+        iterator end() const { return {dict->entries.data() + dict->entries.size(), dict->entries.data() + dict->entries.size()}; }
+        size_t size() const { return dict->size(); }
+
+        void repr(fmt::memory_buffer& out) const {
+            constexpr std::string_view names[] = {"dict_keys([", "dict_values([", "dict_items(["};
+            out.append(names[static_cast<int>(part)]);
+            bool first = true;
+            for (auto&& item : *this) {
+                if (!first) out.append(std::string_view(", "));
+                first = false;
+                if constexpr (part == pydictpart::items) {
+                    out.push_back('(');
+                    pyio::writerepr(out, item.first);
+                    out.append(std::string_view(", "));
+                    pyio::writerepr(out, item.second);
+                    out.push_back(')');
+                } else {
+                    pyio::writerepr(out, item);
+                }
+            }
+            out.append(std::string_view("])"));
+        }
+
+    private:
+        const pydict<K, V>* dict;
+};
+
+template <typename K, typename V>
+using pydictkeys = pydictview<K, V, pydictpart::keys>;
+
+template <typename K, typename V>
+using pydictvalues = pydictview<K, V, pydictpart::values>;
+
+template <typename K, typename V>
+using pydictitems = pydictview<K, V, pydictpart::items>;
+
+// A set is a dict whose values take no space, so it iterates (and prints) in insertion order too; CPython's order
+// follows its hash table instead
+template <typename T>
+class pyset {
+    public:
+        pyset() = default;
+
+        pyset(std::initializer_list<T> items) {
+            table.reserve(items.size());
+            for (const T& item : items) add(item);
+        }
+
+        // set(iterable)
+        template <typename C>
+        explicit pyset(const C& items) { update(items); }
+
+        size_t size() const { return table.size(); }
+        bool empty() const { return table.empty(); }
+        explicit operator bool() const { return !table.empty(); }
+
+        void clear() { table.clear(); }
+        void reserve(size_t count) { table.reserve(count); }
+        pyset copy() const { return *this; }
+
+        template <typename Q>
+        bool contains(const Q& item) const { return table.contains(item); }
+
+        template <typename Q>
+        void add(const Q& item) { table[item]; }
+
+        template <typename Q>
+        void remove(const Q& item) {
+            if (!table.erase(item)) throw std::out_of_range("KeyError: " + pyrepr(item));
+        }
+
+        template <typename Q>
+        void discard(const Q& item) { table.erase(item); }
+
+        template <typename C>
+        void update(const C& items) {
+            if constexpr (requires { items.size(); }) table.reserve(size() + items.size());
+            for (const auto& item : items) add(item);
+        }
+
+        auto begin() const { return table.keys().begin(); }
+        auto end() const { return table.keys().end(); }
+
+        friend pyset operator|(const pyset& a, const pyset& b) {
+            pyset result = a;
+            result.update(b);
+            return result;
+        }
+
+        friend pyset operator&(const pyset& a, const pyset& b) {
+            pyset result;
+            for (const T& item : a)
+                if (b.contains(item)) result.add(item);
+            return result;
+        }
+
+        friend pyset operator-(const pyset& a, const pyset& b) {
+            pyset result;
+            for (const T& item : a)
+                if (!b.contains(item)) result.add(item);
+            return result;
+        }
+
+        friend pyset operator^(const pyset& a, const pyset& b) {
+            pyset result = a - b;
+            for (const T& item : b)
+                if (!a.contains(item)) result.add(item);
+            return result;
+        }
+
+        friend bool operator==(const pyset& a, const pyset& b) { return a.table == b.table; }
+
+        pyset& operator|=(const pyset& other) { update(other); return *this; }
+        pyset& operator&=(const pyset& other) { return *this = *this & other; }
+        pyset& operator-=(const pyset& other) { for (const T& item : other) discard(item); return *this; }
+        pyset& operator^=(const pyset& other) { return *this = *this ^ other; }
+
+        void repr(fmt::memory_buffer& out) const {
+            if (empty()) {
+                out.append(std::string_view("set()"));
+                return;
+            }
+            out.push_back('{');
+            bool first = true;
+            for (const T& item : *this) {
+                if (!first) out.append(std::string_view(", "));
+                first = false;
+                pyio::writerepr(out, item);
+            }
+            out.push_back('}');
+        }
+
+    private:
+        pydict<T, pyunit> table;
+};
+
+// A literal operand of a set operator, left to class template argument deduction, stores what the compiler would have
+// inferred for it
+pyset(std::initializer_list<int>) -> pyset<int64_t>;
+pyset(std::initializer_list<const char*>) -> pyset<pystring>;
+
+// set() and dict() without arguments, which become whichever set or dict they initialise
+struct pyemptycontainer {
+    template <typename K, typename V>
+    operator pydict<K, V>() const { return {}; }
+
+    template <typename T>
+    operator pyset<T>() const { return {}; }
+};
+
+inline pyemptycontainer set() { return {}; }
+inline pyemptycontainer dict() { return {}; }
+
+template <typename C>
+auto set(const C& items) { return pyset<std::decay_t<decltype(*std::begin(items))>>(items); }
+
+template <typename K, typename V>
+pyint len(const pydict<K, V>& dict) { return static_cast<int64_t>(dict.size()); }
+
+template <typename K, typename V, pydictpart part>
+pyint len(const pydictview<K, V, part>& view) { return static_cast<int64_t>(view.size()); }
+
+template <typename T>
+pyint len(const pyset<T>& items) { return static_cast<int64_t>(items.size()); }
@@ -0,0 +1,301 @@
+#pragma once
+#include <cstdint>
+#include <functional>
+#include <iterator>
+#include <stdexcept>
+#include <tuple>
+#include <type_traits>
+#include <utility>
+#include "headers/builtins/stdpy.hpp"
+
+// Python's iterator builtins, enumerate, zip, map and filter, as lazy adaptors: each one wraps the range it's given
+// and works out one element at a time as it's iterated, so nothing is ever collected into a list. sum, min and max
+// then read them in a single loop. The compiler turns a generator expression into the same adaptors:
+//
+//     sum(x * x for x in xs if x % 2)  ->  sum(map([&](const auto& x) { return x * x; }, filter([&](const auto& x) { return x % 2; }, xs)))
+//
+// and g++ inlines the lambdas and iterators back into one loop over xs.
+//
+// A variable given to an adaptor is referred to, and a temporary (a list literal, another adaptor) is moved inside
+// it. Only plain begin()/end() iteration is needed of a range, so range(), lists, strings, slices, dict views and
+// the adaptors themselves all combine
+
+namespace pyiter {
+    // How an adaptor holds the range R it was given: a reference to a variable, or its own copy of a temporary
+    template <typename R>
+    using source = std::conditional_t<std::is_lvalue_reference_v<R>, R, std::remove_cvref_t<R>>;
+
+    template <typename R>
+    using iterator = decltype(std::begin(std::declval<const std::remove_reference_t<R>&>()));
+
+    template <typename R>
+    using sentinel = decltype(std::end(std::declval<const std::remove_reference_t<R>&>()));
+
+    // The end of an adaptor is wherever the iterator it wraps reaches the end of its range
+    template <typename S>
+    struct end { S at; };
+
+    // min(xs, key=f); the compiler turns the keyword argument into this
+    template <typename F>
+    struct key { F function; };
+
+    template <typename F>
+    key(F) -> key<F>;
+
+    template <typename T> struct iskey : std::false_type {};
+    template <typename F> struct iskey<key<F>> : std::true_type {};
+}
+
+// Python's truth value, for filter(): empty strings and containers are false as well as zero
+template <typename T>
+bool pytruth(const T& value) {
+    if constexpr (requires { value.empty(); }) {
+        return !value.empty();
+    } else {
+        return static_cast<bool>(value);
+    }
+}
+
+template <typename R>
+class pyenumerate {
+    public:
+        pyenumerate(R&& items, int64_t start) : items(std::forward<R>(items)), start(start) {}
+
+        class iterator {
+            public:
+                iterator(pyiter::iterator<R> at, int64_t index) : at(at), index(index) {}
+
+                // (index, element), which `for i, x in enumerate(xs)` unpacks; the element is not copied
+                std::pair<int64_t, decltype(*std::declval<pyiter::iterator<R>&>())> operator*() const { return {index, *at}; }
+                iterator& operator++() { ++at; ++index; return *this; }
+                bool operator==(const pyiter::end<pyiter::sentinel<R>>& stop) const { return !(at != stop.at); }
+
+            private:
+                pyiter::iterator<R> at;
+                int64_t index;
+        };
+
+        iterator begin() const { return iterator(std::begin(items), start); }
+        pyiter::end<pyiter::sentinel<R>> end() const { return {std::end(items)}; }
+
+    private:
+        pyiter::source<R> items;
+        int64_t start;
+};
+
+template <typename R>
+pyenumerate<R> enumerate(R&& items, int64_t start = 0) { return pyenumerate<R>(std::forward<R>(items), start); }
+
+template <typename... R>
+class pyzip {
+    public:
+        explicit pyzip(R&&... items) : items(std::forward<R>(items)...) {}
+
+        using stops = pyiter::end<std::tuple<pyiter::sentinel<R>...>>;
+
+        class iterator {
+            public:
+                explicit iterator(std::tuple<pyiter::iterator<R>...> at) : at(at) {}
+
+                std::tuple<decltype(*std::declval<pyiter::iterator<R>&>())...> operator*() const {
+                    return std::apply([](const auto&... each) { return std::tuple<decltype(*each)...>(*each...); }, at);
+                }
+
+                iterator& operator++() {
+                    std::apply([](auto&... each) { (++each, ...); }, at);
+                    return *this;
+                }
+
+                // The shortest range ends the zip
+                bool operator==(const stops& stop) const { return finished(stop, std::index_sequence_for<R...>()); }
+
+            private:
+                std::tuple<pyiter::iterator<R>...> at;
+
+                template <std::size_t... I>
+                bool finished(const stops& stop, std::index_sequence<I...>) const {
+                    return (... || !(std::get<I>(at) != std::get<I>(stop.at)));
+                }
+        };
+
+        iterator begin() const { return iterator(std::apply([](const auto&... each) { return std::make_tuple(std::begin(each)...); }, items)); }
+        stops end() const { return {std::apply([](const auto&... each) { return std::make_tuple(std::end(each)...); }, items)}; }
+
+    private:
+        std::tuple<pyiter::source<R>...> items;
+};
+
+template <typename... R>
+pyzip<R...> zip(R&&... items) { return pyzip<R...>(std::forward<R>(items)...); }
+
+template <typename F, typename R>
+class pymap {
+    public:
+        pymap(F function, R&& items) : function(std::move(function)), items(std::forward<R>(items)) {}
+
+        class iterator {
+            public:
+                iterator(const F* function, pyiter::iterator<R> at) : function(function), at(at) {}
+
+                decltype(auto) operator*() const { return std::invoke(*function, *at); }
+                iterator& operator++() { ++at; return *this; }
+                bool operator==(const pyiter::end<pyiter::sentinel<R>>& stop) const { return !(at != stop.at); }
+
+            private:
+                const F* function;
+                pyiter::iterator<R> at;
+        };
+
+        iterator begin() const { return iterator(&function, std::begin(items)); }
+        pyiter::end<pyiter::sentinel<R>> end() const { return {std::end(items)}; }
+
+    private:
+        F function;
+        pyiter::source<R> items;
+};
+
+template <typename F, typename R>
+pymap<F, R> map(F function, R&& items) { return pymap<F, R>(std::move(function), std::forward<R>(items)); }
+
+template <typename F, typename R>
+class pyfilter {
+    public:
+        pyfilter(F predicate, R&& items) : predicate(std::move(predicate)), items(std::forward<R>(items)) {}
+
+        class iterator {
+            public:
+                iterator(const F* predicate, pyiter::iterator<R> at, pyiter::sentinel<R> stop) : predicate(predicate), at(at), stop(stop) { skip(); }
+
+                decltype(auto) operator*() const { return *at; }
+                iterator& operator++() { ++at; skip(); return *this; }
+                bool operator==(const pyiter::end<pyiter::sentinel<R>>&) const { return !(at != stop); }
+
+            private:
+                const F* predicate;
+                pyiter::iterator<R> at;
+                pyiter::sentinel<R> stop;
+
+                void skip() {
+                    while (at != stop && !keep(*at)) ++at;
+                }
+
+                template <typename T>
+                bool keep(const T& item) const {
+                    // filter(None, xs) keeps the elements that are true themselves
+                    if constexpr (std::is_null_pointer_v<F>) {
+                        return pytruth(item);
+                    } else {
+                        return pytruth(std::invoke(*predicate, item));
+                    }
+                }
+        };
+
+        iterator begin() const { return iterator(&predicate, std::begin(items), std::end(items)); }
+        pyiter::end<pyiter::sentinel<R>> end() const { return {std::end(items)}; }
+
+    private:
+        F predicate;
+        pyiter::source<R> items;
+};
+
+template <typename F, typename R>
+pyfilter<F, R> filter(F predicate, R&& items) { return pyfilter<F, R>(std::move(predicate), std::forward<R>(items)); }
+
+namespace pyiter {
+    // What sum() adds up in: integers exactly, in a pyint, as any number of them can add up to more than 64 bits
+    // hold; other numbers in the wider of the two, and anything else in the element's own type
+    template <typename S, typename E>
+    auto total() {
+        if constexpr ((std::is_integral_v<S> || std::is_same_v<S, pyint>) && (std::is_integral_v<E> || std::is_same_v<E, pyint>)) {
+            return pyint();
+        } else if constexpr (std::is_arithmetic_v<S> && std::is_arithmetic_v<E>) {
+            return std::common_type_t<S, E>();
+        } else {
+            return E();
+        }
+    }
+}
+
+template <typename R, typename S = int>
+auto sum(R&& items, const S& start = 0) {
+    using E = std::remove_cvref_t<decltype(*std::begin(items))>;
+    using A = decltype(pyiter::total<S, E>());
+
+    if constexpr (std::is_same_v<A, pyint> && std::is_integral_v<S> && std::is_integral_v<E>) {
+        // Fixed width integers add up in an int64_t until a sum overflows it, and in the pyint from there on
+        int64_t small = start;
+        auto at = std::begin(items);
+        auto stop = std::end(items);
+        for (; at != stop; ++at) {
+            E item = *at;
+            int64_t next;
+            if (__builtin_add_overflow(small, item, &next)) [[unlikely]] {
+                pyint total = pyint(small) + pyint(item);
+                for (++at; at != stop; ++at) total += pyint(*at);
+                return total;
+            }
+            small = next;
+        }
+        return pyint(small);
+    } else {
+        A total = static_cast<A>(start);
+        for (auto&& item : items) total += item;
+        return total;
+    }
+}
+
+namespace pyiter {
+    // The first element that no other comes `before`: the first of the least for min(), of the greatest for max()
+    template <typename R, typename F, typename Before>
+    auto extreme(R&& items, const F& key, Before before, const char* name) {
+        using E = std::remove_cvref_t<decltype(*std::begin(items))>;
+
+        auto at = std::begin(items);
+        auto stop = std::end(items);
+        if (!(at != stop)) throw std::invalid_argument(std::string("ValueError: ") + name + "() arg is an empty sequence");
+
+        E best = *at;
+        for (++at; at != stop; ++at) {
+            decltype(auto) item = *at;
+            if (before(std::invoke(key, item), std::invoke(key, best))) best = item;
+        }
+        return best;
+    }
+
+    struct identity {
+        template <typename T>
+        const T& operator()(const T& value) const { return value; }
+    };
+
+    inline auto less = [](const auto& a, const auto& b) { return a < b; };
+    inline auto greater = [](const auto& a, const auto& b) { return b < a; };
+}
+
+// min(xs), min(xs, key=f) and min(a, b, ...); the same for max
+template <typename R>
+auto min(R&& items) { return pyiter::extreme(std::forward<R>(items), pyiter::identity(), pyiter::less, "min"); }
+
+template <typename R, typename F>
+auto min(R&& items, const pyiter::key<F>& key) { return pyiter::extreme(std::forward<R>(items), key.function, pyiter::less, "min"); }
+
+template <typename A, typename B, typename... More> requires (!pyiter::iskey<B>::value)
+auto min(const A& a, const B& b, const More&... more) {
+    std::common_type_t<A, B, More...> best = a;
+    if (b < best) best = b;
+    ((best = more < best ? more : best), ...);
+    return best;
+}
+
+template <typename R>
+auto max(R&& items) { return pyiter::extreme(std::forward<R>(items), pyiter::identity(), pyiter::greater, "max"); }
+
+template <typename R, typename F>
+auto max(R&& items, const pyiter::key<F>& key) { return pyiter::extreme(std::forward<R>(items), key.function, pyiter::greater, "max"); }
+
+template <typename A, typename B, typename... More> requires (!pyiter::iskey<B>::value)
+auto max(const A& a, const B& b, const More&... more) {
+    std::common_type_t<A, B, More...> best = a;
+    if (best < b) best = b;
+    ((best = best < more ? more : best), ...);
+    return best;
+}
@@ -0,0 +1,429 @@
+#pragma once
+#include <algorithm>
+#include <cstdint>
+#include <cstdlib>
+#include <cstring>
+#include <functional>
+#include <initializer_list>
+#include <iterator>
+#include <memory>
+#include <new>
+#include <stdexcept>
+#include <string>
+#include <type_traits>
+#include <utility>
+#include "headers/builtins/stdpy.hpp"
+
+// Python's list, for one element type: a contiguous array like std::vector, except that its first few elements live
+// inside the list object itself. A list that never outgrows that (the `stack = []` pushed and popped in a loop, a
+// pair of coordinates) is never allocated at all, and one that does only keeps its three words in the object.
+//
+// Elements that can be copied byte for byte (ints, floats, bools) are moved around with memcpy and their heap block
+// grows with realloc, which extends it in place, or for big lists remaps its pages, instead of copying everything over.
+// Anything else (strings, nested lists) is moved element by element into a block from operator new.
+//
+// Indexing is Python's, a negative index counting from the end, and a slice is a view of the list (see pyview).
+// The methods are Python's: pop(i) (the compiler spells pop pop_back, so pop_back() also returns the element),
+// insert(i, x), remove(x), extend(items), index(x), count(x), reverse(), sort() and copy()
+
+// How many elements are kept inline: as many as fit in 40 bytes, which makes a pylist<int64_t> or pylist<double> one
+// 64 byte cache line holding up to 5 of them, and a pylist<pystring> one string
+template <typename T>
+inline constexpr std::size_t pylistinline = sizeof(T) < 40 ? 40 / sizeof(T) : 1;
+
+template <typename T, std::size_t N = pylistinline<T>>
+class pylist {
+    public:
+        using value_type = T;
+        using size_type = std::size_t;
+        using difference_type = std::ptrdiff_t;
+        using reference = T&;
+        using const_reference = const T&;
+        using iterator = T*;
+        using const_iterator = const T*;
+        using reverse_iterator = std::reverse_iterator<T*>;
+        using const_reverse_iterator = std::reverse_iterator<const T*>;
+
+        pylist() noexcept : first(inlined()) {}
+
+        pylist(std::initializer_list<T> items) : pylist() { append(items.begin(), items.size()); }
+
+        pylist(size_type n, const T& value) : pylist() { resize(n, value); }
+
+        template <std::input_iterator I>
+        pylist(I begin, I end) : pylist() {
+            if constexpr (std::forward_iterator<I>) reserve(std::distance(begin, end));
+            for (; begin != end; ++begin) emplace_back(*begin);
+        }
+
+        // A list of another element type converts element by element, as an int list given to a `list` parameter
+        template <typename U, std::size_t M> requires (!std::is_same_v<T, U> && std::is_constructible_v<T, const U&>)
+        pylist(const pylist<U, M>& other) : pylist(other.begin(), other.end()) {}
+
+        pylist(const pylist& other) : pylist() { append(other.first, other.used); }
+
+        pylist(pylist&& other) noexcept : pylist() { take(std::move(other)); }
+
+        template <typename U> requires std::is_constructible_v<T, const U&>
+        pylist(const pyview<U>& items) : pylist(items.begin(), items.end()) {}
+
+        pylist& operator=(const pylist& other) {
+            if (this != &other) {
+                clear();
+                append(other.first, other.used);
+            }
+            return *this;
+        }
+
+        pylist& operator=(pylist&& other) noexcept {
+            if (this != &other) {
+                clear();
+                release();
+                first = inlined();
+                room = N;
+                take(std::move(other));
+            }
+            return *this;
+        }
+
+        pylist& operator=(std::initializer_list<T> items) {
+            clear();
+            append(items.begin(), items.size());
+            return *this;
+        }
+
+        ~pylist() {
+            std::destroy(first, first + used);
+            release();
+        }
+
+        size_type size() const noexcept { return used; }
+        bool empty() const noexcept { return used == 0; }
+        size_type capacity() const noexcept { return room; }
+        explicit operator bool() const noexcept { return used != 0; }
+
+        T* data() noexcept { return first; }
+        const T* data() const noexcept { return first; }
+
+        iterator begin() noexcept { return first; }
+        iterator end() noexcept { return first + used; }
+        const_iterator begin() const noexcept { return first; }
+        const_iterator end() const noexcept { return first + used; }
+        const_iterator cbegin() const noexcept { return first; }
+        const_iterator cend() const noexcept { return first + used; }
+        reverse_iterator rbegin() noexcept { return reverse_iterator(end()); }
+        reverse_iterator rend() noexcept { return reverse_iterator(begin()); }
+        const_reverse_iterator rbegin() const noexcept { return const_reverse_iterator(end()); }
+        const_reverse_iterator rend() const noexcept { return const_reverse_iterator(begin()); }
+
+        // Any integer indexes, an arbitrary precision one included, and a negative one counts back from the end
+        template <typename I> requires (!std::is_same_v<I, pyslice>)
+        T& operator[](const I& index) { return first[pyindex(index, used, "list index out of range")]; }
+
+        template <typename I> requires (!std::is_same_v<I, pyslice>)
+        const T& operator[](const I& index) const { return first[pyindex(index, used, "list index out of range")]; }
+
+        // xs[a:b:c] is a view of the same elements, only copied if it's stored
+        pyview<T> operator[](const pyslice& slice) const & { return pyview<T>(first, used, slice); }
+
+        // A slice of a temporary (`for x in make()[::2]`) takes the elements instead, as the temporary is gone before
+        // a for loop over a view of it would read them
+        pylist operator[](const pyslice& slice) && {
+            pyslice::extent range = slice.indices(static_cast<int64_t>(used));
+            pylist out;
+            out.reserve(range.count);
+            for (int64_t i = 0; i < range.count; ++i) out.emplace_back(std::move(first[range.first + i * range.step]));
+            return out;
+        }
+
+        template <typename I>
+        T& at(const I& index) { return first[position(static_cast<int64_t>(index), "list index out of range")]; }
+
+        template <typename I>
+        const T& at(const I& index) const { return first[position(static_cast<int64_t>(index), "list index out of range")]; }
+
+        T& front() { return first[0]; }
+        T& back() { return first[used - 1]; }
+        const T& front() const { return first[0]; }
+        const T& back() const { return first[used - 1]; }
+
+        void reserve(size_type capacity) {
+            if (capacity > room) relocate(capacity);
+        }
+
+        void resize(size_type size) { resize(size, T()); }
+
+        void resize(size_type size, const T& value) {
+            if (size < used) {
+                std::destroy(first + size, first + used);
+            } else {
+                reserve(size);
+                std::uninitialized_fill(first + used, first + size, value);
+            }
+            used = size;
+        }
+
+        void clear() noexcept {
+            std::destroy(first, first + used);
+            used = 0;
+        }
+
+        template <typename... Args>
+        T& emplace_back(Args&&... args) {
+            if (used == room) [[unlikely]] {
+                // The argument may be one of this list's own elements, so it's built before they move
+                T value(std::forward<Args>(args)...);
+                grow(used + 1);
+                ::new (static_cast<void*>(first + used)) T(std::move(value));
+            } else {
+                ::new (static_cast<void*>(first + used)) T(std::forward<Args>(args)...);
+            }
+            return first[used++];
+        }
+
+        void push_back(const T& value) { emplace_back(value); }
+        void push_back(T&& value) { emplace_back(std::move(value)); }
+
+        // list.pop()
+        T pop_back() {
+            if (used == 0) [[unlikely]] throw std::out_of_range("IndexError: pop from empty list");
+            T value = std::move(first[used - 1]);
+            std::destroy_at(first + --used);
+            return value;
+        }
+
+        // list.pop(i)
+        template <typename I>
+        T pop_back(const I& index) {
+            if (used == 0) throw std::out_of_range("IndexError: pop from empty list");
+            size_type at = position(static_cast<int64_t>(index), "pop index out of range");
+            T value = std::move(first[at]);
+            std::move(first + at + 1, first + used, first + at);
+            std::destroy_at(first + --used);
+            return value;
+        }
+
+        // list.insert(i, x): an index past either end inserts at that end
+        template <typename I>
+        void insert(const I& index, const T& value) {
+            int64_t length = static_cast<int64_t>(used);
+            int64_t at = static_cast<int64_t>(index);
+            at = at < 0 ? std::max<int64_t>(at + length, 0) : std::min(at, length);
+
+            T item(value);
+            if (used == room) grow(used + 1);
+            if (at == length) {
+                ::new (static_cast<void*>(first + used)) T(std::move(item));
+            } else {
+                ::new (static_cast<void*>(first + used)) T(std::move(first[used - 1]));
+                std::move_backward(first + at, first + used - 1, first + used);
+                first[at] = std::move(item);
+            }
+            ++used;
+        }
+
+        // list.remove(x): the first element equal to x
+        template <typename U>
+        void remove(const U& value) {
+            T* found = std::find_if(begin(), end(), [&](const T& item) { return pyequal(item, value); });
+            if (found == end()) throw std::invalid_argument("ValueError: list.remove(x): x not in list");
+            std::move(found + 1, end(), found);
+            std::destroy_at(first + --used);
+        }
+
+        template <typename R>
+        void extend(const R& items) {
+            if (static_cast<const void*>(&items) == static_cast<const void*>(this)) {
+                // xs.extend(xs): the elements are read by position, after the one reallocation
+                size_type size = used;
+                reserve(2 * size);
+                for (size_type i = 0; i < size; ++i) ::new (static_cast<void*>(first + used++)) T(first[i]);
+                return;
+            }
+            if constexpr (std::is_same_v<decltype(*std::begin(items)), const T&>) {
+                // xs.extend(xs[1:3]): a view of this list would be read after the reallocation frees it, so it's
+                // copied out first
+                if (std::begin(items) != std::end(items) && holds(std::addressof(*std::begin(items)))) {
+                    pylist copied(std::begin(items), std::end(items));
+                    append(copied.first, copied.used);
+                    return;
+                }
+            }
+            if constexpr (requires { std::size(items); }) reserve(used + std::size(items));
+            for (const auto& item : items) emplace_back(item);
+        }
+
+        void extend(std::initializer_list<T> items) { append(items.begin(), items.size()); }
+
+        // list.index(x[, start[, stop]])
+        template <typename U>
+        int64_t index(const U& value, int64_t start = 0, int64_t stop = INT64_MAX) const {
+            int64_t length = static_cast<int64_t>(used);
+            start = start < 0 ? std::max<int64_t>(start + length, 0) : std::min(start, length);
+            stop = stop < 0 ? std::max<int64_t>(stop + length, 0) : std::min(stop, length);
+            for (int64_t i = start; i < stop; ++i) {
+                if (pyequal(first[i], value)) return i;
+            }
+            throw std::invalid_argument("ValueError: " + pyrepr(value) + " is not in list");
+        }
+
+        template <typename U>
+        int64_t count(const U& value) const {
+            return std::count_if(begin(), end(), [&](const T& item) { return pyequal(item, value); });
+        }
+
+        void reverse() { std::reverse(begin(), end()); }
+
+        // Stable, as Python's sort is; equal numbers can't be told apart, so they can use the faster unstable sort
+        void sort() {
+            if constexpr (std::is_arithmetic_v<T>) {
+                std::sort(begin(), end());
+            } else {
+                std::stable_sort(begin(), end());
+            }
+        }
+
+        pylist copy() const { return *this; }
+
+        pylist& operator+=(const pylist& other) {
+            extend(other);
+            return *this;
+        }
+
+        friend pylist operator+(const pylist& a, const pylist& b) {
+            pylist out;
+            out.reserve(a.used + b.used);
+            out.append(a.first, a.used);
+            out.append(b.first, b.used);
+            return out;
+        }
+
+        // xs * n: the list repeated n times
+        template <typename I> requires (std::is_integral_v<I> || std::is_same_v<I, pyint>)
+        friend pylist operator*(const pylist& items, const I& times) {
+            pylist out;
+            int64_t n = static_cast<int64_t>(times);
+            if (n <= 0) return out;
+            out.reserve(items.used * n);
+            for (int64_t i = 0; i < n; ++i) out.append(items.first, items.used);
+            return out;
+        }
+
+        friend bool operator==(const pylist& a, const pylist& b) {
+            return a.used == b.used && std::equal(a.begin(), a.end(), b.begin());
+        }
+
+        friend bool operator<(const pylist& a, const pylist& b) {
+            return std::lexicographical_compare(a.begin(), a.end(), b.begin(), b.end());
+        }
+
+        friend bool operator>(const pylist& a, const pylist& b) { return b < a; }
+        friend bool operator<=(const pylist& a, const pylist& b) { return !(b < a); }
+        friend bool operator>=(const pylist& a, const pylist& b) { return !(a < b); }
+
+        void repr(fmt::memory_buffer& out) const {
+            out.push_back('[');
+            for (size_type i = 0; i < used; ++i) {
+                if (i) {
+                    out.push_back(',');
+                    out.push_back(' ');
+                }
+                pyio::writerepr(out, first[i]);
+            }
+            out.push_back(']');
+        }
+
+    private:
+        // Element types moved with memcpy and grown with realloc
+        static constexpr bool trivial = std::is_trivially_copyable_v<T> && alignof(T) <= alignof(std::max_align_t);
+
+        T* first;
+        size_type used = 0;
+        size_type room = N;
+        alignas(T) unsigned char buffer[N * sizeof(T)];
+
+        T* inlined() noexcept { return reinterpret_cast<T*>(buffer); }
+        bool small() const noexcept { return first == reinterpret_cast<const T*>(buffer); }
+
+        // Whether `item` is one of this list's elements
+        bool holds(const T* item) const noexcept {
+            return std::less_equal<const T*>()(first, item) && std::less<const T*>()(item, first + used);
+        }
+
+        size_type position(int64_t index, const char* message) const {
+            int64_t length = static_cast<int64_t>(used);
+            int64_t at = index < 0 ? index + length : index;
+            if (at < 0 || at >= length) throw std::out_of_range(std::string("IndexError: ") + message);
+            return static_cast<size_type>(at);
+        }
+
+        void append(const T* items, size_type n) {
+            reserve(used + n);
+            if constexpr (trivial) {
+                if (n) std::memcpy(static_cast<void*>(first + used), items, n * sizeof(T));
+            } else {
+                std::uninitialized_copy(items, items + n, first + used);
+            }
+            used += n;
+        }
+
+        // Doubling keeps appends amortised constant time
+        void grow(size_type needed) { relocate(std::max(needed, 2 * room)); }
+
+        void relocate(size_type capacity) {
+            if constexpr (trivial) {
+                T* moved;
+                if (small()) {
+                    moved = static_cast<T*>(std::malloc(capacity * sizeof(T)));
+                    if (moved && used) std::memcpy(static_cast<void*>(moved), first, used * sizeof(T));
+                } else {
+                    moved = static_cast<T*>(std::realloc(first, capacity * sizeof(T)));
+                }
+                if (!moved) throw std::bad_alloc();
+                first = moved;
+            } else {
+                T* moved = static_cast<T*>(::operator new(capacity * sizeof(T), std::align_val_t(alignof(T))));
+                std::uninitialized_move(first, first + used, moved);
+                std::destroy(first, first + used);
+                release();
+                first = moved;
+            }
+            room = capacity;
+        }
+
+        void release() noexcept {
+            if (small()) return;
+            if constexpr (trivial) {
+                std::free(first);
+            } else {
+                ::operator delete(first, std::align_val_t(alignof(T)));
+            }
+        }
+
+        // Move construction: a heap block changes hands, inline elements have to be moved one by one
+        void take(pylist&& other) noexcept {
+            if (other.small()) {
+                if constexpr (trivial) {
+                    if (other.used) std::memcpy(static_cast<void*>(first), other.first, other.used * sizeof(T));
+                } else {
+                    std::uninitialized_move(other.first, other.first + other.used, first);
+                    std::destroy(other.first, other.first + other.used);
+                }
+                used = other.used;
+            } else {
+                first = other.first;
+                used = other.used;
+                room = other.room;
+                other.first = other.inlined();
+                other.room = N;
+            }
+            other.used = 0;
+        }
+};
+
+// A literal left to class template argument deduction stores what the compiler would have inferred for it
+pylist(std::initializer_list<int>) -> pylist<int64_t>;
+pylist(std::initializer_list<const char*>) -> pylist<pystring>;
+
+template <typename T, std::size_t N>
+pyint len(const pylist<T, N>& items) { return static_cast<int64_t>(items.size()); }
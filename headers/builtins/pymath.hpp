@@ -1,91 +1,238 @@
+#pragma once
+#include <bit>
 #include <cmath>
+#include <cstdint>
+#include <initializer_list>
+#include <iterator>
+#include <limits>
+#include <numbers>
+#include <numeric>
+#include <stdexcept>
+#include <utility>
+#include <vector>
 #include <boost/multiprecision/cpp_int.hpp>
-
-class Math{
-    public:
-        long double e = 2.718281828459045;
-        long double pi = 3.141592653589793;
-
-        boost::multiprecision::cpp_int factorial(int n){
-            boost::multiprecision::cpp_int f = 1;
-
-            for(int i = 1; i <= n; ++i) {
-                f *= i;
+#include "headers/builtins/stdpy.hpp"
+
+// Python's math module. The compiler emits `math.sqrt(x)` as `math::sqrt(x)`, so every call is a plain inline function
+// over double that g++ can turn into an intrinsic or vectorise (with --fastmath). Integer functions whose results
+// outgrow 64 bits are defined in runtime/pymath.cpp and linked in from libpycomrt
+namespace math {
+    inline constexpr double e = std::numbers::e;
+    inline constexpr double pi = std::numbers::pi;
+    inline constexpr double tau = 2 * std::numbers::pi;
+    inline constexpr double inf = std::numeric_limits<double>::infinity();
+    inline constexpr double nan = std::numeric_limits<double>::quiet_NaN();
+
+    // Number-theoretic functions
+
+    pyint factorial(const pyint& n);
+    pyint comb(const pyint& n, const pyint& k);
+    pyint perm(const pyint& n, const pyint& k);
+    inline pyint perm(const pyint& n) { return factorial(n); }
+
+    constexpr long long int isqrt(long long int n) {
+        if (n < 0) throw std::domain_error("isqrt() argument must be nonnegative");
+        if (n < 2) return n;
+
+        // Newton's method from a power of two just above the root; every step is exact integer arithmetic
+        long long int x = 1LL << ((std::bit_width(static_cast<unsigned long long int>(n)) + 1) / 2);
+        long long int y = (x + n / x) / 2;
+        while (y < x) {
+            x = y;
+            y = (x + n / x) / 2;
+        }
+        return x;
+    }
+
+    pyint isqrt(const pyint& n);
+
+    template <typename... T>
+    constexpr long long int gcd(T... values) {
+        long long int result = 0;
+        ((result = std::gcd(result, static_cast<long long int>(values))), ...);
+        return result;
+    }
+
+    template <typename... T>
+    constexpr long long int lcm(T... values) {
+        long long int result = 1;
+        ((result = std::lcm(result, static_cast<long long int>(values))), ...);
+        return result;
+    }
+
+    // Rounding and representation
+
+    inline long long int floor(double x) { return static_cast<long long int>(std::floor(x)); }
+    inline long long int ceil(double x) { return static_cast<long long int>(std::ceil(x)); }
+    inline long long int trunc(double x) { return static_cast<long long int>(std::trunc(x)); }
+
+    inline double fabs(double x) { return std::fabs(x); }
+    inline double copysign(double x, double y) { return std::copysign(x, y); }
+    inline double fmod(double x, double y) { return std::fmod(x, y); }
+    inline double remainder(double x, double y) { return std::remainder(x, y); }
+    inline double ldexp(double x, int i) { return std::ldexp(x, i); }
+    inline double nextafter(double x, double y) { return std::nextafter(x, y); }
+
+    inline std::pair<double, int> frexp(double x) {
+        int exponent;
+        double mantissa = std::frexp(x, &exponent);
+        return {mantissa, exponent};
+    }
+
+    inline std::pair<double, double> modf(double x) {
+        double whole;
+        double fraction = std::modf(x, &whole);
+        return {fraction, whole};
+    }
+
+    inline double ulp(double x) {
+        if (std::isnan(x) || std::isinf(x)) return std::fabs(x);
+        x = std::fabs(x);
+        if (x == std::numeric_limits<double>::max()) return x - std::nextafter(x, 0.0);
+        return std::nextafter(x, inf) - x;
+    }
+
+    inline bool isfinite(double x) { return std::isfinite(x); }
+    inline bool isinf(double x) { return std::isinf(x); }
+    inline bool isnan(double x) { return std::isnan(x); }
+
+    inline bool isclose(double a, double b, double rel_tol = 1e-09, double abs_tol = 0.0) {
+        if (a == b) return true;
+        if (std::isinf(a) || std::isinf(b)) return false;
+        double diff = std::fabs(b - a);
+        return diff <= std::fabs(rel_tol * b) || diff <= std::fabs(rel_tol * a) || diff <= abs_tol;
+    }
+
+    // Powers and logarithms
+
+    inline double sqrt(double x) { return std::sqrt(x); }
+    inline double cbrt(double x) { return std::cbrt(x); }
+    inline double exp(double x) { return std::exp(x); }
+    inline double exp2(double x) { return std::exp2(x); }
+    inline double expm1(double x) { return std::expm1(x); }
+    inline double pow(double x, double y) { return std::pow(x, y); }
+
+    inline double log(double x) { return std::log(x); }
+    inline double log(double x, double base) { return std::log(x) / std::log(base); }
+    inline double log1p(double x) { return std::log1p(x); }
+    inline double log2(double x) { return std::log2(x); }
+    inline double log10(double x) { return std::log10(x); }
+
+    // Trigonometry and hyperbolic functions
+
+    inline double cos(double x) { return std::cos(x); }
+    inline double sin(double x) { return std::sin(x); }
+    inline double tan(double x) { return std::tan(x); }
+    inline double acos(double x) { return std::acos(x); }
+    inline double asin(double x) { return std::asin(x); }
+    inline double atan(double x) { return std::atan(x); }
+    inline double atan2(double y, double x) { return std::atan2(y, x); }
+
+    inline double cosh(double x) { return std::cosh(x); }
+    inline double sinh(double x) { return std::sinh(x); }
+    inline double tanh(double x) { return std::tanh(x); }
+    inline double acosh(double x) { return std::acosh(x); }
+    inline double asinh(double x) { return std::asinh(x); }
+    inline double atanh(double x) { return std::atanh(x); }
+
+    // Older Pycom spellings of cosh/sinh/tanh
+    inline double hcos(double x) { return std::cosh(x); }
+    inline double hsin(double x) { return std::sinh(x); }
+    inline double htan(double x) { return std::tanh(x); }
+
+    constexpr double radians(double deg) { return deg * (pi / 180); }
+    constexpr double degrees(double rad) { return rad * (180 / pi); }
+
+    // Special functions
+
+    inline double erf(double x) { return std::erf(x); }
+    inline double erfc(double x) { return std::erfc(x); }
+    inline double gamma(double x) { return std::tgamma(x); }
+    inline double lgamma(double x) { return std::lgamma(x); }
+
+    // Functions over several values
+
+    template <typename... T>
+    inline double hypot(T... coordinates) {
+        // Scaled by the largest magnitude so the squares can neither overflow nor underflow
+        double largest = 0;
+        ((largest = std::fmax(largest, std::fabs(static_cast<double>(coordinates)))), ...);
+        if (largest == 0 || std::isinf(largest)) return largest;
+
+        double sum = 0;
+        ((sum += (static_cast<double>(coordinates) / largest) * (static_cast<double>(coordinates) / largest)), ...);
+        return largest * std::sqrt(sum);
+    }
+
+    inline double hypot(double x, double y) { return std::hypot(x, y); }
+
+    template <typename C>
+    double dist(const C& p, const C& q) {
+        if (p.size() != q.size()) throw std::invalid_argument("both points must have the same number of dimensions");
+
+        double largest = 0;
+        for (std::size_t i = 0; i < p.size(); ++i) largest = std::fmax(largest, std::fabs(static_cast<double>(p[i]) - static_cast<double>(q[i])));
+        if (largest == 0 || std::isinf(largest)) return largest;
+
+        double sum = 0;
+        for (std::size_t i = 0; i < p.size(); ++i) {
+            double scaled = (static_cast<double>(p[i]) - static_cast<double>(q[i])) / largest;
+            sum += scaled * scaled;
+        }
+        return largest * std::sqrt(sum);
+    }
+
+    // A list literal argument, `math.dist([0, 0], [3, 4])`, arrives as a braced list, which no template can deduce
+    inline double dist(std::initializer_list<double> p, std::initializer_list<double> q) {
+        return dist(std::vector<double>(p), std::vector<double>(q));
+    }
+
+    // Exactly rounded sum (Shewchuk's algorithm, as CPython uses): a list of non-overlapping partial sums is kept so no
+    // precision is lost along the way, and only the final total is rounded
+    template <typename C>
+    double fsum(const C& values) {
+        std::vector<double> partials;
+        for (const auto& value : values) {
+            double x = static_cast<double>(value);
+            std::size_t kept = 0;
+            for (double y : partials) {
+                if (std::fabs(x) < std::fabs(y)) std::swap(x, y);
+                double high = x + y;
+                double low = y - (high - x);
+                if (low != 0) partials[kept++] = low;
+                x = high;
             }
-
-            return f;
-        }
-
-        int factorial(short n){
-            int f = 1;
-
-            for(int i = 1; i <= n; ++i) {
-                f *= i;
+            partials.resize(kept);
+            partials.push_back(x);
+        }
+
+        double total = 0;
+        while (!partials.empty()) {
+            double x = total;
+            total = x + partials.back();
+            double low = partials.back() - (total - x);
+            partials.pop_back();
+            if (low != 0) {
+                // Round half to even correctly when the remaining partials would tip it
+                if (!partials.empty() && ((low < 0 && partials.back() < 0) || (low > 0 && partials.back() > 0))) {
+                    double y = low * 2;
+                    x = total + y;
+                    if (y == x - total) total = x;
+                }
+                break;
             }
-
-            return f;
         }
+        return total;
+    }
 
-        long double sqrt(long double root){
-            return sqrtf(root);
-        }
+    inline double fsum(std::initializer_list<double> values) { return fsum<std::initializer_list<double>>(values); }
 
-        long double exp(long double x){
-            return pow(e, x);
+    template <typename C, typename T = std::remove_cvref_t<decltype(*std::begin(std::declval<const C&>()))>>
+    T prod(const C& values, T start = 1) {
+        for (const T& value : values) start *= value;
+        return start;
+    }
 
-        } long double exp(long long int x){
-            return pow(e, x);
-        }
-
-        long double cos(long double x){
-            return cosf(x);
-        }
-        
-        long double sin(long double x){
-            return sinf(x);
-        }
-
-        long double tan(long double x){
-            return tanf(x);
-        }
-
-        long double acos(long double x){
-            return acosf(x);
-        }
-        
-        long double asin(long double x){
-            return asinf(x);
-        }
-
-        long double atan(long double x){
-            return atanf(x);
-        }
-
-        long double hcos(long double x){
-            return hcos(x);
-        }
-        
-        long double hsin(long double x){
-            return asinf(x);
-        }
-
-        long double htan(long double x){
-            return atanf(x);
-        }
-
-        long double radians(long double deg){
-            return deg * (pi / 180);
-        }
-
-        long double degrees(long double rad){
-            return rad * (180 / pi);
-        }
-
-        int floor(long double x){
-            return floorf(x);
-        }
-
-        int ceil(long double x){
-            return ceilf(x);
-        }
-};
\ No newline at end of file
+    template <typename T>
+    T prod(std::initializer_list<T> values, T start = 1) { return prod<std::initializer_list<T>, T>(values, start); }
+}
@@ -1,5 +1,922 @@
+#pragma once
+#include <algorithm>
+#include <array>
 #include <cmath>
+#include <cstdint>
+#include <initializer_list>
+#include <limits>
+#include <memory>
+#include <numbers>
+#include <ostream>
+#include <sstream>
+#include <stdexcept>
+#include <string>
+#include <type_traits>
+#include <vector>
+#include "headers/builtins/stdpy.hpp"
+#include "headers/builtins/pylist.hpp"
 
-class Numpy{
-    
-};
\ No newline at end of file
+// numpy's ndarray. The compiler emits `np.zeros(3)` as `numpy::zeros(3)` (after `import numpy as np`, np is just
+// another name for numpy). An array is a typed block of memory plus a shape and strides; indexing, slicing and
+// reshaping give views into the same block, and copying an ndarray copies the view, not the elements, so two names
+// for one array see each other's changes as they do in Python.
+//
+// Elementwise arithmetic broadcasts as numpy does. The innermost loops run over raw pointers a fixed number of
+// elements at a time, which g++ turns into vector instructions even at -O2 (its vectoriser only takes a loop there
+// when the vector code can replace it outright); the leftover elements are done one by one
+namespace numpy {
+    inline constexpr double e = std::numbers::e;
+    inline constexpr double pi = std::numbers::pi;
+    inline constexpr double inf = std::numeric_limits<double>::infinity();
+    inline constexpr double nan = std::numeric_limits<double>::quiet_NaN();
+
+    inline constexpr int64_t maxdims = 8;
+
+    // Elements per step of the inner loops
+    inline constexpr int64_t lanes = 8;
+
+    // Arrays longer than this print only `edgeitems` elements from each end of every axis, as numpy's defaults
+    inline constexpr int64_t threshold = 1000;
+    inline constexpr int64_t edgeitems = 3;
+
+    // numpy's default element types: Python ints are stored as int64 and floats as float64
+    template <typename T>
+    using dtype = std::conditional_t<std::is_same_v<T, bool>, bool, std::conditional_t<std::is_floating_point_v<T>, double, int64_t>>;
+
+    template <typename T>
+    inline constexpr bool isscalar = std::is_arithmetic_v<T> || std::is_same_v<T, pyint>;
+
+    // A shape or strides: up to maxdims extents kept inline, so making a view never allocates. Prints as a tuple
+    class dims {
+        public:
+            dims() = default;
+            dims(std::initializer_list<int64_t> values) { for (int64_t value : values) push_back(value); }
+
+            template <typename N, std::enable_if_t<isscalar<N>, int> = 0>
+            dims(N value) { push_back(static_cast<int64_t>(value)); }
+
+            void push_back(int64_t value) {
+                if (count == maxdims) throw std::invalid_argument("maximum supported dimension for an ndarray is 8");
+                values[count++] = value;
+            }
+
+            int64_t size() const { return count; }
+            int64_t operator[](int64_t i) const { return values[i < 0 ? i + count : i]; }
+            int64_t& operator[](int64_t i) { return values[i < 0 ? i + count : i]; }
+            const int64_t* begin() const { return values.data(); }
+            const int64_t* end() const { return values.data() + count; }
+
+            int64_t product() const {
+                int64_t result = 1;
+                for (int64_t value : *this) result *= value;
+                return result;
+            }
+
+            friend bool operator==(const dims& a, const dims& b) { return std::equal(a.begin(), a.end(), b.begin(), b.end()); }
+
+            friend std::ostream& operator<<(std::ostream& os, const dims& value) {
+                os << '(';
+                for (int64_t i = 0; i < value.count; ++i) os << (i ? ", " : "") << value.values[i];
+                return os << (value.count == 1 ? ",)" : ")");
+            }
+
+        private:
+            std::array<int64_t, maxdims> values{};
+            int64_t count = 0;
+    };
+
+    inline std::string str(const dims& value) {
+        std::ostringstream stream;
+        stream << value;
+        return stream.str();
+    }
+
+    // Shape of the result of an elementwise operation: axes are matched from the right, and one of length 1 (or a
+    // missing one) stretches to the other's length
+    inline dims broadcast(const dims& a, const dims& b) {
+        dims result;
+        int64_t ndim = std::max(a.size(), b.size());
+        for (int64_t k = 0; k < ndim; ++k) {
+            int64_t x = k < ndim - a.size() ? 1 : a[k - (ndim - a.size())];
+            int64_t y = k < ndim - b.size() ? 1 : b[k - (ndim - b.size())];
+            if (x != y && x != 1 && y != 1)
+                throw std::invalid_argument("operands could not be broadcast together with shapes " + str(a) + " " + str(b));
+            result.push_back(x == 1 ? y : x);
+        }
+        return result;
+    }
+
+    // Defined in runtime/pynumpy.cpp: memory for the elements of an array, and freeing it
+    void* allocate(size_t bytes);
+    void release(void* block);
+
+    // Also in runtime/pynumpy.cpp: the elements of an array as numpy prints them (all the same width), and those
+    // laid out in nested brackets, wrapped at 75 columns
+    std::vector<std::string> formatvalues(const std::vector<double>& values);
+    std::vector<std::string> formatvalues(const std::vector<int64_t>& values);
+    std::vector<std::string> formatvalues(const std::vector<bool>& values);
+    std::string layout(const std::vector<std::string>& words, const dims& shape, bool summary);
+
+    // Elementwise operations, each with the type it computes in and the type it gives for operands of types A and B
+    struct add {
+        template <typename A, typename B> using operands = dtype<std::common_type_t<A, B, int>>;
+        template <typename A, typename B> using result = operands<A, B>;
+        static auto apply(auto x, auto y) { return x + y; }
+    };
+
+    struct subtract {
+        template <typename A, typename B> using operands = dtype<std::common_type_t<A, B, int>>;
+        template <typename A, typename B> using result = operands<A, B>;
+        static auto apply(auto x, auto y) { return x - y; }
+    };
+
+    struct multiply {
+        template <typename A, typename B> using operands = dtype<std::common_type_t<A, B, int>>;
+        template <typename A, typename B> using result = operands<A, B>;
+        static auto apply(auto x, auto y) { return x * y; }
+    };
+
+    // True division, so always in double
+    struct divide {
+        template <typename A, typename B> using operands = double;
+        template <typename A, typename B> using result = double;
+        static auto apply(auto x, auto y) { return x / y; }
+    };
+
+    // Integers are raised exactly by repeated squaring, wrapping around on overflow as numpy's int64 does
+    struct power {
+        template <typename A, typename B> using operands = dtype<std::common_type_t<A, B, int>>;
+        template <typename A, typename B> using result = operands<A, B>;
+        template <typename X>
+        static X apply(X x, X y) {
+            if constexpr (std::is_floating_point_v<X>) {
+                return std::pow(x, y);
+            } else {
+                uint64_t result = 1, square = static_cast<uint64_t>(x);
+                for (uint64_t n = y < 0 ? 0 : static_cast<uint64_t>(y); n; n >>= 1, square *= square)
+                    if (n & 1) result *= square;
+                return static_cast<X>(result);
+            }
+        }
+    };
+
+    template <typename Compare>
+    struct comparison {
+        template <typename A, typename B> using operands = std::common_type_t<A, B>;
+        template <typename A, typename B> using result = bool;
+        static bool apply(auto x, auto y) { return Compare()(x, y); }
+    };
+
+    // out[i] = a[i * sa] <op> b[i * sb] for i < n. Contiguous operands, and a stretched one (stride 0), get the
+    // fixed-width loop
+    template <typename Op, typename R, typename C, typename A, typename B>
+    void kernel(R* __restrict out, const A* __restrict a, int64_t sa, const B* __restrict b, int64_t sb, int64_t n) {
+        auto f = [](A x, B y) { return static_cast<R>(Op::apply(static_cast<C>(x), static_cast<C>(y))); };
+        int64_t i = 0;
+
+        if (sa == 1 && sb == 1) {
+            for (; i + lanes <= n; i += lanes)
+                for (int64_t j = 0; j < lanes; ++j) out[i + j] = f(a[i + j], b[i + j]);
+            for (; i < n; ++i) out[i] = f(a[i], b[i]);
+        } else if (sa == 1 && sb == 0) {
+            const B y = *b;
+            for (; i + lanes <= n; i += lanes)
+                for (int64_t j = 0; j < lanes; ++j) out[i + j] = f(a[i + j], y);
+            for (; i < n; ++i) out[i] = f(a[i], y);
+        } else if (sa == 0 && sb == 1) {
+            const A x = *a;
+            for (; i + lanes <= n; i += lanes)
+                for (int64_t j = 0; j < lanes; ++j) out[i + j] = f(x, b[i + j]);
+            for (; i < n; ++i) out[i] = f(x, b[i]);
+        } else {
+            for (; i < n; ++i) out[i] = f(a[i * sa], b[i * sb]);
+        }
+    }
+
+    // out[i * so] = out[i * so] <op> b[i * sb] for i < n, for in-place arithmetic and assignment
+    template <typename Op, typename C, typename R, typename B>
+    void update(R* __restrict out, int64_t so, const B* __restrict b, int64_t sb, int64_t n) {
+        auto f = [](R x, B y) { return static_cast<R>(Op::apply(static_cast<C>(x), static_cast<C>(y))); };
+        int64_t i = 0;
+
+        if (so == 1 && sb == 1) {
+            for (; i + lanes <= n; i += lanes)
+                for (int64_t j = 0; j < lanes; ++j) out[i + j] = f(out[i + j], b[i + j]);
+            for (; i < n; ++i) out[i] = f(out[i], b[i]);
+        } else if (so == 1 && sb == 0) {
+            const B y = *b;
+            for (; i + lanes <= n; i += lanes)
+                for (int64_t j = 0; j < lanes; ++j) out[i + j] = f(out[i + j], y);
+            for (; i < n; ++i) out[i] = f(out[i], y);
+        } else {
+            for (; i < n; ++i) out[i * so] = f(out[i * so], b[i * sb]);
+        }
+    }
+
+    // Goes through an array of the given shape one run along the last axis at a time, calling f with the offset of
+    // the run's first element in each of the arrays whose element steps are given. The axes before the last are
+    // stepped through like an odometer
+    template <typename F, typename... Steps>
+    void eachrow(const dims& shape, F f, const Steps&... steps) {
+        constexpr size_t count = sizeof...(Steps);
+        const std::array<const dims*, count> all{&steps...};
+        int64_t ndim = shape.size();
+        int64_t n = ndim ? shape[ndim - 1] : 1;
+        int64_t rows = n ? shape.product() / n : 0;
+
+        std::array<int64_t, maxdims> index{};
+        std::array<int64_t, count> offsets{};
+        for (int64_t row = 0; row < rows; ++row) {
+            f(offsets);
+            for (int64_t k = ndim - 2; k >= 0; --k) {
+                for (size_t m = 0; m < count; ++m) offsets[m] += (*all[m])[k];
+                if (++index[k] < shape[k]) break;
+                for (size_t m = 0; m < count; ++m) offsets[m] -= (*all[m])[k] * shape[k];
+                index[k] = 0;
+            }
+        }
+    }
+
+    // numpy's pairwise summation of n doubles `step` apart: blocks of up to 128 are added up in 8 running totals, and
+    // longer runs are split in half and the halves' sums added. Rounding errors grow with the log of n instead of n,
+    // and the sums come out the same as numpy's to the last bit
+    inline double pairwise(const double* a, int64_t n, int64_t step) {
+        if (n < 8) {
+            double result = 0.;
+            for (int64_t i = 0; i < n; ++i) result += a[i * step];
+            return result;
+        }
+        if (n <= 128) {
+            double r[8];
+            for (int64_t j = 0; j < 8; ++j) r[j] = a[j * step];
+            int64_t i = 8;
+            if (step == 1) {
+                for (; i < n - n % 8; i += 8)
+                    for (int64_t j = 0; j < 8; ++j) r[j] += a[i + j];
+            } else {
+                for (; i < n - n % 8; i += 8)
+                    for (int64_t j = 0; j < 8; ++j) r[j] += a[(i + j) * step];
+            }
+            double result = ((r[0] + r[1]) + (r[2] + r[3])) + ((r[4] + r[5]) + (r[6] + r[7]));
+            for (; i < n; ++i) result += a[i * step];
+            return result;
+        }
+
+        int64_t half = n / 2;
+        half -= half % 8;
+        return pairwise(a, half, step) + pairwise(a + half * step, n - half, step);
+    }
+
+    // Assignment, as an operation: the right operand replaces the left one
+    struct replace {
+        template <typename A, typename B> using operands = A;
+        template <typename A, typename B> using result = A;
+        static auto apply(auto, auto y) { return y; }
+    };
+
+    template <typename T>
+    class ndarray {
+        public:
+            using value_type = T;
+
+            // numpy's attributes; strides are in bytes, as numpy reports them
+            dims shape;
+            dims strides;
+            int64_t ndim = 0;
+            int64_t size = 1;
+
+            ndarray() : ndarray(dims{0}) {}
+
+            // A new contiguous array of zeros
+            explicit ndarray(const dims& extents) : ndarray(extents, T()) {}
+
+            ndarray(const dims& extents, T value) : ndarray(empty(extents)) { std::fill_n(data, size, value); }
+
+            // A new contiguous array whose elements are left uninitialised, for results about to be written over
+            static ndarray empty(const dims& extents) {
+                T* block = static_cast<T*>(allocate(std::max<int64_t>(extents.product(), 1) * sizeof(T)));
+                return ndarray(extents, std::shared_ptr<T[]>(block, [](T* elements) { release(elements); }));
+            }
+
+            ndarray(const ndarray&) = default;
+            ndarray(ndarray&&) noexcept = default;
+
+            // Assigning to a name rebinds it to the other array, as in Python
+            ndarray& operator=(const ndarray& other) & = default;
+            ndarray& operator=(ndarray&& other) & noexcept = default;
+            ndarray& operator=(T value) & { return *this = ndarray(dims{}, value); }
+
+            // Assigning to an index or slice (a temporary view) writes the elements in, broadcast to its shape
+            template <typename U>
+            ndarray& operator=(const ndarray<U>& other) && { return assign<replace>(other); }
+            ndarray& operator=(const ndarray& other) && { return assign<replace>(other); }
+            ndarray& operator=(T value) && { return assign<replace>(value); }
+
+            bool contiguous() const {
+                int64_t step = 1;
+                for (int64_t k = ndim - 1; k >= 0; --k) {
+                    if (shape[k] != 1 && steps[k] != step) return false;
+                    step *= shape[k];
+                }
+                return true;
+            }
+
+            // A view with stride 0 along every axis `shape` stretches this one over
+            ndarray broadcastto(const dims& target) const {
+                dims result = broadcast(shape, target);
+                if (!(result == target))
+                    throw std::invalid_argument("could not broadcast input array from shape " + numpy::str(shape) + " into shape " + numpy::str(target));
+
+                dims stretched;
+                int64_t missing = target.size() - ndim;
+                for (int64_t k = 0; k < target.size(); ++k)
+                    stretched.push_back(k < missing || shape[k - missing] != target[k] ? 0 : steps[k - missing]);
+
+                ndarray out = *this;
+                out.view(data, target, stretched);
+                return out;
+            }
+
+            // Indexing drops the first axis; a[i] of a one-dimensional array is a 0-d array, which converts to the
+            // element itself
+            ndarray operator[](int64_t i) const {
+                if (ndim == 0) throw std::out_of_range("too many indices for array: array is 0-dimensional");
+                if (i < 0) i += shape[0];
+                if (i < 0 || i >= shape[0])
+                    throw std::out_of_range("index " + std::to_string(i) + " is out of bounds for axis 0 with size " + std::to_string(shape[0]));
+
+                dims rest, reststeps;
+                for (int64_t k = 1; k < ndim; ++k) {
+                    rest.push_back(shape[k]);
+                    reststeps.push_back(steps[k]);
+                }
+                ndarray out = *this;
+                out.view(data + i * steps[0], rest, reststeps);
+                return out;
+            }
+
+            template <typename N, std::enable_if_t<std::is_same_v<N, pyint>, int> = 0>
+            ndarray operator[](const N& i) const { return (*this)[static_cast<int64_t>(i)]; }
+
+            // Slicing the first axis gives a view; nothing is copied
+            ndarray operator[](const pyslice& slice) const {
+                if (ndim == 0) throw std::out_of_range("too many indices for array: array is 0-dimensional");
+                pyslice::extent range = slice.indices(shape[0]);
+
+                dims sliced = shape, slicedsteps = steps;
+                sliced[0] = range.count;
+                slicedsteps[0] = steps[0] * range.step;
+                ndarray out = *this;
+                out.view(range.count ? data + range.first * steps[0] : data, sliced, slicedsteps);
+                return out;
+            }
+
+            // a[i, j:k, ...]: each index applies to the next axis, integers dropping it and slices narrowing it
+            template <typename... I>
+            ndarray operator()(const I&... indices) const {
+                if (static_cast<int64_t>(sizeof...(I)) > ndim)
+                    throw std::out_of_range("too many indices for array: array is " + std::to_string(ndim) + "-dimensional, but " + std::to_string(sizeof...(I)) + " were indexed");
+
+                T* first = data;
+                dims kept, keptsteps;
+                int64_t axis = 0;
+                auto apply = [&](const auto& index) {
+                    if constexpr (std::is_same_v<std::decay_t<decltype(index)>, pyslice>) {
+                        pyslice::extent range = index.indices(shape[axis]);
+                        if (range.count) first += range.first * steps[axis];
+                        kept.push_back(range.count);
+                        keptsteps.push_back(steps[axis] * range.step);
+                    } else {
+                        int64_t i = static_cast<int64_t>(index);
+                        if (i < 0) i += shape[axis];
+                        if (i < 0 || i >= shape[axis])
+                            throw std::out_of_range("index " + std::to_string(i) + " is out of bounds for axis " + std::to_string(axis) + " with size " + std::to_string(shape[axis]));
+                        first += i * steps[axis];
+                    }
+                    ++axis;
+                };
+                (apply(indices), ...);
+                for (; axis < ndim; ++axis) {
+                    kept.push_back(shape[axis]);
+                    keptsteps.push_back(steps[axis]);
+                }
+
+                ndarray out = *this;
+                out.view(first, kept, keptsteps);
+                return out;
+            }
+
+            // Boolean mask: a new one-dimensional array of the elements where the mask is true
+            ndarray operator[](const ndarray<bool>& mask) const {
+                if (!(mask.shape == shape))
+                    throw std::out_of_range("boolean index did not match indexed array: shape " + numpy::str(mask.shape) + " against " + numpy::str(shape));
+
+                ndarray flat = contiguous() ? *this : copy();
+                ndarray<bool> picked = mask.contiguous() ? mask : mask.copy();
+                std::vector<T> kept;
+                for (int64_t i = 0; i < size; ++i)
+                    if (picked.data[i]) kept.push_back(flat.data[i]);
+
+                ndarray out = empty(dims{static_cast<int64_t>(kept.size())});
+                std::copy(kept.begin(), kept.end(), out.data);
+                return out;
+            }
+
+            // A 0-d (or one-element) array stands for its element, as a numpy scalar would
+            operator T&() const {
+                if (size != 1) throw std::invalid_argument("only one-element arrays can be converted to a scalar");
+                return *data;
+            }
+
+            explicit operator bool() const {
+                if (size != 1) throw std::invalid_argument("the truth value of an array with more than one element is ambiguous; use a.any() or a.all()");
+                return static_cast<bool>(*data);
+            }
+
+            class iterator {
+                public:
+                    using iterator_category = std::forward_iterator_tag;
+                    using value_type = ndarray;
+                    using difference_type = std::ptrdiff_t;
+                    using pointer = void;
+                    using reference = ndarray;
+
+                    iterator(const ndarray* array, int64_t i) : array(array), i(i) {}
+                    ndarray operator*() const { return (*array)[i]; }
+                    iterator& operator++() { ++i; return *this; }
+                    bool operator==(const iterator& other) const { return i == other.i; }
+
+                private:
+                    const ndarray* array;
+                    int64_t i;
+            };
+
+            // Iterating goes along the first axis, as in numpy
+            iterator begin() const { return iterator(this, 0); }
+            iterator end() const {
+                if (ndim == 0) throw std::invalid_argument("iteration over a 0-d array");
+                return iterator(this, shape[0]);
+            }
+
+            ndarray copy() const {
+                ndarray out = empty(shape);
+                if (contiguous()) {
+                    std::copy_n(data, size, out.data);
+                } else {
+                    int64_t n = shape[ndim - 1], step = steps[ndim - 1];
+                    T* next = out.data;
+                    eachrow(shape, [&](const auto& offsets) {
+                        const T* first = data + offsets[0];
+                        for (int64_t i = 0; i < n; ++i) *next++ = first[i * step];
+                    }, steps);
+                }
+                return out;
+            }
+
+            // A view with a new shape (one extent may be -1, worked out from the others); a non-contiguous array is
+            // copied first
+            ndarray reshape(const dims& extents) const {
+                dims target = extents;
+                int64_t known = 1, unknown = -1;
+                for (int64_t k = 0; k < target.size(); ++k) {
+                    if (target[k] == -1) unknown = k;
+                    else known *= target[k];
+                }
+                if (unknown >= 0 && known != 0 && size % known == 0) target[unknown] = size / known;
+                if (target.product() != size)
+                    throw std::invalid_argument("cannot reshape array of size " + std::to_string(size) + " into shape " + numpy::str(extents));
+
+                ndarray out = contiguous() ? *this : copy();
+                ndarray fresh(target);
+                out.view(out.data, target, fresh.steps);
+                return out;
+            }
+
+            template <typename... N, std::enable_if_t<(sizeof...(N) > 1), int> = 0>
+            ndarray reshape(N... extents) const { return reshape(dims{static_cast<int64_t>(extents)...}); }
+
+            ndarray flatten() const { return copy().reshape(dims{size}); }
+            ndarray ravel() const { return reshape(dims{size}); }
+
+            void fill(T value) { std::move(*this) = value; }
+
+            // Reductions over every element. Integer sums keep `lanes` running totals, so they vectorise
+            auto sum() const {
+                if constexpr (std::is_same_v<T, double>) {
+                    if (contiguous()) return 0. + pairwise(data, size, 1);
+                    if (ndim == 1) return 0. + pairwise(data, size, steps[0]);
+                    return copy().sum();
+                } else {
+                    ndarray flat = contiguous() ? *this : copy();
+                    int64_t partial[lanes] = {};
+                    int64_t i = 0;
+                    for (; i + lanes <= size; i += lanes)
+                        for (int64_t j = 0; j < lanes; ++j) partial[j] += flat.data[i + j];
+
+                    int64_t total = 0;
+                    for (int64_t j = 0; j < lanes; ++j) total += partial[j];
+                    for (; i < size; ++i) total += flat.data[i];
+                    return total;
+                }
+            }
+
+            double mean() const { return size ? static_cast<double>(sum()) / size : nan; }
+
+            // As numpy's, a nan anywhere makes the result nan
+            T max() const { return extreme([](T x, T y) { return x > y || x != x ? x : y; }, "maximum"); }
+            T min() const { return extreme([](T x, T y) { return x < y || x != x ? x : y; }, "minimum"); }
+
+            bool any() const {
+                ndarray flat = contiguous() ? *this : copy();
+                return std::any_of(flat.data, flat.data + size, [](T x) { return static_cast<bool>(x); });
+            }
+
+            bool all() const {
+                ndarray flat = contiguous() ? *this : copy();
+                return std::all_of(flat.data, flat.data + size, [](T x) { return static_cast<bool>(x); });
+            }
+
+            // A copy with elements of type U; the compiler emits `a.astype(float)` as `a.astype<double>()`
+            template <typename U>
+            ndarray<U> astype() const {
+                ndarray<U> out = ndarray<U>::empty(shape);
+                return out.template assign<replace>(*this);
+            }
+
+            // In-place arithmetic writes through to every view of the same elements, as numpy's does
+            template <typename U> ndarray& operator+=(const U& other) { return assign<add>(other); }
+            template <typename U> ndarray& operator-=(const U& other) { return assign<subtract>(other); }
+            template <typename U> ndarray& operator*=(const U& other) { return assign<multiply>(other); }
+            template <typename U> ndarray& operator/=(const U& other) { return assign<divide>(other); }
+
+            ndarray operator-() const {
+                ndarray out = copy();
+                for (int64_t i = 0; i < size; ++i) out.data[i] = -out.data[i];
+                return out;
+            }
+
+            std::string str() const {
+                if (ndim == 0) {
+                    fmt::memory_buffer out;
+                    pyio::write(out, *data);
+                    return fmt::to_string(out);
+                }
+                if (size == 0) return "[]";
+
+                bool summary = size > threshold;
+                std::vector<std::conditional_t<std::is_same_v<T, bool>, bool, std::conditional_t<std::is_floating_point_v<T>, double, int64_t>>> shown;
+                collect(shown, data, 0, summary);
+                return layout(formatvalues(shown), shape, summary);
+            }
+
+            friend std::ostream& operator<<(std::ostream& os, const ndarray& value) { return os << value.str(); }
+
+            template <typename U> friend class ndarray;
+            template <typename Op, typename A, typename B> friend auto elementwise(const ndarray<A>& a, const ndarray<B>& b);
+            template <typename Op, typename A, typename B> friend auto elementwise(ndarray<A>&& a, const ndarray<B>& b);
+
+            // The first element; public so the functions below can hand it to the kernels
+            T* data = nullptr;
+
+        private:
+            std::shared_ptr<T[]> buffer;
+            dims steps;
+
+            ndarray(const dims& extents, std::shared_ptr<T[]> storage) : buffer(std::move(storage)) {
+                dims contiguous;
+                int64_t step = 1;
+                for (int64_t k = 0; k < extents.size(); ++k) contiguous.push_back(0);
+                for (int64_t k = extents.size() - 1; k >= 0; --k) {
+                    contiguous[k] = step;
+                    step *= extents[k];
+                }
+                view(buffer.get(), extents, contiguous);
+            }
+
+            // Whether this is the only reference to a whole, contiguous buffer, so nothing else can see it change
+            bool unshared() const { return buffer.use_count() == 1 && data == buffer.get() && contiguous(); }
+
+            void view(T* first, const dims& extents, const dims& elementsteps) {
+                data = first;
+                shape = extents;
+                steps = elementsteps;
+                ndim = extents.size();
+                size = extents.product();
+                strides = dims();
+                for (int64_t step : elementsteps) strides.push_back(step * static_cast<int64_t>(sizeof(T)));
+            }
+
+            template <typename F>
+            T extreme(F pick, const char* name) const {
+                if (size == 0) throw std::invalid_argument(std::string("zero-size array to reduction operation ") + name + " which has no identity");
+
+                ndarray flat = contiguous() ? *this : copy();
+                T partial[lanes];
+                std::fill_n(partial, lanes, flat.data[0]);
+                int64_t i = 0;
+                for (; i + lanes <= size; i += lanes)
+                    for (int64_t j = 0; j < lanes; ++j) partial[j] = pick(partial[j], flat.data[i + j]);
+
+                T result = partial[0];
+                for (int64_t j = 1; j < lanes; ++j) result = pick(result, partial[j]);
+                for (; i < size; ++i) result = pick(result, flat.data[i]);
+                return result;
+            }
+
+            // this <op>= other, elementwise and in place. A right operand sharing this one's memory is copied first,
+            // so no element is read after it's been written
+            template <typename Op, typename U>
+            ndarray& assign(const U& other) {
+                if constexpr (isscalar<U>) {
+                    return assign<Op>(ndarray<dtype<U>>(dims{}, static_cast<dtype<U>>(other)));
+                } else {
+                    using V = typename U::value_type;
+                    using C = typename Op::template operands<T, V>;
+                    ndarray<V> source = other.broadcastto(shape);
+                    if constexpr (std::is_same_v<V, T>) {
+                        if (source.buffer == buffer) source = source.copy().broadcastto(shape);
+                    }
+
+                    if (contiguous() && source.contiguous()) {
+                        update<Op, C>(data, 1, source.data, 1, size);
+                    } else {
+                        int64_t n = ndim ? shape[ndim - 1] : 1;
+                        int64_t so = ndim ? steps[ndim - 1] : 0, sb = ndim ? source.steps[ndim - 1] : 0;
+                        eachrow(shape, [&](const auto& offsets) {
+                            update<Op, C>(data + offsets[0], so, source.data + offsets[1], sb, n);
+                        }, steps, source.steps);
+                    }
+                    return *this;
+                }
+            }
+
+            template <typename V>
+            void collect(std::vector<V>& out, const T* first, int64_t axis, bool summary) const {
+                if (axis == ndim) {
+                    out.push_back(static_cast<V>(*first));
+                    return;
+                }
+                bool edges = summary && shape[axis] > 2 * edgeitems;
+                for (int64_t i = 0; i < shape[axis]; ++i) {
+                    if (edges && i == edgeitems) i = shape[axis] - edgeitems;
+                    collect(out, first + i * steps[axis], axis + 1, summary);
+                }
+            }
+    };
+
+    // a <op> b elementwise, broadcast. Each run along the last axis is one kernel call; the axes before it are
+    // stepped through like an odometer
+    template <typename Op, typename A, typename B>
+    auto elementwise(const ndarray<A>& a, const ndarray<B>& b) {
+        using C = typename Op::template operands<A, B>;
+        using R = typename Op::template result<A, B>;
+
+        dims shape = broadcast(a.shape, b.shape);
+        ndarray<R> out = ndarray<R>::empty(shape);
+        if (a.shape == b.shape && a.contiguous() && b.contiguous()) {
+            kernel<Op, R, C>(out.data, a.data, 1, b.data, 1, out.size);
+            return out;
+        }
+
+        ndarray<A> x = a.broadcastto(shape);
+        ndarray<B> y = b.broadcastto(shape);
+        int64_t ndim = shape.size();
+        int64_t n = ndim ? shape[ndim - 1] : 1;
+        int64_t sx = ndim ? x.steps[ndim - 1] : 0, sy = ndim ? y.steps[ndim - 1] : 0;
+        R* next = out.data;
+        eachrow(shape, [&](const auto& offsets) {
+            kernel<Op, R, C>(next, x.data + offsets[0], sx, y.data + offsets[1], sy, n);
+            next += n;
+        }, x.steps, y.steps);
+        return out;
+    }
+
+    // The same with a temporary on the left, as in the `a * b` of `a * b + c`: when it has the result's shape and
+    // type and nothing else refers to it, the result is written over it instead of into a new array, as numpy does
+    // with temporaries
+    template <typename Op, typename A, typename B>
+    auto elementwise(ndarray<A>&& a, const ndarray<B>& b) {
+        if constexpr (std::is_same_v<typename Op::template result<A, B>, A>) {
+            if (a.unshared() && broadcast(a.shape, b.shape) == a.shape) return std::move(a.template assign<Op>(b));
+        }
+        return elementwise<Op>(static_cast<const ndarray<A>&>(a), b);
+    }
+
+    template <typename S>
+    ndarray<dtype<S>> scalar(const S& value) { return ndarray<dtype<S>>(dims{}, static_cast<dtype<S>>(value)); }
+
+// Each operator for array <op> array, array <op> scalar and scalar <op> array
+#define PYCOM_NUMPY_OPERATOR(symbol, Op) \
+    template <typename A, typename B> \
+    auto operator symbol(const ndarray<A>& a, const ndarray<B>& b) { return elementwise<Op>(a, b); } \
+    template <typename A, typename B> \
+    auto operator symbol(ndarray<A>&& a, const ndarray<B>& b) { return elementwise<Op>(std::move(a), b); } \
+    template <typename A, typename S, std::enable_if_t<isscalar<S>, int> = 0> \
+    auto operator symbol(const ndarray<A>& a, const S& b) { return elementwise<Op>(a, scalar(b)); } \
+    template <typename A, typename S, std::enable_if_t<isscalar<S>, int> = 0> \
+    auto operator symbol(ndarray<A>&& a, const S& b) { return elementwise<Op>(std::move(a), scalar(b)); } \
+    template <typename S, typename B, std::enable_if_t<isscalar<S>, int> = 0> \
+    auto operator symbol(const S& a, const ndarray<B>& b) { return elementwise<Op>(scalar(a), b); }
+
+    PYCOM_NUMPY_OPERATOR(+, add)
+    PYCOM_NUMPY_OPERATOR(-, subtract)
+    PYCOM_NUMPY_OPERATOR(*, multiply)
+    PYCOM_NUMPY_OPERATOR(/, divide)
+    PYCOM_NUMPY_OPERATOR(<, comparison<std::less<>>)
+    PYCOM_NUMPY_OPERATOR(<=, comparison<std::less_equal<>>)
+    PYCOM_NUMPY_OPERATOR(>, comparison<std::greater<>>)
+    PYCOM_NUMPY_OPERATOR(>=, comparison<std::greater_equal<>>)
+    PYCOM_NUMPY_OPERATOR(==, comparison<std::equal_to<>>)
+    PYCOM_NUMPY_OPERATOR(!=, comparison<std::not_equal_to<>>)
+
+#undef PYCOM_NUMPY_OPERATOR
+
+    // `a ** b`, which the compiler emits as pypow(a, b); found by argument-dependent lookup ahead of the scalar one
+    template <typename A, typename B>
+    auto pypow(const ndarray<A>& a, const ndarray<B>& b) { return elementwise<power>(a, b); }
+    template <typename A, typename S, std::enable_if_t<isscalar<S>, int> = 0>
+    auto pypow(const ndarray<A>& a, const S& b) { return elementwise<power>(a, scalar(b)); }
+    template <typename S, typename B, std::enable_if_t<isscalar<S>, int> = 0>
+    auto pypow(const S& a, const ndarray<B>& b) { return elementwise<power>(scalar(a), b); }
+
+    template <typename T>
+    pyint len(const ndarray<T>& a) {
+        if (a.ndim == 0) throw std::invalid_argument("len() of unsized object");
+        return a.shape[0];
+    }
+
+    // Creating arrays
+
+    template <typename T = double>
+    ndarray<T> zeros(const dims& shape) { return ndarray<T>(shape); }
+
+    template <typename T = double>
+    ndarray<T> ones(const dims& shape) { return ndarray<T>(shape, 1); }
+
+    template <typename T = double>
+    ndarray<T> empty(const dims& shape) { return ndarray<T>::empty(shape); }
+
+    // The element type T given by a dtype= argument (the compiler passes it as the first template argument), or else
+    // the one numpy picks for values of type V
+    template <typename T, typename V>
+    using element = std::conditional_t<std::is_void_v<T>, dtype<V>, T>;
+
+    template <typename T = void, typename V>
+    ndarray<element<T, V>> full(const dims& shape, V value) { return ndarray<element<T, V>>(shape, static_cast<element<T, V>>(value)); }
+
+    template <typename T = void, typename V>
+    ndarray<element<T, V>> array(const ndarray<V>& a) { return a.template astype<element<T, V>>(); }
+
+    template <typename T = void, typename V>
+    ndarray<element<T, V>> array(std::initializer_list<V> values) {
+        ndarray<element<T, V>> out = ndarray<element<T, V>>::empty(dims{static_cast<int64_t>(values.size())});
+        std::transform(values.begin(), values.end(), out.data, [](const V& value) { return static_cast<element<T, V>>(value); });
+        return out;
+    }
+
+    // A list literal mixing ints and floats can't deduce one element type, so it lands here
+    template <typename T = double>
+    ndarray<T> array(std::initializer_list<double> values) { return array<T, double>(values); }
+
+    template <typename T = void, typename V>
+    ndarray<element<T, V>> array(std::initializer_list<std::initializer_list<V>> rows) {
+        int64_t width = rows.size() ? rows.begin()->size() : 0;
+        ndarray<element<T, V>> out = ndarray<element<T, V>>::empty(dims{static_cast<int64_t>(rows.size()), width});
+        element<T, V>* next = out.data;
+        for (const auto& row : rows) {
+            if (static_cast<int64_t>(row.size()) != width) throw std::invalid_argument("setting an array element with a sequence: the rows have different lengths");
+            for (const V& value : row) *next++ = static_cast<element<T, V>>(value);
+        }
+        return out;
+    }
+
+    template <typename T = double>
+    ndarray<T> array(std::initializer_list<std::initializer_list<double>> rows) { return array<T, double>(rows); }
+
+    template <typename T = void, typename V, std::size_t N>
+    ndarray<element<T, V>> array(const pylist<V, N>& values) {
+        ndarray<element<T, V>> out = ndarray<element<T, V>>::empty(dims{static_cast<int64_t>(values.size())});
+        std::transform(values.begin(), values.end(), out.data, [](const V& value) { return static_cast<element<T, V>>(value); });
+        return out;
+    }
+
+    // arange(stop), arange(start, stop[, step]): int64 when every argument is an integer, float64 otherwise
+    template <typename T = void, typename A, typename B, typename S = int64_t>
+    auto arange(A start, B stop, S step = 1) {
+        using R = element<T, std::common_type_t<dtype<A>, dtype<B>, dtype<S>>>;
+        if (step == 0) throw std::invalid_argument("arange() step cannot be zero");
+
+        double span = std::ceil((static_cast<double>(stop) - static_cast<double>(start)) / static_cast<double>(step));
+        int64_t count = span > 0 ? static_cast<int64_t>(span) : 0;
+        ndarray<R> out = ndarray<R>::empty(dims{count});
+        for (int64_t i = 0; i < count; ++i) out.data[i] = static_cast<R>(static_cast<R>(start) + i * static_cast<R>(step));
+        return out;
+    }
+
+    template <typename T = void, typename B>
+    auto arange(B stop) { return arange<T>(dtype<B>(0), stop); }
+
+    template <typename A, typename B>
+    ndarray<double> linspace(A start, B stop, int64_t num = 50) {
+        ndarray<double> out = ndarray<double>::empty(dims{num});
+        double first = static_cast<double>(start), last = static_cast<double>(stop);
+        double step = num > 1 ? (last - first) / (num - 1) : 0;
+        for (int64_t i = 0; i < num; ++i) out.data[i] = first + i * step;
+        if (num > 1) out.data[num - 1] = last;
+        return out;
+    }
+
+    // Reductions and products
+
+    template <typename T> auto sum(const ndarray<T>& a) { return a.sum(); }
+    template <typename T> double mean(const ndarray<T>& a) { return a.mean(); }
+    template <typename T> T max(const ndarray<T>& a) { return a.max(); }
+    template <typename T> T min(const ndarray<T>& a) { return a.min(); }
+
+    // out[i] += factor * row[i] for i < n
+    template <typename R>
+    void multiplyadd(R* __restrict out, R factor, const R* __restrict row, int64_t n) {
+        int64_t i = 0;
+        for (; i + lanes <= n; i += lanes)
+            for (int64_t j = 0; j < lanes; ++j) out[i + j] += factor * row[i + j];
+        for (; i < n; ++i) out[i] += factor * row[i];
+    }
+
+    // Inner product of vectors (a 0-d array), matrix-vector and matrix-matrix products. The matrix product runs the
+    // i-k-j loop order, so the innermost loop is a contiguous multiply-add over a row of the result
+    template <typename A, typename B>
+    auto dot(const ndarray<A>& a, const ndarray<B>& b) {
+        using R = dtype<std::common_type_t<A, B, int>>;
+        int64_t inner = a.ndim ? a.shape[a.ndim - 1] : 1;
+        int64_t against = b.ndim == 2 ? b.shape[0] : b.ndim == 1 ? b.shape[0] : 1;
+        if (a.ndim == 0 || b.ndim == 0 || a.ndim > 2 || b.ndim > 2)
+            throw std::invalid_argument("dot() supports arrays of one or two dimensions");
+        if (inner != against)
+            throw std::invalid_argument("shapes " + str(a.shape) + " and " + str(b.shape) + " not aligned: " + std::to_string(inner) + " != " + std::to_string(against));
+
+        ndarray<R> x = a.template astype<R>(), y = b.template astype<R>();
+        int64_t rows = a.ndim == 2 ? a.shape[0] : 1, columns = b.ndim == 2 ? b.shape[1] : 1;
+
+        dims shape;
+        if (a.ndim == 2) shape.push_back(rows);
+        if (b.ndim == 2) shape.push_back(columns);
+        ndarray<R> out(shape);
+
+        if (columns == 1 && b.ndim == 1) {
+            for (int64_t i = 0; i < rows; ++i) {
+                const R* row = x.data + i * inner;
+                R partial[lanes] = {};
+                int64_t k = 0;
+                for (; k + lanes <= inner; k += lanes)
+                    for (int64_t j = 0; j < lanes; ++j) partial[j] += row[k + j] * y.data[k + j];
+                R total = 0;
+                for (int64_t j = 0; j < lanes; ++j) total += partial[j];
+                for (; k < inner; ++k) total += row[k] * y.data[k];
+                out.data[i] = total;
+            }
+            return out;
+        }
+
+        for (int64_t i = 0; i < rows; ++i)
+            for (int64_t k = 0; k < inner; ++k) multiplyadd(out.data + i * columns, x.data[i * inner + k], y.data + k * columns, columns);
+        return out;
+    }
+
+    // Elementwise functions
+
+    template <typename T, typename F>
+    ndarray<double> map(const ndarray<T>& a, F f) {
+        ndarray<double> out = ndarray<double>::empty(a.shape);
+        ndarray<T> flat = a.contiguous() ? a : a.copy();
+        for (int64_t i = 0; i < a.size; ++i) out.data[i] = f(static_cast<double>(flat.data[i]));
+        return out;
+    }
+
+    template <typename T> ndarray<double> sqrt(const ndarray<T>& a) { return map(a, [](double x) { return std::sqrt(x); }); }
+    template <typename T> ndarray<double> exp(const ndarray<T>& a) { return map(a, [](double x) { return std::exp(x); }); }
+    template <typename T> ndarray<double> log(const ndarray<T>& a) { return map(a, [](double x) { return std::log(x); }); }
+    template <typename T> ndarray<double> sin(const ndarray<T>& a) { return map(a, [](double x) { return std::sin(x); }); }
+    template <typename T> ndarray<double> cos(const ndarray<T>& a) { return map(a, [](double x) { return std::cos(x); }); }
+
+    template <typename T>
+    ndarray<T> abs(const ndarray<T>& a) {
+        ndarray<T> out = a.copy();
+        for (int64_t i = 0; i < out.size; ++i) out.data[i] = out.data[i] < 0 ? -out.data[i] : out.data[i];
+        return out;
+    }
+}
+
+template <> struct fmt::formatter<numpy::dims> : fmt::formatter<std::string_view> {
+    template <typename FormatContext>
+    auto format(const numpy::dims& value, FormatContext& ctx) const -> decltype(ctx.out()) {
+        return fmt::formatter<std::string_view>::format(numpy::str(value), ctx);
+    }
+};
+
+// Lets print() and f-strings take an array
+template <typename T> struct fmt::formatter<numpy::ndarray<T>> : fmt::formatter<std::string_view> {
+    template <typename FormatContext>
+    auto format(const numpy::ndarray<T>& value, FormatContext& ctx) const -> decltype(ctx.out()) {
+        return fmt::formatter<std::string_view>::format(value.str(), ctx);
+    }
+};
@@ -1,5 +1,459 @@
+#pragma once
 #include <cmath>
+#include <cstdint>
+#include <initializer_list>
+#include <limits>
+#include <memory>
+#include <ostream>
+#include <stdexcept>
+#include <string>
+#include <string_view>
+#include <type_traits>
+#include <utility>
+#include <variant>
+#include <vector>
+#include "headers/builtins/stdpy.hpp"
+#include "headers/builtins/pynumpy.hpp"
 
-class Pandas{
-    
-};
\ No newline at end of file
+// pandas' DataFrame and Series. The compiler emits `pd.read_csv(path)` as `pandas::read_csv(path)` (after
+// `import pandas as pd`, pd is just another name for pandas). A DataFrame is a list of named columns, and a column is
+// one typed vector of all its values: there are no row objects anywhere, so arithmetic, comparisons and reductions
+// are loops over one or two plain arrays (the same kernels numpy's arrays use), and filtering gathers each column
+// through one list of the selected positions.
+//
+// Columns are immutable and shared, so taking a column out of a frame, or copying a frame, copies no values
+namespace pandas {
+    inline constexpr double nan = std::numeric_limits<double>::quiet_NaN();
+
+    // Rows beyond this print only the first and last `edgerows`, as pandas' display.max_rows and display.min_rows
+    inline constexpr int64_t maxrows = 60;
+    inline constexpr int64_t edgerows = 5;
+
+    // A bool takes a byte, so a mask is a plain array (std::vector<bool> packs bits, which no loop vectorises through)
+    using boolean = uint8_t;
+
+    // Columns take their memory where ndarrays do, so a large one is backed by huge pages: filtering a frame makes a
+    // new set of full-length columns every time, and faulting those in 4KB at a time would cost more than the copying
+    template <typename T>
+    struct allocator {
+        using value_type = T;
+
+        allocator() = default;
+        template <typename U>
+        allocator(const allocator<U>&) {}
+
+        T* allocate(size_t n) { return static_cast<T*>(numpy::allocate(std::max<size_t>(n, 1) * sizeof(T))); }
+        void deallocate(T* block, size_t) { numpy::release(block); }
+
+        template <typename U>
+        bool operator==(const allocator<U>&) const { return true; }
+    };
+
+    template <typename T>
+    using array = std::vector<T, allocator<T>>;
+
+    // The values of a column in one of pandas' dtypes: int64, float64, bool and str. A missing number is NaN, so a
+    // column of ints with a gap is float64 as in pandas, and a missing string is an empty one
+    using values = std::variant<array<int64_t>, array<double>, array<boolean>, array<std::string>>;
+
+    // The element type a Python value is stored as in a column
+    template <typename T>
+    using element = std::conditional_t<std::is_same_v<T, bool>, boolean,
+                    std::conditional_t<std::is_floating_point_v<T>, double,
+                    std::conditional_t<std::is_integral_v<T> || std::is_same_v<T, pyint>, int64_t, std::string>>>;
+
+    // The type numpy's operations see for an element type: they give bool for bool, where a column stores a byte
+    template <typename T>
+    using logical = std::conditional_t<std::is_same_v<T, boolean>, bool, T>;
+
+    class scalar;
+
+    template <typename T>
+    inline constexpr bool isscalar = numpy::isscalar<T> || std::is_convertible_v<const T&, std::string_view> || std::is_same_v<T, scalar>;
+
+    template <typename T>
+    element<T> toelement(const T& value) {
+        if constexpr (std::is_same_v<element<T>, std::string>) return std::string(std::string_view(value));
+        else return static_cast<element<T>>(value);
+    }
+
+    std::string dtypename(const values& column);
+    int64_t length(const values& column);
+
+    // The values at the given positions, in that order
+    values take(const values& column, const array<int64_t>& positions);
+
+    // What a reduction gives when the dtype is only known at runtime: a Python int, float, bool or str. Arithmetic and
+    // comparisons with it follow Python's rules for those types
+    class scalar {
+        public:
+            std::variant<int64_t, double, bool, std::string> value;
+
+            scalar() : value(int64_t(0)) {}
+            scalar(std::string text) : value(std::move(text)) {}
+            scalar(const char* text) : value(std::string(text)) {}
+
+            template <typename T, std::enable_if_t<numpy::isscalar<T>, int> = 0>
+            scalar(T number) {
+                if constexpr (std::is_same_v<T, bool>) value = number;
+                else if constexpr (std::is_floating_point_v<T>) value = static_cast<double>(number);
+                else value = static_cast<int64_t>(number);
+            }
+
+            template <typename T, std::enable_if_t<std::is_arithmetic_v<T>, int> = 0>
+            explicit operator T() const { return static_cast<T>(number()); }
+
+            explicit operator std::string() const { return str(); }
+
+            bool isnumber() const { return value.index() != 3; }
+
+            double number() const {
+                if (!isnumber()) throw std::invalid_argument("could not convert string to float: '" + std::get<std::string>(value) + "'");
+                return std::visit([](const auto& x) -> double {
+                    if constexpr (std::is_same_v<std::decay_t<decltype(x)>, std::string>) return 0;
+                    else return static_cast<double>(x);
+                }, value);
+            }
+
+            std::string str() const;
+
+            friend scalar operator+(const scalar& a, const scalar& b);
+            friend scalar operator-(const scalar& a, const scalar& b);
+            friend scalar operator*(const scalar& a, const scalar& b);
+            friend scalar operator/(const scalar& a, const scalar& b);
+            friend bool operator==(const scalar& a, const scalar& b);
+            friend bool operator<(const scalar& a, const scalar& b);
+            friend bool operator!=(const scalar& a, const scalar& b) { return !(a == b); }
+            friend bool operator>(const scalar& a, const scalar& b) { return b < a; }
+            friend bool operator<=(const scalar& a, const scalar& b) { return !(b < a); }
+            friend bool operator>=(const scalar& a, const scalar& b) { return !(a < b); }
+
+            friend std::ostream& operator<<(std::ostream& os, const scalar& value) { return os << value.str(); }
+    };
+
+    // `total += df["x"].sum()` where total is a plain number keeps it one
+    template <typename T, std::enable_if_t<std::is_arithmetic_v<T>, int> = 0>
+    T& operator+=(T& a, const scalar& b) { return a = static_cast<T>(scalar(a) + b); }
+
+    template <typename T, std::enable_if_t<std::is_arithmetic_v<T>, int> = 0>
+    T& operator-=(T& a, const scalar& b) { return a = static_cast<T>(scalar(a) - b); }
+
+    template <typename T, std::enable_if_t<std::is_arithmetic_v<T>, int> = 0>
+    T& operator*=(T& a, const scalar& b) { return a = static_cast<T>(scalar(a) * b); }
+
+    template <typename T, std::enable_if_t<std::is_arithmetic_v<T>, int> = 0>
+    T& operator/=(T& a, const scalar& b) { return a = static_cast<T>(scalar(a) / b); }
+
+    // The row labels of a filtered or grouped result; no labels is the default 0, 1, 2, ...
+    struct index {
+        std::shared_ptr<const values> labels;
+        std::string name;
+    };
+
+    class DataFrame;
+
+    class Series {
+        public:
+            std::string name;
+
+            Series() : column(std::make_shared<values>(array<double>())) {}
+            Series(values data, std::string name = "", pandas::index rows = {})
+                : name(std::move(name)), column(std::make_shared<values>(std::move(data))), rows(std::move(rows)) {}
+
+            // From a list literal: pd.Series([1, 2, 3]), or a column of pd.DataFrame({"a": [1, 2, 3]})
+            template <typename T>
+            Series(std::initializer_list<T> items) {
+                array<element<T>> data;
+                data.reserve(items.size());
+                for (const T& item : items) data.push_back(toelement(item));
+                column = std::make_shared<values>(std::move(data));
+            }
+
+            // One value for every row, as in `df["flag"] = 0`; the frame stretches it to its length
+            template <typename T, std::enable_if_t<isscalar<T>, int> = 0>
+            Series& operator=(const T& value) {
+                if constexpr (std::is_same_v<T, scalar>) {
+                    std::visit([this](const auto& x) { *this = x; }, value.value);
+                } else {
+                    column = std::make_shared<values>(array<element<T>>{toelement(value)});
+                    broadcast = true;
+                }
+                return *this;
+            }
+
+            int64_t size() const { return length(data()); }
+            std::string dtype() const { return dtypename(data()); }
+            const values& data() const;
+            const pandas::index& labels() const { return rows; }
+
+            scalar sum() const;
+            double mean() const;
+            int64_t count() const;
+            scalar min() const;
+            scalar max() const;
+
+            Series head(int64_t n = 5) const;
+            Series tail(int64_t n = 5) const;
+            Series take(const array<int64_t>& positions) const;
+
+            Series operator[](const Series& mask) const;
+
+            std::string str() const;
+            friend std::ostream& operator<<(std::ostream& os, const Series& value) { return os << value.str(); }
+
+        private:
+            std::shared_ptr<const values> column;
+            pandas::index rows;
+            bool broadcast = false;
+
+            // A column asked of a frame that doesn't have it; an error as soon as it's used
+            static Series missing(std::string name) {
+                Series result;
+                result.name = std::move(name);
+                result.column = nullptr;
+                return result;
+            }
+
+            friend class DataFrame;
+    };
+
+    // The positions where a mask is true, which every column of a frame is then gathered through
+    array<int64_t> selected(const Series& mask, int64_t rows);
+
+    // Elementwise operations. Numbers and bools go through numpy's kernels and operation structs, a value on one
+    // side being a column of stride 0; strings only concatenate and compare
+    struct logicaland {
+        template <typename A, typename B> using operands = std::conditional_t<std::is_same_v<A, bool> && std::is_same_v<B, bool>, bool, int64_t>;
+        template <typename A, typename B> using result = operands<A, B>;
+        static auto apply(auto x, auto y) { return x & y; }
+    };
+
+    struct logicalor {
+        template <typename A, typename B> using operands = std::conditional_t<std::is_same_v<A, bool> && std::is_same_v<B, bool>, bool, int64_t>;
+        template <typename A, typename B> using result = operands<A, B>;
+        static auto apply(auto x, auto y) { return x | y; }
+    };
+
+    // Python's %, whose result takes the sign of the divisor
+    struct remainder {
+        template <typename A, typename B> using operands = numpy::dtype<std::common_type_t<A, B, int>>;
+        template <typename A, typename B> using result = operands<A, B>;
+        template <typename X>
+        static X apply(X x, X y) {
+            X r;
+            if constexpr (std::is_floating_point_v<X>) r = std::fmod(x, y);
+            else r = y ? x % y : 0;
+            return r != 0 && (r < 0) != (y < 0) ? r + y : r;
+        }
+    };
+
+    template <typename Op>
+    inline constexpr bool stringop = std::is_same_v<Op, numpy::add> || std::is_same_v<Op, numpy::comparison<std::less<>>>
+        || std::is_same_v<Op, numpy::comparison<std::less_equal<>>> || std::is_same_v<Op, numpy::comparison<std::greater<>>>
+        || std::is_same_v<Op, numpy::comparison<std::greater_equal<>>> || std::is_same_v<Op, numpy::comparison<std::equal_to<>>>
+        || std::is_same_v<Op, numpy::comparison<std::not_equal_to<>>>;
+
+    // a and b point at n values each, or at one value when their stride is 0
+    template <typename Op, typename A, typename B>
+    values combine(const A* a, int64_t sa, const B* b, int64_t sb, int64_t n) {
+        constexpr bool strings = std::is_same_v<A, std::string> || std::is_same_v<B, std::string>;
+        if constexpr (strings) {
+            if constexpr (std::is_same_v<A, B> && stringop<Op>) {
+                using R = std::conditional_t<std::is_same_v<Op, numpy::add>, std::string, boolean>;
+                array<R> out(n);
+                for (int64_t i = 0; i < n; ++i) out[i] = static_cast<R>(Op::apply(a[i * sa], b[i * sb]));
+                return out;
+            } else {
+                throw std::invalid_argument("unsupported operand types for a str column");
+            }
+        } else {
+            using C = typename Op::template operands<logical<A>, logical<B>>;
+            using R = element<typename Op::template result<logical<A>, logical<B>>>;
+            array<R> out(n);
+            numpy::kernel<Op, R, C>(out.data(), a, sa, b, sb, n);
+            return out;
+        }
+    }
+
+    template <typename Op>
+    Series elementwise(const Series& a, const Series& b) {
+        int64_t n = a.size();
+        if (b.size() != n) throw std::invalid_argument("Can only compare identically-labeled Series objects");
+        values result = std::visit([n](const auto& x, const auto& y) {
+            return combine<Op>(x.data(), 1, y.data(), 1, n);
+        }, a.data(), b.data());
+        return Series(std::move(result), a.name == b.name ? a.name : "", a.labels());
+    }
+
+    template <typename Op, typename S>
+    Series elementwise(const Series& a, const S& value, bool reflected) {
+        if constexpr (std::is_same_v<S, scalar>)
+            return std::visit([&](const auto& x) { return elementwise<Op>(a, x, reflected); }, value.value);
+        int64_t n = a.size();
+        element<S> y = toelement(value);
+        values result = std::visit([&](const auto& x) {
+            return reflected ? combine<Op>(&y, 0, x.data(), 1, n) : combine<Op>(x.data(), 1, &y, 0, n);
+        }, a.data());
+        return Series(std::move(result), a.name, a.labels());
+    }
+
+#define PYCOM_PANDAS_OPERATOR(symbol, Op) \
+    inline Series operator symbol(const Series& a, const Series& b) { return elementwise<Op>(a, b); } \
+    template <typename S, std::enable_if_t<isscalar<S>, int> = 0> \
+    Series operator symbol(const Series& a, const S& b) { return elementwise<Op>(a, b, false); } \
+    template <typename S, std::enable_if_t<isscalar<S>, int> = 0> \
+    Series operator symbol(const S& a, const Series& b) { return elementwise<Op>(b, a, true); }
+
+    PYCOM_PANDAS_OPERATOR(+, numpy::add)
+    PYCOM_PANDAS_OPERATOR(-, numpy::subtract)
+    PYCOM_PANDAS_OPERATOR(*, numpy::multiply)
+    PYCOM_PANDAS_OPERATOR(/, numpy::divide)
+    PYCOM_PANDAS_OPERATOR(%, remainder)
+    PYCOM_PANDAS_OPERATOR(<, numpy::comparison<std::less<>>)
+    PYCOM_PANDAS_OPERATOR(<=, numpy::comparison<std::less_equal<>>)
+    PYCOM_PANDAS_OPERATOR(>, numpy::comparison<std::greater<>>)
+    PYCOM_PANDAS_OPERATOR(>=, numpy::comparison<std::greater_equal<>>)
+    PYCOM_PANDAS_OPERATOR(==, numpy::comparison<std::equal_to<>>)
+    PYCOM_PANDAS_OPERATOR(!=, numpy::comparison<std::not_equal_to<>>)
+    PYCOM_PANDAS_OPERATOR(&, logicaland)
+    PYCOM_PANDAS_OPERATOR(|, logicalor)
+
+#undef PYCOM_PANDAS_OPERATOR
+
+    // `~mask` negates a bool column and flips the bits of an int one; `-s` negates numbers
+    Series operator~(const Series& a);
+    Series operator-(const Series& a);
+
+    // A frame's shape, which prints as a tuple
+    struct dimensions {
+        int64_t rows = 0;
+        int64_t columns = 0;
+
+        friend std::ostream& operator<<(std::ostream& os, const dimensions& value) {
+            return os << '(' << value.rows << ", " << value.columns << ')';
+        }
+    };
+
+    class GroupBy;
+
+    class DataFrame {
+        public:
+            mutable dimensions shape;
+
+            DataFrame() = default;
+            DataFrame(std::initializer_list<std::pair<std::string, Series>> columns);
+            DataFrame(std::vector<Series> columns, int64_t rows, pandas::index labels = {});
+
+            // `df["total"] = ...` assigns through the reference: a new name adds a column, which (like any column
+            // assigned a value) is named and checked against the frame's length the next time the frame is used
+            Series& operator[](const std::string& name);
+            DataFrame operator[](std::initializer_list<std::string> names) const;
+            DataFrame operator[](const Series& mask) const;
+
+            const std::vector<Series>& data() const;
+            const pandas::index& labels() const { return rows; }
+
+            DataFrame head(int64_t n = 5) const;
+            DataFrame tail(int64_t n = 5) const;
+            DataFrame take(const array<int64_t>& positions) const;
+
+            GroupBy groupby(const std::string& key) const;
+            GroupBy groupby(const Series& key) const;
+
+            std::string str() const;
+            friend std::ostream& operator<<(std::ostream& os, const DataFrame& value) { return os << value.str(); }
+
+        private:
+            mutable std::vector<Series> series;
+            array<std::string> names;
+            pandas::index rows;
+            // Whether the length is known: a frame made empty takes it from the first column it's given
+            mutable bool sized = false;
+
+            // Names the columns after their keys and stretches or checks what was assigned to them
+            void settle() const;
+    };
+
+    // Rows grouped by the values of a key: each row's group number (or -1 where the key is missing), and the keys in
+    // sorted order, which label the groups
+    struct grouping {
+        array<int64_t> codes;
+        int64_t count = 0;
+        pandas::index keys;
+    };
+
+    std::shared_ptr<const grouping> factorize(const Series& key);
+
+    enum class reduction { sum, mean, count, min, max };
+
+    // One value per group, in a single pass over the column
+    values aggregate(const values& column, const grouping& groups, reduction how);
+
+    class SeriesGroupBy {
+        public:
+            SeriesGroupBy(std::shared_ptr<const grouping> groups, Series column) : groups(std::move(groups)), column(std::move(column)) {}
+
+            Series sum() const { return reduce(reduction::sum); }
+            Series mean() const { return reduce(reduction::mean); }
+            Series count() const { return reduce(reduction::count); }
+            Series min() const { return reduce(reduction::min); }
+            Series max() const { return reduce(reduction::max); }
+            Series size() const;
+
+        private:
+            std::shared_ptr<const grouping> groups;
+            Series column;
+
+            Series reduce(reduction how) const { return Series(aggregate(column.data(), *groups, how), column.name, groups->keys); }
+    };
+
+    class GroupBy {
+        public:
+            GroupBy(std::shared_ptr<const grouping> groups, DataFrame frame) : groups(std::move(groups)), frame(std::move(frame)) {}
+
+            SeriesGroupBy operator[](const std::string& name) const { return SeriesGroupBy(groups, frame[name]); }
+            GroupBy operator[](std::initializer_list<std::string> names) const { return GroupBy(groups, frame[names]); }
+
+            DataFrame sum() const { return reduce(reduction::sum); }
+            DataFrame mean() const { return reduce(reduction::mean); }
+            DataFrame count() const { return reduce(reduction::count); }
+            DataFrame min() const { return reduce(reduction::min); }
+            DataFrame max() const { return reduce(reduction::max); }
+            Series size() const;
+
+        private:
+            std::shared_ptr<const grouping> groups;
+            mutable DataFrame frame;
+
+            DataFrame reduce(reduction how) const;
+    };
+
+    // Reads a CSV file with a header row. The file is memory-mapped and split at line ends into one chunk per
+    // hardware thread; the chunks are scanned in parallel for their row counts and each column's narrowest type
+    // (int64, then float64, bool, str), then parsed in parallel straight into the finished columns
+    DataFrame read_csv(const std::string& path);
+
+    pyint len(const Series& s);
+    pyint len(const DataFrame& frame);
+}
+
+template <> struct fmt::formatter<pandas::scalar> : fmt::formatter<std::string_view> {
+    template <typename Context>
+    auto format(const pandas::scalar& value, Context& ctx) const {
+        return fmt::formatter<std::string_view>::format(value.str(), ctx);
+    }
+};
+
+template <> struct fmt::formatter<pandas::Series> : fmt::formatter<std::string_view> {
+    template <typename Context>
+    auto format(const pandas::Series& value, Context& ctx) const {
+        return fmt::formatter<std::string_view>::format(value.str(), ctx);
+    }
+};
+
+template <> struct fmt::formatter<pandas::DataFrame> : fmt::formatter<std::string_view> {
+    template <typename Context>
+    auto format(const pandas::DataFrame& value, Context& ctx) const {
+        return fmt::formatter<std::string_view>::format(value.str(), ctx);
+    }
+};
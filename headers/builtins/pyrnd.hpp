@@ -1,40 +1,79 @@
+#pragma once
 #include <algorithm>
 #include <iostream>
 #include <random>
+#include <stdexcept>
+#include <string>
+#include <type_traits>
 #include <vector>
 
+// Every thread has one Mersenne Twister, seeded from std::random_device the first time the thread draws from it or
+// from random.seed(); nothing here builds an engine or reads the random device per call.
+// The non-template definitions live in runtime/pyrnd.cpp and are linked in from libpycomrt
 class Rnd{
     public:
-        long long int randint(long long int min, long long int max){
-            std::random_device rd;
-            std::mt19937 gen(rd()); 
-            std::uniform_int_distribution<> distr(min, max);
+        static std::mt19937_64& engine();
 
-            return distr(gen);
+        void seed();
+        void seed(long long int value);
+
+        long long int randint(long long int min, long long int max);
+
+        double random();
+        double uniform(double a, double b);
+        double gauss(double mu, double sigma);
+
+        template <typename C>
+        auto choice(const C& in){
+            if (in.empty()) throw std::out_of_range("Cannot choose from an empty sequence");
+            return in[std::uniform_int_distribution<std::size_t>(0, in.size() - 1)(engine())];
         }
 
-        long double random(){
-            return static_cast <long double> (rand()) / static_cast <long double> (RAND_MAX);
+        template <typename C>
+        void shuffle(C& in){
+            std::shuffle(in.begin(), in.end(), engine());
         }
 
-        long long int choice(const std::vector<long long int> in){
-            std::vector<int> out;
-            std::sample(in.begin(), in.end(), std::back_inserter(out), 1, std::mt19937{std::random_device{}()});
+        // k distinct elements in selection order, like Python's (std::sample would keep them in population order)
+        template <typename C>
+        C sample(const C& population, long long int k){
+            if (k < 0 || static_cast<std::size_t>(k) > population.size()) throw std::invalid_argument("Sample larger than population or is negative");
 
-            return out[0];
+            C pool = population;
+            std::mt19937_64& gen = engine();
+            for (std::size_t i = 0; i < static_cast<std::size_t>(k); ++i) {
+                std::swap(pool[i], pool[std::uniform_int_distribution<std::size_t>(i, pool.size() - 1)(gen)]);
+            }
+            pool.resize(k);
+            return pool;
         }
 
-        std::string choice(const std::vector<std::string> in){
-            std::vector<std::string> out;
-            std::sample(in.begin(), in.end(), std::back_inserter(out), 1, std::mt19937{std::random_device{}()});
+        // Bulk variants: fill every element of a list in one call, fetching the engine and building the distribution once
+        template <typename C>
+        void fillrandom(C& out){
+            fill(out, std::uniform_real_distribution<double>(0.0, 1.0));
+        }
 
-            return out[0];
+        template <typename C>
+        void fillrandint(C& out, long long int min, long long int max){
+            fill(out, std::uniform_int_distribution<long long int>(min, max));
         }
 
-        long double choice(const std::vector<long double> in){
-            std::vector<long double> out;
-            std::sample(in.begin(), in.end(), std::back_inserter(out), 1, std::mt19937{std::random_device{}()});
+        template <typename C>
+        void filluniform(C& out, double a, double b){
+            fill(out, std::uniform_real_distribution<double>(a, b));
+        }
+
+        template <typename C>
+        void fillgauss(C& out, double mu, double sigma){
+            fill(out, std::normal_distribution<double>(mu, sigma));
+        }
 
-            return out[0];
+    private:
+        template <typename C, typename Distribution>
+        void fill(C& out, Distribution distribution){
+            using T = std::remove_reference_t<decltype(*out.begin())>;
+            std::mt19937_64& gen = engine();
+            for (T& value : out) value = static_cast<T>(distribution(gen));
         }
-};
\ No newline at end of file
+};
@@ -1,9 +1,14 @@
 #include "iostream"
+#include "cstdio"
 
 class Sys{
     public:
+        // For print(..., file=sys.stderr)
+        std::FILE* const stdout = ::stdout;
+        std::FILE* const stderr = ::stderr;
+
         void exit(int code = 1){
             std::exit(code);
         }
 
-};
\ No newline at end of file
+};
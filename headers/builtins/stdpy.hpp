@@ -1,67 +1,493 @@
+#pragma once
 #include <iostream>
 #include <cmath>
 #include <cassert>
 #include <sstream>
 #include <cctype>
 #include <algorithm>
+#include <vector>
+#include <compare>
+#include <cstdint>
+#include <memory>
+#include <stdexcept>
+#include <string>
+#include <type_traits>
+#include <cstdio>
+#include <string_view>
+#include <optional>
+#include <span>
+#include <initializer_list>
+#ifdef _WIN32
+#include <io.h>
+#else
+#include <unistd.h>
+#endif
 #include "boost/multiprecision/cpp_int.hpp"
+// fmt itself is compiled into libpycomrt (runtime/fmt.cpp), so only its declarations are parsed here
+#include "headers/fmt/format.h"
 
 typedef boost::multiprecision::cpp_int bigint;
 
-void print(std::string str){
-    std::cout << str << char(10);
-}
+// Python's int: the value lives in an inline int64_t and arithmetic takes overflow-checked fast paths. Only a result
+// that doesn't fit in 64 bits is promoted to a heap-allocated bigint, and a bigint result that fits is demoted again,
+// so `big` is set exactly when the value is outside the int64_t range
+class pyint {
+    public:
+        pyint() : small(0) {}
 
-void print(const char *cstr){
-    std::cout << cstr << char(10);
-}
+        template<typename T, std::enable_if_t<std::is_integral_v<T>, int> = 0>
+        pyint(T value) : small(0) {
+            if constexpr (std::is_unsigned_v<T> && sizeof(T) >= sizeof(int64_t)) {
+                if (value > static_cast<uint64_t>(INT64_MAX)) {
+                    big = std::make_unique<bigint>(value);
+                    return;
+                }
+            }
+            small = static_cast<int64_t>(value);
+        }
 
-void print(int istr){
-    std::cout << istr << char(10);
-}
-void print(float fstr){
-    std::cout << fstr << char(10);
-}
-void print(long long int llistr){
-    std::cout << llistr << char(10);
-}
+        template<typename T, std::enable_if_t<std::is_floating_point_v<T>, int> = 0>
+        explicit pyint(T value) : small(0) {
+            if (value >= static_cast<T>(INT64_MIN) && value < static_cast<T>(INT64_MAX))
+                small = static_cast<int64_t>(value);
+            else
+                big = std::make_unique<bigint>(value);
+        }
 
-void print(long double ldstr){
-    std::cout << ldstr << char(10);
-}
+        pyint(const bigint& value) : small(0) { assign(value); }
 
-void print(long lstr){
-    std::cout << lstr << char(10);
-}
+        pyint(const pyint& other) : small(other.small), big(other.big ? std::make_unique<bigint>(*other.big) : nullptr) {}
+        pyint(pyint&& other) noexcept = default;
 
-void print(double dstr){
-    std::cout << dstr << char(10);
-}
+        pyint& operator=(const pyint& other) {
+            if (this != &other) {
+                small = other.small;
+                big = other.big ? std::make_unique<bigint>(*other.big) : nullptr;
+            }
+            return *this;
+        }
+        pyint& operator=(pyint&& other) noexcept = default;
+
+        bool isbig() const { return big != nullptr; }
+        bigint tobigint() const { return big ? *big : bigint(small); }
+        std::string str() const { return big ? big->str() : std::to_string(small); }
+
+        explicit operator bool() const { return big ? !big->is_zero() : small != 0; }
+        explicit operator bigint() const { return tobigint(); }
+
+        template<typename T, std::enable_if_t<std::is_arithmetic_v<T> && !std::is_same_v<T, bool>, int> = 0>
+        explicit operator T() const { return big ? big->convert_to<T>() : static_cast<T>(small); }
+
+        friend pyint operator+(const pyint& a, const pyint& b) {
+            int64_t result;
+            if (!a.big && !b.big && !__builtin_add_overflow(a.small, b.small, &result))
+                return pyint(result);
+            return pyint(a.tobigint() + b.tobigint());
+        }
+
+        friend pyint operator-(const pyint& a, const pyint& b) {
+            int64_t result;
+            if (!a.big && !b.big && !__builtin_sub_overflow(a.small, b.small, &result))
+                return pyint(result);
+            return pyint(a.tobigint() - b.tobigint());
+        }
+
+        friend pyint operator*(const pyint& a, const pyint& b) {
+            int64_t result;
+            if (!a.big && !b.big && !__builtin_mul_overflow(a.small, b.small, &result))
+                return pyint(result);
+            return pyint(a.tobigint() * b.tobigint());
+        }
+
+        // Division and modulo round towards negative infinity, as Python's // and % do
+        friend pyint operator/(const pyint& a, const pyint& b) {
+            if (!b) throw std::domain_error("integer division or modulo by zero");
+            if (!a.big && !b.big && !(a.small == INT64_MIN && b.small == -1)) {
+                int64_t quotient = a.small / b.small;
+                if (a.small % b.small != 0 && ((a.small < 0) != (b.small < 0))) quotient--;
+                return pyint(quotient);
+            }
+            bigint divisor = b.tobigint();
+            bigint quotient = a.tobigint() / divisor;
+            bigint remainder = a.tobigint() % divisor;
+            if (remainder != 0 && ((remainder < 0) != (divisor < 0))) quotient--;
+            return pyint(quotient);
+        }
+
+        friend pyint operator%(const pyint& a, const pyint& b) {
+            if (!b) throw std::domain_error("integer division or modulo by zero");
+            if (!a.big && !b.big) {
+                if (b.small == -1) return pyint(0);
+                int64_t remainder = a.small % b.small;
+                if (remainder != 0 && ((remainder < 0) != (b.small < 0))) remainder += b.small;
+                return pyint(remainder);
+            }
+            bigint divisor = b.tobigint();
+            bigint remainder = a.tobigint() % divisor;
+            if (remainder != 0 && ((remainder < 0) != (divisor < 0))) remainder += divisor;
+            return pyint(remainder);
+        }
+
+        friend pyint operator&(const pyint& a, const pyint& b) {
+            if (!a.big && !b.big) return pyint(a.small & b.small);
+            return pyint(a.tobigint() & b.tobigint());
+        }
+
+        friend pyint operator|(const pyint& a, const pyint& b) {
+            if (!a.big && !b.big) return pyint(a.small | b.small);
+            return pyint(a.tobigint() | b.tobigint());
+        }
+
+        friend pyint operator^(const pyint& a, const pyint& b) {
+            if (!a.big && !b.big) return pyint(a.small ^ b.small);
+            return pyint(a.tobigint() ^ b.tobigint());
+        }
+
+        friend pyint operator<<(const pyint& a, const pyint& b) {
+            if (b < 0) throw std::domain_error("negative shift count");
+            int64_t result;
+            if (!a.big && !b.big && b.small < 63 && !__builtin_mul_overflow(a.small, int64_t(1) << b.small, &result))
+                return pyint(result);
+            return pyint(a.tobigint() << static_cast<unsigned>(b));
+        }
+
+        friend pyint operator>>(const pyint& a, const pyint& b) {
+            if (b < 0) throw std::domain_error("negative shift count");
+            if (!a.big) {
+                if (b.big || b.small > 63) return pyint(a.small < 0 ? -1 : 0);
+                return pyint(a.small >> b.small);
+            }
+            return pyint(a.tobigint() >> static_cast<unsigned>(b));
+        }
 
-void print(bigint bigintstr){
-    std::cout << bigintstr << char(10);
+        pyint operator-() const {
+            if (!big && small != INT64_MIN) return pyint(-small);
+            return pyint(-tobigint());
+        }
+        pyint operator+() const { return *this; }
+        pyint operator~() const { return big ? pyint(~*big) : pyint(~small); }
+
+        // small is only written once the result is known to fit; on overflow the sum is redone from the operands
+        pyint& operator+=(const pyint& other) {
+            int64_t result;
+            if (!big && !other.big && !__builtin_add_overflow(small, other.small, &result)) {
+                small = result;
+                return *this;
+            }
+            return *this = *this + other;
+        }
+        pyint& operator-=(const pyint& other) {
+            int64_t result;
+            if (!big && !other.big && !__builtin_sub_overflow(small, other.small, &result)) {
+                small = result;
+                return *this;
+            }
+            return *this = *this - other;
+        }
+        pyint& operator*=(const pyint& other) { return *this = *this * other; }
+        pyint& operator/=(const pyint& other) { return *this = *this / other; }
+        pyint& operator%=(const pyint& other) { return *this = *this % other; }
+        pyint& operator&=(const pyint& other) { return *this = *this & other; }
+        pyint& operator|=(const pyint& other) { return *this = *this | other; }
+        pyint& operator^=(const pyint& other) { return *this = *this ^ other; }
+        pyint& operator<<=(const pyint& other) { return *this = *this << other; }
+        pyint& operator>>=(const pyint& other) { return *this = *this >> other; }
+
+        pyint& operator++() { return *this += 1; }
+        pyint& operator--() { return *this -= 1; }
+        pyint operator++(int) { pyint copy = *this; *this += 1; return copy; }
+        pyint operator--(int) { pyint copy = *this; *this -= 1; return copy; }
+
+        friend bool operator==(const pyint& a, const pyint& b) {
+            if (!a.big && !b.big) return a.small == b.small;
+            return a.tobigint() == b.tobigint();
+        }
+
+        friend std::strong_ordering operator<=>(const pyint& a, const pyint& b) {
+            if (!a.big && !b.big) return a.small <=> b.small;
+            return a.tobigint().compare(b.tobigint()) <=> 0;
+        }
+
+        // Mixed with a float the int is converted, as in Python
+        template<typename T, std::enable_if_t<std::is_floating_point_v<T>, int> = 0>
+        friend T operator+(const pyint& a, T b) { return static_cast<T>(a) + b; }
+        template<typename T, std::enable_if_t<std::is_floating_point_v<T>, int> = 0>
+        friend T operator+(T a, const pyint& b) { return a + static_cast<T>(b); }
+        template<typename T, std::enable_if_t<std::is_floating_point_v<T>, int> = 0>
+        friend T operator-(const pyint& a, T b) { return static_cast<T>(a) - b; }
+        template<typename T, std::enable_if_t<std::is_floating_point_v<T>, int> = 0>
+        friend T operator-(T a, const pyint& b) { return a - static_cast<T>(b); }
+        template<typename T, std::enable_if_t<std::is_floating_point_v<T>, int> = 0>
+        friend T operator*(const pyint& a, T b) { return static_cast<T>(a) * b; }
+        template<typename T, std::enable_if_t<std::is_floating_point_v<T>, int> = 0>
+        friend T operator*(T a, const pyint& b) { return a * static_cast<T>(b); }
+        template<typename T, std::enable_if_t<std::is_floating_point_v<T>, int> = 0>
+        friend T operator/(const pyint& a, T b) { return static_cast<T>(a) / b; }
+        template<typename T, std::enable_if_t<std::is_floating_point_v<T>, int> = 0>
+        friend T operator/(T a, const pyint& b) { return a / static_cast<T>(b); }
+        template<typename T, std::enable_if_t<std::is_floating_point_v<T>, int> = 0>
+        friend bool operator==(const pyint& a, T b) { return static_cast<T>(a) == b; }
+        template<typename T, std::enable_if_t<std::is_floating_point_v<T>, int> = 0>
+        friend std::partial_ordering operator<=>(const pyint& a, T b) { return static_cast<T>(a) <=> b; }
+
+        friend std::ostream& operator<<(std::ostream& os, const pyint& value) {
+            if (value.big) return os << *value.big;
+            return os << value.small;
+        }
+
+    private:
+        int64_t small;
+        std::unique_ptr<bigint> big;
+
+        void assign(const bigint& value) {
+            if (value >= INT64_MIN && value <= INT64_MAX) {
+                small = value.convert_to<int64_t>();
+                big.reset();
+            } else {
+                big = std::make_unique<bigint>(value);
+            }
+        }
+};
+
+// Lets fmt::format (and so f-strings) take a pyint
+template <> struct fmt::formatter<pyint> : fmt::formatter<std::string_view> {
+    template <typename FormatContext>
+    auto format(const pyint& value, FormatContext& ctx) const -> decltype(ctx.out()) {
+        return fmt::formatter<std::string_view>::format(value.str(), ctx);
+    }
+};
+
+// Python's pow() and **, which the compiler emits as pypow(). Between integers the result is exact, by repeated
+// squaring (in int64_t until a step overflows, then in bigint); anything else is raised in floating point
+pyint intpow(const pyint& base, const pyint& exp);
+pyint intpow(const pyint& base, const pyint& exp, const pyint& mod);
+
+template <typename T>
+inline constexpr bool isinteger = std::is_integral_v<T> || std::is_same_v<T, pyint> || std::is_same_v<T, bigint>;
+
+template <typename B, typename E>
+auto pypow(const B& base, const E& exp) {
+    if constexpr (isinteger<B> && isinteger<E>)
+        return intpow(pyint(base), pyint(exp));
+    else
+        return std::pow(static_cast<double>(base), static_cast<double>(exp));
 }
 
-void print(bool bstr){
-    std::cout << bstr << char(10);
+// An integer power whose exponent may be negative (type inference decides), which Python gives as a float
+template <typename B, typename E>
+double pyfloatpow(const B& base, const E& exp) {
+    return std::pow(static_cast<double>(base), static_cast<double>(exp));
 }
 
-bigint len(std::string str){
-    return str.length();
+// pow(base, exp, mod) reduces after every step, so nothing grows past mod squared
+inline pyint pypow(const pyint& base, const pyint& exp, const pyint& mod) { return intpow(base, exp, mod); }
+
+// Python's `item in container`, which the compiler emits as pyin(item, container): a hash lookup for dicts and sets,
+// a substring search for strings and a linear search for anything else, including a literal `x in [1, 2, 3]`
+template <typename T, typename U>
+bool pyequal(const T& a, const U& b) {
+    if constexpr (std::is_convertible_v<const T&, std::string_view> && std::is_convertible_v<const U&, std::string_view>) {
+        return std::string_view(a) == std::string_view(b);
+    } else {
+        return a == b;
+    }
 }
-bigint len(std::vector<bigint> container){
-    return container.size();
+
+template <typename T, typename C>
+bool pyin(const T& item, const C& container) {
+    if constexpr (requires { container.contains(item); }) {
+        return container.contains(item);
+    } else if constexpr (std::is_convertible_v<const C&, std::string_view>) {
+        return std::string_view(container).find(item) != std::string_view::npos;
+    } else {
+        for (const auto& element : container) {
+            if (pyequal(item, element)) return true;
+        }
+        return false;
+    }
 }
-bigint len(std::vector<std::string> container){
-    return container.size();
+
+template <typename T, typename U>
+bool pyin(const T& item, std::initializer_list<U> options) {
+    return pyin(item, std::span<const U>(options.begin(), options.size()));
 }
-bigint len(std::vector<float> container){
-    return container.size();
+
+// A subscript's start:stop:step; the compiler emits `xs[1:]` as `xs[pyslice(1, std::nullopt, std::nullopt)]`, and a
+// bound that's left out is std::nullopt
+struct pyslice {
+    std::optional<int64_t> start, stop, step;
+
+    template <typename A, typename B, typename C>
+    pyslice(const A& start, const B& stop, const C& step) : start(bound(start)), stop(bound(stop)), step(bound(step)) {
+        if (this->step == 0) throw std::invalid_argument("slice step cannot be zero");
+    }
+
+    // First index, step and number of items when slicing a sequence of `length`, clamped as Python's slice.indices()
+    struct extent { int64_t first, step, count; };
+
+    extent indices(int64_t length) const {
+        int64_t by = step.value_or(1);
+        int64_t first = clamp(start, by < 0 ? length - 1 : 0, by, length);
+        int64_t last = clamp(stop, by < 0 ? -1 : length, by, length);
+
+        int64_t count = 0;
+        if (by > 0 && first < last) count = (last - first - 1) / by + 1;
+        if (by < 0 && last < first) count = (first - last - 1) / -by + 1;
+        return {first, by, count};
+    }
+
+    private:
+        template <typename T>
+        static std::optional<int64_t> bound(const T& value) {
+            if constexpr (std::is_same_v<T, std::nullopt_t>) return std::nullopt;
+            else return static_cast<int64_t>(value);
+        }
+
+        static int64_t clamp(std::optional<int64_t> index, int64_t missing, int64_t by, int64_t length) {
+            if (!index) return missing;
+            int64_t i = *index < 0 ? *index + length : *index;
+            if (i < 0) return by < 0 ? -1 : 0;
+            if (i >= length) return by < 0 ? length - 1 : length;
+            return i;
+        }
+};
+
+// Position of Python's `xs[index]` in a sequence of `length`: a negative index counts back from the end, and one that's
+// still out of range raises IndexError. Built with --unchecked-index (PYCOM_UNCHECKED_INDEX), the index is used as it
+// is, which takes the compare and branch out of indexing in hot loops but makes a negative index undefined behaviour
+template <typename I>
+inline std::size_t pyindex(const I& index, std::size_t length, const char* message) {
+#ifdef PYCOM_UNCHECKED_INDEX
+    return static_cast<std::size_t>(static_cast<int64_t>(index));
+#else
+    int64_t at = static_cast<int64_t>(index);
+    if (at < 0) at += static_cast<int64_t>(length);
+    if (static_cast<std::size_t>(at) >= length) [[unlikely]] throw std::out_of_range(std::string("IndexError: ") + message);
+    return static_cast<std::size_t>(at);
+#endif
 }
-std::string input(std::string prompt){
-    std::cout << prompt; std::string x; std::cin >> x; return x;
+
+// The step of a counted `for` loop over range() whose step is only known at runtime: Python raises ValueError for a
+// zero step, where the loop would otherwise never end
+template <typename S>
+inline S pystep(const S& step) {
+    if (step == 0) [[unlikely]] throw std::invalid_argument("ValueError: range() arg 3 must not be zero");
+    return step;
 }
 
+// A slice of a list or string, `xs[a:b:c]`. It refers to the elements where they are instead of copying them: they're
+// only copied when the slice is stored into a variable or passed on as a list or string (pylist and pystring convert
+// from it), so looping over, printing, comparing or searching a slice allocates nothing. A slice with step 1 is
+// contiguous, and span() and view() give it as a std::span or, for strings, a std::string_view.
+// Like any view, it must not outlive what it was sliced from
+template <typename T>
+class pyview {
+    public:
+        using value_type = T;
+        using size_type = std::size_t;
+
+        class iterator {
+            public:
+                using iterator_concept = std::forward_iterator_tag;
+                using iterator_category = std::forward_iterator_tag;
+                using value_type = T;
+                using difference_type = std::ptrdiff_t;
+                using pointer = const T*;
+                using reference = const T&;
+
+                iterator() = default;
+                iterator(const T* first, int64_t step, int64_t at) : first(first), step(step), at(at) {}
+
+                // Addressed by position, so stepping backwards past the start never forms an out of range pointer
+                const T& operator*() const { return first[at * step]; }
+                iterator& operator++() { ++at; return *this; }
+                iterator operator++(int) { iterator old = *this; ++at; return old; }
+                bool operator==(const iterator& other) const { return at == other.at; }
+
+            private:
+                const T* first = nullptr;
+                int64_t step = 1;
+                int64_t at = 0;
+        };
+
+        pyview() = default;
+        pyview(const T* first, int64_t step, size_type count) : first(first), step(step), count(count) {}
+
+        // The `sequence[slice]` of any contiguous sequence
+        pyview(const T* data, size_type length, const pyslice& slice) {
+            pyslice::extent range = slice.indices(static_cast<int64_t>(length));
+            if (range.count > 0) *this = pyview(data + range.first, range.step, range.count);
+        }
+
+        size_type size() const noexcept { return count; }
+        bool empty() const noexcept { return count == 0; }
+        explicit operator bool() const noexcept { return count != 0; }
+
+        iterator begin() const { return iterator(first, step, 0); }
+        iterator end() const { return iterator(first, step, static_cast<int64_t>(count)); }
+
+        bool contiguous() const noexcept { return step == 1 || count <= 1; }
+        std::span<const T> span() const { return {first, count}; }
+        std::string_view view() const requires std::is_same_v<T, char> { return {first, count}; }
+
+        template <typename I> requires (!std::is_same_v<I, pyslice>)
+        const T& operator[](const I& index) const {
+            return first[static_cast<int64_t>(pyindex(index, count, message())) * step];
+        }
+
+        // A slice of a slice is one more view of the same elements
+        pyview operator[](const pyslice& slice) const {
+            pyslice::extent range = slice.indices(static_cast<int64_t>(count));
+            if (range.count == 0) return pyview();
+            return pyview(first + range.first * step, range.step * step, range.count);
+        }
+
+        // `x in s[a:b]`, for a string slice a substring search
+        template <typename U>
+        bool contains(const U& item) const {
+            if constexpr (std::is_same_v<T, char> && std::is_convertible_v<const U&, std::string_view>) {
+                std::string_view needle = item;
+                if (contiguous()) return view().find(needle) != std::string_view::npos;
+                return std::search(begin(), end(), needle.begin(), needle.end()) != end();
+            } else {
+                return std::find_if(begin(), end(), [&](const T& element) { return element == item; }) != end();
+            }
+        }
+
+        // Equal to any list, string or other slice with the same elements in the same order
+        template <typename R>
+        friend bool operator==(const pyview& a, const R& b) {
+            if constexpr (std::is_same_v<T, char> && std::is_convertible_v<const R&, std::string_view>) {
+                std::string_view text = b;
+                return a.count == text.size() && std::equal(a.begin(), a.end(), text.begin());
+            } else {
+                return a.count == std::size(b) && std::equal(a.begin(), a.end(), std::begin(b));
+            }
+        }
+
+        // A string slice prints as the string would, and anything else as a list
+        void repr(fmt::memory_buffer& out) const;
+
+    private:
+        const T* first = nullptr;
+        int64_t step = 1;
+        size_type count = 0;
+
+        static const char* message() {
+            return std::is_same_v<T, char> ? "string index out of range" : "list index out of range";
+        }
+};
+
+template <typename T>
+pyint len(const pyview<T>& items) { return static_cast<int64_t>(items.size()); }
+
+// Definitions live in runtime/stdpy.cpp and are linked in from libpycomrt
+pyint len(const std::string& str);
+pyint len(const std::vector<pyint>& container);
+pyint len(const std::vector<std::string>& container);
+pyint len(const std::vector<float>& container);
+std::string input(const std::string& prompt);
+
 // This class is not mine, it was posted here https://www.daniweb.com/programming/software-development/code/252294/string-class-inherited-from-basic-string
 class pystring : public std::basic_string<char>
 {
@@ -72,15 +498,29 @@ class pystring : public std::basic_string<char>
         pystring(const char * str) : string_type(str){}
         pystring(const char * str, size_t n) : string_type(str,n) {}
         pystring(size_t n , char c ) : string_type(n,c) {}
+        // What concatenation gives, `s + "!"` being a std::string
+        pystring(const string_type& str) : string_type(str) {}
+        pystring(string_type&& str) : string_type(std::move(str)) {}
+        // Storing a slice copies its characters
+        pystring(const pyview<char>& chars) : string_type(chars.begin(), chars.end()) {}
     public:
+        // s[i] counts back from the end for a negative i, and s[a:b:c] is a view of the same characters
+        template <typename I> requires (!std::is_same_v<I, pyslice>)
+        char& operator[](const I& index) { return string_type::operator[](pyindex(index, size(), "string index out of range")); }
+        template <typename I> requires (!std::is_same_v<I, pyslice>)
+        const char& operator[](const I& index) const { return string_type::operator[](pyindex(index, size(), "string index out of range")); }
+        pyview<char> operator[](const pyslice& slice) const & { return pyview<char>(data(), size(), slice); }
+        // except of a temporary, which is gone before a for loop over the view would read it
+        pystring operator[](const pyslice& slice) && { return pystring(pyview<char>(data(), size(), slice)); }
+
         //added functionalities
-        pystring  upper()const      { return _apply(std::toupper);  }
-        pystring  lower()const      { return _apply(std::tolower);  }
+        pystring  upper()const;
+        pystring  lower()const;
         
-        bool    isDigit()const     { return _isAllDigits();	}
-        bool    islower()const      { return _checkIf(std::islower);}
-        bool    isupper()const      { return _checkIf(std::isupper);}
-        bool    isalpha()const      { return _checkIf(std::isalpha);}
+        bool    isDigit()const;
+        bool    islower()const;
+        bool    isupper()const;
+        bool    isalpha()const;
 
         int     toInt()	const       { return _convertTo<int>(*this);}		
         long    toLong()const       { return _convertTo<long>(*this);}	
@@ -88,24 +528,14 @@ class pystring : public std::basic_string<char>
         double  toDouble()const     { return _convertTo<double>(*this);}		
         size_t  toSizeT()const      { return _convertTo<size_t>(*this);}
 
-        void    reset()             { *this = pystring();	}
+        void    reset();
 
-        bool    startswith(const pystring& preFix)const {
-                    return substr(0,preFix.size()) == preFix; 
-                }
-        bool    endswith(const pystring& suffix)const	{
-                    return substr(size()-suffix.size()) == suffix; 
-                }
+        bool    startswith(const pystring& preFix)const;
+        bool    endswith(const pystring& suffix)const;
         
-        void    shuffleIt() {
-                    std::random_shuffle( begin(), end()); 
-                }
+        void    shuffleIt();
         
-        pystring  shuffled()const{
-                    pystring tmp = *this;
-                    tmp.shuffleIt();
-                    return tmp; 
-                }
+        pystring  shuffled()const;
         //conversion function
         operator const char*(){
             return c_str();
@@ -125,34 +555,224 @@ class pystring : public std::basic_string<char>
         }
 
         //takes in a function and returns a string with that function applied to the whole string
-        pystring _apply(const ApplyFunc& Applier )const{
-            _assertValidSize();
-            pystring str;
-            std::transform( begin(),end(), //from start to end
-                            std::back_insert_iterator<string_type>(str), //adjust str size
-                            Applier); //while applying a function to it
-            return str;
+        pystring _apply(const ApplyFunc& Applier )const;
+
+        bool _checkIf(const ApplyFunc& Applier)const;
+
+        bool _isAllDigits()const;
+
+        void _assertValidSize()const{
+            assert(size());
         }	
+};
+
+// print() formats with fmt into one large buffer per stream instead of going through std::cout. The buffer is written
+// out when it fills up, on flush=True, before input() reads, and when the program exits or dies of an uncaught
+// exception; like Python, a stdout that is a terminal is line buffered instead, and stderr is written out after every
+// print. The formatting itself is done by the writers in runtime/stdpy.cpp, so a program doesn't instantiate fmt
+namespace pyio {
+    // print()'s keyword arguments; the compiler turns `print(x, end="")` into `print(x, pyio::end(""))`
+    struct sep { std::string_view value; };
+    struct end { std::string_view value; };
+    struct flush { bool value; };
+    struct file { std::FILE* value; };
+
+    template <typename T> struct isoption : std::false_type {};
+    template <> struct isoption<sep> : std::true_type {};
+    template <> struct isoption<end> : std::true_type {};
+    template <> struct isoption<flush> : std::true_type {};
+    template <> struct isoption<file> : std::true_type {};
 
-        bool _checkIf(const ApplyFunc& Applier)const{
-            for(size_t indx = 0; indx != size(); ++indx){			
-                if(!Applier((*this)[indx]) )return false;
+    constexpr std::size_t buffersize = 1 << 16;
+
+    inline bool isterminal(std::FILE* stream) {
+#ifdef _WIN32
+        return _isatty(_fileno(stream));
+#else
+        return isatty(fileno(stream));
+#endif
+    }
+
+    class outbuffer {
+        public:
+            explicit outbuffer(std::FILE* stream)
+                : stream(stream), linebuffered(stream == stderr || isterminal(stream)) {}
+
+            // Static, so this runs on exit() and at the end of main()
+            ~outbuffer() { flush(); }
+
+            fmt::memory_buffer data;
+
+            void append(std::string_view text) { data.append(text.data(), text.data() + text.size()); }
+
+            void done(bool force) {
+                if (force || linebuffered) {
+                    flush();
+                } else if (data.size() >= buffersize) {
+                    write();
+                }
+            }
+
+            void write() {
+                std::fwrite(data.data(), 1, data.size(), stream);
+                data.clear();
+            }
+
+            void flush() {
+                write();
+                std::fflush(stream);
+            }
+
+            std::FILE* target() const { return stream; }
+
+        private:
+            std::FILE* stream;
+            bool linebuffered;
+    };
+
+    outbuffer& buffer(std::FILE* stream);
+
+    // For the --no-stdio-sync build flag; runs before main() through a global's initialiser
+    inline bool unsyncstdio() {
+        std::ios::sync_with_stdio(false);
+        return true;
+    }
+
+    struct options {
+        std::string_view sep = " ";
+        std::string_view end = "\n";
+        bool flush = false;
+        std::FILE* stream = stdout;
+
+        void set(const pyio::sep& option) { sep = option.value; }
+        void set(const pyio::end& option) { end = option.value; }
+        void set(const pyio::flush& option) { flush = option.value; }
+        void set(const pyio::file& option) { stream = option.value; }
+        template <typename T> void set(const T&) {}
+    };
+
+    template <typename T> struct isvector : std::false_type {};
+    template <typename T, typename A> struct isvector<std::vector<T, A>> : std::true_type {};
+
+    void writebool(fmt::memory_buffer& out, bool value);
+    void writeint(fmt::memory_buffer& out, int64_t value);
+    void writeint(fmt::memory_buffer& out, uint64_t value);
+    void writeint(fmt::memory_buffer& out, const pyint& value);
+    void writeint(fmt::memory_buffer& out, const bigint& value);
+    void writefloat(fmt::memory_buffer& out, double value);
+    void writestr(fmt::memory_buffer& out, std::string_view text);
+
+    template <typename T> void write(fmt::memory_buffer& out, const T& value);
+
+    // repr() of a list element: strings are quoted, everything else prints as it would on its own
+    template <typename T>
+    void writerepr(fmt::memory_buffer& out, const T& value) {
+        if constexpr (std::is_convertible_v<const T&, std::string_view> && !std::is_arithmetic_v<T>) {
+            std::string_view text = value;
+            out.push_back('\'');
+            out.append(text.data(), text.data() + text.size());
+            out.push_back('\'');
+        } else {
+            write(out, value);
+        }
+    }
+
+    template <typename T>
+    void write(fmt::memory_buffer& out, const T& value) {
+        if constexpr (std::is_same_v<T, bool>) {
+            writebool(out, value);
+        } else if constexpr (std::is_same_v<T, char>) {
+            out.push_back(value);
+        } else if constexpr (std::is_integral_v<T> && std::is_signed_v<T>) {
+            writeint(out, static_cast<int64_t>(value));
+        } else if constexpr (std::is_integral_v<T>) {
+            writeint(out, static_cast<uint64_t>(value));
+        } else if constexpr (std::is_floating_point_v<T>) {
+            // Python's float is a double, so that's the precision it prints at
+            writefloat(out, static_cast<double>(value));
+        } else if constexpr (std::is_convertible_v<const T&, std::string_view>) {
+            writestr(out, value);
+        } else if constexpr (std::is_same_v<T, pyint> || std::is_same_v<T, bigint>) {
+            writeint(out, value);
+        } else if constexpr (isvector<T>::value) {
+            out.push_back('[');
+            for (std::size_t i = 0; i < value.size(); ++i) {
+                if (i) {
+                    out.push_back(',');
+                    out.push_back(' ');
+                }
+                writerepr(out, value[i]);
             }
-            return true;
+            out.push_back(']');
+        } else if constexpr (requires { value.repr(out); }) {
+            // dicts and sets (pydict.hpp) write their own repr()
+            value.repr(out);
+        } else if constexpr (requires { value.has_value(); *value; }) {
+            // dict.get(key) without a default
+            if (value.has_value()) {
+                write(out, *value);
+            } else {
+                out.append(std::string_view("None"));
+            }
+        } else if constexpr (fmt::is_formattable<T>::value) {
+            fmt::format_to(std::back_inserter(out), "{}", value);
+        } else {
+            std::ostringstream stream;
+            stream << value;
+            std::string text = stream.str();
+            out.append(text.data(), text.data() + text.size());
         }
+    }
+}
 
-        bool _isAllDigits()const{
-            size_t start = 0;
-            if((*this)[0] == '-' ) 
-                start = 1;
-            for(; start < size(); ++start){
-                char value = (*this)[start];
-                if(!isdigit( value ) && value != '.' )
-                    return false;
+template <typename T>
+void pyview<T>::repr(fmt::memory_buffer& out) const {
+    if constexpr (std::is_same_v<T, char>) {
+        for (char c : *this) out.push_back(c);
+    } else {
+        out.push_back('[');
+        for (iterator at = begin(); at != end(); ++at) {
+            if (at != begin()) {
+                out.push_back(',');
+                out.push_back(' ');
             }
-            return true;
+            pyio::writerepr(out, *at);
         }
-        void _assertValidSize()const{
-            assert(size());
-        }	
-};
\ No newline at end of file
+        out.push_back(']');
+    }
+}
+
+// repr() of a value, for the messages of KeyError and ValueError
+template <typename T>
+std::string pyrepr(const T& value) {
+    fmt::memory_buffer out;
+    pyio::writerepr(out, value);
+    return std::string(out.data(), out.size());
+}
+
+// str(x): what print(x) writes
+template <typename T>
+pystring str(const T& value) {
+    fmt::memory_buffer out;
+    pyio::write(out, value);
+    return pystring(out.data(), out.size());
+}
+
+template <typename... Args>
+void print(const Args&... args) {
+    pyio::options options;
+    (options.set(args), ...);
+
+    pyio::outbuffer& out = pyio::buffer(options.stream);
+    bool first = true;
+    ([&] {
+        if constexpr (!pyio::isoption<Args>::value) {
+            if (!first) out.append(options.sep);
+            first = false;
+            pyio::write(out.data, args);
+        }
+    }(), ...);
+
+    out.append(options.end);
+    out.done(options.flush);
+}
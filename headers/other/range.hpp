@@ -4,7 +4,9 @@
 #define UTIL_LANG_RANGE_HPP
 
 #include <cmath>
+#include <cstddef>
 #include <iterator>
+#include <stdexcept>
 #include <type_traits>
 
 namespace util { namespace lang {
@@ -12,7 +14,14 @@ namespace util { namespace lang {
 namespace detail {
 
 template <typename T>
-struct range_iter_base : std::iterator<std::input_iterator_tag, T> {
+struct range_iter_base {
+    // std::iterator is deprecated in C++17, so the traits are spelt out
+    using iterator_category = std::input_iterator_tag;
+    using value_type = T;
+    using difference_type = std::ptrdiff_t;
+    using pointer = T const*;
+    using reference = T;
+
     range_iter_base(T current) : current(current) { }
 
     T operator *() const { return current; }
@@ -66,7 +75,7 @@ struct step_range_proxy {
         // Loses commutativity. Iterator-based ranges are simply broken. :-(
         bool operator ==(iterator const& other) const {
             return step_ > 0 ? current >= other.current
-                             : current < other.current;
+                             : current <= other.current;
         }
 
         bool operator !=(iterator const& other) const {
@@ -91,7 +100,15 @@ struct step_range_proxy {
             // Decreasing range
             if (begin_.step_ > T{0}) return 0;
         }
-        return std::ceil(std::abs(static_cast<double>(*end_ - *begin_) / begin_.step_));
+        // Integer ceil division; going through double loses precision for large 64-bit bounds
+        if constexpr (std::is_integral<T>::value) {
+            T span = *end_ - *begin_;
+            T step = begin_.step_;
+            if (step < T{0}) { span = -span; step = -step; }
+            return static_cast<std::size_t>((span + step - 1) / step);
+        } else {
+            return std::ceil(std::abs(static_cast<double>(*end_ - *begin_) / begin_.step_));
+        }
     }
 
 private:
@@ -115,7 +132,7 @@ struct range_proxy {
 
     iterator end() const { return end_; }
 
-    std::size_t size() const { return *end_ - *begin_; }
+    std::size_t size() const { return *end_ > *begin_ ? *end_ - *begin_ : 0; }
 
 private:
     iterator begin_;
@@ -189,8 +206,22 @@ auto range(T begin, U end) -> range_proxy<typename std::common_type<T, U>::type>
     return {static_cast<C>(begin), static_cast<C>(end)};
 }
 
+// Python's range(stop) counts from zero; the unbounded form is still available as range_from(begin)
+template <typename T>
+range_proxy<T> range(T end) {
+    return {T{}, end};
+}
+
+template <typename T, typename U, typename V>
+auto range(T begin, U end, V step) -> step_range_proxy<typename std::common_type<T, U, V>::type> {
+    using C = typename std::common_type<T, U, V>::type;
+    // As in Python, a zero step is an error rather than a range that never ends
+    if (step == 0) throw std::invalid_argument("ValueError: range() arg 3 must not be zero");
+    return {static_cast<C>(begin), static_cast<C>(end), static_cast<C>(step)};
+}
+
 template <typename T>
-infinite_range_proxy<T> range(T begin) {
+infinite_range_proxy<T> range_from(T begin) {
     return {begin};
 }
 
@@ -1,5 +1,6 @@
 import pytest
 import os
+import subprocess
 
 @pytest.fixture
 def pycom_path():
@@ -15,3 +16,14 @@ def run_check_compile(pycom_path):
 		return os.system(f"{pycom_path} -c {file}")
 
 	return check_compile
+
+
+@pytest.fixture
+def run_compiled(pycom_path, tmp_path):
+	def compile_and_run(file: str):
+		# Compiles a file, runs the executable and returns what it printed
+		executable = tmp_path / 'program'
+		os.system(f"{pycom_path} -o {executable} {file}")
+		return subprocess.run([str(executable)], capture_output=True, text=True).stdout
+
+	return compile_and_run
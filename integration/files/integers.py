@@ -0,0 +1,32 @@
+# Annotated ints crossing INT64_MAX and INT64_MIN with += and -= (what pyint's ++ and -- do too), and sums
+# that outgrow int64_t
+
+def main():
+    x: int = 9223372036854775807
+    x += 1
+    print(x)
+    x -= 1
+    print(x)
+    y: int = -9223372036854775807
+    y -= 1
+    print(y)
+    y -= 1
+    print(y)
+    y += 1
+    print(y)
+    total: int = 0
+    for i in range(20):
+        total += 10 ** 18
+    print(total)
+    a: int = 9223372036854775806
+    for i in range(3):
+        a += 1
+    print(a)
+    b: int = -9223372036854775807
+    for i in range(3):
+        b -= 1
+    print(b)
+    xs = [1, 2, 3]
+    print(sum(x * 4 * 10 ** 18 for x in xs))
+    ys = [9000000000000000000, 9000000000000000000, -9000000000000000000]
+    print(sum(ys), sum(ys[:2]))
@@ -3,4 +3,5 @@ import math
 print(math.sqrt(34))
 print(math.factorial(5))
 print(pow(math.e, math.pi))
-print(math.cos(34) - math.sin(344) + math.tan(42.3))
\ No newline at end of file
+print(math.cos(34) - math.sin(344) + math.tan(42.3))
+print(math.fsum([0.1, 0.2, 0.3]))
@@ -0,0 +1,7 @@
+import random
+
+random.seed(4)
+x = random.random()
+print(0.0 <= x and x < 1.0)
+n = random.randint(1, 6)
+print(1 <= n and n <= 6)
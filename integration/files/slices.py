@@ -0,0 +1,30 @@
+# Slices are views of the list or string they are taken from: extending that same list has to read one before the
+# list grows, and a slice of a temporary has to outlive it
+
+def make(n):
+    squares = []
+    for i in range(n):
+        squares.append(i * i)
+    return squares
+
+
+def name(n):
+    letters = "abcdefgh"
+    return letters[:n]
+
+
+def main():
+    xs = [1, 2, 3, 4, 5]
+    xs.extend(xs[1:3])
+    print(xs)
+    for i in range(4):
+        xs.extend(xs[::-2])
+    print(len(xs), xs[-1], sum(xs))
+    words = ["a", "b", "c", "d", "e", "f"]
+    words.extend(words[2:])
+    print(words)
+    for x in make(6)[::2]:
+        print(x)
+    for c in name(5)[1:]:
+        print(c)
+    print(sum(make(10)[3:7]), name(6)[::-1])
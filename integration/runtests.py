@@ -1,11 +1,10 @@
 import os
 import time
-import platform
 
 if __name__ == "__main__":
-    testdir = os.listdir("/")
-    for file in testdir:
-        code = os.system(f"pycom -c tests/{file}") if platform.system() == "Linux" else os.system(f"pycom -c tests\\\\{file}")
+    testdir = os.path.join("integration", "files")
+    # One batch invocation; pycom spreads the g++ builds over a worker pool and exits non-zero if any file failed
+    code = os.system(f"pycom -c -j {os.cpu_count()} {testdir}")
 
     time.sleep(1.5)
     print("[INFO]: Tests complete. Check for any errors in the log.")
@@ -7,13 +7,39 @@ integration_files_path = os.path.join(os.getcwd(), 'integration', 'files')
 
 @pytest.mark.parametrize('filename', [
 	'functions.py',
+	'integers.py',
 	'list_operations.py',
 	'listcomp.py',
 	'loops.py',
 	'mathlib.py',
+	'randoms.py',
+	'slices.py',
 	'strings.py'
 ])
 def check_compilation_test(run_check_compile, filename):
 	file = os.path.join(integration_files_path, filename)
 	return_code = run_check_compile(file=file)
 	assert not return_code
+
+
+def integer_overflow_test(run_compiled):
+	output = run_compiled(os.path.join(integration_files_path, 'integers.py'))
+
+	# The sums carry into a big integer past either end of int64_t and come back when they fit again, sum() included
+	assert output.split() == ['9223372036854775808', '9223372036854775807', '-9223372036854775808', '-9223372036854775809',
+		'-9223372036854775808', '20000000000000000000', '9223372036854775809', '-9223372036854775810',
+		'24000000000000000000', '9000000000000000000', '18000000000000000000']
+
+
+def slice_of_itself_test(run_compiled):
+	output = run_compiled(os.path.join(integration_files_path, 'slices.py'))
+
+	# A list extended by a slice of itself gets the elements the slice had before the list grew
+	assert output.splitlines()[:3] == ['[1, 2, 3, 4, 5, 2, 3]', '39 2 117', "['a', 'b', 'c', 'd', 'e', 'f', 'c', 'd', 'e', 'f']"]
+
+
+def slice_of_temporary_test(run_compiled):
+	output = run_compiled(os.path.join(integration_files_path, 'slices.py'))
+
+	# Slicing what a function returns, in a for loop's header or an argument, reads the elements it returned
+	assert output.splitlines()[3:] == ['0', '4', '16', 'b', 'c', 'd', 'e', '86 fedcba']
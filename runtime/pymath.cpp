@@ -0,0 +1,113 @@
+#include "headers/builtins/pymath.hpp"
+
+// Product of term(begin), ..., term(end - 1) by binary splitting: both halves are multiplied out separately and then
+// together, so the big multiplications are between operands of about the same size instead of a huge accumulator
+// times one small factor at a time. Short runs are multiplied in 64 bits first
+template <typename Term>
+static bigint product(uint64_t begin, uint64_t end, const Term& term) {
+    if (end - begin <= 32) {
+        bigint result = 1;
+        uint64_t partial = 1;
+        for (uint64_t i = begin; i < end; ++i) {
+            uint64_t factor = term(i), next;
+            if (__builtin_mul_overflow(partial, factor, &next)) {
+                result *= partial;
+                next = factor;
+            }
+            partial = next;
+        }
+        return result * partial;
+    }
+
+    uint64_t middle = begin + (end - begin) / 2;
+    return product(begin, middle, term) * product(middle, end, term);
+}
+
+// first * (first + step) * ... with `count` factors
+static bigint rangeproduct(uint64_t first, uint64_t count, uint64_t step) {
+    return product(0, count, [=](uint64_t i) { return first + i * step; });
+}
+
+// n! as CPython computes it: the odd part is the product over i of the odd numbers up to n >> i, built up from the
+// smallest of those ranges so each is only multiplied out once, and the power of two is a final shift
+static bigint bigfactorial(uint64_t n) {
+    bigint inner = 1, outer = 1;
+    for (int i = std::bit_width(n) - 1; i >= 0; --i) {
+        // The odd numbers in ((n >> (i + 1)), (n >> i)], written as 2j + 1
+        uint64_t lo = ((n >> (i + 1)) + 1) / 2, hi = ((n >> i) + 1) / 2;
+        if (hi > lo) {
+            inner *= rangeproduct(2 * lo + 1, hi - lo, 2);
+            outer *= inner;
+        }
+    }
+    return outer << static_cast<unsigned>(n - std::popcount(n));
+}
+
+// Largest n comb() sieves the primes up to, in a bit each
+static constexpr uint64_t sievelimit = uint64_t(1) << 28;
+
+static uint64_t nonnegative(const pyint& value, const char* function) {
+    if (value < 0) throw std::domain_error(std::string(function) + "() not defined for negative values");
+    if (value.isbig()) throw std::overflow_error(std::string(function) + "() argument should not exceed 9223372036854775807");
+    return static_cast<uint64_t>(value);
+}
+
+pyint math::factorial(const pyint& n){
+    return bigfactorial(nonnegative(n, "factorial"));
+}
+
+pyint math::perm(const pyint& n, const pyint& k){
+    uint64_t top = nonnegative(n, "perm"), count = nonnegative(k, "perm");
+    if (count > top) return 0;
+
+    return rangeproduct(top - count + 1, count, 1);
+}
+
+pyint math::comb(const pyint& n, const pyint& k){
+    uint64_t top = nonnegative(n, "comb"), count = nonnegative(k, "comb");
+    if (count > top) return 0;
+    count = std::min(count, top - count);
+
+    if (count <= 64 || top > sievelimit) {
+        // Dividing by k! once costs far less than dividing at every step of the multiplicative formula
+        return rangeproduct(top - count + 1, count, 1) / bigfactorial(count);
+    }
+
+    // Otherwise there's no division at all: by Legendre's formula each prime p divides n! / (k! (n - k)!) as often as
+    // the sum over i of n / p**i - k / p**i - (n - k) / p**i, and that power of p is at most n, so it fits in 64 bits
+    std::vector<bool> composite(top + 1);
+    std::vector<uint64_t> powers;
+    for (uint64_t p = 2; p <= top; ++p) {
+        if (composite[p]) continue;
+        for (uint64_t multiple = p * p; multiple <= top; multiple += p) composite[multiple] = true;
+
+        uint64_t power = 1;
+        for (uint64_t q = p; q <= top; q *= p) {
+            uint64_t carries = top / q - count / q - (top - count) / q;
+            while (carries--) power *= p;
+            if (q > top / p) break;
+        }
+        if (power > 1) powers.push_back(power);
+    }
+
+    return product(0, powers.size(), [&](uint64_t i) { return powers[i]; });
+}
+
+pyint math::isqrt(const pyint& n){
+    if (n < 0) throw std::domain_error("isqrt() argument must be nonnegative");
+    if (!n.isbig()) return isqrt(static_cast<long long int>(n));
+
+    // CPython's algorithm: each step doubles the number of correct leading bits of the root, working on only as many
+    // of n's top bits as that needs, so all but the last steps are on numbers much smaller than n
+    bigint value = n.tobigint();
+    uint64_t c = boost::multiprecision::msb(value) / 2, d = 0;
+    bigint a = 1;
+    for (int s = std::bit_width(c) - 1; s >= 0; --s) {
+        uint64_t e = d;
+        d = c >> s;
+        a = (a << static_cast<unsigned>(d - e - 1)) + (value >> static_cast<unsigned>(2 * c - e - d + 1)) / a;
+    }
+    if (a * a > value) --a;
+
+    return a;
+}
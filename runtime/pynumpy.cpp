@@ -0,0 +1,181 @@
+#include <cstdlib>
+#include <new>
+#ifdef __linux__
+#include <sys/mman.h>
+#endif
+#include "headers/builtins/pynumpy.hpp"
+
+// Blocks of 4MB and more are marked for transparent huge pages, as numpy marks them: a new array's memory is then
+// faulted in 2MB at a time rather than 4KB at a time, which is most of the cost of making a large temporary
+void* numpy::allocate(size_t bytes) {
+    void* block = std::malloc(bytes);
+    if (!block) throw std::bad_alloc();
+
+#ifdef MADV_HUGEPAGE
+    if (bytes >= (size_t(1) << 22)) {
+        uintptr_t offset = 4096 - reinterpret_cast<uintptr_t>(block) % 4096;
+        madvise(static_cast<char*>(block) + offset, bytes - offset, MADV_HUGEPAGE);
+    }
+#endif
+    return block;
+}
+
+void numpy::release(void* block) {
+    std::free(block);
+}
+
+// Printing follows numpy's array2string with its default options, so arrays print exactly as they do under CPython
+
+static constexpr int64_t linewidth = 75;
+
+// The string lengths of the integer and fractional parts of `text`, split at its decimal point
+static std::pair<size_t, size_t> parts(const std::string& text) {
+    size_t point = text.find('.');
+    return {point, text.size() - point - 1};
+}
+
+// Drops the trailing zeros of a fixed-precision number, keeping the decimal point: "1.50000000" becomes "1.5"
+static std::string trimzeros(std::string text) {
+    size_t last = text.find_last_not_of('0');
+    text.erase(last + 1);
+    return text;
+}
+
+std::vector<std::string> numpy::formatvalues(const std::vector<double>& values) {
+    std::vector<double> finite;
+    double largest = 0, smallest = inf;
+    bool neginf = false;
+    for (double value : values) {
+        if (std::isinf(value) && value < 0) neginf = true;
+        if (!std::isfinite(value)) continue;
+        finite.push_back(value);
+        largest = std::max(largest, std::fabs(value));
+        if (value != 0) smallest = std::min(smallest, std::fabs(value));
+    }
+
+    // Scientific notation once the magnitudes are too large, too small or too far apart for positional
+    bool scientific = smallest != inf && (largest >= 1e8 || smallest < 0.0001 || largest / smallest > 1000);
+
+    // Every value with at most 8 fractional digits (fewer if that's enough to tell it apart), then padded to the
+    // widest integer and fractional parts so the columns line up
+    size_t padleft = 0, padright = 0, precision = 0, exponent = 0;
+    std::vector<std::string> texts;
+    for (double value : finite) {
+        if (scientific) {
+            std::string text = fmt::format("{:.8e}", value);
+            size_t e = text.find('e');
+            std::string mantissa = trimzeros(text.substr(0, e));
+            auto [whole, fraction] = parts(mantissa);
+            padleft = std::max(padleft, whole);
+            precision = std::max(precision, fraction);
+            exponent = std::max(exponent, text.size() - e - 2);
+        } else {
+            texts.push_back(trimzeros(fmt::format("{:.8f}", value)));
+            auto [whole, fraction] = parts(texts.back());
+            padleft = std::max(padleft, whole);
+            padright = std::max(padright, fraction);
+        }
+    }
+    if (scientific) padright = exponent + 2 + precision;
+    if (finite.size() != values.size()) {
+        // nan and inf are right-aligned in the same width
+        int64_t offset = padright + 1;
+        padleft = std::max<int64_t>({static_cast<int64_t>(padleft), 3 - offset, 3 + neginf - offset});
+    }
+
+    std::vector<std::string> words;
+    size_t next = 0;
+    for (double value : values) {
+        std::string word;
+        if (std::isnan(value)) {
+            word = "nan";
+        } else if (std::isinf(value)) {
+            word = value < 0 ? "-inf" : "inf";
+        } else if (scientific) {
+            std::string text = fmt::format("{:.{}e}", value, precision);
+            size_t e = text.find('e');
+            std::string digits = text.substr(e + 2);
+            if (precision == 0) text.insert(e++, ".");
+            word = text.substr(0, e + 2) + std::string(exponent - std::min(exponent, digits.size()), '0') + digits;
+            word.insert(0, padleft - std::min(padleft, parts(word).first), ' ');
+            words.push_back(word);
+            continue;
+        } else {
+            word = texts[next++];
+            auto [whole, fraction] = parts(word);
+            word = std::string(padleft - whole, ' ') + word + std::string(padright - fraction, ' ');
+            words.push_back(word);
+            continue;
+        }
+        words.push_back(std::string(std::max<int64_t>(padleft + padright + 1 - word.size(), 0), ' ') + word);
+    }
+    return words;
+}
+
+std::vector<std::string> numpy::formatvalues(const std::vector<int64_t>& values) {
+    size_t width = 0;
+    for (int64_t value : values) width = std::max(width, fmt::formatted_size("{}", value));
+
+    std::vector<std::string> words;
+    for (int64_t value : values) words.push_back(fmt::format("{:>{}}", value, width));
+    return words;
+}
+
+std::vector<std::string> numpy::formatvalues(const std::vector<bool>& values) {
+    std::vector<std::string> words;
+    for (bool value : values) words.push_back(value ? " True" : "False");
+    return words;
+}
+
+// Appends `word` to the line being built, first moving on to a new line if it would pass `width`
+static void extendline(std::string& out, std::string& line, const std::string& word, int64_t width, const std::string& indent) {
+    if (static_cast<int64_t>(line.size() + word.size()) > width && line.size() > indent.size()) {
+        out += line.substr(0, line.find_last_not_of(' ') + 1) + "\n";
+        line = indent;
+    }
+    line += word;
+}
+
+// numpy's _formatArray: the innermost axis is filled into lines, outer axes put their rows on separate lines (with
+// a blank line between blocks of more than one dimension), and each nested level is indented by one more space
+static std::string recurse(const std::vector<std::string>& words, size_t& next, const numpy::dims& shape, int64_t axis, const std::string& indent, int64_t width, bool summary) {
+    int64_t remaining = shape.size() - axis;
+    if (remaining == 0) return words[next++];
+
+    std::string nextindent = indent + " ";
+    int64_t length = shape[axis];
+    bool edges = summary && length > 2 * numpy::edgeitems;
+    int64_t leading = edges ? numpy::edgeitems : 0, trailing = edges ? numpy::edgeitems : length;
+
+    std::string out;
+    if (remaining == 1) {
+        int64_t elementwidth = width - 1;
+        std::string line = indent;
+        for (int64_t i = 0; i < leading; ++i) {
+            extendline(out, line, recurse(words, next, shape, axis + 1, nextindent, width - 1, summary), elementwidth, indent);
+            line += " ";
+        }
+        if (edges) {
+            extendline(out, line, "...", elementwidth, indent);
+            line += " ";
+        }
+        for (int64_t i = trailing; i > 1; --i) {
+            extendline(out, line, recurse(words, next, shape, axis + 1, nextindent, width - 1, summary), elementwidth, indent);
+            line += " ";
+        }
+        extendline(out, line, recurse(words, next, shape, axis + 1, nextindent, width - 1, summary), elementwidth, indent);
+        out += line;
+    } else {
+        std::string separator(remaining - 1, '\n');
+        for (int64_t i = 0; i < leading; ++i) out += indent + recurse(words, next, shape, axis + 1, nextindent, width - 1, summary) + separator;
+        if (edges) out += indent + "..." + separator;
+        for (int64_t i = trailing; i > 1; --i) out += indent + recurse(words, next, shape, axis + 1, nextindent, width - 1, summary) + separator;
+        out += indent + recurse(words, next, shape, axis + 1, nextindent, width - 1, summary);
+    }
+    return "[" + out.substr(indent.size()) + "]";
+}
+
+std::string numpy::layout(const std::vector<std::string>& words, const dims& shape, bool summary) {
+    size_t next = 0;
+    return recurse(words, next, shape, 0, " ", linewidth, summary);
+}
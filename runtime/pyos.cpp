@@ -0,0 +1,113 @@
+#include "headers/builtins/pyos.hpp"
+#include <boost/filesystem.hpp>
+
+#if defined(_WIN32)
+    #define PLATFORM_NAME "windows"
+#elif defined(_WIN64)
+    #define PLATFORM_NAME "windows"
+#elif defined(__linux__)
+    #define PLATFORM_NAME "linux"
+#elif defined(__unix__) || !defined(__APPLE__) && defined(__MACH__)
+    #include <sys/param.h>
+    #if defined(BSD)
+        #define PLATFORM_NAME "bsd"
+    #endif
+#elif defined(__hpux)
+    #define PLATFORM_NAME "hp-ux"
+#elif defined(_AIX)
+    #define PLATFORM_NAME "aix"
+#elif defined(__APPLE__) && defined(__MACH__)
+    #include <TargetConditionals.h>
+    #elif TARGET_OS_MAC == 1
+        #define PLATFORM_NAME "osx" 
+    #endif
+
+const char *Os::get_platform_name() {
+    return (PLATFORM_NAME == NULL) ? "" : PLATFORM_NAME;
+}
+
+// No exceptions on failed process, just return error code
+int Os::system(const char * cmd){
+    int code = std::system(cmd);
+    return code;
+}
+
+int Os::system(const std::string& cmd){
+    int code = std::system(cmd.c_str());
+    return code;
+}
+
+// Throw exception if returned bool is false, else it was successful
+void Os::remove(const char * filename){
+    std::filesystem::__cxx11::path pfilename = filename;
+
+    if (!std::filesystem::remove(pfilename)){
+        // Throw std::filesystem::__cxx11::filesystem_error; not implemented
+    }
+    
+}
+
+void Os::remove(const std::string& filename){
+    std::filesystem::__cxx11::path pfilename = filename;
+
+    if (!std::filesystem::remove(pfilename)){
+        // Throw std::filesystem::__cxx11::filesystem_error; not implemented
+    }
+}
+
+// Throws std::filesystem::__cxx11::filesystem_error automatically if file not found
+void Os::rename(const char * old, const char * _new){
+    std::filesystem::__cxx11::path oldp = old;
+    std::filesystem::__cxx11::path newp = _new;
+    std::filesystem::rename(oldp, newp);
+    
+}
+
+void Os::rename(const std::string& old, const char * _new){
+    std::filesystem::__cxx11::path oldp = old;
+    std::filesystem::__cxx11::path newp = _new;
+    std::filesystem::rename(oldp, newp);
+    
+}
+
+void Os::rename(const std::string& old, const std::string& _new){
+    std::filesystem::__cxx11::path oldp = old;
+    std::filesystem::__cxx11::path newp = _new;
+    std::filesystem::rename(oldp, newp);
+    
+}
+
+void Os::rename(const char * old, const std::string& _new){
+    std::filesystem::__cxx11::path oldp = old;
+    std::filesystem::__cxx11::path newp = _new;
+    std::filesystem::rename(oldp, newp);
+}
+
+// Throws std::filesystem::__cxx11::filesystem_error automatically if file not found
+void Os::chdir(const char * path){
+    std::filesystem::current_path(path);
+}
+
+void Os::chdir(const std::string& path){
+    std::filesystem::current_path(path);
+}
+
+void Os::mkdir(const char * path){
+    std::filesystem::create_directory(path);
+}
+
+void Os::mkdir(const std::string& path){
+    std::filesystem::create_directory(path);
+}
+
+void Os::rmdir(const char * path){
+    // Not implemented
+}
+
+void Os::rmdir(const std::string& path){
+    // Not implemented
+}
+
+std::string Os::getcwd(){
+    return std::filesystem::current_path();
+}
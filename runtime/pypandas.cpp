@@ -0,0 +1,1078 @@
+#include <algorithm>
+#include <charconv>
+#include <cstdlib>
+#include <cstring>
+#include <deque>
+#include <exception>
+#include <fstream>
+#include <iterator>
+#include <numeric>
+#include <thread>
+#include <unordered_map>
+#ifndef _WIN32
+#include <fcntl.h>
+#include <sys/ioctl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#endif
+#include "headers/builtins/pypandas.hpp"
+
+namespace pandas {
+
+static bool ismissing(int64_t) { return false; }
+static bool ismissing(boolean) { return false; }
+static bool ismissing(double value) { return std::isnan(value); }
+static bool ismissing(const std::string& value) { return value.empty(); }
+
+std::string dtypename(const values& column) {
+    static const char* names[] = {"int64", "float64", "bool", "str"};
+    return names[column.index()];
+}
+
+int64_t length(const values& column) {
+    return std::visit([](const auto& x) { return static_cast<int64_t>(x.size()); }, column);
+}
+
+values take(const values& column, const array<int64_t>& positions) {
+    return std::visit([&](const auto& x) -> values {
+        using column = std::remove_cvref_t<decltype(x)>;
+        if constexpr (std::is_same_v<column, array<std::string>>) {
+            // Copy-constructed in place: default-constructing every string first and then assigning costs a second pass
+            column out;
+            out.reserve(positions.size());
+            for (int64_t position : positions) out.emplace_back(x[position]);
+            return out;
+        } else {
+            column out(positions.size());
+            for (size_t i = 0; i < positions.size(); ++i) out[i] = x[positions[i]];
+            return out;
+        }
+    }, column);
+}
+
+// The positions begin, begin + 1, ..., end - 1
+static array<int64_t> span(int64_t begin, int64_t end) {
+    array<int64_t> positions(std::max<int64_t>(end - begin, 0));
+    std::iota(positions.begin(), positions.end(), begin);
+    return positions;
+}
+
+// The labels of the rows at `positions`: their positions themselves under the default index
+static pandas::index takelabels(const pandas::index& rows, const array<int64_t>& positions) {
+    values labels = rows.labels ? take(*rows.labels, positions) : values(positions);
+    return {std::make_shared<values>(std::move(labels)), rows.name};
+}
+
+// Scalars
+
+std::string scalar::str() const {
+    fmt::memory_buffer out;
+    std::visit([&](const auto& x) { pyio::write(out, x); }, value);
+    return fmt::to_string(out);
+}
+
+static int64_t integer(const scalar& x) {
+    return x.value.index() == 2 ? std::get<bool>(x.value) : std::get<int64_t>(x.value);
+}
+
+// Ints (and bools) stay ints unless the other side is a float, as in Python
+template <typename F>
+static scalar arithmetic(const scalar& a, const scalar& b, F f, const char* symbol) {
+    if (!a.isnumber() || !b.isnumber())
+        throw std::invalid_argument(std::string("unsupported operand type(s) for ") + symbol);
+    if (a.value.index() == 1 || b.value.index() == 1) return f(a.number(), b.number());
+    return f(integer(a), integer(b));
+}
+
+scalar operator+(const scalar& a, const scalar& b) {
+    if (!a.isnumber() && !b.isnumber()) return std::get<std::string>(a.value) + std::get<std::string>(b.value);
+    return arithmetic(a, b, [](auto x, auto y) { return scalar(x + y); }, "+");
+}
+
+scalar operator-(const scalar& a, const scalar& b) {
+    return arithmetic(a, b, [](auto x, auto y) { return scalar(x - y); }, "-");
+}
+
+scalar operator*(const scalar& a, const scalar& b) {
+    return arithmetic(a, b, [](auto x, auto y) { return scalar(x * y); }, "*");
+}
+
+scalar operator/(const scalar& a, const scalar& b) {
+    if (b.isnumber() && b.number() == 0) throw std::domain_error("division by zero");
+    return arithmetic(a, b, [](auto x, auto y) { return scalar(static_cast<double>(x) / static_cast<double>(y)); }, "/");
+}
+
+bool operator==(const scalar& a, const scalar& b) {
+    if (a.isnumber() != b.isnumber()) return false;
+    if (!a.isnumber()) return a.value == b.value;
+    return a.number() == b.number();
+}
+
+bool operator<(const scalar& a, const scalar& b) {
+    if (a.isnumber() != b.isnumber()) throw std::invalid_argument("'<' not supported between instances of 'str' and a number");
+    if (!a.isnumber()) return std::get<std::string>(a.value) < std::get<std::string>(b.value);
+    return a.number() < b.number();
+}
+
+// Series
+
+const values& Series::data() const {
+    if (!column) throw std::out_of_range("KeyError: '" + name + "'");
+    return *column;
+}
+
+// pandas' nansum: NaN counts as 0, and the rest is numpy's pairwise sum
+static double nansum(const array<double>& x) {
+    array<double> filled(x.size());
+    for (size_t i = 0; i < x.size(); ++i) filled[i] = std::isnan(x[i]) ? 0. : x[i];
+    return 0. + numpy::pairwise(filled.data(), filled.size(), 1);
+}
+
+template <typename T>
+static int64_t total(const array<T>& x) {
+    int64_t lanes[numpy::lanes] = {};
+    size_t i = 0, n = x.size();
+    for (; i + numpy::lanes <= n; i += numpy::lanes)
+        for (int64_t j = 0; j < numpy::lanes; ++j) lanes[j] += x[i + j];
+    int64_t result = 0;
+    for (; i < n; ++i) result += x[i];
+    for (int64_t j = 0; j < numpy::lanes; ++j) result += lanes[j];
+    return result;
+}
+
+scalar Series::sum() const {
+    return std::visit([](const auto& x) -> scalar {
+        using T = typename std::decay_t<decltype(x)>::value_type;
+        if constexpr (std::is_same_v<T, double>) {
+            return nansum(x);
+        } else if constexpr (std::is_same_v<T, std::string>) {
+            std::string result;
+            for (const std::string& text : x) result += text;
+            return result;
+        } else {
+            return total(x);
+        }
+    }, data());
+}
+
+int64_t Series::count() const {
+    return std::visit([](const auto& x) -> int64_t {
+        return std::count_if(x.begin(), x.end(), [](const auto& value) { return !ismissing(value); });
+    }, data());
+}
+
+double Series::mean() const {
+    return std::visit([this](const auto& x) -> double {
+        using T = typename std::decay_t<decltype(x)>::value_type;
+        if constexpr (std::is_same_v<T, std::string>) {
+            throw std::invalid_argument("Could not convert string to numeric: mean of a str column");
+        } else {
+            int64_t n = count();
+            if (n == 0) return nan;
+            if constexpr (std::is_same_v<T, double>) return nansum(x) / n;
+            else return static_cast<double>(total(x)) / n;
+        }
+    }, data());
+}
+
+// The smallest (or largest) value that isn't missing; NaN if there's none
+static scalar extreme(const values& column, bool largest) {
+    return std::visit([largest](const auto& x) -> scalar {
+        using T = typename std::decay_t<decltype(x)>::value_type;
+        const T* best = nullptr;
+        for (const T& value : x) {
+            if (ismissing(value)) continue;
+            if (!best || (largest ? *best < value : value < *best)) best = &value;
+        }
+        if (!best) return nan;
+        if constexpr (std::is_same_v<T, boolean>) return static_cast<bool>(*best);
+        else return *best;
+    }, column);
+}
+
+scalar Series::min() const {
+    return extreme(data(), false);
+}
+
+scalar Series::max() const {
+    return extreme(data(), true);
+}
+
+Series Series::take(const array<int64_t>& positions) const {
+    return Series(pandas::take(data(), positions), name, takelabels(rows, positions));
+}
+
+Series Series::head(int64_t n) const {
+    int64_t length = size();
+    Series result(pandas::take(data(), span(0, n < 0 ? length + n : std::min(n, length))), name, rows);
+    if (rows.labels) result.rows = takelabels(rows, span(0, result.size()));
+    return result;
+}
+
+Series Series::tail(int64_t n) const {
+    int64_t length = size();
+    return take(span(n < 0 ? -n : std::max<int64_t>(length - n, 0), length));
+}
+
+array<int64_t> selected(const Series& mask, int64_t rows) {
+    const auto* flags = std::get_if<array<boolean>>(&mask.data());
+    if (!flags) throw std::invalid_argument("Cannot index with a non-boolean Series; the mask must have dtype bool");
+    if (static_cast<int64_t>(flags->size()) != rows)
+        throw std::invalid_argument("Item wrong length " + std::to_string(flags->size()) + " instead of " + std::to_string(rows) + ".");
+
+    array<int64_t> positions(total(*flags));
+    int64_t next = 0;
+    for (int64_t i = 0; i < rows; ++i)
+        if ((*flags)[i]) positions[next++] = i;
+    return positions;
+}
+
+Series Series::operator[](const Series& mask) const {
+    return take(selected(mask, size()));
+}
+
+Series operator~(const Series& a) {
+    values result = std::visit([](const auto& x) -> values {
+        using T = typename std::decay_t<decltype(x)>::value_type;
+        if constexpr (std::is_same_v<T, boolean> || std::is_same_v<T, int64_t>) {
+            array<T> out(x.size());
+            for (size_t i = 0; i < x.size(); ++i) out[i] = std::is_same_v<T, boolean> ? !x[i] : ~x[i];
+            return out;
+        } else {
+            throw std::invalid_argument("bad operand type for unary ~: " + dtypename(x));
+        }
+    }, a.data());
+    return Series(std::move(result), a.name, a.labels());
+}
+
+Series operator-(const Series& a) {
+    values result = std::visit([](const auto& x) -> values {
+        using T = typename std::decay_t<decltype(x)>::value_type;
+        if constexpr (std::is_same_v<T, double> || std::is_same_v<T, int64_t>) {
+            array<T> out(x.size());
+            for (size_t i = 0; i < x.size(); ++i) out[i] = -x[i];
+            return out;
+        } else {
+            throw std::invalid_argument("bad operand type for unary -: " + dtypename(x));
+        }
+    }, a.data());
+    return Series(std::move(result), a.name, a.labels());
+}
+
+pyint len(const Series& s) {
+    return s.size();
+}
+
+// Printing follows pandas' repr with its default display options, so frames and series print as they do under CPython
+
+static std::string rjust(const std::string& text, size_t width) {
+    return text.size() >= width ? text : std::string(width - text.size(), ' ') + text;
+}
+
+static std::string ljust(const std::string& text, size_t width) {
+    return text.size() >= width ? text : text + std::string(width - text.size(), ' ');
+}
+
+// Python's str.center, which puts an odd leftover space on the left only when the width is odd
+static std::string center(const std::string& text, size_t width) {
+    if (text.size() >= width) return text;
+    size_t margin = width - text.size(), left = margin / 2 + (margin & width & 1);
+    return std::string(left, ' ') + text + std::string(margin - left, ' ');
+}
+
+static size_t widest(const array<std::string>& texts) {
+    size_t width = 0;
+    for (const std::string& text : texts) width = std::max(width, text.size());
+    return width;
+}
+
+// Whether a cell is a plain number with a decimal point, the kind pandas trims zeros from
+static bool hasdecimal(const std::string& text) {
+    size_t i = text.find_first_not_of(' ');
+    if (i < text.size() && (text[i] == '-' || text[i] == '+')) ++i;
+    size_t digits = i;
+    while (i < text.size() && std::isdigit(static_cast<unsigned char>(text[i]))) ++i;
+    if (i == digits || i == text.size() || text[i] != '.') return false;
+    return std::all_of(text.begin() + i + 1, text.end(), [](char c) { return std::isdigit(static_cast<unsigned char>(c)); });
+}
+
+// pandas' FloatArrayFormatter: six decimals with a space for the sign, then as many trailing zeros as every number
+// has dropped (keeping one after the point); scientific if a value would show as zero, or is large and long
+static array<std::string> formatfloats(const array<double>& values) {
+    auto render = [&](bool scientific) {
+        array<std::string> cells;
+        for (double value : values)
+            cells.push_back(std::isnan(value) ? "NaN" : scientific ? fmt::format("{: .6e}", value) : fmt::format("{: .6f}", value));
+        return cells;
+    };
+
+    array<std::string> cells = render(false);
+    while (true) {
+        bool any = false, zeros = true;
+        for (const std::string& cell : cells) {
+            if (!hasdecimal(cell)) continue;
+            any = true;
+            zeros = zeros && cell.back() == '0';
+        }
+        if (!any || !zeros) break;
+        for (std::string& cell : cells)
+            if (hasdecimal(cell)) cell.pop_back();
+    }
+    for (std::string& cell : cells)
+        if (hasdecimal(cell) && cell.back() == '.') cell += '0';
+
+    bool large = false, small = false;
+    for (double value : values) {
+        large = large || std::fabs(value) > 1e6;
+        small = small || (std::fabs(value) < 1e-6 && value != 0);
+    }
+    if (small || (widest(cells) > 12 && large)) return render(true);
+    return cells;
+}
+
+// Every cell with a leading space, as pandas leaves room for a sign
+static array<std::string> formatcells(const values& column) {
+    return std::visit([](const auto& x) {
+        using T = typename std::decay_t<decltype(x)>::value_type;
+        array<std::string> cells;
+        if constexpr (std::is_same_v<T, double>) {
+            cells = formatfloats(x);
+        } else {
+            for (const T& value : x) {
+                if constexpr (std::is_same_v<T, int64_t>) cells.push_back(fmt::format("{: d}", value));
+                else if constexpr (std::is_same_v<T, boolean>) cells.push_back(value ? " True" : " False");
+                else cells.push_back(" " + (value.empty() ? std::string("NaN") : value));
+            }
+        }
+        return cells;
+    }, column);
+}
+
+static array<std::string> formatlabels(const pandas::index& rows, const array<int64_t>& positions) {
+    array<std::string> labels;
+    if (!rows.labels) {
+        for (int64_t position : positions) labels.push_back(std::to_string(position));
+        return labels;
+    }
+    std::visit([&](const auto& x) {
+        using T = typename std::decay_t<decltype(x)>::value_type;
+        for (int64_t position : positions) {
+            fmt::memory_buffer out;
+            if constexpr (std::is_same_v<T, boolean>) pyio::write(out, static_cast<bool>(x[position]));
+            else if constexpr (std::is_same_v<T, std::string>) pyio::write(out, x[position].empty() ? std::string("NaN") : x[position]);
+            else pyio::write(out, x[position]);
+            labels.push_back(fmt::to_string(out));
+        }
+    }, *rows.labels);
+    return labels;
+}
+
+// The rows that are printed: all of them, or the first and last few of a long result
+static array<int64_t> shownrows(int64_t rows) {
+    if (rows <= maxrows) return span(0, rows);
+    array<int64_t> positions = span(0, edgerows);
+    for (int64_t i = rows - edgerows; i < rows; ++i) positions.push_back(i);
+    return positions;
+}
+
+std::string Series::str() const {
+    int64_t n = size();
+    std::string footer = name.empty() ? "" : "Name: " + name + ", ";
+    if (n > maxrows) footer += "Length: " + std::to_string(n) + ", ";
+    footer += "dtype: " + dtype();
+    if (n == 0) return "Series([], " + footer + ")";
+
+    array<int64_t> positions = shownrows(n);
+    array<std::string> cells = formatcells(pandas::take(data(), positions));
+    array<std::string> labels = formatlabels(rows, positions);
+    size_t cellwidth = widest(cells), labelwidth = widest(labels);
+
+    std::string out = rows.name.empty() ? "" : rows.name + "\n";
+    for (size_t k = 0; k < positions.size(); ++k) {
+        if (n > maxrows && k == edgerows)
+            out += std::string(labelwidth, ' ') + "   " + center(cellwidth > 3 ? "..." : "..", cellwidth) + "\n";
+        out += ljust(labels[k], labelwidth) + "   " + rjust(cells[k], cellwidth) + "\n";
+    }
+    return out + footer;
+}
+
+// DataFrames
+
+DataFrame::DataFrame(std::initializer_list<std::pair<std::string, Series>> columns) {
+    for (const auto& [name, column] : columns) {
+        names.push_back(name);
+        series.push_back(column);
+    }
+    shape = {series.empty() ? 0 : series.front().size(), static_cast<int64_t>(series.size())};
+    sized = true;
+    settle();
+}
+
+DataFrame::DataFrame(std::vector<Series> columns, int64_t rows, pandas::index labels) : series(std::move(columns)), rows(std::move(labels)) {
+    for (const Series& column : series) names.push_back(column.name);
+    shape = {rows, static_cast<int64_t>(series.size())};
+    sized = true;
+    settle();
+}
+
+void DataFrame::settle() const {
+    if (!sized && !series.empty() && series.front().column) {
+        shape.rows = series.front().broadcast ? 0 : series.front().size();
+        sized = true;
+    }
+    for (size_t k = 0; k < series.size(); ++k) {
+        Series& column = series[k];
+        column.name = names[k];
+        const values& data = column.data();
+        if (column.broadcast) {
+            column.column = std::make_shared<values>(std::visit([this](const auto& x) -> values {
+                return std::remove_cvref_t<decltype(x)>(shape.rows, x.front());
+            }, data));
+            column.broadcast = false;
+        } else if (column.size() != shape.rows) {
+            throw std::invalid_argument("Length of values (" + std::to_string(column.size()) + ") does not match length of index (" + std::to_string(shape.rows) + ")");
+        }
+        column.rows = rows;
+    }
+}
+
+Series& DataFrame::operator[](const std::string& name) {
+    auto found = std::find(names.begin(), names.end(), name);
+    if (found == names.end()) {
+        names.push_back(name);
+        series.push_back(Series::missing(name));
+        ++shape.columns;
+        return series.back();
+    }
+    settle();
+    return series[found - names.begin()];
+}
+
+DataFrame DataFrame::operator[](std::initializer_list<std::string> selection) const {
+    settle();
+    std::vector<Series> columns;
+    for (const std::string& name : selection) {
+        auto found = std::find(names.begin(), names.end(), name);
+        if (found == names.end()) throw std::out_of_range("KeyError: \"['" + name + "'] not in index\"");
+        columns.push_back(series[found - names.begin()]);
+    }
+    return DataFrame(std::move(columns), shape.rows, rows);
+}
+
+DataFrame DataFrame::operator[](const Series& mask) const {
+    settle();
+    return take(selected(mask, shape.rows));
+}
+
+const std::vector<Series>& DataFrame::data() const {
+    settle();
+    return series;
+}
+
+DataFrame DataFrame::take(const array<int64_t>& positions) const {
+    std::vector<Series> columns;
+    for (const Series& column : data()) columns.push_back(Series(pandas::take(column.data(), positions), column.name));
+    return DataFrame(std::move(columns), positions.size(), takelabels(rows, positions));
+}
+
+DataFrame DataFrame::head(int64_t n) const {
+    int64_t length = static_cast<int64_t>(len(*this));
+    array<int64_t> positions = span(0, n < 0 ? length + n : std::min(n, length));
+    if (rows.labels) return take(positions);
+
+    // The first rows keep the default index
+    std::vector<Series> columns;
+    for (const Series& column : series) columns.push_back(Series(pandas::take(column.data(), positions), column.name));
+    return DataFrame(std::move(columns), positions.size());
+}
+
+DataFrame DataFrame::tail(int64_t n) const {
+    int64_t length = static_cast<int64_t>(len(*this));
+    return take(span(n < 0 ? -n : std::max<int64_t>(length - n, 0), length));
+}
+
+GroupBy DataFrame::groupby(const std::string& key) const {
+    std::vector<Series> others;
+    const Series* column = nullptr;
+    for (const Series& candidate : data()) {
+        if (candidate.name == key) column = &candidate;
+        else others.push_back(candidate);
+    }
+    if (!column) throw std::out_of_range("KeyError: '" + key + "'");
+    return GroupBy(factorize(*column), DataFrame(std::move(others), shape.rows, rows));
+}
+
+GroupBy DataFrame::groupby(const Series& key) const {
+    if (key.size() != len(*this)) throw std::invalid_argument("Grouper and axis must be same length");
+    return GroupBy(factorize(key), *this);
+}
+
+pyint len(const DataFrame& frame) {
+    frame.data();
+    return frame.shape.rows;
+}
+
+// The width results are fitted to, as pandas takes it from the terminal (or $COLUMNS), else 80
+static size_t linewidth() {
+    if (const char* columns = std::getenv("COLUMNS"); columns && std::atoi(columns) > 0) return std::atoi(columns);
+#ifdef TIOCGWINSZ
+    winsize size;
+    if (isatty(STDOUT_FILENO) && ioctl(STDOUT_FILENO, TIOCGWINSZ, &size) == 0 && size.ws_col > 0) return size.ws_col;
+#endif
+    return 80;
+}
+
+// Python's round(n / 2), which rounds halves to even
+static size_t halfround(size_t n) {
+    size_t half = n / 2;
+    return n % 2 && half % 2 ? half + 1 : half;
+}
+
+std::string DataFrame::str() const {
+    const std::vector<Series>& columns = data();
+    int64_t n = shape.rows;
+    if (n == 0) {
+        std::string list;
+        for (const std::string& name : names) list += (list.empty() ? "" : ", ") + name;
+        return "Empty DataFrame\nColumns: [" + list + "]\nIndex: []";
+    }
+
+    array<int64_t> positions = shownrows(n);
+    size_t headers = rows.name.empty() ? 1 : 2;
+
+    // Each printed column is its header line(s) and then its cells, all padded to one width
+    array<std::string> index = {""};
+    if (headers == 2) index.push_back(rows.name);
+    for (const std::string& label : formatlabels(rows, positions)) index.push_back(label);
+    size_t indexwidth = widest(index);
+    for (std::string& text : index) text = ljust(text, indexwidth);
+
+    std::vector<array<std::string>> strcols;
+    for (const Series& column : columns) {
+        array<std::string> texts = {(column.data().index() == 3 ? "" : " ") + column.name};
+        if (headers == 2) texts.push_back("");
+        for (const std::string& cell : formatcells(pandas::take(column.data(), positions))) texts.push_back(cell);
+        size_t width = widest(texts);
+        for (std::string& text : texts) text = rjust(text, width);
+        strcols.push_back(std::move(texts));
+    }
+
+    // Too wide for the line: the middle columns are dropped one at a time until it fits, and half the number that's
+    // left is printed from each end with a column of dots between
+    std::vector<size_t> widths = {indexwidth};
+    size_t total = indexwidth;
+    for (const auto& texts : strcols) {
+        widths.push_back(texts.front().size());
+        total += texts.front().size() + 1;
+    }
+    size_t dotcolumn = 0;
+    int64_t excess = static_cast<int64_t>(total) - static_cast<int64_t>(linewidth()) + 1;
+    if (excess > 0) {
+        while (excess > 0 && widths.size() > 1) {
+            size_t middle = halfround(widths.size());
+            excess -= widths[middle] + 1;
+            widths.erase(widths.begin() + middle);
+        }
+        size_t fitted = std::max<size_t>(widths.size() - 1, 2);
+        if (fitted < strcols.size()) {
+            size_t half = fitted / 2;
+            strcols.erase(strcols.begin() + half, strcols.end() - half);
+            strcols.insert(strcols.begin() + half, array<std::string>(index.size(), " ..."));
+            dotcolumn = half + 1;
+        }
+    }
+
+    strcols.insert(strcols.begin(), std::move(index));
+    std::string out;
+    for (size_t line = 0; line < strcols.front().size(); ++line) {
+        if (n > maxrows && line == headers + edgerows) {
+            for (size_t k = 0; k < strcols.size(); ++k) {
+                size_t width = strcols[k][line].size();
+                std::string dots = width > 3 ? "..." : "..";
+                if (k) out += ' ';
+                out += k == 0 ? ljust(dots, width) : k == dotcolumn ? center("...", width) : rjust(dots, width);
+            }
+            out += '\n';
+        }
+        for (size_t k = 0; k < strcols.size(); ++k) {
+            if (k) out += ' ';
+            out += strcols[k][line];
+        }
+        if (line + 1 < strcols.front().size()) out += '\n';
+    }
+
+    if (n > maxrows || dotcolumn) out += "\n\n[" + std::to_string(n) + " rows x " + std::to_string(columns.size()) + " columns]";
+    return out;
+}
+
+// Grouping
+
+template <typename T>
+static void factorize(const array<T>& keys, grouping& groups) {
+    using K = std::conditional_t<std::is_same_v<T, std::string>, std::string_view, T>;
+    std::unordered_map<K, int64_t> ids;
+    std::vector<K> uniques;
+    for (size_t i = 0; i < keys.size(); ++i) {
+        if (ismissing(keys[i])) {
+            groups.codes[i] = -1;
+            continue;
+        }
+        auto [found, added] = ids.try_emplace(K(keys[i]), uniques.size());
+        if (added) uniques.push_back(K(keys[i]));
+        groups.codes[i] = found->second;
+    }
+
+    // Group numbers follow the sorted keys
+    array<int64_t> order = span(0, uniques.size()), rank(uniques.size());
+    std::sort(order.begin(), order.end(), [&](int64_t a, int64_t b) { return uniques[a] < uniques[b]; });
+    array<T> sorted;
+    for (size_t j = 0; j < order.size(); ++j) {
+        rank[order[j]] = j;
+        sorted.push_back(T(uniques[order[j]]));
+    }
+    for (int64_t& code : groups.codes)
+        if (code >= 0) code = rank[code];
+
+    groups.count = uniques.size();
+    groups.keys.labels = std::make_shared<values>(std::move(sorted));
+}
+
+std::shared_ptr<const grouping> factorize(const Series& key) {
+    auto groups = std::make_shared<grouping>();
+    groups->codes.resize(key.size());
+    std::visit([&](const auto& x) { factorize(x, *groups); }, key.data());
+    groups->keys.name = key.name;
+    return groups;
+}
+
+// Sums of doubles per group with Kahan's compensation, as pandas' group_sum and group_mean; NaN is skipped and
+// counted in `observed` only when it isn't
+template <typename T>
+static array<double> compensatedsums(const array<T>& x, const grouping& groups, array<int64_t>& observed) {
+    array<double> sums(groups.count), compensation(groups.count);
+    observed.assign(groups.count, 0);
+    for (size_t i = 0; i < x.size(); ++i) {
+        int64_t group = groups.codes[i];
+        double value = static_cast<double>(x[i]);
+        if (group < 0 || std::isnan(value)) continue;
+        ++observed[group];
+        double y = value - compensation[group];
+        double t = sums[group] + y;
+        compensation[group] = t - sums[group] - y;
+        // An infinite value makes the compensation NaN, which would turn the sum NaN instead of infinite
+        if (std::isnan(compensation[group])) compensation[group] = 0;
+        sums[group] = t;
+    }
+    return sums;
+}
+
+template <typename T>
+static values aggregate(const array<T>& x, const grouping& groups, reduction how) {
+    const array<int64_t>& codes = groups.codes;
+    if (how == reduction::count) {
+        array<int64_t> counts(groups.count);
+        for (size_t i = 0; i < x.size(); ++i)
+            if (codes[i] >= 0 && !ismissing(x[i])) ++counts[codes[i]];
+        return counts;
+    }
+
+    if (how == reduction::min || how == reduction::max) {
+        array<T> out(groups.count);
+        array<boolean> seen(groups.count);
+        for (size_t i = 0; i < x.size(); ++i) {
+            int64_t group = codes[i];
+            if (group < 0 || ismissing(x[i])) continue;
+            if (!seen[group] || (how == reduction::min ? x[i] < out[group] : out[group] < x[i])) out[group] = x[i];
+            seen[group] = 1;
+        }
+        if constexpr (std::is_same_v<T, double>)
+            for (int64_t group = 0; group < groups.count; ++group)
+                if (!seen[group]) out[group] = nan;
+        return out;
+    }
+
+    if constexpr (std::is_same_v<T, std::string>) {
+        if (how == reduction::mean) throw std::invalid_argument("agg function failed [how->mean,dtype->str]");
+        array<std::string> out(groups.count);
+        for (size_t i = 0; i < x.size(); ++i)
+            if (codes[i] >= 0) out[codes[i]] += x[i];
+        return out;
+    } else {
+        array<int64_t> observed;
+        if (how == reduction::mean) {
+            array<double> means = compensatedsums(x, groups, observed);
+            for (int64_t group = 0; group < groups.count; ++group)
+                means[group] = observed[group] ? means[group] / observed[group] : nan;
+            return means;
+        }
+        if constexpr (std::is_same_v<T, double>) {
+            return compensatedsums(x, groups, observed);
+        } else {
+            array<int64_t> sums(groups.count);
+            for (size_t i = 0; i < x.size(); ++i)
+                if (codes[i] >= 0) sums[codes[i]] += x[i];
+            return sums;
+        }
+    }
+}
+
+values aggregate(const values& column, const grouping& groups, reduction how) {
+    return std::visit([&](const auto& x) { return aggregate(x, groups, how); }, column);
+}
+
+static Series groupsizes(const grouping& groups) {
+    array<int64_t> sizes(groups.count);
+    for (int64_t code : groups.codes)
+        if (code >= 0) ++sizes[code];
+    return Series(std::move(sizes), "", groups.keys);
+}
+
+Series SeriesGroupBy::size() const {
+    return groupsizes(*groups);
+}
+
+Series GroupBy::size() const {
+    return groupsizes(*groups);
+}
+
+DataFrame GroupBy::reduce(reduction how) const {
+    std::vector<Series> columns;
+    for (const Series& column : frame.data()) columns.push_back(Series(aggregate(column.data(), *groups, how), column.name));
+    return DataFrame(std::move(columns), groups->count, groups->keys);
+}
+
+// Reading CSV files
+
+namespace {
+    // A file's bytes: memory-mapped, so the parsing threads read the page cache directly, or else read in whole
+    class mapping {
+        public:
+            explicit mapping(const std::string& path) {
+#ifdef _WIN32
+                std::ifstream file(path, std::ios::binary);
+                if (!file) throw std::runtime_error("[Errno 2] No such file or directory: '" + path + "'");
+                contents.assign(std::istreambuf_iterator<char>(file), std::istreambuf_iterator<char>());
+                text = contents;
+#else
+                int fd = open(path.c_str(), O_RDONLY);
+                if (fd < 0) throw std::runtime_error("[Errno 2] No such file or directory: '" + path + "'");
+                struct stat info;
+                if (fstat(fd, &info) == 0 && info.st_size > 0) {
+                    bytes = info.st_size;
+                    address = mmap(nullptr, bytes, PROT_READ, MAP_PRIVATE, fd, 0);
+                    if (address == MAP_FAILED) {
+                        close(fd);
+                        throw std::runtime_error("could not map '" + path + "' into memory");
+                    }
+                    madvise(address, bytes, MADV_SEQUENTIAL);
+                    text = std::string_view(static_cast<const char*>(address), bytes);
+                }
+                close(fd);
+#endif
+            }
+
+            ~mapping() {
+#ifndef _WIN32
+                if (bytes) munmap(address, bytes);
+#endif
+            }
+
+            mapping(const mapping&) = delete;
+            mapping& operator=(const mapping&) = delete;
+
+            std::string_view text;
+
+        private:
+#ifdef _WIN32
+            std::string contents;
+#else
+            void* address = nullptr;
+            size_t bytes = 0;
+#endif
+    };
+
+    // The narrowest type seen for a column so far; each can only widen, to float64 from int64 and to str from any
+    enum class kind : uint8_t { none, integer, floating, flag, text };
+
+    struct chunkscan {
+        int64_t rows = 0;
+        int64_t lines = 0;
+        std::vector<kind> kinds;
+        array<boolean> missing;
+        int64_t badline = -1;
+        int64_t badfields = 0;
+    };
+
+    // Where the parsing threads write a column's values
+    struct target {
+        kind type;
+        int64_t* integers = nullptr;
+        double* floats = nullptr;
+        boolean* flags = nullptr;
+        std::string* texts = nullptr;
+    };
+}
+
+// pandas' default na_values
+static bool ismissing(std::string_view field) {
+    static constexpr std::string_view markers[] = {
+        "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA",
+        "NULL", "NaN", "None", "n/a", "nan", "null",
+    };
+    if (field.empty()) return true;
+    if (field.size() > 8) return false;
+    char first = field[0];
+    if (std::isdigit(static_cast<unsigned char>(first)) || (first == '-' && field.size() > 1 && std::isdigit(static_cast<unsigned char>(field[1]))))
+        if (field.find('#') == std::string_view::npos) return false;
+    return std::find(std::begin(markers), std::end(markers), field) != std::end(markers);
+}
+
+// A number's text without surrounding spaces or a leading '+', which std::from_chars doesn't take
+static std::string_view numeric(std::string_view field) {
+    size_t first = field.find_first_not_of(' '), last = field.find_last_not_of(' ');
+    if (first == std::string_view::npos) return {};
+    field = field.substr(first, last - first + 1);
+    if (field.size() > 1 && field[0] == '+' && field[1] != '-') field.remove_prefix(1);
+    return field;
+}
+
+static bool parse(std::string_view field, int64_t& value) {
+    field = numeric(field);
+    auto [end, error] = std::from_chars(field.data(), field.data() + field.size(), value);
+    return !field.empty() && error == std::errc() && end == field.data() + field.size();
+}
+
+static bool parse(std::string_view field, double& value) {
+    field = numeric(field);
+    auto [end, error] = std::from_chars(field.data(), field.data() + field.size(), value);
+    return !field.empty() && error == std::errc() && end == field.data() + field.size();
+}
+
+static bool parse(std::string_view field, boolean& value) {
+    if (field == "True" || field == "TRUE" || field == "true") value = 1;
+    else if (field == "False" || field == "FALSE" || field == "false") value = 0;
+    else return false;
+    return true;
+}
+
+static kind widen(kind current, std::string_view field) {
+    int64_t integer;
+    double floating;
+    boolean flag;
+    if (current == kind::text) return kind::text;
+    if ((current == kind::none || current == kind::integer) && parse(field, integer)) return kind::integer;
+    if ((current == kind::none || current == kind::integer || current == kind::floating) && parse(field, floating)) return kind::floating;
+    if ((current == kind::none || current == kind::flag) && parse(field, flag)) return kind::flag;
+    return kind::text;
+}
+
+static kind join(kind a, kind b) {
+    if (a == kind::none || a == b) return b;
+    if (b == kind::none) return a;
+    if ((a == kind::integer || a == kind::floating) && (b == kind::integer || b == kind::floating)) return kind::floating;
+    return kind::text;
+}
+
+// Splits a line at its commas. A quoted field may hold commas and doubled quotes, and is unquoted into `scratch` when
+// it has any of the latter; a quoted field can't span lines
+static void splitline(std::string_view line, std::vector<std::string_view>& fields, std::deque<std::string>& scratch) {
+    fields.clear();
+    scratch.clear();
+    size_t i = 0;
+    while (true) {
+        if (i < line.size() && line[i] == '"') {
+            std::string unquoted;
+            bool escaped = false;
+            size_t j = i + 1;
+            for (; j < line.size(); ++j) {
+                if (line[j] != '"') continue;
+                if (j + 1 < line.size() && line[j+1] == '"') {
+                    escaped = true;
+                    ++j;
+                    continue;
+                }
+                break;
+            }
+            std::string_view inner = line.substr(i + 1, std::min(j, line.size()) - i - 1);
+            if (escaped) {
+                for (size_t k = 0; k < inner.size(); ++k) {
+                    unquoted += inner[k];
+                    if (inner[k] == '"') ++k;
+                }
+                inner = scratch.emplace_back(std::move(unquoted));
+            }
+            fields.push_back(inner);
+            i = line.find(',', j);
+        } else {
+            size_t comma = line.find(',', i);
+            fields.push_back(line.substr(i, comma == std::string_view::npos ? std::string_view::npos : comma - i));
+            i = comma;
+        }
+        if (i == std::string_view::npos || i >= line.size()) break;
+        ++i;
+    }
+}
+
+// Calls f(line) for each non-empty line of text, without its line end
+template <typename F>
+static void eachline(std::string_view text, F f) {
+    size_t start = 0;
+    while (start < text.size()) {
+        const void* found = std::memchr(text.data() + start, '\n', text.size() - start);
+        size_t end = found ? static_cast<const char*>(found) - text.data() : text.size();
+        std::string_view line = text.substr(start, end - start);
+        if (!line.empty() && line.back() == '\r') line.remove_suffix(1);
+        f(line);
+        start = end + 1;
+    }
+}
+
+// Runs f(0), ..., f(count - 1) on threads of their own, passing on the first exception any of them throws
+template <typename F>
+static void parallel(size_t count, F f) {
+    std::vector<std::exception_ptr> errors(count);
+    {
+        std::vector<std::jthread> threads;
+        for (size_t k = 1; k < count; ++k)
+            threads.emplace_back([&, k] {
+                try { f(k); } catch (...) { errors[k] = std::current_exception(); }
+            });
+        try { f(0); } catch (...) { errors[0] = std::current_exception(); }
+    }
+    for (const std::exception_ptr& error : errors)
+        if (error) std::rethrow_exception(error);
+}
+
+DataFrame read_csv(const std::string& path) {
+    mapping file(path);
+    std::string_view text = file.text;
+
+    // The header is the first line that isn't empty
+    std::vector<std::string_view> fields;
+    std::deque<std::string> scratch;
+    size_t bodystart = text.size();
+    int64_t headerlines = 0;
+    array<std::string> names;
+    for (size_t start = 0; start < text.size();) {
+        size_t end = std::min(text.find('\n', start), text.size());
+        std::string_view line = text.substr(start, end - start);
+        if (!line.empty() && line.back() == '\r') line.remove_suffix(1);
+        ++headerlines;
+        start = end + 1;
+        if (line.empty()) continue;
+        splitline(line, fields, scratch);
+        for (std::string_view field : fields) names.emplace_back(field);
+        bodystart = std::min(start, text.size());
+        break;
+    }
+    if (names.empty()) throw std::runtime_error("No columns to parse from file");
+    std::string_view body = text.substr(bodystart);
+    size_t width = names.size();
+
+    // Chunks of at least 1MB, one per hardware thread at most, each ending at a line end
+    size_t threads = std::max<size_t>(std::thread::hardware_concurrency(), 1);
+    size_t count = std::clamp<size_t>(body.size() >> 20, 1, threads);
+    std::vector<std::string_view> chunks;
+    size_t begin = 0;
+    for (size_t k = 1; k <= count && begin < body.size(); ++k) {
+        size_t end = k == count ? body.size() : std::max(begin, body.size() * k / count);
+        end = std::min(body.find('\n', end), body.size());
+        if (end < body.size()) ++end;
+        chunks.push_back(body.substr(begin, end - begin));
+        begin = end;
+    }
+
+    // First pass: the rows in each chunk and the type each column needs there
+    std::vector<chunkscan> scans(chunks.size());
+    parallel(chunks.size(), [&](size_t k) {
+        chunkscan& scan = scans[k];
+        scan.kinds.assign(width, kind::none);
+        scan.missing.assign(width, 0);
+        std::vector<std::string_view> fields;
+        std::deque<std::string> scratch;
+        eachline(chunks[k], [&](std::string_view line) {
+            ++scan.lines;
+            if (line.empty()) return;
+            splitline(line, fields, scratch);
+            if (fields.size() > width && scan.badline < 0) {
+                scan.badline = scan.lines;
+                scan.badfields = fields.size();
+            }
+            for (size_t c = 0; c < width; ++c) {
+                if (c >= fields.size() || ismissing(fields[c])) scan.missing[c] = 1;
+                else scan.kinds[c] = widen(scan.kinds[c], fields[c]);
+            }
+            ++scan.rows;
+        });
+    });
+
+    array<int64_t> offsets = {0};
+    int64_t lines = headerlines;
+    for (const chunkscan& scan : scans) {
+        if (scan.badline >= 0)
+            throw std::runtime_error("Error tokenizing data. C error: Expected " + std::to_string(width) + " fields in line " + std::to_string(lines + scan.badline) + ", saw " + std::to_string(scan.badfields));
+        lines += scan.lines;
+        offsets.push_back(offsets.back() + scan.rows);
+    }
+    int64_t rows = offsets.back();
+
+    // Ints with a gap are floats, and bools with a gap strings; a column with nothing in it is float64 NaN
+    std::vector<Series> columns;
+    std::vector<target> targets;
+    for (size_t c = 0; c < width; ++c) {
+        kind type = kind::none;
+        bool missing = false;
+        for (const chunkscan& scan : scans) {
+            type = join(type, scan.kinds[c]);
+            missing = missing || scan.missing[c];
+        }
+        if (type == kind::none || (type == kind::integer && missing)) type = kind::floating;
+        if (type == kind::flag && missing) type = kind::text;
+
+        target place{type};
+        values data;
+        if (type == kind::integer) data = array<int64_t>(rows);
+        else if (type == kind::floating) data = array<double>(rows);
+        else if (type == kind::flag) data = array<boolean>(rows);
+        else data = array<std::string>(rows);
+        columns.push_back(Series(std::move(data), names[c]));
+
+        std::visit([&](const auto& x) {
+            using T = typename std::decay_t<decltype(x)>::value_type;
+            T* start = const_cast<T*>(x.data());
+            if constexpr (std::is_same_v<T, int64_t>) place.integers = start;
+            else if constexpr (std::is_same_v<T, double>) place.floats = start;
+            else if constexpr (std::is_same_v<T, boolean>) place.flags = start;
+            else place.texts = start;
+        }, columns.back().data());
+        targets.push_back(place);
+    }
+
+    // Second pass: every chunk parses its rows into place
+    parallel(chunks.size(), [&](size_t k) {
+        int64_t row = offsets[k];
+        std::vector<std::string_view> fields;
+        std::deque<std::string> scratch;
+        eachline(chunks[k], [&](std::string_view line) {
+            if (line.empty()) return;
+            splitline(line, fields, scratch);
+            for (size_t c = 0; c < width; ++c) {
+                const target& place = targets[c];
+                std::string_view field = c < fields.size() ? fields[c] : std::string_view();
+                bool missing = ismissing(field);
+                switch (place.type) {
+                    case kind::integer: parse(field, place.integers[row]); break;
+                    case kind::floating: if (missing || !parse(field, place.floats[row])) place.floats[row] = nan; break;
+                    case kind::flag: parse(field, place.flags[row]); break;
+                    default: if (!missing) place.texts[row] = field; break;
+                }
+            }
+            ++row;
+        });
+    });
+
+    return DataFrame(std::move(columns), rows);
+}
+
+}
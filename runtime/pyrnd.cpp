@@ -0,0 +1,46 @@
+#include "headers/builtins/pyrnd.hpp"
+
+std::mt19937_64& Rnd::engine(){
+    thread_local std::mt19937_64 gen = []{
+        std::random_device device;
+        std::seed_seq seq{device(), device(), device(), device()};
+        return std::mt19937_64(seq);
+    }();
+
+    return gen;
+}
+
+// Standard normal values, kept per thread: std::normal_distribution makes them in pairs and hands out the spare next
+static std::normal_distribution<double>& standardnormal(){
+    thread_local std::normal_distribution<double> distribution(0.0, 1.0);
+    return distribution;
+}
+
+void Rnd::seed(){
+    std::random_device device;
+    std::seed_seq seq{device(), device(), device(), device()};
+    engine().seed(seq);
+    standardnormal().reset();
+}
+
+void Rnd::seed(long long int value){
+    engine().seed(static_cast<std::mt19937_64::result_type>(value));
+    standardnormal().reset();
+}
+
+long long int Rnd::randint(long long int min, long long int max){
+    if (min > max) throw std::invalid_argument("empty range for randint()");
+    return std::uniform_int_distribution<long long int>(min, max)(engine());
+}
+
+double Rnd::random(){
+    return std::uniform_real_distribution<double>(0.0, 1.0)(engine());
+}
+
+double Rnd::uniform(double a, double b){
+    return a + (b - a) * random();
+}
+
+double Rnd::gauss(double mu, double sigma){
+    return mu + sigma * standardnormal()(engine());
+}
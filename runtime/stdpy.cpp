@@ -0,0 +1,214 @@
+#include "headers/builtins/stdpy.hpp"
+
+pyint len(const std::string& str){
+    return str.length();
+}
+pyint len(const std::vector<pyint>& container){
+    return container.size();
+}
+pyint len(const std::vector<std::string>& container){
+    return container.size();
+}
+pyint len(const std::vector<float>& container){
+    return container.size();
+}
+namespace pyio {
+    outbuffer& buffer(std::FILE* stream) {
+        static outbuffer out(stdout);
+        static outbuffer err(stderr);
+        if (stream == stdout) return out;
+        if (stream == stderr) return err;
+
+        // Any other stream shares one buffer, which is flushed (by its destructor) when a different stream takes it over
+        static std::unique_ptr<outbuffer> other;
+        if (!other || other->target() != stream) other = std::make_unique<outbuffer>(stream);
+        return *other;
+    }
+
+    // An uncaught exception ends the program without running destructors, so what print() buffered is written out
+    // before the default handler reports the exception and aborts
+    static std::terminate_handler previous = std::set_terminate([] {
+        buffer(stdout).flush();
+        buffer(stderr).flush();
+        previous();
+    });
+
+    void writebool(fmt::memory_buffer& out, bool value) {
+        writestr(out, value ? "True" : "False");
+    }
+
+    void writeint(fmt::memory_buffer& out, int64_t value) {
+        fmt::format_to(std::back_inserter(out), "{}", value);
+    }
+
+    void writeint(fmt::memory_buffer& out, uint64_t value) {
+        fmt::format_to(std::back_inserter(out), "{}", value);
+    }
+
+    void writeint(fmt::memory_buffer& out, const pyint& value) {
+        if (value.isbig()) {
+            writestr(out, value.str());
+        } else {
+            writeint(out, static_cast<int64_t>(value));
+        }
+    }
+
+    void writeint(fmt::memory_buffer& out, const bigint& value) {
+        writestr(out, value.str());
+    }
+
+    void writefloat(fmt::memory_buffer& out, double value) {
+        // Shortest round-trip digits, as Python's repr(); a whole number still gets its ".0"
+        std::size_t start = out.size();
+        fmt::format_to(std::back_inserter(out), "{}", value);
+        if (std::all_of(out.data() + start, out.data() + out.size(), [](char c) { return c == '-' || (c >= '0' && c <= '9'); })) {
+            out.push_back('.');
+            out.push_back('0');
+        }
+    }
+
+    void writestr(fmt::memory_buffer& out, std::string_view text) {
+        out.append(text.data(), text.data() + text.size());
+    }
+}
+
+std::string input(const std::string& prompt){
+    // Whatever print() has buffered has to be out before the prompt, and the prompt before reading
+    pyio::buffer(stdout).flush();
+    std::cout << prompt << std::flush; std::string x; std::cin >> x; return x;
+}
+
+// result * square ** exp by squaring, once the numbers no longer fit in 64 bits
+static bigint bigpow(bigint result, bigint square, uint64_t exp){
+    while (exp) {
+        if (exp & 1) result *= square;
+        exp >>= 1;
+        if (exp) square *= square;
+    }
+    return result;
+}
+
+pyint intpow(const pyint& base, const pyint& exp){
+    if (exp < 0) throw std::domain_error("pow() of an int to a negative power needs a float base");
+    if (exp.isbig()) {
+        // Only 0, 1 and -1 have a power this large that fits in memory
+        if (base == 0 || base == 1) return base;
+        if (base == -1) return (exp & 1) == 1 ? -1 : 1;
+        throw std::overflow_error("exponent too large");
+    }
+
+    uint64_t e = static_cast<uint64_t>(exp);
+    if (base.isbig()) return bigpow(1, base.tobigint(), e);
+
+    int64_t result = 1, square = static_cast<int64_t>(base), product;
+    while (true) {
+        if (e & 1) {
+            if (__builtin_mul_overflow(result, square, &product)) return bigpow(result, square, e);
+            result = product;
+        }
+        e >>= 1;
+        if (!e) return result;
+        if (__builtin_mul_overflow(square, square, &product)) return bigpow(result, bigint(square) * square, e);
+        square = product;
+    }
+}
+
+// Modular inverse by the extended Euclidean algorithm, for pow() with a negative exponent
+static bigint inverse(const bigint& value, const bigint& modulus){
+    bigint r0 = modulus, r1 = value, t0 = 0, t1 = 1;
+    while (r1 != 0) {
+        bigint quotient = r0 / r1;
+        r0 -= quotient * r1;
+        std::swap(r0, r1);
+        t0 -= quotient * t1;
+        std::swap(t0, t1);
+    }
+    if (r0 != 1) throw std::domain_error("base is not invertible for the given modulus");
+
+    return t0 < 0 ? bigint(t0 + modulus) : t0;
+}
+
+pyint intpow(const pyint& base, const pyint& exp, const pyint& mod){
+    if (!mod) throw std::domain_error("pow() 3rd argument cannot be 0");
+
+    // Worked out modulo |mod|; as in Python the result then takes the sign of mod
+    pyint modulus = mod < 0 ? -mod : mod;
+    pyint b = base % modulus, e = exp, result;
+    if (e < 0) {
+        b = inverse(b.tobigint(), modulus.tobigint());
+        e = -e;
+    }
+
+    if (modulus == 1) {
+        result = 0;
+    } else if (!modulus.isbig() && !e.isbig()) {
+        // Residues are below 2**63, so their products fit in 128 bits
+        uint64_t m = static_cast<uint64_t>(modulus), square = static_cast<uint64_t>(b), n = static_cast<uint64_t>(e), r = 1;
+        while (n) {
+            if (n & 1) r = static_cast<unsigned __int128>(r) * square % m;
+            n >>= 1;
+            if (n) square = static_cast<unsigned __int128>(square) * square % m;
+        }
+        result = r;
+    } else {
+        result = bigint(boost::multiprecision::powm(b.tobigint(), e.tobigint(), modulus.tobigint()));
+    }
+
+    return mod < 0 && result != 0 ? result - modulus : result;
+}
+
+pystring pystring::upper()const      { return _apply(std::toupper);  }
+pystring pystring::lower()const      { return _apply(std::tolower);  }
+
+bool pystring::isDigit()const     { return _isAllDigits();	}
+bool pystring::islower()const      { return _checkIf(std::islower);}
+bool pystring::isupper()const      { return _checkIf(std::isupper);}
+bool pystring::isalpha()const      { return _checkIf(std::isalpha);}
+
+void pystring::reset()             { *this = pystring();	}
+
+bool pystring::startswith(const pystring& preFix)const {
+    return substr(0,preFix.size()) == preFix; 
+}
+bool pystring::endswith(const pystring& suffix)const	{
+    return substr(size()-suffix.size()) == suffix; 
+}
+
+void pystring::shuffleIt() {
+    std::random_shuffle( begin(), end()); 
+}
+
+pystring pystring::shuffled()const{
+    pystring tmp = *this;
+    tmp.shuffleIt();
+    return tmp; 
+}
+
+//takes in a function and returns a string with that function applied to the whole string
+pystring pystring::_apply(const ApplyFunc& Applier )const{
+    _assertValidSize();
+    pystring str;
+    std::transform( begin(),end(), //from start to end
+                    std::back_insert_iterator<string_type>(str), //adjust str size
+                    Applier); //while applying a function to it
+    return str;
+}	
+
+bool pystring::_checkIf(const ApplyFunc& Applier)const{
+    for(size_t indx = 0; indx != size(); ++indx){			
+        if(!Applier((*this)[indx]) )return false;
+    }
+    return true;
+}
+
+bool pystring::_isAllDigits()const{
+    size_t start = 0;
+    if((*this)[0] == '-' ) 
+        start = 1;
+    for(; start < size(); ++start){
+        char value = (*this)[start];
+        if(!isdigit( value ) && value != '.' )
+            return false;
+    }
+    return true;
+}
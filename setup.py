@@ -16,7 +16,8 @@ setup(
     install_requires=install_requires,
     entry_points={
         'console_scripts': [
-            'pycom=pycom.main:main'
+            'pycom=pycom.main:main',
+            'pycom-client=pycom.client:main'
         ]
     }
 )
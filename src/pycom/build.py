@@ -0,0 +1,141 @@
+import io
+import os
+import platform
+import subprocess
+import threading
+from functools import lru_cache
+
+from pycom import cache
+from pycom import pch
+from pycom import runtime
+from pycom.emitter import Emitter
+
+PLATFORM = platform.system()
+
+# Directory containing headers/; passed to g++ so generated code compiles from any working directory
+ROOTDIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+HEADERSDIR = os.path.join(ROOTDIR, "headers")
+
+RUNTIMEDIR = os.path.join(ROOTDIR, "runtime")
+
+
+@lru_cache(maxsize=None)
+def gppversion():
+    try:
+        return subprocess.run(["g++", "--version"], capture_output=True, text=True).stdout.split("\n")[0]
+
+    except FileNotFoundError:
+        return ""
+
+
+def optflag(fastmath: bool):
+    if fastmath:
+        return '-O3'
+    elif PLATFORM == "Linux":
+        return '-O2'
+    else:
+        return '-O3'
+
+
+def gppflags(fastmath: bool, uncheckedindex: bool = False):
+    flags = [
+        "-std=c++20",
+        optflag(fastmath),
+        "-w",
+        "-I", ROOTDIR,
+    ]
+
+    if uncheckedindex:
+        # Drops the negative index and bounds checks from list and string indexing (pyindex() in stdpy.hpp)
+        flags.append("-DPYCOM_UNCHECKED_INDEX")
+
+    return flags
+
+
+def gpp(code, outname: str, flags: list, link: list = ()):
+    cmd = [
+        "g++",
+        *flags,
+        "-xc++",
+        "-o", outname,
+        "-",
+        *link,
+    ]
+
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stdin=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+    if not isinstance(code, Emitter):
+        return process.communicate(code.encode('utf-8'))
+
+    # Stream the emitter's sections straight into g++'s stdin; stderr is drained on a separate thread so g++ can never
+    # block on a full pipe while we're still feeding it source
+    errors = []
+    reader = threading.Thread(target=lambda: errors.append(process.stderr.read()))
+    reader.start()
+
+    try:
+        with io.TextIOWrapper(process.stdin, encoding='utf-8') as stdin:
+            code.writeto(stdin)
+    except BrokenPipeError:
+        # g++ gave up early; its stderr says why
+        pass
+
+    output = process.stdout.read()
+    reader.join()
+    process.wait()
+
+    return output, errors[0]
+
+
+def prebuild(fastmath: bool, usepch: bool = False, uncheckedindex: bool = False):
+    # Builds the shared artifacts compilecode() depends on, so parallel builds don't all try to at once
+    flags = gppflags(fastmath, uncheckedindex)
+    runtime.ensurelib(flags, gppversion(), ROOTDIR)
+    if usepch:
+        pch.ensurepch(flags, gppversion(), HEADERSDIR)
+
+
+def compilecode(code, outname: str, fastmath: bool, usecache: bool = True, usepch: bool = False,
+                uncheckedindex: bool = False):
+    # Returns (stdout, stderr, cachehit); a hit means an identical build was copied out of the cache
+    # With usepch, `code` must have been generated without the prelude (compiler.Compile(pch=True))
+    flags = gppflags(fastmath, uncheckedindex)
+    buildflags = flags
+    link = runtime.linkflags(flags, gppversion())
+
+    if usepch:
+        buildflags = [*flags, "-include", pch.preludeheader(flags, gppversion())]
+
+    if fastmath:
+        # libpycomrt carries LTO bytecode, so this lets g++ inline the runtime into the program
+        link = ["-flto=auto", *link]
+    else:
+        # Otherwise the linker plugin would still run LTO over the runtime's bytecode; its ordinary code is used instead
+        link = ["-fno-lto", *link]
+
+    if usecache:
+        key = cache.cachekey(code, gppversion(), " ".join(buildflags + link),
+                             cache.dirdigest(HEADERSDIR), cache.dirdigest(RUNTIMEDIR))
+
+        if cache.lookup(key, outname):
+            return b"", b"", True
+
+    liberror = runtime.ensurelib(flags, gppversion(), ROOTDIR)
+    if liberror != b"":
+        return b"", liberror, False
+
+    if usepch:
+        pch.ensurepch(flags, gppversion(), HEADERSDIR)
+
+    output, error = gpp(code, outname, buildflags, link)
+
+    if usecache and error == b"" and os.path.isfile(outname):
+        cache.store(key, outname)
+
+    return output, error, False
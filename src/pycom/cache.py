@@ -0,0 +1,102 @@
+import hashlib
+import os
+import shutil
+import threading
+
+from pycom.emitter import Emitter
+
+# Compiled executables are stored under CACHEDIR/bin, named by the hash of everything that went into building them
+CACHEDIR = os.environ.get("PYCOM_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "pycom"))
+
+# Upper bound (in MB) for the executable cache; least recently used entries are evicted past this
+MAXCACHESIZE = int(os.environ.get("PYCOM_CACHE_SIZE", 512)) * 1024 * 1024
+
+
+def cachedir(*parts: str):
+    path = os.path.join(CACHEDIR, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def dirdigest(path: str):
+    # Cheap fingerprint of a directory tree; any added, removed or modified file changes it
+    digest = hashlib.sha256()
+    for root, dirs, files in sorted(os.walk(path)):
+        dirs.sort()
+        for file in sorted(files):
+            stat = os.stat(os.path.join(root, file))
+            digest.update(f"{os.path.relpath(os.path.join(root, file), path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode("utf-8"))
+
+    return digest.hexdigest()
+
+
+def cachekey(code, *parts: str):
+    # `code` is either a string or an Emitter, whose fragments are hashed without joining them first
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8") + b"\0")
+    for fragment in (code.parts() if isinstance(code, Emitter) else (code,)):
+        digest.update(fragment.encode("utf-8"))
+
+    return digest.hexdigest()
+
+
+def lookup(key: str, outname: str):
+    entry = os.path.join(cachedir("bin"), key)
+    if not os.path.isfile(entry):
+        return False
+
+    try:
+        shutil.copy2(entry, outname)
+        # Bump the entry's mtime so eviction treats it as recently used
+        os.utime(entry)
+
+    except OSError:
+        return False
+
+    return True
+
+
+def store(key: str, outname: str):
+    bindir = cachedir("bin")
+    entry = os.path.join(bindir, key)
+    temp = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    try:
+        shutil.copy2(outname, temp)
+        # Atomic so concurrent compiles of the same code never see a half-written entry
+        os.replace(temp, entry)
+
+    except OSError:
+        if os.path.exists(temp):
+            os.remove(temp)
+        return
+
+    evict()
+
+
+def evict(maxsize: int = None):
+    maxsize = MAXCACHESIZE if maxsize is None else maxsize
+    bindir = cachedir("bin")
+
+    entries = []
+    for name in os.listdir(bindir):
+        if name.endswith(".tmp"):
+            continue
+        path = os.path.join(bindir, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+    total = sum(entry[1] for entry in entries)
+
+    for _, size, path in sorted(entries):
+        if total <= maxsize:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
@@ -0,0 +1,43 @@
+import json
+import os
+import socket
+import sys
+
+from pycom import cache
+
+# Kept free of pycom's heavier imports so asking a running `pycom --serve` for a build starts quickly
+PORT = int(os.environ.get("PYCOM_PORT", 7878))
+
+
+def tokenfile(port: int = PORT):
+    # Where the daemon on `port` keeps the secret every request must carry; only its owner can read the file, so no
+    # other local user can have the daemon compile (and write files) on the owner's behalf
+    return os.path.join(cache.CACHEDIR, f"daemon-{port}.token")
+
+
+def request(argv: list, port: int = PORT):
+    # Protocol: one JSON request line {"token", "cwd", "argv"} in, one JSON reply line {"output", "code"} back
+    with open(tokenfile(port), "r") as file:
+        token = file.read().strip()
+
+    with socket.create_connection(("127.0.0.1", port)) as conn:
+        conn.sendall(json.dumps({"token": token, "cwd": os.getcwd(), "argv": argv}).encode("utf-8") + b"\n")
+
+        with conn.makefile("rb") as reply:
+            return json.loads(reply.readline())
+
+
+def main():
+    try:
+        reply = request(sys.argv[1:])
+
+    except (ConnectionRefusedError, FileNotFoundError):
+        print(f"pycom-client: error: no pycom daemon listening on port {PORT}; start one with 'pycom --serve'", file=sys.stderr)
+        sys.exit(2)
+
+    sys.stdout.write(reply["output"])
+    sys.exit(reply["code"])
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ import time
 from colorama import Fore
 
 from pycom import tokenise
+from pycom import typeinfer
+from pycom.emitter import Emitter
 
 PLATFORM = platform.system()
 
@@ -11,7 +13,8 @@ def red(string): return Fore.RED + string + Fore.RESET
 
 invopmap = {v: k for k, v in tokenise.tokmap.items()}
 
-implemented = [
+# Sets, as every token is checked against these
+implemented = frozenset([
     ('KW', 'def'),
     ('KW', 'for'),
     ('KW', 'if'),
@@ -38,12 +41,14 @@ implemented = [
     ('SIG', 'TYPEPOINTER'),
     ('SIG', 'FUNCTYPEPOINTER'),
     ('SIG', 'COMMA')
-]
+])
 
 pyexceptiontocpp = {
     "Exception": "...",
-    "FileNotFoundError": "std::filesystem::__cxx11::filesystem_error"
-    
+    "FileNotFoundError": "std::filesystem::__cxx11::filesystem_error",
+    "KeyError": "std::out_of_range",
+    "IndexError": "std::out_of_range",
+    "ValueError": "std::invalid_argument"
 }
 
 implementedtypes = [
@@ -56,16 +61,22 @@ implementedmodules = [
     "math",
     "numpy",
     "os",
+    "pandas",
     "sys",
     "rnd"
 ]
 
-types = ["str", "int", "float", "list", "bool", "strlist", "floatlist", "None"]
+# Modules whose header is a namespace of free functions rather than a class with a global instance; their attributes
+# are emitted as `math::sqrt` instead of `math.sqrt`
+namespacemodules = frozenset(["math", "numpy", "pandas"])
+
+types = ["str", "int", "float", "list", "dict", "set", "bool", "strlist", "floatlist", "None"]
 
 typecomparisons = ["const std::type_info& inttype = typeid(int);", "const std::type_info& floattype = typeid(float);"]
 
 includes = ["iostream", "string", "headers/other/range.hpp", "cmath",
-            "sstream", "headers/fmt/format.h", "vector", "boost/multiprecision/cpp_int.hpp", "typeinfo", "headers/builtins/stdpy.hpp"]
+            "sstream", "headers/fmt/format.h", "vector", "boost/multiprecision/cpp_int.hpp", "typeinfo", "headers/builtins/stdpy.hpp", "headers/builtins/pylist.hpp",
+            "headers/builtins/pydict.hpp", "headers/builtins/pyiter.hpp"]
 
 using = ["util::lang::range"]
 
@@ -74,7 +85,9 @@ pytypetoctype = {
     "strlist": "strlist",
     "floatlist": "floatlist",
     "list": "intlist",
-    "int": "bigint",
+    "dict": "pydict",
+    "set": "pyset",
+    "int": "pyint",
     "float": "long double",
     "None": "void",
     "bool": "bool"
@@ -83,97 +96,1020 @@ pytypetoctype = {
 
 typedefs = [
     ("boost::multiprecision::cpp_int", "bigint"),
-    ("std::vector<pystring>", "strlist"),
-    ("std::vector<bigint>", "intlist"),
-    ("std::vector<float>", "floatlist"),
+    ("pylist<pystring>", "strlist"),
+    ("pylist<pyint>", "intlist"),
+    ("pylist<double>", "floatlist"),
 
 ]
 
+# Annotations that name a container but not what it holds; the element types come from type inference
+genericannotations = frozenset(["dict", "set"])
+
+
+def annotatedctype(pytype: str, inferred: dict, index: int):
+    # C++ type of the declaration at `index` annotated with `pytype`
+    if pytype in genericannotations:
+        return inferred.get(index, "auto")
+
+    return pytypetoctype[pytype]
+
+
+def matchingbrackets(tokens: list, opening: str = "LSPAREN", closing: str = "RSPAREN"):
+    # Maps the index of every opening bracket to the index of its matching closing one, using a single stack pass
+    stack = []
+    matches = {}
+    for i, token in enumerate(tokens):
+        if token == ("OP", opening):
+            stack.append(i)
+        elif token == ("OP", closing) and stack:
+            matches[stack.pop()] = i
+
+    return matches
+
+
+def functypepointers(tokens: list):
+    # Maps the index of every 'def' to the index of its return annotation ('->'), if its own header has one
+    found = {}
+    defind = None
+    for i, token in enumerate(tokens):
+        if token == ("KW", "def"):
+            defind = i
+        elif defind is not None:
+            if token == ("SIG", "FUNCTYPEPOINTER"):
+                found[defind] = i
+                defind = None
+            elif token == ("SIG", "BLOCK_START"):
+                defind = None
 
-def findlastkw(tokens, currentind):
-    for i in range(currentind, -1, -1):
-        if tokens[i][0] == "KW":
-            return tokens[i]
+    return found
 
-def findlastopind(tokens, currentind, find = None):
-    for i in range(currentind, -1, -1):
-        if tokens[i][0] == "OP":
-            if find is not None:
-                if tokens[i][1] == find:
-                    return i
 
-                else:
-                    continue
+def matchingblocks(tokens: list):
+    # Maps the index of every BLOCK_START to its BLOCK_END; they become the braces of the generated C++
+    stack = []
+    matches = {}
+    for i, token in enumerate(tokens):
+        if token == ("SIG", "BLOCK_START"):
+            stack.append(i)
+        elif token == ("SIG", "BLOCK_END") and stack:
+            matches[stack.pop()] = i
+
+    return matches
+
+
+# Operators that rebind a name; a counted loop's body mustn't use them on the loop variable
+loopassignments = {"ASSIGN"} | typeinfer.AUGMENTED
+
+
+def countedloops(tokens: list, inferred: dict, parens: dict, blocks: dict):
+    # Finds `for <var> in range(...)` loops that can become plain counted C++ for loops: the loop variable needs a
+    # native integer type, and the body mustn't assign to it (Python would carry on from the next range value).
+    # Maps the index of 'for' to (type, name, index of '(', index of ')', indices of the commas between arguments,
+    # indices of the integer literals to compute in the loop's type)
+    loops = {}
+    for i, token in enumerate(tokens):
+        if token != ("KW", "for") or i + 4 >= len(tokens):
+            continue
+        if tokens[i+1][0] != "VAR" or tokens[i+2] != ("OP", "in") or tokens[i+3] != ("NAME", "range") or tokens[i+4] != ("OP", "LPAREN"):
+            continue
+
+        ctype = inferred.get(i + 1)
+        rparen = parens.get(i + 4)
+        if ctype not in ("int", "int64_t") or rparen is None or rparen + 1 >= len(tokens) or tokens[rparen+1] != ("SIG", "BLOCK_START"):
+            continue
+
+        name = tokens[i+1][1]
+        body = range(rparen + 2, blocks.get(rparen + 1, len(tokens)))
+        if any(tokens[k][1] == name and (tokens[k-1] == ("KW", "for") or tokens[k+1][0] == "OP" and tokens[k+1][1] in loopassignments) for k in body):
+            continue
+
+        commas = []
+        depth = 0
+        for k in range(i + 5, rparen):
+            if tokens[k][0] == "OP" and tokens[k][1] in ("LPAREN", "LSPAREN", "LCPAREN"):
+                depth += 1
+            elif tokens[k][0] == "OP" and tokens[k][1] in ("RPAREN", "RSPAREN", "RCPAREN"):
+                depth -= 1
+            elif depth == 0 and tokens[k] == ("SIG", "COMMA"):
+                commas.append(k)
+
+        # `range(2147483640, 2147483647 + 5)` computes its stop in int however wide the loop variable, unless the
+        # literals in it are as wide; a lone literal (or negated one) is already given a type it fits in
+        literals = set()
+        if ctype != "int":
+            bounds = [i + 4] + commas + [rparen]
+            for start, end in zip(bounds, bounds[1:]):
+                if end - start > 3 or end - start == 3 and tokens[start+1] != ("OP", "SUB"):
+                    literals.update(k for k in range(start + 1, end) if tokens[k][0] == "INT")
+
+        if 0 <= len(commas) <= 2 and rparen > i + 5:
+            loops[i] = (ctype, name, i + 4, rparen, commas, literals)
+
+    return loops
+
+
+def countedloopheader(ctype: str, name: str, args: list):
+    # C++ for loop header equivalent to `for <name> in range(*args)`; stop and a non-literal step are evaluated
+    # once, as Python evaluates range()'s arguments once
+    args = [arg.strip() for arg in args]
+    start, stop, step = ("0", args[0], None) if len(args) == 1 else (args[0], args[1], args[2] if len(args) == 3 else None)
+
+    # Python raises ValueError for a zero step rather than looping forever; a literal one can't be anything but a mistake
+    if step is not None and step.removeprefix("-").strip().isdigit() and int(step.removeprefix("-")) == 0:
+        print(red(f"error: range() arg 3 must not be zero in the loop over '{name}'"))
+        exit(1)
+
+    if step is None or step.isdigit():
+        increment = f"++{name}" if step in (None, "1") else f"{name} += {step}"
+        return f"for({ctype} {name} = {start}, {name}_stop = {stop}; {name} < {name}_stop; {increment})"
+
+    if step.startswith("-") and step.removeprefix("-").strip().isdigit():
+        return f"for({ctype} {name} = {start}, {name}_stop = {stop}; {name} > {name}_stop; {name} += {step})"
+
+    return (f"for({ctype} {name} = {start}, {name}_stop = {stop}, {name}_step = pystep({step}); "
+            f"{name}_step > 0 ? {name} < {name}_stop : {name} > {name}_stop; {name} += {name}_step)")
+
+
+# Types that are cheaper to copy than to reference; every other parameter type is a container, string or big integer
+scalartypes = frozenset(["bool", "int", "int64_t", "float", "double", "long double"])
+
+# Methods that don't modify their object, so calling them doesn't stop a parameter being passed by const reference
+readonlymethods = frozenset(["upper", "lower", "startswith", "endswith", "isDigit", "islower", "isupper", "isalpha", "shuffled",
+                             "size", "find", "count", "index", "substr", "str", "get", "keys", "values", "items", "copy"])
+
+# Runtime functions that modify the list passed to them
+mutatingcalls = frozenset(["shuffle", "fillrandom", "fillrandint", "filluniform", "fillgauss"])
+
+
+def readonlyparams(tokens: list, blocks: dict):
+    # Indices of the PARAM tokens whose function body never rebinds or mutates them: no assignment to the name or to
+    # an item of it, no 'for' rebinding it, no method call that could change it and no being shuffled or filled in
+    # place by the runtime. Those can be taken by const&
+    squares = matchingbrackets(tokens)
+    found = set()
+    params = []
+    for i, token in enumerate(tokens):
+        if token[0] == "PARAM":
+            params.append(i)
+        elif token == ("SIG", "BLOCK_START") and params:
+            body = range(i + 1, blocks.get(i, len(tokens)))
+            for param in params:
+                name = tokens[param][1]
+                if not any(tokens[k][1] == name and mutates(tokens, k, squares) for k in body):
+                    found.add(param)
+            params = []
+
+    return found
+
+
+def mutates(tokens: list, k: int, squares: dict):
+    # Whether the occurrence of a name at k rebinds or modifies what it refers to
+    after = tokens[k+1] if k + 1 < len(tokens) else None
+    if tokens[k][0] == "VAR" or tokens[k-1] == ("KW", "for"):
+        return True
+    if tokens[k-1] == ("OP", "LPAREN") and tokens[k-2][1] in mutatingcalls:
+        return True
+    if after is not None and after[0] == "OP" and after[1] in loopassignments:
+        return True
+    if after == ("SIG", "DOT"):
+        return k + 2 >= len(tokens) or tokens[k+2][1] not in readonlymethods
+    if after == ("OP", "LSPAREN"):
+        close = squares.get(k + 1)
+        return close is None or close + 1 < len(tokens) and tokens[close+1][0] == "OP" and tokens[close+1][1] in loopassignments
+
+    return False
+
+
+def paramdeclaration(ctype: str, name: str, readonly: bool):
+    # Read-only containers, strings and big integers are passed by const reference instead of being copied per call
+    if readonly and ctype not in scalartypes:
+        return f"const {ctype}& {name}"
+
+    return f"{ctype} {name}"
+
+
+# Tokens an argument of range() may contain for it to be evaluated a second time, for reserve(), without side effects
+reservabletokens = frozenset(["NAME", "VARREF", "PARAM", "INT", "OP", "SIG"])
+
+
+def comprehensionclauses(tokens: list, start: int, end: int):
+    # Splits the inside of `[...]` (start and end exclusive) at its top-level 'for' and 'if' keywords. Returns the
+    # element expression's bounds and a list of ("for" | "if", start, end) clauses, or None if it isn't a comprehension
+    splits = []
+    depth = 0
+    for k in range(start, end):
+        if tokens[k][0] == "OP" and tokens[k][1] in ("LPAREN", "LSPAREN", "LCPAREN"):
+            depth += 1
+        elif tokens[k][0] == "OP" and tokens[k][1] in ("RPAREN", "RSPAREN", "RCPAREN"):
+            depth -= 1
+        elif depth == 0 and tokens[k] in (("KW", "for"), ("KW", "if")) and (splits or tokens[k][1] == "for"):
+            splits.append(k)
 
-            else:
-                return None
+    if not splits or splits[0] == start:
+        return None
 
-def findnextopind(tokens, currentind, find = None):
-    for i in range(currentind, len(tokens)):
-        if tokens[i][0] == "OP":
-            if find is not None:
-                if tokens[i][1] == find:
-                    return i
+    clauses = [(tokens[k][1], k + 1, after) for k, after in zip(splits, splits[1:] + [end])]
+    if any(kind == "for" and (after - k < 3 or tokens[k][0] != "VAR" or tokens[k+1] != ("OP", "in")) for kind, k, after in clauses):
+        return None
 
-                else:
-                    continue
+    return (start, splits[0]), clauses
+
+
+def reservesize(tokens: list, start: int, end: int):
+    # Tokens for the length of the iterable tokens[start:end], when it's known without iterating: range() with
+    # side-effect free arguments, or a plain name whose .size() is the length of the list or string
+    if end == start + 1 and tokens[start][0] in ("NAME", "VARREF", "PARAM"):
+        return [tokens[start], ("SIG", "DOT"), ("METHOD", "size"), ("OP", "LPAREN"), ("OP", "RPAREN")]
+
+    if (tokens[start] == ("NAME", "range") and tokens[start+1] == ("OP", "LPAREN") and tokens[end-1] == ("OP", "RPAREN")
+            and all(token[0] in reservabletokens and token[1] not in ("LPAREN", "DOT") for token in tokens[start+2:end-1])):
+        return tokens[start:end] + [("SIG", "DOT"), ("METHOD", "size"), ("OP", "LPAREN"), ("OP", "RPAREN")]
+
+    return None
+
+
+def lowercomprehensions(tokens: list):
+    # Rewrites `x = [expr for v in it if cond ...]` statements into the tokens of
+    #     x = []
+    #     x.reserve(<length of it>)       (only with a single 'for' whose iterable's length is known)
+    #     for v in it:
+    #         if cond:
+    #             x.append(expr)
+    # so the rest of the compiler handles them like hand-written loops, with one allocation where the size is known.
+    # Dict and set comprehensions start from {} and set(), and store with x[k] = v and x.add(expr). An element that is
+    # itself a comprehension, `[[i * j for j in range(3)] for i in range(3)]`, is lowered the same way into a
+    # temporary in the loop body, which is then stored
+    if ("KW", "for") not in tokens:
+        return tokens
+
+    squares = matchingbrackets(tokens)
+    squares.update(matchingbrackets(tokens, "LCPAREN", "RCPAREN"))
+    lowered = []
+    i = 0
+    while i < len(tokens):
+        statementstart = i == 0 or tokens[i-1][0] == "SIG" and tokens[i-1][1] in ("NEWLINE", "BLOCK_START", "BLOCK_END") or str(tokens[i-1][1]).endswith(" TAB")
+        assign = i + 1 if i + 1 < len(tokens) and tokens[i+1] == ("OP", "ASSIGN") else i + 3
+        if (not statementstart or tokens[i][0] not in ("VAR", "NAME", "VARREF") or assign + 1 >= len(tokens)
+                or tokens[assign] != ("OP", "ASSIGN") or tokens[assign+1] not in (("OP", "LSPAREN"), ("OP", "LCPAREN"))
+                or assign == i + 3 and tokens[i+1] != ("SIG", "TYPEPOINTER")):
+            lowered.append(tokens[i])
+            i += 1
+            continue
+
+        close = squares.get(assign + 1)
+        split = None if close is None else comprehensionclauses(tokens, assign + 2, close)
+        if split is None:
+            lowered.append(tokens[i])
+            i += 1
+            continue
+
+        (elemstart, elemend), clauses = split
+        target = tokens[i:assign]
+        element = tokens[elemstart:elemend]
+        name = ("NAME", tokens[i][1])
+
+        braced = tokens[assign+1] == ("OP", "LCPAREN")
+        pair = toplevelsplit(tokens, elemstart + 1, elemend - 1, (("SIG", "COMMA"),)) if braced and squares.get(elemstart) == elemend - 1 else []
+
+        hoisted = []
+        inner = [k for k in range(elemstart, elemend) if k in squares and comprehensionclauses(tokens, k + 1, squares[k]) is not None]
+        if inner and inner[0] == elemstart and squares[elemstart] == elemend - 1 and len(pair) != 2:
+            temporary = f"pyelem_{tokens[i][1]}"
+            hoisted = lowercomprehensions([("VAR", temporary), ("OP", "ASSIGN")] + element + [("SIG", "NEWLINE")])
+            element = [("NAME", temporary)]
+        elif inner:
+            print(red(f"error: a comprehension inside the element of the comprehension assigned to '{tokens[i][1]}' "
+                      "is not supported yet; assign it to a variable in a loop instead"))
+            exit(1)
+        if len(pair) == 2:
+            (keystart, keyend), (valuestart, valueend) = pair
+            lowered += target + [("OP", "ASSIGN"), ("OP", "LCPAREN"), ("OP", "RCPAREN"), ("SIG", "NEWLINE")]
+            store = [name, ("OP", "LSPAREN")] + tokens[keystart:keyend] + [("OP", "RSPAREN"), ("OP", "ASSIGN")] + tokens[valuestart:valueend]
+        elif braced:
+            lowered += target + [("OP", "ASSIGN"), ("NAME", "set"), ("OP", "LPAREN"), ("OP", "RPAREN"), ("SIG", "NEWLINE")]
+            store = [name, ("SIG", "DOT"), ("METHOD", "add"), ("OP", "LPAREN")] + element + [("OP", "RPAREN")]
+        else:
+            lowered += target + [("OP", "ASSIGN"), ("OP", "LSPAREN"), ("OP", "RSPAREN"), ("SIG", "NEWLINE")]
+            store = [name, ("SIG", "DOT"), ("METHOD", "push_back"), ("OP", "LPAREN")] + element + [("OP", "RPAREN")]
+
+        loops = [clause for clause in clauses if clause[0] == "for"]
+        size = reservesize(tokens, loops[0][1] + 2, loops[0][2]) if len(loops) == 1 else None
+        if size is not None:
+            lowered += [name, ("SIG", "DOT"), ("METHOD", "reserve"), ("OP", "LPAREN")] + size + [("OP", "RPAREN"), ("SIG", "NEWLINE")]
+
+        for kind, start, end in clauses:
+            lowered += [("KW", kind)] + tokens[start:end] + [("SIG", "BLOCK_START"), ("SIG", "NEWLINE")]
+
+        lowered += hoisted + store + [("SIG", "BLOCK_END")] * len(clauses)
+        i = close + 1
+
+    return lowered
+
+
+def elementlists(tokens: list, elements: dict, parens: dict):
+    # Of the lists type inference couldn't type, {VAR index: (first 'for', name appended to, append's '(' and ')',
+    # blocks open at the append)} for those a lowered comprehension fills: `x = []`, maybe x.reserve(n), then a loop
+    # appending to x, which doesn't otherwise use it. Such a list is declared as pylist<decltype> of what a lambda
+    # running the loop headers would return (elementdeclaration), where the loops' names are in scope
+    found = {}
+    for index, lparen in elements.items():
+        name, rparen = tokens[index][1], parens.get(lparen)
+        loopstart = index + 5
+        if tokens[loopstart:loopstart+3] == [("NAME", name), ("SIG", "DOT"), ("METHOD", "reserve")] and loopstart + 3 in parens:
+            loopstart = parens[loopstart+3] + 2
+        if rparen is None or loopstart >= lparen - 3 or tokens[loopstart] != ("KW", "for") or tokens[lparen-3][1] != name:
+            continue
+
+        depth = 0
+        for k in range(loopstart, rparen):
+            if tokens[k] == ("SIG", "BLOCK_START"):
+                depth += 1
+            elif tokens[k] == ("SIG", "BLOCK_END"):
+                depth -= 1
+            if (tokens[k] == ("SIG", "BLOCK_END") and depth <= 0 or tokens[k] == ("KW", "return")
+                    or tokens[k][0] in ("NAME", "VARREF") and tokens[k][1] == name and k != lparen - 3):
+                break
+        else:
+            if depth > 0:
+                found[index] = (loopstart, lparen - 3, lparen, rparen, depth)
+
+    return found
+
+
+def elementdeclaration(name: str, loops: str, element: str, depth: int):
+    # The declaration of a list of whatever `element` evaluates to inside `loops`, the C++ of the loops and ifs up to
+    # where it's appended. The lambda is never called: decltype only deduces what it would return
+    return f"pylist<std::decay_t<decltype([&] {{ {loops.strip()} return {element.strip()}; {'}' * depth} throw; }}())>> {name}"
+
+
+# Builtins of pyiter.hpp whose first argument is a function applied to each element, and those taking min()'s key=
+functionbuiltins = frozenset(["map", "filter"])
+keybuiltins = frozenset(["min", "max"])
+
+
+def lambdatokens(parameter: str, body: list):
+    # A LAMBDA token names the parameter, a plain name or "[a, b]" for a tuple, and LAMBDA_END closes the body
+    return [("LAMBDA", parameter)] + body + [("SIG", "LAMBDA_END")]
+
+
+def wrapcall(function: list, count: int):
+    # `f` as a lambda of `count` arguments calling it, so a C++ function template can be passed like a Python function
+    if count == 1:
+        return lambdatokens("pyarg", function + [("OP", "LPAREN"), ("NAME", "pyarg"), ("OP", "RPAREN")])
+
+    names = [f"pyarg{n}" for n in range(count)]
+    arguments = []
+    for name in names:
+        arguments += [("NAME", name), ("SIG", "COMMA")]
+
+    return lambdatokens(f"[{', '.join(names)}]", function + [("OP", "LPAREN")] + arguments[:-1] + [("OP", "RPAREN")])
+
+
+def lowergenerator(tokens: list, start: int, end: int):
+    # Tokens for the generator expression tokens[start:end] (start and end exclusive, so within its parentheses) as
+    # map() of its element over filter() of its conditions, or None if it isn't a generator expression
+    split = comprehensionclauses(tokens, start, end)
+    if split is None or [kind for kind, _, _ in split[1]].count("for") != 1:
+        return None
 
+    (elemstart, elemend), clauses = split
+    _, loopstart, loopend = clauses[0]
+    name = tokens[loopstart][1]
+    source = tokens[loopstart+2:loopend]
+
+    conditions = [tokens[k:after] for _, k, after in clauses[1:]]
+    if len(conditions) > 1:
+        test = []
+        for condition in conditions:
+            test += [("OP", "LPAREN")] + condition + [("OP", "RPAREN"), ("OP", "and")]
+        conditions = [test[:-1]]
+
+    if conditions:
+        source = [("NAME", "filter"), ("OP", "LPAREN")] + lambdatokens(name, conditions[0]) + [("SIG", "COMMA")] + source + [("OP", "RPAREN")]
+
+    element = tokens[elemstart:elemend]
+    if len(element) == 1 and element[0][1] == name:
+        return source
+
+    return [("NAME", "map"), ("OP", "LPAREN")] + lambdatokens(name, element) + [("SIG", "COMMA")] + source + [("OP", "RPAREN")]
+
+
+def lowergenerators(tokens: list):
+    # Rewrites generator expressions and the calls of pyiter.hpp's builtins that take a function into lambdas over
+    # its lazy adaptors, shown here with <v: body> for the LAMBDA tokens:
+    #     sum(x * x for x in xs if x % 2)  ->  sum(map(<x: x * x>, filter(<x: x % 2>, xs)))
+    #     map(f, xs, ys)                   ->  map(<[pyarg0, pyarg1]: f(pyarg0, pyarg1)>, zip(xs, ys))
+    #     filter(None, xs)                 ->  filter(nullptr, xs)
+    #     max(xs, key=len)                 ->  max(xs, pyiter::key(<pyarg: len(pyarg)>))
+    # A generator expression needs its own parentheses, or to be a call's only argument, and a single 'for'
+    if not any(token[0] == "NAME" and (token[1] in functionbuiltins or token[1] in keybuiltins) for token in tokens) and ("KW", "for") not in tokens:
+        return tokens
+
+    parens = matchingbrackets(tokens, "LPAREN", "RPAREN")
+    replacements = {}
+    for i, token in enumerate(tokens):
+        if token[0] != "NAME" or i + 1 not in parens or tokens[i+1] != ("OP", "LPAREN"):
+            continue
+
+        close = parens[i+1]
+        arguments = toplevelsplit(tokens, i + 2, close, (("SIG", "COMMA"),))
+        if token[1] in functionbuiltins and len(arguments) >= 2:
+            start, end = arguments[0]
+            if token[1] == "filter" and tokens[start:end] == [("NAME", "None")]:
+                replacements[start] = (end, [("NAME", "nullptr")])
             else:
-                return None
+                replacements[start] = (end, wrapcall(tokens[start:end], len(arguments) - 1))
+
+            # The iterables of a map() over several are zipped for its lambda to unpack
+            if len(arguments) > 2:
+                replacements[arguments[1][0]] = (arguments[1][0], [("NAME", "zip"), ("OP", "LPAREN")])
+                replacements[close] = (close, [("OP", "RPAREN")])
+        elif token[1] in keybuiltins:
+            for start, end in arguments:
+                if end - start >= 3 and tokens[start][1] == "key" and tokens[start+1] == ("OP", "ASSIGN"):
+                    replacements[start] = (end, [("NAME", "pyiter::key"), ("OP", "LPAREN")] + wrapcall(tokens[start+2:end], 1) + [("OP", "RPAREN")])
+
+    lowered = []
+    i = 0
+    while i < len(tokens):
+        if i in replacements:
+            end, replacement = replacements.pop(i)
+            lowered += replacement
+            i = end
+        else:
+            lowered.append(tokens[i])
+            i += 1
+
+    # Innermost first, so a generator in another's element or iterable has been lowered by the time the outer one is
+    while ("KW", "for") in lowered:
+        parens = matchingbrackets(lowered, "LPAREN", "RPAREN")
+        for opening in sorted(parens, reverse=True):
+            generator = lowergenerator(lowered, opening + 1, parens[opening])
+            if generator is not None:
+                lowered = lowered[:opening+1] + generator + lowered[parens[opening]:]
+                break
+        else:
+            break
+
+    return lowered
+
+
+# print()'s keyword arguments, which become tagged values pyio::sep(...) etc. that the variadic print() picks out
+printoptions = frozenset(["sep", "end", "file", "flush"])
+
+
+def lowerprintoptions(tokens: list):
+    # Rewrites the keyword arguments of print() calls, `print(x, end="")` -> `print(x, pyio::end(""))`
+    if ("NAME", "print") not in tokens:
+        return tokens
+
+    parens = matchingbrackets(tokens, "LPAREN", "RPAREN")
+    replacements = {}
+    for i, token in enumerate(tokens):
+        if token != ("NAME", "print") or i + 1 >= len(tokens) or tokens[i+1] != ("OP", "LPAREN") or i + 1 not in parens:
+            continue
+
+        close = parens[i+1]
+        start = i + 2
+        depth = 0
+        for k in range(i + 2, close + 1):
+            if tokens[k][0] == "OP" and tokens[k][1] in ("LPAREN", "LSPAREN", "LCPAREN"):
+                depth += 1
+            elif tokens[k][0] == "OP" and tokens[k][1] in ("RPAREN", "RSPAREN", "RCPAREN") and k != close:
+                depth -= 1
+            elif k == close or depth == 0 and tokens[k] == ("SIG", "COMMA"):
+                if k - start >= 3 and tokens[start][1] in printoptions and tokens[start+1] == ("OP", "ASSIGN"):
+                    replacements[start] = (k, [("NAME", f"pyio::{tokens[start][1]}"), ("OP", "LPAREN")] + tokens[start+2:k] + [("OP", "RPAREN")])
+                start = k + 1
+
+    lowered = []
+    i = 0
+    while i < len(tokens):
+        if i in replacements:
+            end, replacement = replacements[i]
+            lowered += replacement
+            i = end
+        else:
+            lowered.append(tokens[i])
+            i += 1
+
+    return lowered
+
+
+def toplevelsplit(tokens: list, start: int, end: int, separators: tuple):
+    # Splits tokens[start:end] at the separators that aren't nested inside brackets, into (start, end) spans
+    spans = []
+    depth = 0
+    for k in range(start, end):
+        if tokens[k][0] == "OP" and tokens[k][1] in ("LPAREN", "LSPAREN", "LCPAREN"):
+            depth += 1
+        elif tokens[k][0] == "OP" and tokens[k][1] in ("RPAREN", "RSPAREN", "RCPAREN"):
+            depth -= 1
+        elif depth == 0 and tokens[k] in separators:
+            spans.append((start, k))
+            start = k + 1
+    spans.append((start, end))
+
+    return spans
+
+
+# Tokens after which `[` is a subscript rather than the start of a list literal
+subscriptablekinds = frozenset(["NAME", "VARREF", "PARAM", "METHOD"])
+subscriptedtokens = frozenset([("OP", "RPAREN"), ("OP", "RSPAREN"), ("OP", "SRSPAREN")])
+
+
+def subscriptable(token: tuple):
+    return token[0] in subscriptablekinds or token in subscriptedtokens
+
+
+# C++ only takes a bare braced list after '=' or an opening bracket, so a list literal operand of these is a pylist{...} temporary
+listoperands = frozenset([("OP", "PLUS"), ("OP", "MULT"), ("OP", "EQUAL"), ("OP", "NOTEQUAL"), ("OP", "GREATER"), ("OP", "LESS"),
+            ("OP", "GREATEROREQUAL"), ("OP", "LESSOREQUAL")])
+
+
+# Likewise a set literal operand of these is a pyset{...} temporary
+setoperands = frozenset([("OP", "BITOR"), ("OP", "BITAND"), ("OP", "SUB"), ("OP", "BITXOR")])
+
+
+# A slice's colons; a colon before a type name was taken for an annotation by the tokeniser
+slicecolons = (("SIG", "BLOCK_START"), ("SIG", "TYPEPOINTER"))
+
+
+def lowersubscripts(tokens: list):
+    # Rewrites slices and indexing by several axes into the runtime's pyslice and call operator:
+    #     x[a:b]       -> x[pyslice(a, b, std::nullopt)]
+    #     x[i, ::2]    -> x(i, pyslice(std::nullopt, std::nullopt, 2))
+    if ("OP", "LSPAREN") not in tokens:
+        return tokens
+
+    squares = matchingbrackets(tokens)
+
+    def lowerspan(start: int, end: int):
+        lowered = []
+        i = start
+        while i < end:
+            close = squares.get(i)
+            if close is None or close >= end or i == 0 or not subscriptable(tokens[i-1]):
+                lowered.append(tokens[i])
+                i += 1
+                continue
 
+            axes = toplevelsplit(tokens, i + 1, close, (("SIG", "COMMA"),))
+            indices = []
+            for axisstart, axisend in axes:
+                parts = toplevelsplit(tokens, axisstart, axisend, slicecolons)
+                if len(parts) == 1:
+                    if axisend > axisstart:
+                        indices.append(lowerspan(axisstart, axisend))
+                    continue
 
+                bounds = [lowerspan(partstart, partend) or [("NAME", "std::nullopt")] for partstart, partend in parts]
+                bounds += [[("NAME", "std::nullopt")]] * (3 - len(bounds))
+                index = [("NAME", "pyslice"), ("OP", "LPAREN")]
+                for k, bound in enumerate(bounds):
+                    index += ([("SIG", "COMMA")] if k else []) + bound
+                indices.append(index + [("OP", "RPAREN")])
+
+            if len(axes) == 1:
+                lowered += [("OP", "LSPAREN")] + indices[0] + [("OP", "RSPAREN")]
+            else:
+                lowered.append(("OP", "LPAREN"))
+                for k, index in enumerate(indices):
+                    lowered += ([("SIG", "COMMA")] if k else []) + index
+                lowered.append(("OP", "RPAREN"))
+            i = close + 1
+
+        return lowered
+
+    return lowerspan(0, len(tokens))
+
+
+# Kinds of token that name a variable, for the targets of a for loop
+namekinds = frozenset(["NAME", "VAR", "VARREF", "PARAM"])
+
+
+def lowerunpacking(tokens: list):
+    # `for k, v in d.items()` becomes a structured binding, `for(auto [k, v] : d.items())`: the names are joined into
+    # a single VAR "[k, v]", which type inference declares auto and types the names of from the iterable's items
+    if ("KW", "for") not in tokens:
+        return tokens
+
+    lowered = []
+    i = 0
+    while i < len(tokens):
+        names = []
+        k = i + 1
+        while tokens[i] == ("KW", "for") and k + 1 < len(tokens) and tokens[k][0] in namekinds and tokens[k+1] == ("SIG", "COMMA"):
+            names.append(tokens[k][1])
+            k += 2
+        if names and k + 1 < len(tokens) and tokens[k][0] in namekinds and tokens[k+1] == ("OP", "in"):
+            lowered += [tokens[i], ("VAR", "[" + ", ".join(names + [tokens[k][1]]) + "]")]
+            i = k + 1
+            continue
+
+        lowered.append(tokens[i])
+        i += 1
+
+    return lowered
+
+
+def lowerdicts(tokens: list):
+    # A dict literal's entries become bracketed key/value pairs, which initialise a pydict like any initializer list:
+    #     {"a": 1, k: v}                -> {["a", 1], [k, v]}            (emitted {{"a",1},{k,v}})
+    #     {k: v for k, v in d.items()}  -> {[k, v] for [k, v] in d.items()}
+    # Set literals have no colons and stay as they are. The tokeniser took a name before the colon for a parameter
+    if ("OP", "LCPAREN") not in tokens:
+        return tokens
+
+    replaced = {}
+    inserted = {}
+    for opening, close in matchingbrackets(tokens, "LCPAREN", "RCPAREN").items():
+        comprehension = comprehensionclauses(tokens, opening + 1, close)
+        entries = [comprehension[0]] if comprehension is not None else toplevelsplit(tokens, opening + 1, close, (("SIG", "COMMA"),))
+        for start, end in entries:
+            parts = toplevelsplit(tokens, start, end, slicecolons)
+            if len(parts) != 2:
+                continue
+            (keystart, keyend), _ = parts
+            replaced[keyend] = ("SIG", "COMMA")
+            if keyend == keystart + 1 and tokens[keystart][0] == "PARAM":
+                replaced[keystart] = ("VARREF", tokens[keystart][1])
+            inserted[start] = [("OP", "LSPAREN")] + inserted.get(start, [])
+            inserted[end] = [("OP", "RSPAREN")] + inserted.get(end, [])
+
+    lowered = []
+    for i, token in enumerate(tokens):
+        lowered += inserted.get(i, [])
+        lowered.append(replaced.get(i, token))
+    lowered += inserted.get(len(tokens), [])
+
+    return lowered
+
+
+# Operators that bind more loosely than `in`, and so end its operands
+membershipbounds = frozenset(["ASSIGN", "and", "or", "not", "in", "is"]) | typeinfer.COMPARISONS | typeinfer.AUGMENTED
+
+openingbrackets = frozenset([("OP", "LPAREN"), ("OP", "LSPAREN"), ("OP", "LCPAREN")])
+closingbrackets = frozenset([("OP", "RPAREN"), ("OP", "RSPAREN"), ("OP", "RCPAREN")])
+
+
+def membershipbound(token: tuple):
+    return (token[0] == "SIG" and token[1] != "DOT" or token[0] == "KW" and token[1] not in ("True", "False")
+            or token[0] == "OP" and token[1] in membershipbounds)
+
+
+def membershipoperands(tokens: list, p: int, openers: dict, closers: dict):
+    # (start, end) of `item in container` (or `item not in container`) around the `in` at p
+    j = p - 2 if tokens[p-1] == ("OP", "not") else p - 1
+    while j >= 0 and not membershipbound(tokens[j]) and tokens[j] not in openingbrackets:
+        if tokens[j] in closingbrackets:
+            if j not in openers:
+                break
+            j = openers[j]
+        j -= 1
+
+    k = p + 1
+    while k < len(tokens) and not membershipbound(tokens[k]) and tokens[k] not in closingbrackets:
+        if tokens[k] in openingbrackets:
+            if k not in closers:
+                break
+            k = closers[k]
+        k += 1
+
+    return j + 1, k
+
+
+def lowermembership(tokens: list):
+    # `x in c` outside a for header becomes pyin(x, c), which looks x up in a dict or set and searches anything else;
+    # `x not in c` becomes `not pyin(x, c)`
+    if ("OP", "in") not in tokens:
+        return tokens
+
+    closers = {}
+    for opening, closing in (("LPAREN", "RPAREN"), ("LSPAREN", "RSPAREN"), ("LCPAREN", "RCPAREN")):
+        closers.update(matchingbrackets(tokens, opening, closing))
+    openers = {close: start for start, close in closers.items()}
+
+    # Found on the tokens as they are, then rewritten in one go: what opens a test goes before its item, and its `)`
+    # before the token after the container
+    opened = {}
+    closed = {}
+    separators = {}
+    ending = {}     # end of each test -> its start
+    for p, token in enumerate(tokens):
+        if token != ("OP", "in") or p < 2 or tokens[p-2] == ("KW", "for"):
+            continue
+
+        start, end = membershipoperands(tokens, p, openers, closers)
+        negated = tokens[p-1] == ("OP", "not")
+
+        # `a in b in c`, whose first container ends at this `in`, tests what `a in b` gives, inside the `not`s
+        # leading it, as rewriting them one at a time did
+        outer = 0
+        if p - negated in ending:
+            start = ending[p - negated]
+            while opened[start][outer] == ("OP", "not"):
+                outer += 1
+        test = [("OP", "not")] * negated + [("NAME", "pyin"), ("OP", "LPAREN")]
+        opened[start] = opened.get(start, [])[:outer] + test + opened.get(start, [])[outer:]
+        closed[end] = closed.get(end, 0) + 1
+        ending[end] = start
+        separators[p] = [("SIG", "COMMA")]
+        if negated:
+            separators[p-1] = []
+
+    lowered = []
+    for i, token in enumerate(tokens):
+        lowered += [("OP", "RPAREN")] * closed.get(i, 0) + opened.get(i, [])
+        lowered += separators.get(i, [token])
+
+    return lowered + [("OP", "RPAREN")] * closed.get(len(tokens), 0)
+
+
+# numpy's dtype= arguments and the C++ element types they select
+numpydtypes = {
+    "int": "int64_t", "int64": "int64_t", "int32": "int64_t",
+    "float": "double", "float64": "double", "float32": "double",
+    "bool": "bool", "bool_": "bool"
+}
 
-def findnextfunctypeptr(tokens: list, currentind):
-    try:
-        return tokens.index(("SIG", "FUNCTYPEPOINTER"), currentind)
 
-    except ValueError:
+def lowernumpycalls(tokens: list):
+    # Rewrites the arguments of numpy calls into what the functions in pynumpy.hpp take:
+    #     np.zeros((3, 4))           -> numpy::zeros({3, 4})     (the same for a.reshape((3, 4)))
+    #     np.arange(5, dtype=float)  -> numpy::arange<double>(5)
+    #     a.astype(float)            -> a.astype<double>()
+    if ("IMPORTREF", "numpy") not in tokens:
+        return tokens
+
+    parens = matchingbrackets(tokens, "LPAREN", "RPAREN")
+    replaced = {}
+    removed = set()
+    for i, token in enumerate(tokens):
+        if token[0] != "METHOD" or i < 2 or tokens[i-1] != ("SIG", "DOT") or i + 1 not in parens:
+            continue
+        if token[1] == "astype" and parens[i+1] == i + 3 and tokens[i+2][1] in numpydtypes:
+            replaced[i] = ("METHOD", f"astype<{numpydtypes[tokens[i+2][1]]}>")
+            removed.add(i + 2)
+            continue
+        if tokens[i-2] != ("IMPORTREF", "numpy") and token[1] != "reshape":
+            continue
+
+        for start, end in toplevelsplit(tokens, i + 2, parens[i+1], (("SIG", "COMMA"),)):
+            if parens.get(start) == end - 1 and len(toplevelsplit(tokens, start + 1, end - 1, (("SIG", "COMMA"),))) > 1:
+                replaced[start], replaced[end-1] = ("OP", "LSPAREN"), ("OP", "RSPAREN")
+
+            elif end - start >= 3 and tokens[start][1] == "dtype" and tokens[start+1] == ("OP", "ASSIGN") and tokens[end-1][1] in numpydtypes:
+                replaced[i] = ("METHOD", f"{token[1]}<{numpydtypes[tokens[end-1][1]]}>")
+                removed.update(range(start - 1, end))
+
+    return [replaced.get(i, token) for i, token in enumerate(tokens) if i not in removed]
+
+
+def lowerpandascalls(tokens: list):
+    # The dict of columns given to a DataFrame, whose entries lowerdicts made pairs, becomes a braced list of them:
+    #     pd.DataFrame({"a": [1, 2], "b": [0.5, 1.0]})  -> pandas::DataFrame({{"a", {1, 2}}, {"b", {0.5, 1.0}}})
+    if ("IMPORTREF", "pandas") not in tokens:
+        return tokens
+
+    braces = matchingbrackets(tokens, "LCPAREN", "RCPAREN")
+    replaced = {}
+    for i, token in enumerate(tokens):
+        if token == ("METHOD", "DataFrame") and i >= 2 and tokens[i-2] == ("IMPORTREF", "pandas") and i + 2 in braces:
+            replaced[i+2], replaced[braces[i+2]] = ("OP", "LSPAREN"), ("OP", "RSPAREN")
+
+    return [replaced.get(i, token) for i, token in enumerate(tokens)]
+
+
+# Tokens that are a whole operand by themselves, for finding the two sides of a `**`
+operandkinds = frozenset(["NAME", "VAR", "VARREF", "PARAM", "FUNCREF", "IMPORTREF", "METHOD", "TYPE", "INT", "FLOAT", "STRING"])
+
+unaryops = frozenset([("OP", "SUB"), ("OP", "PLUS"), ("OP", "BITFLIP")])
+
+
+def poweroperands(tokens: list, p: int, parens: dict, squares: dict, openers: dict, powers: dict):
+    # (start, end) of `base ** exponent` around the POW at p: the base is the primary (with any calls, indexing
+    # and attribute accesses) just before it, the exponent may carry unary signs as in Python. None if either side
+    # isn't recognised. `openers` maps the closing brackets of parens and squares back to their openings, and
+    # `powers` the start of each power right of p to its end, as the exponent may be one of those
+    j = p - 1
+    while j >= 0:
+        if j in openers:
+            j = openers[j]
+            if j > 0 and (tokens[j-1][0] in operandkinds or tokens[j-1] in (("OP", "RPAREN"), ("OP", "RSPAREN"))):
+                j -= 1
+                continue
+        elif tokens[j][0] in operandkinds:
+            if j > 1 and tokens[j-1] == ("SIG", "DOT"):
+                j -= 2
+                continue
+        else:
+            return None
+        break
+    if j < 0:
+        return None
+
+    k = p + 1
+    while k < len(tokens) and tokens[k] in unaryops:
+        k += 1
+    if k >= len(tokens):
+        return None
+    if k in powers:
+        k = powers[k]
+    elif k in parens:
+        k = parens[k] + 1
+    elif tokens[k][0] in operandkinds:
+        k += 1
+    else:
         return None
+    while k < len(tokens):
+        if k in parens or k in squares:
+            k = (parens.get(k) or squares.get(k)) + 1
+        elif tokens[k] == ("SIG", "DOT") and k + 1 < len(tokens):
+            k += 2
+        else:
+            break
+
+    return j, k
+
+
+def lowerpowers(tokens: list):
+    # Rewrites `a ** b` as `pypow(a, b)`, `x **= b` as `x = pypow(x, b)` and pow() as pypow(), whose integer
+    # overloads raise exactly by repeated squaring. The rightmost ** goes first, so `a ** b ** c` nests as Python's
+    # right associativity has it
+    if ("OP", "POW") not in tokens and ("OP", "POWAND") not in tokens and ("NAME", "pow") not in tokens:
+        return tokens
+
+    lowered = []
+    closing = []
+    for i, token in enumerate(tokens):
+        if closing and token in (("SIG", "NEWLINE"), ("SIG", "BLOCK_START"), ("SIG", "BLOCK_END")):
+            lowered.append(closing.pop())
+
+        if token == ("NAME", "pow") and tokens[i-1] != ("SIG", "DOT"):
+            lowered.append(("NAME", "pypow"))
+        elif token == ("OP", "POWAND") and i > 0 and tokens[i-1][0] in operandkinds:
+            lowered += [("OP", "ASSIGN"), ("NAME", "pypow"), ("OP", "LPAREN"), ("NAME", tokens[i-1][1]), ("SIG", "COMMA")]
+            closing.append(("OP", "RPAREN"))
+        else:
+            lowered.append(token)
+    tokens = lowered + closing
+
+    parens = matchingbrackets(tokens, "LPAREN", "RPAREN")
+    squares = matchingbrackets(tokens)
+    openers = {close: start for matches in (parens, squares) for start, close in matches.items()}
+
+    # Found on the tokens as they are, then rewritten in one go: `pypow(` goes before each base, a comma in place of
+    # the **, and a `)` before the token after the exponent
+    opened = {}
+    closed = {}
+    powers = {}     # start -> end of each power rewritten
+    commas = set()
+    for p in range(len(tokens) - 1, -1, -1):
+        if tokens[p] != ("OP", "POW"):
+            continue
+
+        operands = poweroperands(tokens, p, parens, squares, openers, powers)
+        if operands is None:
+            continue
+
+        start, end = operands
+        powers[start] = end
+        commas.add(p)
+        opened[start] = [("NAME", "pypow"), ("OP", "LPAREN")] + opened.get(start, [])
+        closed[end] = closed.get(end, 0) + 1
+
+    lowered = []
+    for i, token in enumerate(tokens):
+        lowered += [("OP", "RPAREN")] * closed.get(i, 0) + opened.get(i, [])
+        lowered.append(("SIG", "COMMA") if i in commas else token)
+
+    return lowered + [("OP", "RPAREN")] * closed.get(len(tokens), 0)
 
 
 def parsetabamount(tabtok):
     return int(str(tabtok[1]).removesuffix(" TAB"))
 
 
-def removenewlinedups(x):
-    return [x[i] for i in range(len(x)) if (i == 0) or (x[i] != x[i-1]) or (x[i] != ("SIG", "NEWLINE"))]
+# Kinds that pass checktokens() even when the token itself isn't in `implemented`
+passthroughkinds = frozenset(tokenise.Kind[kind] for kind in ["STRING", "FSTRING", "FLOAT", "NAME", "FUNC", "VAR", "SIG", "PARAM",
+                                                              "TYPE", "INT", "OP", "VARREF", "FUNCREF", "IMPORTREF", "IMPORT_MODULE", "METHOD"])
 
-def removeblanks(x):
-    return [tok for tok in x if tok != ("SIG", "BLANK")]
+
+def prelude():
+    # Fixed runtime prelude every program starts with; identical across programs so it can be precompiled (see pch.py)
+    code = ""
+    for include in includes:
+        code += f'#include "{include}"\n'
+    for use in using:
+        code += f"using {use};\n"
+    for typedef in typedefs:
+        code += f"typedef {typedef[0]} {typedef[1]};"
+    for typecomp in typecomparisons:
+        code += typecomp + " "
+
+    code += '\nstd::string operator * (std::string a, unsigned int b) {std::string output = "";while (b--) {output += a;}return output;}\n'
+
+    return code
 
 
 class Compile:
-    def __init__(self, tokens: list, verbose: bool, filename: str):
+    def __init__(self, tokens: list, verbose: bool, filename: str, pch: bool = False, stdiosync: bool = True):
         self.tokens = tokens
         self.type = 0
         self.value = 1
         self.verbose = verbose
         self.filename = filename
+        self.pch = pch
+        self.stdiosync = stdiosync
 
-        self.oktokens = self.checktokens()
+        self.oktokens = lowerprintoptions(lowergenerators(lowercomprehensions(lowerpowers(lowerpandascalls(lowernumpycalls(
+            lowersubscripts(lowermembership(lowerdicts(lowerunpacking(self.checktokens()))))))))))
 
     def iteratetokens(self):
-        code = """#define FMT_HEADER_ONLY\n"""
-        for include in includes:
-            code += f'#include "{include}"\n'
-        for use in using:
-            code += f"using {use};\n"
-        for typedef in typedefs:
-            code += f"typedef {typedef[0]} {typedef[1]};"
-        for typecomp in typecomparisons:
-            code += typecomp + " "
-
-        code += '\nstd::string operator * (std::string a, unsigned int b) {std::string output = "";while (b--) {output += a;}return output;}\n'
+        emitter, oktokens = self.emittokens()
+        return emitter.getvalue(), oktokens
+
+    def emittokens(self):
+        # Same as iteratetokens() but hands back the section buffers unjoined, so they can be streamed to g++
+        self.emitter = Emitter()
+
+        # While a counted loop's range() arguments are emitted they're collected here, one list per argument
+        capture = []
+
+        def emit(text, section="body"):
+            if capture and section == "body":
+                capture[-1].append(text)
+            else:
+                self.emitter.write(text, section)
+
+        # With a precompiled prelude g++ is handed it via -include, so it must not be emitted again
+        if not self.pch:
+            emit(prelude(), "prelude")
+
+        if not self.stdiosync:
+            emit("const bool stdiounsynced = pyio::unsyncstdio();\n", "globals")
 
         if ("KW", "def") not in self.oktokens and ("KW", "class") not in self.oktokens:
-            code += "int main(int argc, char *argv[]){\n"
+            emit("int main(int argc, char *argv[]){\n")
 
         if self.verbose:
             print(f"[INFO]: Started converting {self.filename} to C++ IR;\n")
 
         start_time = time.perf_counter()
 
+        # Everything the loop below needs to know about other tokens is worked out up front, so each token is O(1)
+        lastkw = tokenise.lastkeywords(self.oktokens)
+        brackets = matchingbrackets(self.oktokens)
+        braces = matchingbrackets(self.oktokens, "LCPAREN", "RCPAREN")
+        functypeptrs = functypepointers(self.oktokens)
+        inference = typeinfer.TypeInference(self.oktokens)
+        inferred = inference.infer()
+        blocks = matchingblocks(self.oktokens)
+        parens = matchingbrackets(self.oktokens, "LPAREN", "RPAREN")
+        loops = countedloops(self.oktokens, inferred, parens, blocks)
+        readonly = readonlyparams(self.oktokens, blocks)
+        loop = None
+
+        # Where the declaration, the loops, the append and the element of each list in elementlists() start in the
+        # emitted code; the declaration is rewritten when the element has been emitted
+        lists = elementlists(self.oktokens, inference.elements, parens)
+        points = {}
+        for index, (loopstart, appended, lparen, rparen, _) in lists.items():
+            for k in (index, loopstart, appended, lparen + 1, rparen):
+                points.setdefault(k, []).append(index)
+        marks = {}
+
         for i in range(len(self.oktokens)):
+            for index in points.get(i, ()):
+                marks.setdefault(index, []).append(self.emitter.mark())
+                if len(marks[index]) == 5:
+                    declaration, loopstart, appended, elemstart, elemend = marks[index]
+                    self.emitter.rewrite(declaration, elementdeclaration(self.oktokens[index][self.value], self.emitter.text(loopstart, appended),
+                                                                         self.emitter.text(elemstart, elemend), lists[index][4]))
+
+            if i in loops:
+                loop = loops[i]
+                capture.append([])
+
+            if loop is not None:
+                # Tokens up to range's '(' and the commas between its arguments are replaced by the loop header
+                ctype, name, lparen, rparen, commas, literals = loop
+                if i <= lparen:
+                    continue
+                if i in literals:
+                    emit(f"{ctype}({self.oktokens[i][self.value]})")
+                    continue
+                if i in commas:
+                    capture.append([])
+                    continue
+                if i == rparen:
+                    args = ["".join(arg).strip() for arg in capture]
+                    capture.clear()
+                    loop = None
+                    emit(countedloopheader(ctype, name, args))
+                    continue
+
             if self.oktokens[i][self.type] == "TYPE":
                 if self.oktokens[i+1] == ("OP", "LPAREN"):
                     self.oktokens[i] = ("NAME", self.oktokens[i][self.value])
@@ -196,138 +1132,154 @@ class Compile:
                         print(
                             red(f"error: invalid type specified for var '{self.oktokens[i][self.value]}'"))
                         exit(1)
-                    ctypeofvar = pytypetoctype[typeofvar]
+                    ctypeofvar = annotatedctype(typeofvar, inferred, i)
                     varname = self.oktokens[i][self.value]
-                    code += f"{ctypeofvar} {varname}"
+                    emit(f"{ctypeofvar} {varname}")
 
                 else:
-                    code += f"auto {self.oktokens[i][self.value]}"
+                    emit(f"{inferred.get(i, 'auto')} {self.oktokens[i][self.value]}")
 
 
             if self.oktokens[i][self.type] == "FUNCREF" or self.oktokens[i][self.type] == "VARREF":
-                code += self.oktokens[i][self.value]
+                emit(self.oktokens[i][self.value])
 
             elif self.oktokens[i][self.type] == "OP":
                 if self.oktokens[i][self.value] == "LPAREN":
-                    code += "("
+                    emit("(")
 
                 elif self.oktokens[i][self.value] == "RPAREN":
-                    code += ")"
+                    emit(")")
 
                 elif self.oktokens[i][self.value] == "LSPAREN":
-                    if self.oktokens[i-1][self.type] != "NAME":
-                        code += "{"
+                    if not subscriptable(self.oktokens[i-1]):
+                        operand = self.oktokens[i-1] in listoperands or brackets.get(i, -2) + 1 < len(self.oktokens) and self.oktokens[brackets[i]+1] in listoperands
+                        emit("pylist{" if operand else "{")
+
+                    elif i in inference.lookups:
+                        # Reading a missing key raises KeyError, where d[k] would insert it
+                        emit(".at(")
+                        self.oktokens[brackets[i]] = ("OP", "RPAREN")
 
                     else:
-                        code += "["
-                        srsparenind = findnextopind(self.oktokens, i, "RSPAREN")
+                        emit("[")
+                        srsparenind = brackets.get(i)
                         if srsparenind is not None:
                             self.oktokens[srsparenind] = ("OP", "SRSPAREN")
 
 
+                elif self.oktokens[i][self.value] == "LCPAREN" and self.oktokens[i+1] != ("OP", "LSPAREN") and (self.oktokens[i-1] in setoperands
+                        or braces.get(i, -2) + 1 < len(self.oktokens) and self.oktokens[braces[i]+1] in setoperands):
+                    # Dict literals were lowered to braced [key, value] pairs, so only a set literal gets here
+                    emit("pyset{")
+
                 elif self.oktokens[i][self.value] == "RSPAREN":
-                    code += "}"
+                    emit("}")
 
                 elif self.oktokens[i][self.value] == "SRSPAREN":
-                    code += "]"
+                    emit("]")
 
                 elif self.oktokens[i][self.value] == "in":
-                    code += ": "
+                    emit(": ")
 
                 elif self.oktokens[i][self.value] == "or":
-                    code += " || "
+                    emit(" || ")
 
                 elif self.oktokens[i][self.value] == "and":
-                    code += " && "
+                    emit(" && ")
 
                 elif self.oktokens[i][self.value] == "not":
-                    code += "!"
+                    emit("!")
 
                 else:
                     mapped = invopmap[self.oktokens[i][self.value]]
                     if mapped != ";":
-                        code += " " + mapped + " "
+                        emit(" " + mapped + " ")
 
             elif self.oktokens[i][self.type] == "STRING" or self.oktokens[i][self.type] == "INT" or self.oktokens[i][self.type] == "FLOAT":
-                code += self.oktokens[i][self.value]
+                emit(self.oktokens[i][self.value])
 
             elif self.oktokens[i][self.type] == "SIG":
                 if self.oktokens[i][self.value] == "NEWLINE":
                     if i + 1 != len(self.oktokens):
                         if self.oktokens[i-1][self.type] != "SIG" and not str(self.oktokens[i-1][self.value]).endswith(" TAB") and self.oktokens[i-1][0] != "IMPORT_MODULE":
-                            code += ";"
+                            emit(";")
 
-                    code += "\n"
+                    emit("\n")
 
                 if self.oktokens[i][self.type] == "SIG" and str(self.oktokens[i][self.value]).endswith("TAB"):
-                    code += "    " * parsetabamount(self.oktokens[i])
+                    emit("    " * parsetabamount(self.oktokens[i]))
 
                 if self.oktokens[i] == ("SIG", "COMMA"):
-                    code += ","
+                    emit(",")
 
                 if self.oktokens[i] == ("SIG", "DOT"):
-                    code += "."
+                    emit("::" if self.oktokens[i-1][self.type] == "IMPORTREF" and self.oktokens[i-1][self.value] in namespacemodules else ".")
 
                 elif self.oktokens[i] == ("SIG", "BLOCK_START"):
-                    code += "{"
+                    emit("{")
                 elif self.oktokens[i] == ("SIG", "BLOCK_END"):
-                    code += "}"
+                    emit("}")
+                elif self.oktokens[i] == ("SIG", "LAMBDA_END"):
+                    emit("; }")
 
             elif self.oktokens[i][self.type] == "KW":
                 if self.oktokens[i][self.value] == "def":
                     if self.oktokens[i+1] == ('FUNC', 'main'):
-                        code += "int "
+                        emit("int ")
 
                     else:
-                        indoftypedec = findnextfunctypeptr(self.oktokens, i)
+                        indoftypedec = functypeptrs.get(i)
                         if indoftypedec is not None:
                             if self.oktokens[indoftypedec + 1][self.value] in types:
-                                code += pytypetoctype[self.oktokens[indoftypedec + 1][self.value]] + " "
+                                emit(annotatedctype(self.oktokens[indoftypedec + 1][self.value], inferred, i) + " ")
                         else:
-                            code += "auto "
+                            emit(f"{inferred.get(i, 'auto')} ")
 
                 elif self.oktokens[i][self.value] == "for":
                     itervarname = self.oktokens[i+1][self.value]
-                    code += f"for("
+                    emit(f"for(")
 
                 elif self.oktokens[i][self.value] == "if":
-                    code += "if("
+                    emit("if(")
 
                 elif self.oktokens[i][self.value] == "elif":
-                    code += "else if("
+                    emit("else if(")
 
                 elif self.oktokens[i][self.value] == "else":
-                    code += "else"
+                    emit("else")
 
                 elif self.oktokens[i][self.value] == "while":
-                    code += "while("
+                    emit("while(")
 
                 elif self.oktokens[i][self.value] == "try":
-                    code += "try"
+                    emit("try")
 
                 elif self.oktokens[i][self.value] == "except":
-                    code += "catch("
+                    emit("catch(")
 
                 elif self.oktokens[i][self.value] == "continue":
-                    code += "continue"
+                    emit("continue")
 
                 elif self.oktokens[i][self.value] == "break":
-                    code += "break"
+                    emit("break")
                     
                 elif self.oktokens[i][self.value] == "pass":
-                    code += "pass"
+                    emit("pass")
 
                 elif self.oktokens[i][self.value] == "return":
-                    code += "return "
+                    emit("return ")
 
                 elif self.oktokens[i][self.value] == "True":
-                    code += "true "
+                    emit("true ")
 
                 elif self.oktokens[i][self.value] == "False":
-                    code += "false "
+                    emit("false ")
 
                 elif self.oktokens[i][self.value] == "import":
-                    code = f'#include "headers/builtins/py{self.oktokens[i+1][self.value]}.hpp"\n{str(self.oktokens[i+1][self.value]).capitalize()} {self.oktokens[i+1][self.value]};\n' + code
+                    module = self.oktokens[i+1][self.value]
+                    self.emitter.writeonce(f'#include "headers/builtins/py{module}.hpp"\n', "includes")
+                    if module not in namespacemodules:
+                        self.emitter.writeonce(f'{str(module).capitalize()} {module};\n', "globals")
 
                 else:
                     print(
@@ -335,13 +1287,15 @@ class Compile:
                     exit(1)
 
             elif self.oktokens[i][self.type] == "FUNC":
-                code += self.oktokens[i][self.value]
+                emit(self.oktokens[i][self.value])
 
             elif self.oktokens[i][self.type] == "NAME":
                 if self.oktokens[i][self.value] in pyexceptiontocpp:
-                    code += pyexceptiontocpp[self.oktokens[i][self.value]]
+                    emit(pyexceptiontocpp[self.oktokens[i][self.value]])
+                elif i in inference.floatpowers:
+                    emit("pyfloatpow")
                 else:
-                    code += self.oktokens[i][self.value]
+                    emit(self.oktokens[i][self.value])
 
             elif self.oktokens[i][self.type] == "PARAM":
                 if self.oktokens[i+1] == ("SIG", "TYPEPOINTER"):
@@ -351,86 +1305,89 @@ class Compile:
                         print(
                             red(f"error: invalid type specified for param '{self.oktokens[i][self.value]}'"))
                         exit(1)
-                    ctypeofparam = pytypetoctype[typeofparam]
+                    ctypeofparam = annotatedctype(typeofparam, inferred, i)
                     paramname = self.oktokens[i][self.value]
-                    code += f"{ctypeofparam} {paramname}"
+                    emit(paramdeclaration(ctypeofparam, paramname, i in readonly))
 
                 else:
-                    code += f"auto {self.oktokens[i][self.value]}"
+                    emit(paramdeclaration(inferred.get(i, 'auto'), self.oktokens[i][self.value], i in readonly))
 
             elif self.oktokens[i][self.type] == "IMPORTREF":
-                code += self.oktokens[i][self.value] if self.oktokens[i][self.value] != "random" else "rnd"
+                # The random module's instance is `rnd`; an attribute of the same name, `random.random()`, keeps its own
+                if self.oktokens[i][self.value] == "random" and self.oktokens[i-1] != ("SIG", "DOT"):
+                    emit("rnd")
+                else:
+                    emit(self.oktokens[i][self.value])
 
             elif self.oktokens[i][self.type] == "METHOD":
-                code += self.oktokens[i][self.value]
+                emit(self.oktokens[i][self.value])
+
+            elif self.oktokens[i][self.type] == "LAMBDA":
+                # A tuple parameter is bound to the names it unpacks into, like a `for a, b in ...` loop variable
+                parameter = self.oktokens[i][self.value]
+                if parameter.startswith("["):
+                    emit(f"[&](const auto& pyrow) {{ const auto& {parameter} = pyrow; return ")
+                else:
+                    emit(f"[&]({paramdeclaration(inferred.get(i, 'auto'), parameter, True)}) {{ return ")
 
             if i + 1 != len(self.oktokens):
                 if self.oktokens[i+1] == ("SIG", "BLOCK_END") and self.oktokens[i] != ("SIG", "NEWLINE") and self.oktokens[i] != ("SIG", "BLOCK_END"):
-                    code += ";"
+                    emit(";")
                 if self.oktokens[i+1] == ("SIG", "BLOCK_START"):
-                    blockkw = findlastkw(self.oktokens, i)
+                    blockkw = lastkw[i]
                     if blockkw not in [('KW', 'def'), ('KW', 'else'), ('KW', 'try')]:
-                        code += ")"
+                        emit(")")
 
         if ("KW", "def") not in self.oktokens and ("KW", "class") not in self.oktokens:
             pass
 
         end_time = time.perf_counter()
 
-        cpplines = code.split("\n")
-
-        newcpplines = cpplines
-
-        """
-        newcpplines = []
-        for line in cpplines:
-            if line.split(" ")[0] == "auto":
-                varname = line.split(" ")[1].removesuffix(";")
-                newcpplines.append(line + f"if(typeid({varname}) == inttype){{bigint {varname} {line.removeprefix('auto ' + varname)}}} else if(typeid({varname}) == floattype){{long double {varname} {line.removeprefix('auto ' + varname)}}}")
-
-            else:
-                newcpplines.append(line)
-
-        """
-
-        code = "\n".join(newcpplines)
-
         if self.verbose:
             print(f"[INFO]: Converted {self.filename} to C++ IR successfully in {round(end_time - start_time, 3)}s ({round(end_time - start_time, 3) * 1000}ms)\n")
 
-        return code, self.oktokens
+        return self.emitter, self.oktokens
 
     def checktokens(self):
-        oktokens = []
-
-        for token in self.tokens:
-            if token[self.type] == "IMPORT_MODULE" and token[self.value] not in implementedmodules:
-                print(red(f"error: module/library {token[self.value]} is not implemented yet, sorry'"))
+        # One pass over the kind codes decides which tokens stay, and the store then drops the others in place:
+        # unsupported tokens, an 'import' no module name follows, repeated newlines and blanks
+        store = self.tokens if isinstance(self.tokens, tokenise.TokenStore) else tokenise.TokenStore(self.tokens)
+        kinds, values = store.kinds, store.values
+        KW, SIG, MODULE = tokenise.Kind.KW, tokenise.Kind.SIG, tokenise.Kind.IMPORT_MODULE
+
+        keep = bytearray(len(store))
+        pending = None
+        newline = False
+        for i in range(len(kinds)):
+            kind, value = kinds[i], values[i]
+            if kind == MODULE and value not in implementedmodules:
+                print(red(f"error: line {store.lines[i]}: module/library {value} is not implemented yet, sorry"))
                 exit(1)
 
-            if token[self.type] == "SIG" and str(token[self.value]).endswith(" TAB"):
-                oktokens.append(token)
+            if kind not in passthroughkinds and (tokenise.KINDNAMES[kind], value) not in implemented:
                 continue
 
-            if token not in implemented:
-                if token[self.type] not in ["STRING", "FSTRING", "FLOAT", "NAME", "FUNC", "VAR", "SIG", "PARAM", "TYPE", "INT", "OP", "VARREF", "FUNCREF", "IMPORTREF", "IMPORT_MODULE", "METHOD"]:
-                    continue
-
-                if token[self.type] == "OP":
-                    pass
+            if pending is not None:
+                if kind == MODULE:
+                    keep[pending] = 1
+                    newline = False
+                pending = None
 
-            oktokens.append(token)
-
-        temp = []
-
-        for i in range(len(oktokens)):
-            if oktokens[i] == ("KW", "import") and oktokens[i+1][self.type] != "IMPORT_MODULE":
+            if kind == KW and value == "import":
+                pending = i
                 continue
 
-            temp.append(oktokens[i])
+            if kind == SIG and value == "NEWLINE":
+                keep[i] = not newline
+                newline = True
+                continue
 
-        oktokens = temp
+            newline = False
+            keep[i] = kind != SIG or value != "BLANK"
 
-        oktokens = removeblanks(removenewlinedups(oktokens))
+        store.retain(keep)
 
-        return oktokens
+        # The lowering passes rewrite by building new lists of (kind, value) tuples, inserting and dropping tokens as
+        # they go, so the store is expanded once here rather than converted back by each of them; that one pass over
+        # what survived is a fraction of a percent of the front end's time
+        return list(store)
@@ -0,0 +1,244 @@
+import contextlib
+import hmac
+import io
+import json
+import os
+import platform
+import secrets
+import socket
+import time
+from argparse import Namespace
+
+from colorama import Fore
+
+from pycom import build
+from pycom import client
+from pycom import compiler
+from pycom import errors
+from pycom import refactor
+from pycom import tokenise
+
+PLATFORM = platform.system()
+
+# How often (in seconds) watched files are checked for changes while waiting for client requests
+POLLINTERVAL = 0.5
+
+# How long (in seconds) a client has to send its request, and to take the reply, before it's hung up on; the daemon
+# serves one client at a time, so an idle one mustn't hold it up for longer. Requests are a line of JSON, of at most
+# MAXREQUEST bytes
+REQUESTTIMEOUT = 5
+MAXREQUEST = 1 << 20
+
+
+def red(string): return Fore.RED + string + Fore.RESET
+def green(string): return Fore.GREEN + string + Fore.RESET
+
+
+class Watched:
+    # Output of every stage from the last build, so a change only redoes the stages whose input changed
+    def __init__(self, filename: str, outname: str):
+        self.filename = filename
+        self.outname = outname
+        self.mtime = None
+        self.source = None
+        self.refactored = None
+        self.code = None
+
+
+def outnamefor(filename: str, flags: Namespace, many: bool):
+    outname = filename.removesuffix('.py')
+    if flags.output:
+        outname = os.path.join(flags.output, os.path.basename(outname)) if many else flags.output
+    if PLATFORM not in ("Linux", "Darwin"):
+        outname += '.exe'
+
+    return os.path.abspath(outname)
+
+
+def rebuild(entry: Watched, flags: Namespace):
+    try:
+        mtime = os.stat(entry.filename).st_mtime_ns
+    except FileNotFoundError:
+        return
+
+    if mtime == entry.mtime:
+        return
+    entry.mtime = mtime
+
+    with open(entry.filename, "r") as src:
+        source = src.read()
+
+    if source == entry.source:
+        return
+    entry.source = source
+
+    start_time = time.perf_counter()
+    log = io.StringIO()
+
+    try:
+        with contextlib.redirect_stdout(log):
+            refactored = refactor.refactorforcompiler(source.splitlines(keepends=True))
+
+            if refactored == entry.refactored:
+                # Only comments or blank lines changed
+                return
+            entry.refactored = refactored
+
+            code, _ = compiler.Compile(
+                tokens=tokenise.classifytokens(list(tokenise.rawtokens(refactored))),
+                verbose=flags.verbose,
+                filename=entry.filename,
+                pch=flags.pch,
+                stdiosync=not flags.no_stdio_sync
+            ).iteratetokens()
+
+    except (Exception, SystemExit):
+        entry.refactored = entry.code = None
+        print(red(f"[FAIL] '{entry.filename}': failed to convert to C++"))
+        print(log.getvalue(), end="")
+        return
+
+    if code == entry.code:
+        print(f"[INFO]: '{entry.filename}' changed but its C++ did not; skipped g++")
+        return
+
+    output, error, cachehit = build.compilecode(
+        code, entry.outname, fastmath=flags.fastmath, usecache=not flags.no_cache, usepch=flags.pch,
+        uncheckedindex=flags.unchecked_index)
+
+    elapsed = round(time.perf_counter() - start_time, 2)
+
+    if error == b"" and os.path.isfile(entry.outname):
+        entry.code = code
+        print(green(f"[OK] '{entry.filename}' rebuilt in {elapsed}s{' (cached)' if cachehit else ''}"))
+
+    else:
+        entry.code = None
+        print(red(f"[FAIL] '{entry.filename}' in {elapsed}s"))
+        print(red(error.decode('utf-8') if flags.gpperrors else errors.cpperrortopycomerror(error.decode('utf-8'))))
+
+
+def writetoken(port: int):
+    # A fresh secret for this run, in a file only the daemon's owner can read (see client.tokenfile)
+    token = secrets.token_hex(32)
+    path = client.tokenfile(port)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
+
+    descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(descriptor, "w") as file:
+        file.write(token)
+
+    return token
+
+
+def readrequest(conn: socket.socket):
+    # The request line, read within REQUESTTIMEOUT however slowly its bytes arrive; None if it doesn't come in time
+    deadline = time.monotonic() + REQUESTTIMEOUT
+    data = b""
+    while b"\n" not in data and len(data) <= MAXREQUEST:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        conn.settimeout(remaining)
+        try:
+            chunk = conn.recv(65536)
+        except OSError:
+            # socket.timeout included
+            return None
+        if not chunk:
+            break
+        data += chunk
+
+    return data.split(b"\n", 1)[0]
+
+
+def reply(conn: socket.socket, output: str, code: int):
+    # A client that has gone, or stopped reading, just misses its reply
+    conn.settimeout(REQUESTTIMEOUT)
+    with contextlib.suppress(OSError):
+        conn.sendall(json.dumps({"output": output, "code": code}).encode("utf-8") + b"\n")
+
+
+def handle(conn: socket.socket, parser, dispatch, token: str):
+    # Runs one pycom-client request as if `pycom <argv>` had been run in the client's directory
+    with conn:
+        line = readrequest(conn)
+        try:
+            request = json.loads(line) if line is not None else None
+        except ValueError:
+            request = None
+        if not isinstance(request, dict):
+            # Too slow, or not a request at all: hung up on without a reply
+            return
+
+        if not hmac.compare_digest(str(request.get("token", "")), token):
+            reply(conn, red("[ERROR]: request refused: wrong or missing daemon token\n"), 1)
+            return
+
+        log = io.StringIO()
+        code = 0
+        cwd = os.getcwd()
+
+        try:
+            with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+                os.chdir(request["cwd"])
+                flags = parser.parse_args(request["argv"])
+
+                if flags.serve or flags.run or flags.runanddelete:
+                    print(red("[ERROR]: --serve, --run and --runanddelete can't be used through pycom-client"))
+                    code = 1
+
+                elif not flags.source_file:
+                    parser.error("at least one source file is required")
+
+                else:
+                    dispatch(flags)
+
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+
+        except Exception as e:
+            log.write(red(f"[ERROR]: {type(e).__name__}: {e}\n"))
+            code = 1
+
+        finally:
+            os.chdir(cwd)
+
+        reply(conn, log.getvalue(), code)
+
+
+def serve(flags: Namespace, parser, dispatch, filenames: list):
+    many = len(filenames) > 1
+    watched = [Watched(os.path.abspath(filename), outnamefor(filename, flags, many)) for filename in filenames]
+
+    if flags.output and many:
+        os.makedirs(flags.output, exist_ok=True)
+
+    # Build libpycomrt and the prelude .gch now, so neither the first request nor the first rebuild waits on them
+    build.prebuild(fastmath=flags.fastmath, usepch=flags.pch, uncheckedindex=flags.unchecked_index)
+
+    with socket.create_server(("127.0.0.1", flags.port)) as server:
+        token = writetoken(flags.port)
+        server.settimeout(POLLINTERVAL)
+        print(f"[INFO]: pycom daemon listening on 127.0.0.1:{flags.port}, watching {len(watched)} file(s); Ctrl+C to stop\n")
+
+        try:
+            while True:
+                for entry in watched:
+                    rebuild(entry, flags)
+
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    continue
+
+                handle(conn, parser, dispatch, token)
+
+        except KeyboardInterrupt:
+            print("\n[INFO]: pycom daemon stopped")
+
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(client.tokenfile(flags.port))
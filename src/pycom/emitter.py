@@ -0,0 +1,42 @@
+# Order the sections appear in the translation unit
+SECTIONS = ("prelude", "includes", "globals", "body")
+
+
+class Emitter:
+    # Collects generated C++ as lists of fragments per section; nothing is concatenated until the code is
+    # written out, so emitting a program costs time linear in its size wherever a fragment lands
+    def __init__(self):
+        self.sections = {section: [] for section in SECTIONS}
+        self.seen = set()
+
+    def write(self, text: str, section: str = "body"):
+        self.sections[section].append(text)
+
+    def mark(self, section: str = "body"):
+        # Index of the next fragment written to `section`, for text() and rewrite()
+        return len(self.sections[section])
+
+    def text(self, start: int, end: int, section: str = "body"):
+        return "".join(self.sections[section][start:end])
+
+    def rewrite(self, index: int, text: str, section: str = "body"):
+        # Replaces a fragment already written, for what can only be told from the code after it
+        self.sections[section][index] = text
+
+    def writeonce(self, text: str, section: str):
+        # For includes and module objects, which must only be emitted once however often they're imported
+        if (section, text) not in self.seen:
+            self.seen.add((section, text))
+            self.write(text, section)
+
+    def parts(self):
+        for section in SECTIONS:
+            yield from self.sections[section]
+
+    def writeto(self, stream):
+        # `stream` is anything with a text write(), e.g. an open file, sys.stdout or g++'s wrapped stdin
+        for part in self.parts():
+            stream.write(part)
+
+    def getvalue(self):
+        return "".join(self.parts())
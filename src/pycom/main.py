@@ -2,18 +2,42 @@
 import argparse
 import os
 import platform
-import shlex
-import subprocess
+import sys
 import time
 from argparse import Namespace
+from concurrent.futures import ThreadPoolExecutor
 
 from colorama import Fore
 
+from pycom import build
+from pycom import client
 from pycom import compiler
+from pycom import daemon
 from pycom import errors
 from pycom import tokenise
 
 
+def transpile(filename: str, verbose: bool, use_pch: bool, stdiosync: bool = True):
+    return compiler.Compile(
+        tokens=tokenise.gettokens(filename=filename, verbose=verbose),
+        verbose=verbose,
+        filename=filename,
+        pch=use_pch,
+        stdiosync=stdiosync
+    ).emittokens()
+
+
+def expandsources(sources: list):
+    files = []
+    for source in sources:
+        if os.path.isdir(source):
+            files += sorted(os.path.join(source, file) for file in os.listdir(source) if file.endswith(".py"))
+        else:
+            files.append(source)
+
+    return files
+
+
 def run_compile(flags: Namespace):
     _platform = platform.system()
 
@@ -39,6 +63,8 @@ def run_compile(flags: Namespace):
     test = flags.test
     check = flags.check
     gpp_errors = flags.gpperrors
+    no_cache = flags.no_cache
+    use_pch = flags.pch
 
     if raw_tokens:
         print(tokenise.gettokens(filename=filename, verbose=verbose))
@@ -49,18 +75,15 @@ def run_compile(flags: Namespace):
 
     start_time = time.perf_counter()
 
-    compiledcode, tokens = compiler.Compile(
-        tokens=tokenise.gettokens(filename=filename, verbose=verbose),
-        verbose=verbose,
-        filename=filename
-    ).iteratetokens()
+    compiledcode, tokens = transpile(filename, verbose, use_pch, not flags.no_stdio_sync)
 
     if print_tokens:
         print(tokens)
         exit(1)
 
     if _print:
-        print(compiledcode)
+        compiledcode.writeto(sys.stdout)
+        print()
         exit(1)
 
     outname = filename.split('.')[0]
@@ -69,43 +92,16 @@ def run_compile(flags: Namespace):
     elif _platform not in ("Linux", "Darwin"):
         outname += '.exe'
 
-    if fastmath:
-        opt = '-O3'
-    elif _platform == "Linux":
-        opt = '-O2'
-    else:
-        opt = '-O3'
-
-    cmd = [
-        "g++",
-        "-std=c++20",
-        opt,
-        "-w",
-        "-xc++",
-        "-o", outname,
-        "-",
-    ]
-
-    process = subprocess.Popen(
-        cmd,
-        stdout=subprocess.PIPE,
-        stdin=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-    )
-
-    if _platform in ("Linux", "Darwin"):
-        process.stdin.write(compiledcode.encode('utf-8'))
-    else:
-        process.stdin.write(str.encode(compiledcode))
-        # XXX: not sure if this is actually needed on Windows
-        process.stdin.close()
-
-    output, error = process.communicate()
+    output, error, cachehit = build.compilecode(
+        compiledcode, outname, fastmath=fastmath, usecache=not no_cache, usepch=use_pch,
+        uncheckedindex=flags.unchecked_index)
 
     end_time = time.perf_counter()
 
     if info:
         print(f"[INFO]: Finished compiling '{filename}';\n")
+        if not no_cache:
+            print(f"[INFO]: Build cache {'hit' if cachehit else 'miss'} for '{filename}';\n")
 
     if error != b"":
         errorstr = errors.cpperrortopycomerror(error.decode(
@@ -121,7 +117,8 @@ def run_compile(flags: Namespace):
                 red(f"[INFO]: Errors in the compilation of '{filename}'; unsuccessful check"))
 
         if failprint:
-            print(compiledcode)
+            compiledcode.writeto(sys.stdout)
+            print()
             exit(1)
 
     if output == b"":
@@ -149,7 +146,100 @@ def run_compile(flags: Namespace):
                 f"./{filename.split('.')[0]}") if _platform == "Linux" else os.system(f".\{filename}.exe")
 
 
-def main():
+def run_batch(flags: Namespace, filenames: list):
+    _platform = platform.system()
+
+    def red(string): return Fore.RED + string + Fore.RESET
+    def green(string): return Fore.GREEN + string + Fore.RESET
+
+    if flags.run or flags.runanddelete or flags.print or flags.tokens or flags.rawtokens:
+        print(red("[ERROR]: --run, --runanddelete, --print, --tokens and --rawtokens need a single source file"))
+        exit(1)
+
+    if flags.output:
+        os.makedirs(flags.output, exist_ok=True)
+
+    start_time = time.perf_counter()
+
+    # Build libpycomrt and the prelude .gch up front rather than racing to build them in every worker
+    build.prebuild(fastmath=flags.fastmath, usepch=flags.pch, uncheckedindex=flags.unchecked_index)
+
+    def gppjob(filename, compiledcode, outname, frontend_time):
+        job_start = time.perf_counter()
+        output, error, cachehit = build.compilecode(
+            compiledcode, outname, fastmath=flags.fastmath, usecache=not flags.no_cache, usepch=flags.pch,
+            uncheckedindex=flags.unchecked_index)
+
+        ok = error == b"" and os.path.isfile(outname)
+        if ok and flags.check:
+            os.remove(outname)
+
+        return ok, error, cachehit, frontend_time + time.perf_counter() - job_start
+
+    jobs = {}
+
+    # The front-end runs here one file at a time; only the independent g++ builds go to the pool
+    with ThreadPoolExecutor(max_workers=flags.jobs) as pool:
+        for filename in filenames:
+            if not os.path.isfile(filename):
+                jobs[filename] = f"'{filename}' not found"
+                continue
+
+            frontend_start = time.perf_counter()
+
+            try:
+                compiledcode, _ = transpile(filename, flags.verbose, flags.pch, not flags.no_stdio_sync)
+
+            except SystemExit:
+                jobs[filename] = "failed to convert to C++"
+                continue
+
+            outname = filename.removesuffix('.py')
+            if flags.output:
+                outname = os.path.join(flags.output, os.path.basename(outname))
+            if _platform not in ("Linux", "Darwin"):
+                outname += '.exe'
+
+            jobs[filename] = pool.submit(
+                gppjob, filename, compiledcode, outname, time.perf_counter() - frontend_start)
+
+        failed = 0
+
+        for filename, job in jobs.items():
+            if isinstance(job, str):
+                failed += 1
+                print(red(f"[FAIL] '{filename}': {job}"))
+                continue
+
+            ok, error, cachehit, elapsed = job.result()
+
+            if ok:
+                cached = " (cached)" if cachehit and flags.info else ""
+                print(green(f"[OK] '{filename}' in {round(elapsed, 2)}s{cached}"))
+
+            else:
+                failed += 1
+                print(red(f"[FAIL] '{filename}' in {round(elapsed, 2)}s"))
+                errorstr = error.decode('utf-8') if flags.gpperrors else errors.cpperrortopycomerror(error.decode('utf-8'))
+                print(red(errorstr))
+
+    end_time = time.perf_counter()
+
+    summary = f"[INFO]: {len(filenames) - failed}/{len(filenames)} files compiled successfully in {round(end_time - start_time, 2)}s"
+    print(summary if not failed else red(summary))
+
+    exit(1 if failed else 0)
+
+
+def jobcount(value: str):
+    # --jobs takes a number of parallel builds, of which there has to be at least one
+    jobs = int(value)
+    if jobs < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {jobs}")
+    return jobs
+
+
+def makeparser():
     parser = argparse.ArgumentParser(prog='pycom')
     parser.add_argument(
         '-i', '--info', action='store_true',
@@ -172,6 +262,10 @@ def main():
         '-fm', '--fastmath', action='store_true',
         help='Perform aggressive optimisations speed on calculations at the cost of some precision. Defaults to off.'
     )
+    parser.add_argument(
+        '-ui', '--unchecked-index', action='store_true',
+        help='Leave out the negative index and bounds checks when indexing lists and strings. Defaults to off.'
+    )
     parser.add_argument(
         '-c', '--check', action='store_true',
         help='Check if the program will compile without actually compiling it. Defaults to off.'
@@ -208,9 +302,62 @@ def main():
         '-ge', '--gpperrors', action='store_true',
         help='Print g++ errors compiler errors instead of Pycom ones. Defaults to off.'
     )
-    parser.add_argument('source_file', type=str, help='Source file')
+    parser.add_argument(
+        '-nc', '--no-cache', action='store_true',
+        help='Always invoke g++ instead of reusing a previously built executable for identical code. Defaults to off.'
+    )
+    parser.add_argument(
+        '-pch', '--pch', action='store_true',
+        help='Use a precompiled header for the runtime prelude, built once per compiler/flags and kept in the cache. Defaults to off.'
+    )
+    parser.add_argument(
+        '-ns', '--no-stdio-sync', action='store_true',
+        help='Turn off the synchronisation of C++ streams with C stdio in the generated program, which speeds up input(). Defaults to off.'
+    )
+    parser.add_argument(
+        '-j', '--jobs', type=jobcount, default=os.cpu_count(),
+        help='Number of g++ builds to run in parallel when compiling several files, at least 1. Defaults to the number of CPUs.'
+    )
+    parser.add_argument(
+        '-s', '--serve', action='store_true',
+        help='Stay resident, answering pycom-client requests and rebuilding the given source files whenever they change. Defaults to off.'
+    )
+    parser.add_argument(
+        '--port', type=int, default=client.PORT,
+        help=f'Local port the --serve daemon listens on. Defaults to {client.PORT} (or PYCOM_PORT).'
+    )
+    parser.add_argument(
+        'source_file', type=str, nargs='*',
+        help='Source file(s); directories compile every .py file directly inside them'
+    )
+
+    return parser
+
+
+def dispatch(flags: Namespace):
+    filenames = expandsources(flags.source_file)
+
+    if len(filenames) == 1 and not os.path.isdir(flags.source_file[0]):
+        flags.source_file = filenames[0]
+        run_compile(flags=flags)
+
+    else:
+        run_batch(flags=flags, filenames=filenames)
+
+
+def main():
+    parser = makeparser()
     parsed_args = parser.parse_args()
-    run_compile(flags=parsed_args)
+
+    if parsed_args.serve:
+        daemon.serve(flags=parsed_args, parser=parser, dispatch=dispatch,
+                     filenames=expandsources(parsed_args.source_file))
+
+    elif not parsed_args.source_file:
+        parser.error("at least one source file is required")
+
+    else:
+        dispatch(flags=parsed_args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,54 @@
+import os
+import subprocess
+import threading
+
+from pycom import cache
+from pycom import compiler
+
+# Every program shares the same prelude (see compiler.prelude()), so it is compiled once into a .gch per
+# compiler/flag combination and handed to g++ with -include instead of being re-parsed for each program
+PRELUDE = "prelude.hpp"
+
+
+def pchdir(flags: list, version: str):
+    return cache.cachedir("pch", cache.cachekey("", version, " ".join(flags))[:16])
+
+
+def preludeheader(flags: list, version: str):
+    return os.path.join(pchdir(flags, version), PRELUDE)
+
+
+def ensurepch(flags: list, version: str, headersdir: str):
+    # Rebuilds the .gch whenever the prelude or anything under headersdir changed since it was built.
+    # Returns the header to pass to -include; if the .gch can't be built g++ just parses the plain header.
+    header = preludeheader(flags, version)
+    stamp = header + ".stamp"
+    digest = cache.cachekey(compiler.prelude(), cache.dirdigest(headersdir))
+
+    if os.path.isfile(header + ".gch") and os.path.isfile(stamp):
+        with open(stamp, "r") as f:
+            if f.read() == digest:
+                return header
+
+    with open(header, "w") as f:
+        f.write(compiler.prelude())
+
+    temp = f"{header}.{os.getpid()}.{threading.get_ident()}.gch"
+
+    process = subprocess.run(
+        ["g++", *flags, "-xc++-header", header, "-o", temp],
+        capture_output=True,
+    )
+
+    if process.returncode != 0:
+        if os.path.exists(temp):
+            os.remove(temp)
+        return header
+
+    # Replaced atomically so a concurrent compile never picks up a half-written .gch
+    os.replace(temp, header + ".gch")
+
+    with open(stamp, "w") as f:
+        f.write(digest)
+
+    return header
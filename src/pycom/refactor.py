@@ -1,5 +1,4 @@
 from typing import List
-import os
 
 blockkw = ["if", "elif", "else", "for", "while", "try", "except", "finally", "def", "class", "with"]
 
@@ -8,24 +7,6 @@ def findnextkwline(lines: List[str], startind: int):
         if lines[i].split(" ")[0] in blockkw:
             return lines[i]
 
-def listcomptocppfor(line: str, mode = "translate"):
-    try:
-        varname = line.split("=", 1)[0].strip().split(":")[0].strip()
-
-        listcomp = line.split("=", 1)[1].strip().removeprefix("[").removesuffix("]")
-
-        forinit = listcomp.split("for", 1)[1].strip()
-
-        foritername = forinit.split(" ", 1)[0].strip()
-
-        forbody = listcomp.split("for", 1)[0].strip()
-
-        return f"{varname} = []\nfor {forinit}:\n    {varname}.append({forbody});" if mode == "translate" else foritername
-
-    except Exception:
-        return None
-
-
 def refactorforcompiler(code: list):
     if code == []: return ";"
     try:
@@ -70,20 +51,6 @@ def refactorforcompiler(code: list):
             if str(lineandindlevel[i][0]).strip().split(" ")[0] == "return" and str(lineandindlevel[i][0]).strip()[-1] != ";" and i + 1 <= len(lineandindlevel) and len(lineandindlevel) > 2:
                 lineandindlevel[i] = (lineandindlevel[i][0] + ";", lineandindlevel[i][1])
 
-            if listcomptocppfor(str(lineandindlevel[i][0]).strip()) is not None:
-                lineandindlevel[i] = (listcomptocppfor(str(lineandindlevel[i][0]).strip()), lineandindlevel[i][1])
-
-            if "=" in str(lineandindlevel[i][0]).strip():
-                if str(lineandindlevel[i][0]).strip().split("=", 1)[1].strip().startswith('["'):
-                    lineandindlevel[i] = (str(lineandindlevel[i][0]).strip().split("=", 1)[0] + ":strlist = " + str(lineandindlevel[i][0]).strip().split("=", 1)[1], lineandindlevel[i][1])
-
-                elif str(lineandindlevel[i][0]).strip().split("=", 1)[1].strip().startswith('['):
-                    if '"' not in str(lineandindlevel[i][0]).strip() and "." in str(lineandindlevel[i][0]).strip():
-                        lineandindlevel[i] = (str(lineandindlevel[i][0]).strip().split("=", 1)[0] + ":floatlist = " + str(lineandindlevel[i][0]).strip().split("=", 1)[1], lineandindlevel[i][1])
-
-                    else:
-                        lineandindlevel[i] = (str(lineandindlevel[i][0]).strip().split("=", 1)[0] + ":list = " + str(lineandindlevel[i][0]).strip().split("=", 1)[1], lineandindlevel[i][1])
-
         if not definanylines:
             lineandindlevel[-1] = (lineandindlevel[-1][0] + ";", lineandindlevel[-1][1])
 
@@ -93,7 +60,6 @@ def refactorforcompiler(code: list):
 
     except Exception as e:
         print(f"error: likely an indexing problem in 'refactorforcompiler()': {e}")
-        os.remove("temp.py")
         exit(1)
 
         
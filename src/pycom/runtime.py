@@ -0,0 +1,67 @@
+import os
+import subprocess
+import tempfile
+
+from pycom import cache
+
+LIBNAME = "pycomrt"
+
+# The builtins declared in headers/builtins are defined in these sources and archived into libpycomrt.a, along with
+# fmt's library part, built lazily once per compiler/flag combination and linked into every executable
+SOURCES = ["stdpy.cpp", "pymath.cpp", "pyos.cpp", "pyrnd.cpp", "pynumpy.cpp", "pypandas.cpp", "fmt.cpp"]
+
+
+def libdir(flags: list, version: str):
+    return cache.cachedir("rt", cache.cachekey("", version, " ".join(flags))[:16])
+
+
+def linkflags(flags: list, version: str):
+    return ["-L", libdir(flags, version), f"-l{LIBNAME}"]
+
+
+def ensurelib(flags: list, version: str, rootdir: str):
+    # Rebuilds the archive whenever the runtime sources or headers changed since it was built.
+    # Returns g++'s stderr if any source failed to compile, else b"".
+    directory = libdir(flags, version)
+    lib = os.path.join(directory, f"lib{LIBNAME}.a")
+    stamp = lib + ".stamp"
+    runtimedir = os.path.join(rootdir, "runtime")
+    digest = cache.cachekey("", cache.dirdigest(runtimedir), cache.dirdigest(os.path.join(rootdir, "headers")))
+
+    if os.path.isfile(lib) and os.path.isfile(stamp):
+        with open(stamp, "r") as f:
+            if f.read() == digest:
+                return b""
+
+    with tempfile.TemporaryDirectory(dir=directory) as builddir:
+        objects = [os.path.join(builddir, source.replace(".cpp", ".o")) for source in SOURCES]
+
+        # Each source is independent, so they are all compiled at once
+        processes = [
+            subprocess.Popen(
+                # Fat LTO objects link normally, but also let -flto builds optimise across the runtime
+                ["g++", *flags, "-flto", "-ffat-lto-objects", "-c", os.path.join(runtimedir, source), "-o", obj],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+            for source, obj in zip(SOURCES, objects)
+        ]
+
+        errors = b"".join(process.communicate()[1] for process in processes)
+
+        if any(process.returncode != 0 for process in processes):
+            return errors
+
+        temp = os.path.join(builddir, f"lib{LIBNAME}.a")
+        process = subprocess.run(["gcc-ar", "rcs", temp, *objects], capture_output=True)
+
+        if process.returncode != 0:
+            return process.stderr
+
+        # Replaced atomically so a concurrent link never picks up a half-written archive
+        os.replace(temp, lib)
+
+    with open(stamp, "w") as f:
+        f.write(digest)
+
+    return b""
@@ -0,0 +1,45 @@
+KINDS = ("var", "func", "import", "class")
+
+# Builtin type names are treated as already-declared variables, as the tokeniser always has
+BUILTINVARS = ["str", "int", "float", "list", "dict", "set", "bool"]
+
+
+class Scope:
+    def __init__(self, name: str, parent=None):
+        self.name = name
+        self.parent = parent
+        self.names = {kind: set() for kind in KINDS}
+
+
+# Names declared in one compilation unit, with a scope per function. Scopes are named by the dotted path of their
+# enclosing functions ("outer.inner"), None being module level; a lookup checks the given scope and then each
+# enclosing one, so every query costs O(depth) set lookups instead of a scan over every name seen so far
+class SymbolTable:
+    def __init__(self):
+        self.globals = Scope(None)
+        self.scopes = {None: self.globals}
+
+        for name in BUILTINVARS:
+            self.define(name, "var")
+
+    def scope(self, path: str = None):
+        if path not in self.scopes:
+            parent = self.scope(path.rsplit(".", 1)[0] if "." in path else None)
+            self.scopes[path] = Scope(path, parent)
+
+        return self.scopes[path]
+
+    def define(self, name: str, kind: str, path: str = None):
+        self.scope(path).names[kind].add(name)
+
+    def has(self, name: str, kind: str, path: str = None):
+        scope = self.scope(path)
+        while scope is not None:
+            if name in scope.names[kind]:
+                return True
+            scope = scope.parent
+
+        return False
+
+    def names(self, kind: str, path: str = None):
+        return set(self.scope(path).names[kind])
@@ -8,13 +8,17 @@ THE FOLLOWING BUILTINS ARE NOT SUPPORTED YET:
 
 
 
-import os
+import enum
+import io
 import re
 import sys
 import time
 import tokenize
+from array import array
+from itertools import compress
 
 from pycom import refactor
+from pycom import symbols
 
 tokmap = {
     "\n": "NEWLINE",
@@ -68,32 +72,86 @@ tokmap = {
     ";": "BLOCK_END"
 }
 
-keywords = ["import", "if", "elif", "else", "for", "while", "match", "case", "try", "except", "finally", "True", "False", "continue",
+# Sets, as wordtotoktype() and the classifier test membership for every token
+keywords = frozenset(["import", "if", "elif", "else", "for", "while", "match", "case", "try", "except", "finally", "True", "False", "continue",
             "break", "pass", "as", "assert", "def", "class", "await", "return", "from", "async", "await", "del", "global",
-            "lambda", "nonlocal", "raise", "with", "yield"]
+            "lambda", "nonlocal", "raise", "with", "yield"])
 
-blockkw = ["if", "elif", "else", "for", "while", "try",
-           "except", "finally", "def", "class", "with", "match", ]
+blockkw = frozenset(["if", "elif", "else", "for", "while", "try",
+           "except", "finally", "def", "class", "with", "match"])
 
-operators = ["+", "-", "*", "/", "//", "%", "**", "+=", "-=", "*=", "/=", "%=", "**=", "//=", "&=", "|=", ">>=", "<<=", "=",
-             "==", "!=", ">", "<", ">=", "<=", "&", "|", "^", ">>", "<<", "(", ")", "[", "]", "{", "}", "and", "or", "in", "is", "not"]
+operators = frozenset(["+", "-", "*", "/", "//", "%", "**", "+=", "-=", "*=", "/=", "%=", "**=", "//=", "&=", "|=", ">>=", "<<=", "=",
+             "==", "!=", ">", "<", ">=", "<=", "&", "|", "^", "~", ">>", "<<", "(", ")", "[", "]", "{", "}", "and", "or", "in", "is", "not"])
 
-signifiers = [":", ";", ".", ",", "\n", "\r\n", "\t", "->"]
+signifiers = frozenset([":", ";", ".", ",", "\n", "\r\n", "\t", "->"])
 
-types = ["str", "int", "float", "list", "dict", "set", "bool", "strlist", "floatlist"]
+types = frozenset(["str", "int", "float", "list", "dict", "set", "bool", "strlist", "floatlist"])
 
 pylistmethodtocpp = {
     "append": "push_back",
     "pop": "pop_back"
 }
 
-varnames = ["str", "int", "float", "list", "dict", "set", "bool"]
-
-funcnames = []
-
-importnames = []
-
-classnames = []
+class Kind(enum.IntEnum):
+    # Token kinds, stored as one byte each in a TokenStore
+    KW = 0
+    OP = 1
+    SIG = 2
+    STRING = 3
+    FSTRING = 4
+    INT = 5
+    FLOAT = 6
+    NAME = 7
+    TYPE = 8
+    VAR = 9
+    VARREF = 10
+    PARAM = 11
+    FUNC = 12
+    FUNCREF = 13
+    CLASS = 14
+    CLASSREF = 15
+    IMPORT_MODULE = 16
+    IMPORTREF = 17
+    METHOD = 18
+
+
+# Interned, so the (kind, value) tuples a TokenStore hands out share their kind strings
+KINDNAMES = tuple(sys.intern(kind.name) for kind in Kind)
+KINDCODES = {kind.name: kind.value for kind in Kind}
+
+
+class TokenStore:
+    # The classified tokens of a unit as parallel arrays: the Kind of each (one byte), its interned value and the line
+    # of the refactored source it's on. Filters work on the kinds and values and then drop tokens in place with
+    # retain(); indexing and iterating give the (kind, value) tuples the compiler's lowering passes take
+    __slots__ = ("kinds", "values", "lines")
+
+    def __init__(self, tokens=(), lines=None):
+        tokens = list(tokens)
+        self.kinds = bytearray(map(KINDCODES.__getitem__, [kind for kind, _ in tokens]))
+        self.values = [value for _, value in tokens]
+        self.lines = array("I", lines) if lines is not None else array("I", bytes(4 * len(self.values)))
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return list(zip(map(KINDNAMES.__getitem__, self.kinds[i]), self.values[i]))
+        return KINDNAMES[self.kinds[i]], self.values[i]
+
+    def __iter__(self):
+        return zip(map(KINDNAMES.__getitem__, self.kinds), self.values)
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def retain(self, keep):
+        # Keeps the tokens whose entry in `keep` (one truth value per token) is true, compacting every array in place
+        keep = bytes(keep)
+        self.kinds[:] = bytes(compress(self.kinds, keep))
+        self.values[:] = compress(self.values, keep)
+        self.lines[:] = array("I", compress(self.lines, keep))
 
 
 def fstringtocppformat(stringtok: str):
@@ -119,10 +177,32 @@ def fstringtocppformat(stringtok: str):
 
     return "fmt::format(" + re.sub("\{.*?\}", "{}", stringtok) + strformatargs + ")"
 
-def findlastkw(tokens, currentind):
-    for i in range(currentind, -1, -1):
-        if tokens[i][0] == "KW":
-            return tokens[i]
+def lastkeywords(tokens: list):
+    # lastkeywords(tokens)[i] is the closest keyword token at or before i (None if there is none), found in one
+    # pass so per-token queries are constant time; classification never turns tokens into or out of keywords
+    lastkw = None
+    found = []
+    for token in tokens:
+        if token[0] == "KW":
+            lastkw = token
+        found.append(lastkw)
+
+    return found
+
+
+def defheaders(tokens: list):
+    # defheaders(tokens)[i] is whether token i is in a function header, between 'def' and the ':' opening its body;
+    # only names there can be parameters
+    inheader = False
+    found = []
+    for token in tokens:
+        if token == ("KW", "def"):
+            inheader = True
+        elif token == ("SIG", "BLOCK_START"):
+            inheader = False
+        found.append(inheader)
+
+    return found
 
 def isfloat(token: str):
     token = str(token)
@@ -176,7 +256,37 @@ def allcharacterssame(s):
     return True
 
 
-def gettokens(filename: str, verbose: bool):
+def rawtokens(code: str):
+    # (token string, enclosing function scope, line) of the refactored source, streamed straight from an
+    # in-memory buffer; the empty NEWLINE/DEDENT/ENDMARKER strings carry nothing the classifier uses, but
+    # INDENT/DEDENT still tell which function body each token is in
+    depth = 0
+    functions = []
+    lastdef = False
+
+    for token in tokenize.generate_tokens(io.StringIO(code).readline):
+        if token.type == tokenize.INDENT:
+            depth += 1
+
+        elif token.type == tokenize.DEDENT:
+            depth -= 1
+            while functions and functions[-1][1] >= depth:
+                functions.pop()
+
+        if token.string == "":
+            continue
+
+        scope = functions[-1][0] if functions else None
+
+        yield token.string, scope, token.start[0]
+
+        if lastdef and token.type == tokenize.NAME:
+            functions.append((f"{scope}.{token.string}" if scope else token.string, depth))
+
+        lastdef = token.string == "def"
+
+
+def gettokens(filename: str, verbose: bool, source: str = None):
 
     if verbose:
         print(f"[VINFO]: Started tokenisation of {filename};\n")
@@ -184,184 +294,189 @@ def gettokens(filename: str, verbose: bool):
     start_time = time.perf_counter()
 
     try:
-        with open(filename, "r") as src:
-            source = src.readlines()
-        with open("temp.py", "x") as x:
-            pass
-        with open("temp.py", "w") as temp:
-            temp.write(refactor.refactorforcompiler(source))
-        with open("temp.py", "rb") as f:
-            tokens = tokenize.tokenize(f.readline)
-            token_list = [t.string for t in tokens][1:-2]
-
-        os.remove("temp.py")
-
-        while "" in token_list:
-            token_list.remove("")
-
-        for i in range(len(token_list)):
-            current = token_list[i]
-            typeofcurrent = wordtotoktype(current)
-
-            try:
-                token_list[i] = (typeofcurrent, tokmap[current])
-
-            except KeyError:
-                if typeofcurrent == "STRING":
-                    current = current.replace("\\n", "\\\\n")
-
-                token_list[i] = (typeofcurrent, current)
-                if token_list[i][0] == "SIG" and token_list[i][1].startswith("    ") and allcharacterssame(token_list[i][1]):
-                    token_list[i] = ("SIG", f"{int(len(current) / 4)} TAB")
-
-            try:
-                if token_list[i] == ("KW", "def"):
-                    funcnames.append(token_list[i+1][1])
-
-                elif token_list[i] == ("KW", "class"):
-                    classnames.append(token_list[i+1][1])
-
-                elif token_list[i] == ("KW", "import"):
-                    importnames.append(token_list[i+1][1])
-
-                elif token_list[i] == ("SIG", "BLOCK_START"):
-                    if i + 1 != len(token_list):
-                        if token_list[i+1][1] in types:
-                            token_list[i] = ("SIG", "TYPEPOINTER")
-
-                elif token_list[i][0] == "FSTRING":
-                    token_list[i] = (
-                        "STRING", fstringtocppformat(token_list[i][1]).replace("\n", "\\n"))
-
-                elif token_list[i][0] == "NAME":
-                    if token_list[i][1] in types:
-                        if token_list[i+1] != ("OP", "LPAREN"):
-                            token_list[i] = (
-                                "TYPE", token_list[i][1])
-
-                    elif token_list[i+1] == ("OP", "ASSIGN"):
-                        token_list[i] = ("VAR", token_list[i][1])
-                        varnames.append(token_list[i][1])
-
-                    elif token_list[i+1] == ("SIG", "BLOCK_START") and token_list[i+2][1] in types and token_list[i+3] == ("OP", "ASSIGN"):
-                        token_list[i] = ("VAR", token_list[i][1])
-                        varnames.append(token_list[i][1])
-
-                    elif token_list[i-1] == ("KW", "for"):
-                        token_list[i] = ("VAR", token_list[i][1])
-                        varnames.append(token_list[i][1])
-
-                    elif token_list[i+1] == ("SIG", "BLOCK_START"):
-                        token_list[i] = ("PARAM", token_list[i][1])
-                        varnames.append(token_list[i][1])
+        if source is None:
+            with open(filename, "r") as src:
+                source = src.read()
 
-                    elif token_list[i-1] == ("SIG", "DOT"):
-                        if token_list[i][1] not in pylistmethodtocpp:
-                            token_list[i] = ("METHOD", token_list[i][1])
+    except FileNotFoundError:
+        print(f"tokenise.py: error: '{filename}' not found", file=sys.stderr)
+        exit(1)
 
-                        else:
-                            token_list[i] = ("METHOD", pylistmethodtocpp[token_list[i][1]])
+    token_list = classifytokens(list(rawtokens(refactor.refactorforcompiler(source.splitlines(keepends=True)))))
 
-                    elif token_list[i-1] == ("KW", "import"):
-                        if token_list[i][1] != "random":
-                            token_list[i] = ("IMPORT_MODULE", token_list[i][1])
-                            importnames.append(token_list[i][1])
+    end_time = time.perf_counter()
 
-                        else:
-                            token_list[i] = ("IMPORT_MODULE", "rnd") # 'random' module clashes with C method, so must call it rnd here
-                            importnames.append("random")
+    if verbose:
+        print(f"[VINFO] Successfully tokenised {filename} in {round(end_time - start_time, 3)}s ({round(end_time - start_time, 3) * 1000}ms);\n")
 
-                    elif token_list[i-1] == ("KW", "def"):
-                        token_list[i] = ("FUNC", token_list[i][1])
+    return token_list
 
-                    elif token_list[i-1] == ("KW", "class"):
-                        token_list[i] = ("CLASS", token_list[i][1])
 
-                    else:
-                        if token_list[i][1] in varnames:
-                            token_list[i] = (
-                                "VARREF", token_list[i][1])
-                        elif token_list[i][1] in funcnames:
-                            token_list[i] = (
-                                "FUNCREF", token_list[i][1])
-                        elif token_list[i][1] in importnames:
-                            token_list[i] = (
-                                "IMPORTREF", token_list[i][1])
-                        elif token_list[i][1] in classnames:
-                            token_list[i] = (
-                                "CLASSREF", token_list[i][1])
-
-            except IndexError:
-
-                continue
-
-                end_time = time.perf_counter()
-                if verbose:
-                    print(f"[VINFO]: Successfully tokenised {filename} in {round(end_time - start_time, 3)}s ({round(end_time - start_time, 3) * 1000}ms);\n")
-
-                return token_list
-
-        for i in range(len(token_list)):
-            if i + 1 != len(token_list):
-                if token_list[i] == ("SIG", "BLOCK_START"):
+def classifytokens(rawtoken_list: list):
+    # Each compilation unit gets a fresh symbol table, so names never leak between files
+    table = symbols.SymbolTable()
+    # `import numpy as np` makes np another name for numpy
+    aliases = {}
+    # Interned, so every occurrence of a name shares one string and token comparisons mostly hit the identity check
+    token_list = [sys.intern(token) for token, _, _ in rawtoken_list]
+    scopes = [scope for _, scope, _ in rawtoken_list]
+
+    for i in range(len(token_list)):
+        current = token_list[i]
+        typeofcurrent = wordtotoktype(current)
+
+        try:
+            token_list[i] = (typeofcurrent, tokmap[current])
+
+        except KeyError:
+            if typeofcurrent == "STRING":
+                current = current.replace("\\n", "\\\\n")
+
+            token_list[i] = (typeofcurrent, current)
+            if token_list[i][0] == "SIG" and token_list[i][1].startswith("    ") and allcharacterssame(token_list[i][1]):
+                token_list[i] = ("SIG", sys.intern(f"{int(len(current) / 4)} TAB"))
+
+        try:
+            # The next token hasn't been classified yet, so it's still the raw name
+            if token_list[i] == ("KW", "def"):
+                table.define(token_list[i+1], "func", scopes[i])
+
+            elif token_list[i] == ("KW", "class"):
+                table.define(token_list[i+1], "class", scopes[i])
+
+            elif token_list[i] == ("KW", "import"):
+                table.define(token_list[i+1], "import", scopes[i])
+
+            elif token_list[i] == ("SIG", "BLOCK_START"):
+                if i + 1 != len(token_list):
                     if token_list[i+1][1] in types:
                         token_list[i] = ("SIG", "TYPEPOINTER")
 
-        for i in range(len(token_list)):
-            if i + 1 != len(token_list) and i + 2 != len(token_list):
-                if token_list[i+1] == ("OP", "ASSIGN") and token_list[i][1] not in varnames and token_list[i][0] != "OP" and token_list[i][1] not in types:
+            elif token_list[i][0] == "FSTRING":
+                token_list[i] = (
+                    "STRING", fstringtocppformat(token_list[i][1]).replace("\n", "\\n"))
+
+            elif token_list[i][0] == "NAME":
+                if token_list[i][1] in types:
+                    if token_list[i+1] != ("OP", "LPAREN"):
+                        token_list[i] = (
+                            "TYPE", token_list[i][1])
+
+                elif token_list[i+1] == ("OP", "ASSIGN"):
                     token_list[i] = ("VAR", token_list[i][1])
-                    varnames.append(token_list[i][1])
+                    table.define(token_list[i][1], "var", scopes[i])
 
-                elif token_list[i+1] == ("SIG", "TYPEPOINTER") and token_list[i+2][1] in types and token_list[i+3] == ("OP", "ASSIGN"):
+                elif token_list[i+1] == ("SIG", "BLOCK_START") and token_list[i+2][1] in types and token_list[i+3] == ("OP", "ASSIGN"):
                     token_list[i] = ("VAR", token_list[i][1])
-                    varnames.append(token_list[i][1])
+                    table.define(token_list[i][1], "var", scopes[i])
 
                 elif token_list[i-1] == ("KW", "for"):
                     token_list[i] = ("VAR", token_list[i][1])
-                    varnames.append(token_list[i][1])
+                    table.define(token_list[i][1], "var", scopes[i])
 
-                if token_list[i][0] != "INT" and findlastkw(token_list, i) == ("KW", "def"): 
-                    if token_list[i-1] == ("OP", "LPAREN") and token_list[i-2][0] == "FUNC" and token_list[i] != ("OP", "RPAREN") and token_list[i][1] not in types:
-                        token_list[i] = ("PARAM", token_list[i][1])
-                        varnames.append(token_list[i][1])
-
-                    elif token_list[i+1] == ("OP", "RPAREN") and token_list[i+2] == ("SIG", "BLOCK_START") and token_list[i] != ("OP", "LPAREN") and token_list[i][1] not in types:
-                        token_list[i] = ("PARAM", token_list[i][1])
-                        varnames.append(token_list[i][1])
+                elif token_list[i+1] == ("SIG", "BLOCK_START"):
+                    token_list[i] = ("PARAM", token_list[i][1])
+                    table.define(token_list[i][1], "var", scopes[i])
 
-                    elif token_list[i+1] == ("SIG", "COMMA") and token_list[i-1] == ("SIG", "COMMA") and token_list[i][1] not in types:
-                        token_list[i] = ("PARAM", token_list[i][1])
-                        varnames.append(token_list[i][1])
-
-                    if i + 3 != len(token_list):
-                        if token_list[i+1] == ("SIG", "TYPEPOINTER") and token_list[i+2] in types and token_list[i+3] != ("OP", "ASSIGN") and token_list[i][1] not in types:
-                            token_list[i] = ("PARAM", token_list[i][1])
-                            varnames.append(token_list[i][1])
+                elif token_list[i-1] == ("SIG", "DOT"):
+                    if token_list[i][1] not in pylistmethodtocpp:
+                        token_list[i] = ("METHOD", token_list[i][1])
 
-                if token_list[i] == ("IMPORTREF", "sys") and token_list[i+1] == ("SIG", "DOT") and token_list[i+2] == ("METHOD", "argv"):
-                    token_list[i], token_list[i+1], token_list[i+2] = ("NAME", "argv"),  ("SIG", "BLANK"), ("SIG", "BLANK")
+                    else:
+                        token_list[i] = ("METHOD", pylistmethodtocpp[token_list[i][1]])
 
-                if token_list[i][1] in funcnames and token_list[i-1] != ("KW", "def"):
-                    token_list[i] = (
-                                "FUNCREF", token_list[i][1])
-                elif token_list[i][1] in importnames and token_list[i-1] != ("KW", "import"):
-                    token_list[i] = (
-                                "IMPORTREF", token_list[i][1])
-                elif token_list[i][1] in classnames and token_list[i-1] != ("KW", "class"):
-                    token_list[i] = (
-                                "CLASSREF", token_list[i][1])
+                elif token_list[i-1] == ("KW", "import"):
+                    if token_list[i][1] != "random":
+                        token_list[i] = ("IMPORT_MODULE", token_list[i][1])
+                        table.define(token_list[i][1], "import", scopes[i])
 
-                    
+                    else:
+                        token_list[i] = ("IMPORT_MODULE", "rnd") # 'random' module clashes with C method, so must call it rnd here
+                        table.define("random", "import", scopes[i])
+
+                elif token_list[i-1] == ("KW", "as") and token_list[i-2][0] == "IMPORT_MODULE":
+                    aliases[token_list[i][1]] = token_list[i-2][1]
+                    token_list[i-1], token_list[i] = ("SIG", "BLANK"), ("SIG", "BLANK")
+
+                elif token_list[i-1] == ("KW", "def"):
+                    token_list[i] = ("FUNC", token_list[i][1])
+
+                elif token_list[i-1] == ("KW", "class"):
+                    token_list[i] = ("CLASS", token_list[i][1])
+
+                else:
+                    if table.has(token_list[i][1], "var", scopes[i]):
+                        token_list[i] = (
+                            "VARREF", token_list[i][1])
+                    elif table.has(token_list[i][1], "func", scopes[i]):
+                        token_list[i] = (
+                            "FUNCREF", token_list[i][1])
+                    elif table.has(token_list[i][1], "import", scopes[i]):
+                        token_list[i] = (
+                            "IMPORTREF", token_list[i][1])
+                    elif token_list[i][1] in aliases:
+                        token_list[i] = (
+                            "IMPORTREF", aliases[token_list[i][1]])
+                    elif table.has(token_list[i][1], "class", scopes[i]):
+                        token_list[i] = (
+                            "CLASSREF", token_list[i][1])
+
+        except IndexError:
+
+            continue
+
+    for i in range(len(token_list)):
+        if i + 1 != len(token_list):
+            if token_list[i] == ("SIG", "BLOCK_START"):
+                if token_list[i+1][1] in types:
+                    token_list[i] = ("SIG", "TYPEPOINTER")
+
+    headers = defheaders(token_list)
+
+    for i in range(len(token_list)):
+        if i + 1 != len(token_list) and i + 2 != len(token_list):
+            if token_list[i+1] == ("OP", "ASSIGN") and not table.has(token_list[i][1], "var", scopes[i]) and token_list[i][0] != "OP" and token_list[i][1] not in types:
+                token_list[i] = ("VAR", token_list[i][1])
+                table.define(token_list[i][1], "var", scopes[i])
+
+            elif token_list[i+1] == ("SIG", "TYPEPOINTER") and token_list[i+2][1] in types and token_list[i+3] == ("OP", "ASSIGN"):
+                token_list[i] = ("VAR", token_list[i][1])
+                table.define(token_list[i][1], "var", scopes[i])
+
+            elif token_list[i-1] == ("KW", "for"):
+                token_list[i] = ("VAR", token_list[i][1])
+                table.define(token_list[i][1], "var", scopes[i])
+
+            if token_list[i][0] != "INT" and headers[i]: 
+                if token_list[i-1] == ("OP", "LPAREN") and token_list[i-2][0] == "FUNC" and token_list[i] != ("OP", "RPAREN") and token_list[i][1] not in types:
+                    token_list[i] = ("PARAM", token_list[i][1])
+                    table.define(token_list[i][1], "var", scopes[i])
+
+                elif token_list[i+1] == ("OP", "RPAREN") and token_list[i+2] == ("SIG", "BLOCK_START") and token_list[i] != ("OP", "LPAREN") and token_list[i][1] not in types:
+                    token_list[i] = ("PARAM", token_list[i][1])
+                    table.define(token_list[i][1], "var", scopes[i])
+
+                elif token_list[i+1] == ("SIG", "COMMA") and token_list[i-1] == ("SIG", "COMMA") and token_list[i][1] not in types:
+                    token_list[i] = ("PARAM", token_list[i][1])
+                    table.define(token_list[i][1], "var", scopes[i])
+
+                if i + 3 != len(token_list):
+                    if token_list[i+1] == ("SIG", "TYPEPOINTER") and token_list[i+2][1] in types and token_list[i+3] != ("OP", "ASSIGN") and token_list[i][1] not in types:
+                        token_list[i] = ("PARAM", token_list[i][1])
+                        table.define(token_list[i][1], "var", scopes[i])
 
-        end_time = time.perf_counter()
+            if token_list[i] == ("IMPORTREF", "sys") and token_list[i+1] == ("SIG", "DOT") and token_list[i+2] == ("METHOD", "argv"):
+                token_list[i], token_list[i+1], token_list[i+2] = ("NAME", "argv"),  ("SIG", "BLANK"), ("SIG", "BLANK")
 
-        if verbose:
-            print(f"[VINFO] Successfully tokenised {filename} in {round(end_time - start_time, 3)}s ({round(end_time - start_time, 3) * 1000}ms);\n")
+            if table.has(token_list[i][1], "func", scopes[i]) and token_list[i-1] != ("KW", "def"):
+                token_list[i] = (
+                            "FUNCREF", token_list[i][1])
+            elif table.has(token_list[i][1], "import", scopes[i]) and token_list[i-1] != ("KW", "import"):
+                token_list[i] = (
+                            "IMPORTREF", token_list[i][1])
+            elif table.has(token_list[i][1], "class", scopes[i]) and token_list[i-1] != ("KW", "class"):
+                token_list[i] = (
+                            "CLASSREF", token_list[i][1])
 
-        return token_list
 
-    except FileNotFoundError:
-        print(f"tokenise.py: error: '{filename}' not found", file=sys.stderr)
-        os.remove("temp.py")
-        exit(1)
+    return TokenStore(token_list, (line for _, _, line in rawtoken_list))
@@ -0,0 +1,1246 @@
+from pycom import compiler
+
+# Inferred type of a name/function: None while nothing is known yet, AUTO once its uses disagree (or can't be typed)
+# and the declaration has to stay generic, otherwise the C++ type to declare it with
+AUTO = "auto"
+
+# Numeric C++ types, narrowest first; mixing two gives the wider, as C++'s usual arithmetic conversions do
+NUMERIC = ["bool", "int", "int64_t", "pyint", "double", "long double"]
+
+INTEGRAL = ("bool", "int", "int64_t")
+
+INT32 = (-2 ** 31, 2 ** 31 - 1)
+INT64 = (-2 ** 63, 2 ** 63 - 1)
+
+# A bound that keeps moving after this many rounds (a recursive call shrinking its argument, say) is dropped
+WIDENAFTER = 3
+
+MAXPASSES = 50
+
+COMPARISONS = {"EQUAL", "NOTEQUAL", "GREATER", "LESS", "GREATEROREQUAL", "LESSOREQUAL", "in", "is"}
+
+AUGMENTED = {"PLUSAND", "SUBAND", "MULTAND", "DIVAND", "MODAND", "BITANDAND", "BITORAND", "BITXORAND",
+             "BITLSHIFTAND", "BITRSHIFTAND"}
+
+# Python's precedence levels for the binary operators handled here, loosest first
+BINARY = [{"or"}, {"and"}, COMPARISONS, {"BITOR"}, {"BITXOR"}, {"BITAND"}, {"BITLSHIFT", "BITRSHIFT"}, {"PLUS", "SUB"},
+          {"MULT", "DIV", "MOD"}]
+
+PRECEDENCE = {op: level for level, ops in enumerate(BINARY) for op in ops}
+
+# Builtins of pyiter.hpp, which type inference follows through to the elements they give
+ITERATORBUILTINS = frozenset(["map", "filter", "enumerate", "zip", "sum", "min", "max"])
+
+# Result types of builtins whose C++ counterparts return a fixed type
+BUILTINRETURNS = {"len": "pyint", "int": "int", "float": "double", "bool": "bool", "pyin": "bool", "str": "pystring"}
+
+# Result types of pystring's methods (stdpy.hpp)
+STRINGMETHODS = {"upper": "pystring", "lower": "pystring", "shuffled": "pystring", "startswith": "bool", "endswith": "bool",
+                 "isDigit": "bool", "islower": "bool", "isupper": "bool", "isalpha": "bool"}
+
+# Element type of the containers a for loop can iterate over, besides CONTAINERS
+ELEMENTTYPES = {"pystring": "char"}
+
+STATEMENTENDS = (("SIG", "NEWLINE"), ("SIG", "BLOCK_END"), ("SIG", "BLOCK_START"))
+
+# Containers whose C++ type spells out what they hold, "pydict<pystring, int64_t>"; a bare "pydict" is one whose
+# contents aren't known yet, as for an empty literal or a `dict` annotation
+CONTAINERS = ("pylist", "pydict", "pyset", "pydictkeys", "pydictvalues", "pydictitems", "pyiter", "pyenumerate", "pyzip")
+
+# The lazy adaptors of pyiter.hpp, typed by what they give for inference's sake: "pyiter<double>" is a map() or
+# filter() giving doubles. Their C++ types spell out lambdas, so anything holding one is declared auto
+ITERATORS = ("pyiter", "pyenumerate", "pyzip")
+
+# The list types annotations name (compiler.typedefs), which are declared by these names again
+LISTALIASES = {"intlist": "pylist<pyint>", "strlist": "pylist<pystring>", "floatlist": "pylist<double>"}
+LISTNAMES = {full: alias for alias, full in LISTALIASES.items()}
+
+
+class Unsupported(Exception):
+    pass
+
+
+class Parts(tuple):
+    # Range of a container's contents, one (lo, hi) per part of its type (a dict's keys, then its values); a part is
+    # None while nothing integral is known to be stored in it
+    pass
+
+
+class Value:
+    # What an expression is known to produce: its type, the range of values it can take when integral ((lo, hi),
+    # either end None when unbounded; None while still unknown) or Parts when a container, the C++ type it's
+    # computed in once declarations are fixed, and the variables/functions whose declared type it depends on
+    __slots__ = ("type", "range", "ctype", "keys")
+
+    def __init__(self, type, range=None, ctype=None, keys=frozenset()):
+        self.type = type
+        self.range = range
+        self.ctype = ctype
+        self.keys = keys
+
+
+def unify(a, b):
+    # Type a declaration needs to hold values of both a and b
+    if a is None:
+        return b
+    if b is None or a == b:
+        return a
+    if a in NUMERIC and b in NUMERIC:
+        return max(a, b, key=NUMERIC.index)
+
+    # An empty container takes on what the other holds; two full ones must agree part by part
+    pa, pb = containerparts(a), containerparts(b)
+    if pa is not None and pb is not None and pa[0] == pb[0]:
+        if pa[1] is None:
+            return b
+        if pb[1] is None:
+            return a
+        if len(pa[1]) == len(pb[1]):
+            return container(pa[0], [unify(x, y) for x, y in zip(pa[1], pb[1])])
+
+    return AUTO
+
+
+def containerparts(found):
+    # ("pydict", ["pystring", "int64_t"]) for "pydict<pystring, int64_t>", ("pydict", None) for a bare "pydict",
+    # None for anything that isn't one of CONTAINERS
+    if not isinstance(found, str):
+        return None
+    family, _, rest = found.partition("<")
+    if family not in CONTAINERS:
+        return None
+    if not rest:
+        return family, None
+
+    parts = []
+    depth = 0
+    start = 0
+    inner = rest[:-1]
+    for k, char in enumerate(inner):
+        if char == "<":
+            depth += 1
+        elif char == ">":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(inner[start:k].strip())
+            start = k + 1
+    parts.append(inner[start:].strip())
+
+    return family, parts
+
+
+def container(family: str, parts: list):
+    # Type of a `family` container holding `parts`; unknown while any part is, generic once any can't be typed
+    if AUTO in parts:
+        return AUTO
+    if None in parts:
+        return None
+
+    return f"{family}<{', '.join(parts)}>"
+
+
+def stored(found, bounds):
+    # Type a value with range `bounds` is kept as inside a container: an int proven to fit in 64 bits is an int64_t
+    # whatever its range within them, any other a pyint
+    if found in ("int", "int64_t"):
+        return "int64_t" if within(bounds, INT64) else "pyint"
+    if found == "long double":
+        return "double"
+
+    return found
+
+
+def storedbounds(found):
+    # Range of a value read out of a container that stores it as `found`: anything an int64_t holds, as nothing
+    # narrower is known of it
+    return INT64 if found == "int64_t" else (None, None)
+
+
+def partof(found):
+    # Which part of a `found` container's type a for loop over it gives
+    parts = containerparts(found)
+    return 1 if parts is not None and parts[0] == "pydictvalues" else 0
+
+
+def elementbounds(found, bounds, part=None):
+    # Range of what a for loop over a `found` with contents `bounds` gives (or of its `part`): the range stored, or
+    # anything an int64_t holds when nothing narrower is known
+    part = partof(found) if part is None else part
+    known = bounds[part] if isinstance(bounds, Parts) and part < len(bounds) else None
+    if within(known, INT64):
+        return known
+
+    parts = containerparts(found)
+    return storedbounds(parts[1][part] if parts is not None and parts[1] is not None and part < len(parts[1]) else elementof(found))
+
+
+def hullparts(a, b):
+    # Smallest Parts containing both, part by part
+    if a is None or b is None:
+        return b if a is None else a
+    if not isinstance(a, Parts) or not isinstance(b, Parts) or len(a) != len(b):
+        return None
+
+    return Parts(hull(x, y) for x, y in zip(a, b))
+
+
+def elementof(found):
+    # Type of what a for loop over a `found` gives; None while that isn't known yet
+    if found is None or found in ELEMENTTYPES:
+        return None if found is None else ELEMENTTYPES[found]
+
+    parts = containerparts(found)
+    if parts is None:
+        return AUTO
+    family, types = parts
+    if types is None:
+        return None
+    if family in ("pylist", "pydict", "pyset", "pydictkeys", "pyiter"):
+        return types[0]
+    if family == "pydictvalues":
+        return types[1]
+
+    # An item is a pair, which only unpacking gives types to
+    return AUTO
+
+
+def lambdabodies(tokens: list):
+    # Maps the index of every LAMBDA token (see compiler.lowergenerators) to that of the LAMBDA_END closing its body
+    stack = []
+    matches = {}
+    for k, token in enumerate(tokens):
+        if token[0] == "LAMBDA":
+            stack.append(k)
+        elif token == ("SIG", "LAMBDA_END") and stack:
+            matches[stack.pop()] = k
+
+    return matches
+
+
+def lambdascope(scope, k: int):
+    # Scope of the parameter of the LAMBDA token at k, nested in the one the lambda is written in
+    return f"{scope}.<{k}>" if scope else f"<{k}>"
+
+
+def promote(a, b):
+    # Type of `a <op> b` for an arithmetic or set op; unknown until both sides are known
+    if a == AUTO or b == AUTO:
+        return AUTO
+    if a is None or b is None:
+        return None
+    if a in NUMERIC and b in NUMERIC:
+        return max(a, b, "int", key=NUMERIC.index)
+
+    # + between strings concatenates
+    if a == b == "pystring":
+        return a
+
+    # | & - and ^ between sets give a set of what both hold
+    pa, pb = containerparts(a), containerparts(b)
+    if pa is not None and pb is not None and pa[0] == pb[0] == "pyset":
+        return unify(a, b)
+
+    return AUTO
+
+
+def hull(a, b):
+    # Smallest range containing both
+    if a is None:
+        return b
+    if b is None:
+        return a
+
+    return (None if a[0] is None or b[0] is None else min(a[0], b[0]),
+            None if a[1] is None or b[1] is None else max(a[1], b[1]))
+
+
+def within(bounds, limits):
+    return bounds is not None and bounds[0] is not None and bounds[1] is not None and limits[0] <= bounds[0] and bounds[1] <= limits[1]
+
+
+def arithmetic(op: str, a, b):
+    # Range of `a <op> b` over integers, as C++ computes it
+    if a is None or b is None:
+        return None
+
+    (alo, ahi), (blo, bhi) = a, b
+    bounded = None not in (alo, ahi, blo, bhi)
+
+    if op == "PLUS":
+        return (None if alo is None or blo is None else alo + blo, None if ahi is None or bhi is None else ahi + bhi)
+    if op == "SUB":
+        return (None if alo is None or bhi is None else alo - bhi, None if ahi is None or blo is None else ahi - blo)
+    if op == "MULT" and bounded:
+        products = [alo * blo, alo * bhi, ahi * blo, ahi * bhi]
+        return (min(products), max(products))
+    if op in ("MOD", "DIV") and alo is not None and ahi is not None:
+        # Neither truncating division nor remainder can grow the dividend's magnitude
+        magnitude = max(abs(alo), abs(ahi))
+        if op == "MOD" and bounded and (blo > 0 or bhi < 0):
+            magnitude = min(magnitude, max(abs(blo), abs(bhi)) - 1)
+        return (0 if alo >= 0 else -magnitude, magnitude if ahi > 0 else 0)
+    if op == "MOD" and blo is not None and bhi is not None and (blo > 0 or bhi < 0):
+        # The remainder is smaller than the divisor however big the dividend, with the dividend's sign
+        magnitude = max(abs(blo), abs(bhi)) - 1
+        return (0 if alo is not None and alo >= 0 else -magnitude, 0 if ahi is not None and ahi <= 0 else magnitude)
+    if op in ("BITAND", "BITRSHIFT") and alo is not None and alo >= 0 and ahi is not None:
+        return (0, ahi)
+    if op in ("BITAND", "BITOR", "BITXOR") and bounded:
+        # No wider than the widest operand, in two's complement
+        width = max(abs(bound).bit_length() for bound in (alo, ahi, blo, bhi))
+        return (0 if alo >= 0 and blo >= 0 else -2 ** width, 2 ** width - 1)
+    if op == "BITLSHIFT" and bounded and blo >= 0:
+        return (min(alo, alo << bhi), max(ahi, ahi << bhi))
+
+    return (None, None)
+
+
+def power(arguments: list):
+    # pow() and ** (both emitted as pypow()) are exact between integers, which can outgrow any fixed width, and
+    # floating point otherwise. An integer exponent that may be negative gives a float too, as 2 ** -1 is 0.5; a
+    # modulus makes a negative one an inverse instead
+    found = "int"
+    for argument in arguments:
+        found = promote(found, argument.type)
+    if found in NUMERIC and NUMERIC.index(found) <= NUMERIC.index("pyint"):
+        exponent = arguments[1].range if len(arguments) == 2 else (0, None)
+        if exponent is None:
+            found = None
+        else:
+            found = "pyint" if exponent[0] is not None and exponent[0] >= 0 else "double"
+    elif found in NUMERIC:
+        found = "double"
+
+    # A power of a non-negative integer can be a non-negative exponent itself, as in 2 ** 3 ** 2
+    base = arguments[0].range if arguments else None
+    bounds = (0, None) if found == "pyint" and len(arguments) == 2 and base is not None and base[0] is not None and base[0] >= 0 else (None, None)
+    return Value(found, None if found is None else bounds, found, frozenset().union(*(argument.keys for argument in arguments)))
+
+
+class TypeInference:
+    # Works out C++ types for unannotated variables, parameters and return values from the token stream, so the
+    # compiler can declare concrete types instead of auto. Parameters are typed from every call site, return types
+    # from every return statement, and anything used inconsistently or beyond what's modelled here stays auto.
+    #
+    # Integers are also given value ranges (literals, range() bounds, interval arithmetic), which decide their width:
+    # int where every value provably fits in 32 bits and no arithmetic on it can overflow in int, int64_t where that
+    # holds for 64 bits, and the arbitrary precision pyint (which `n: int` always is) when no finite range is proven
+    def __init__(self, tokens: list):
+        self.tokens = tokens
+        self.parens = compiler.matchingbrackets(tokens, "LPAREN", "RPAREN")
+        self.squares = compiler.matchingbrackets(tokens, "LSPAREN", "RSPAREN")
+        self.braces = compiler.matchingbrackets(tokens, "LCPAREN", "RCPAREN")
+        self.lambdas = lambdabodies(tokens)
+
+        # (scope, name) -> type and range, for variables and parameters; ("return", function) for return values
+        self.types = {}
+        self.ranges = {}
+        self.changes = {}
+        self.unbounded = set()
+        # Integral keys that must be int64_t because int arithmetic on them could overflow, and those that must be
+        # pyint because int64_t arithmetic on them could
+        self.widened = set()
+        self.bigints = set()
+        self.checking = False
+
+        self.sources = []        # (key, kind, data, scope): what each variable is assigned from
+        self.params = {}         # function name -> [(key, annotated type or None, default range or None)]
+        self.returns = {}        # function name -> [range of the returned expression, or None for a bare return]
+        self.calls = []          # (function name, [argument ranges], scope of the call)
+        self.annotatedreturns = {}
+        self.escaped = set()     # functions used as values, whose parameters can't be typed from call sites
+        self.statements = []     # (start, end, scope) of every expression, for the overflow check
+
+        self.declarations = {}   # index of a VAR/PARAM/def token -> key whose type it's declared with
+
+        # Indices of the '[' of dict subscripts that read, and of those stored into; a read of a missing key has to
+        # raise KeyError where a store inserts it
+        self.lookups = set()
+        self.stores = set()
+
+        # Indices of the pypow tokens raising integers to a power that may be negative, which compute in floating point
+        self.floatpowers = set()
+
+        # Index of each VAR initialised with a list literal -> whether the literal is empty
+        self.listliterals = {}
+
+        # Index of each VAR initialised with an empty list that's filled by a single append of something this pass
+        # can't type -> the index of that append's '(', for the compiler to declare it from the element (as it does
+        # for a lowered comprehension)
+        self.elements = {}
+
+    def infer(self):
+        # Returns {token index: C++ type} for every VAR, PARAM and 'def' token whose type could be inferred
+        self.collect()
+
+        while True:
+            for _ in range(MAXPASSES):
+                if not self.solve():
+                    break
+            else:
+                # No fixed point in time; the ranges can't be trusted, so every integer keeps arbitrary precision
+                self.bigints.update(self.types)
+
+            # Narrowing one declaration can make arithmetic elsewhere overflow, so check until nothing widens
+            self.checking = True
+            stored = {key for key in self.bigints if containerparts(self.types.get(key)) is not None}
+            while True:
+                before = len(self.widened), len(self.bigints)
+                for start, end, scope in self.statements:
+                    self.check(start, end, scope)
+                if (len(self.widened), len(self.bigints)) == before:
+                    break
+            self.checking = False
+
+            # A container whose elements overflow stores pyints from now on, which changes what's read out of it
+            if {key for key in self.bigints if containerparts(self.types.get(key)) is not None} <= stored:
+                break
+
+        self.lookups -= self.stores
+
+        inferred = {}
+        for index, key in self.declarations.items():
+            found = self.ctype(key)
+            if found is not None and found != AUTO:
+                inferred[index] = found
+
+        # A list literal whose elements couldn't be typed still has to initialise a list, not an initializer_list: the
+        # element type is deduced from the literal, and an empty one holds ints
+        appends = {}
+        for key, kind, data, scope in self.sources:
+            if kind == "member" and data[0] == "push_back":
+                appends.setdefault(self.resolve(scope, key), []).append(data[1])
+        for index, empty in self.listliterals.items():
+            if index not in inferred:
+                inferred[index] = "intlist" if empty else "pylist"
+                if empty and len(appends.get(self.declarations[index], ())) == 1:
+                    self.elements[index] = appends[self.declarations[index]][0]
+
+        return inferred
+
+    def ctype(self, key):
+        found = self.types.get(key)
+        if found in INTEGRAL and found != "bool":
+            if key in self.bigints or not within(self.ranges.get(key), INT64):
+                return "pyint"
+            return "int" if within(self.ranges.get(key), INT32) and key not in self.widened else "int64_t"
+        if containerparts(found) is not None and (containerparts(found)[1] is None or containerparts(found)[0] in ITERATORS):
+            return AUTO
+
+        return LISTNAMES.get(found, found)
+
+    def statementend(self, start: int):
+        # Index of the NEWLINE, BLOCK_START or BLOCK_END ending the statement that starts at `start`
+        depth = 0
+        for k in range(start, len(self.tokens)):
+            if self.tokens[k] in (("OP", "LPAREN"), ("OP", "LSPAREN"), ("OP", "LCPAREN")):
+                depth += 1
+            elif self.tokens[k] in (("OP", "RPAREN"), ("OP", "RSPAREN"), ("OP", "RCPAREN")):
+                depth -= 1
+            elif depth <= 0 and self.tokens[k] in STATEMENTENDS:
+                return k
+
+        return len(self.tokens)
+
+    def paramend(self, start: int):
+        # End of a parameter's default value: the next top level ',' or ')'
+        depth = 0
+        for k in range(start, len(self.tokens)):
+            if self.tokens[k] == ("OP", "LPAREN"):
+                depth += 1
+            elif self.tokens[k] == ("OP", "RPAREN"):
+                if depth == 0:
+                    return k
+                depth -= 1
+            elif depth == 0 and self.tokens[k] == ("SIG", "COMMA"):
+                return k
+
+        return len(self.tokens)
+
+    def arguments(self, lparen: int):
+        # Ranges of the comma separated arguments of the call whose '(' is at `lparen`
+        rparen = self.parens.get(lparen)
+        if rparen is None:
+            return None
+
+        ranges = []
+        start = lparen + 1
+        depth = 0
+        for k in range(lparen + 1, rparen):
+            if self.tokens[k][0] == "OP" and self.tokens[k][1] in ("LPAREN", "LSPAREN", "LCPAREN"):
+                depth += 1
+            elif self.tokens[k][0] == "OP" and self.tokens[k][1] in ("RPAREN", "RSPAREN", "RCPAREN"):
+                depth -= 1
+            elif depth == 0 and self.tokens[k] == ("SIG", "COMMA"):
+                ranges.append((start, k))
+                start = k + 1
+
+        if start < rparen:
+            ranges.append((start, rparen))
+
+        return ranges
+
+    def collect(self):
+        tokens = self.tokens
+        functions = set(token[1] for token in tokens if token[0] == "FUNC")
+
+        # Braces in the generated C++ mirror BLOCK_START/BLOCK_END, which is what tells where a function body ends
+        depth = 0
+        stack = []        # (function name, depth of its body)
+        pendingdef = None
+        scope = None
+        statementstart = 0
+        lambdas = []      # (index of LAMBDA_END, scope of its parameter) of the lambdas k is inside
+
+        for k, token in enumerate(tokens):
+            kind, value = token
+            while lambdas and lambdas[-1][0] < k:
+                lambdas.pop()
+            within = lambdas[-1][1] if lambdas else scope
+
+            if k == statementstart:
+                self.statement(k, scope)
+
+            if token in STATEMENTENDS:
+                statementstart = k + 1
+
+            if token == ("KW", "def") and k + 1 < len(tokens) and tokens[k+1][0] == "FUNC":
+                pendingdef = tokens[k+1][1]
+                scope = f"{scope}.{pendingdef}" if scope else pendingdef
+                self.declarations[k] = ("return", scope)
+                self.params.setdefault(scope, [])
+                self.returns.setdefault(scope, [])
+
+            elif token == ("SIG", "BLOCK_START"):
+                if pendingdef is not None:
+                    stack.append((scope, depth))
+                    pendingdef = None
+                depth += 1
+
+            elif token == ("SIG", "BLOCK_END"):
+                depth -= 1
+                if stack and stack[-1][1] == depth:
+                    stack.pop()
+                    scope = stack[-1][0] if stack else None
+
+            elif token == ("SIG", "FUNCTYPEPOINTER") and pendingdef is not None:
+                self.annotatedreturns[scope] = tokens[k+1][1]
+
+            elif kind == "PARAM" and pendingdef is not None:
+                key = (scope, value)
+                annotation = tokens[k+2][1] if tokens[k+1] == ("SIG", "TYPEPOINTER") else None
+                default = (k + 2, self.paramend(k + 2)) if tokens[k+1] == ("OP", "ASSIGN") else None
+                self.params[scope].append((key, annotation, default))
+                self.types[key] = None
+                self.declarations[k] = key
+
+            elif kind == "VAR" and tokens[k-1] != ("SIG", "DOT"):
+                key = (scope, value)
+                self.types.setdefault(key, None)
+                self.declarations[k] = key
+
+                if tokens[k-1] == ("KW", "for") and value.startswith("["):
+                    # `for a, b in ...` (see lowerunpacking): the binding stays auto, its names are typed one by one
+                    self.sources.append((key, "auto", None, scope))
+                    for position, name in enumerate(value[1:-1].split(", ")):
+                        self.types.setdefault((scope, name), None)
+                        self.sources.append(((scope, name), "unpack", (k + 2, self.statementend(k + 2), position), scope))
+                elif tokens[k-1] == ("KW", "for"):
+                    self.sources.append((key, "for", (k + 2, self.statementend(k + 2)), scope))
+                elif tokens[k+1] == ("SIG", "TYPEPOINTER"):
+                    self.sources.append((key, "annotation", tokens[k+2][1], scope))
+                    # A bare `dict` or `set` says nothing of what's in it; the value does
+                    if tokens[k+2][1] in compiler.genericannotations and k + 3 < len(tokens) and tokens[k+3] == ("OP", "ASSIGN"):
+                        self.sources.append((key, "expr", (k + 4, self.statementend(k + 4)), scope))
+                elif tokens[k+1] == ("OP", "ASSIGN"):
+                    self.sources.append((key, "expr", (k + 2, self.statementend(k + 2)), scope))
+                    if tokens[k+2] == ("OP", "LSPAREN"):
+                        self.listliterals[k] = tokens[k+3] == ("OP", "RSPAREN")
+                else:
+                    self.sources.append((key, "auto", None, scope))
+
+            elif kind in ("NAME", "VARREF") and k + 1 < len(tokens) and tokens[k+1][0] == "OP" and tokens[k+1][1] in AUGMENTED:
+                self.sources.append((value, "augmented", (k + 2, self.statementend(k + 2), tokens[k+1][1]), scope))
+
+            elif kind in ("NAME", "VARREF") and self.begins(k, statementstart) and k + 1 < len(tokens) and tokens[k+1] == ("OP", "ASSIGN"):
+                self.sources.append((value, "reassigned", (k + 2, self.statementend(k + 2)), scope))
+
+            elif kind in ("NAME", "VARREF") and self.begins(k, statementstart) and k + 1 < len(tokens) and tokens[k+1] == ("OP", "LSPAREN"):
+                # `d[key] = value` (or `d[key] += value`) tells what a dict that started out empty holds
+                opening, close = k + 1, self.squares.get(k + 1)
+                while close is not None and close + 1 < len(tokens) and tokens[close+1] == ("OP", "LSPAREN"):
+                    opening, close = close + 1, self.squares.get(close + 1)
+                if close is not None and close + 1 < len(tokens) and tokens[close+1][0] == "OP" and (tokens[close+1][1] == "ASSIGN" or tokens[close+1][1] in AUGMENTED):
+                    self.stores.add(opening)
+                    if opening == k + 1:
+                        self.sources.append((value, "item", ((k + 2, close), (close + 2, self.statementend(close + 2)), tokens[close+1][1]), scope))
+
+            elif (kind in ("NAME", "VARREF") and self.begins(k, statementstart) and k + 3 < len(tokens) and tokens[k+1] == ("SIG", "DOT")
+                  and tokens[k+2][0] == "METHOD" and tokens[k+3] == ("OP", "LPAREN")):
+                # As do s.add(x), d.setdefault(key, value) and update()
+                self.sources.append((value, "member", (tokens[k+2][1], k + 3), scope))
+
+            elif kind == "LAMBDA":
+                # The element given to map()'s or filter()'s lambda comes from their last argument, like a for loop's
+                inner = lambdascope(within, k)
+                lambdas.append((self.lambdas.get(k, len(tokens)), inner))
+                callee = tokens[k-2][1] if k >= 2 and tokens[k-1] == ("OP", "LPAREN") else None
+                arguments = self.arguments(k - 1) if callee in compiler.functionbuiltins else None
+                if value.startswith("["):
+                    for position, name in enumerate(value[1:-1].split(", ")):
+                        self.types.setdefault((inner, name), None)
+                        if arguments:
+                            self.sources.append(((inner, name), "unpack", arguments[-1] + (position,), within))
+                        else:
+                            self.sources.append(((inner, name), "auto", None, within))
+                else:
+                    key = (inner, value)
+                    self.types.setdefault(key, None)
+                    self.declarations[k] = key
+                    self.sources.append((key, "for", arguments[-1], within) if arguments else (key, "auto", None, within))
+
+            elif token == ("KW", "return") and scope is not None:
+                end = self.statementend(k + 1)
+                self.returns[scope].append((k + 1, end) if end > k + 1 else None)
+
+            elif value in functions and kind in ("NAME", "FUNCREF"):
+                if k + 1 < len(tokens) and tokens[k+1] == ("OP", "LPAREN"):
+                    arguments = self.arguments(k + 1)
+                    if arguments is None or any(tokens[start+1] == ("OP", "ASSIGN") for start, _ in arguments):
+                        self.escaped.add(value)
+                    else:
+                        self.calls.append((value, arguments, within))
+                else:
+                    self.escaped.add(value)
+
+    def begins(self, k: int, statementstart: int):
+        # Whether tokens[k] is the first of its statement, past the indentation of a block's first line
+        return k == statementstart or k == statementstart + 1 and str(self.tokens[statementstart][1]).endswith(" TAB")
+
+    def statement(self, start: int, scope):
+        # Records the expression part of the statement starting at `start` for the overflow check
+        tokens = self.tokens
+        end = self.statementend(start)
+        k = start
+
+        while k < end and (tokens[k][0] == "SIG" and tokens[k][1].endswith(" TAB")):
+            k += 1
+
+        if k < end and tokens[k] in (("KW", "if"), ("KW", "elif"), ("KW", "while"), ("KW", "return")):
+            k += 1
+        elif k + 2 < end and tokens[k] == ("KW", "for") and tokens[k+2] == ("OP", "in"):
+            k += 3
+        elif k + 1 < end and tokens[k][0] in ("VAR", "NAME", "VARREF") and tokens[k+1] == ("OP", "ASSIGN"):
+            k += 2
+        elif k + 3 < end and tokens[k][0] == "VAR" and tokens[k+1] == ("SIG", "TYPEPOINTER") and tokens[k+3] == ("OP", "ASSIGN"):
+            k += 4
+        elif k + 1 < end and tokens[k+1][0] == "OP" and tokens[k+1][1] in AUGMENTED:
+            k += 2
+        elif k + 1 < end and tokens[k][0] in ("NAME", "VARREF") and tokens[k+1] == ("OP", "LSPAREN"):
+            # Storing into a subscript: what's checked is the value
+            close = self.squares.get(k + 1)
+            while close is not None and close + 1 < end and tokens[close+1] == ("OP", "LSPAREN"):
+                close = self.squares.get(close + 1)
+            if close is not None and close + 1 < end and tokens[close+1][0] == "OP" and (tokens[close+1][1] == "ASSIGN" or tokens[close+1][1] in AUGMENTED):
+                k = close + 2
+        elif k < end and tokens[k][0] == "KW":
+            return
+
+        if k < end:
+            self.statements.append((k, end, scope))
+
+    def resolve(self, scope, name: str):
+        # Key of the variable `name` refers to from `scope`, walking out to module level
+        while True:
+            if (scope, name) in self.types:
+                return (scope, name)
+            if scope is None:
+                return None
+            scope = scope.rsplit(".", 1)[0] if "." in scope else None
+
+    def function(self, scope, name: str):
+        # Full name of the function `name` refers to from `scope`
+        while True:
+            candidate = f"{scope}.{name}" if scope else name
+            if candidate in self.returns:
+                return candidate
+            if scope is None:
+                return None
+            scope = scope.rsplit(".", 1)[0] if "." in scope else None
+
+    def current(self, key):
+        # Value of a variable or function call as of the last round
+        found = self.types.get(key)
+        bounds = self.ranges.get(key) if found in INTEGRAL else (None if found is None else (None, None))
+        if isinstance(self.ranges.get(key), Parts):
+            bounds = self.ranges[key]
+        return Value(found, bounds, self.ctype(key), frozenset([key]))
+
+    def annotated(self, pytype: str):
+        found = compiler.pytypetoctype.get(pytype, AUTO)
+        return LISTALIASES.get(found, found)
+
+    def evaluate(self, start: int, end: int, scope):
+        # Value of the expression tokens[start:end]; anything the parser doesn't model makes it AUTO
+        try:
+            value, k = self.binary(start, end, scope, 0)
+            if k != end:
+                raise Unsupported()
+            return value
+
+        except (Unsupported, IndexError):
+            return Value(AUTO, (None, None))
+
+    def check(self, start: int, end: int, scope):
+        try:
+            value, k = self.binary(start, end, scope, 0)
+            if k == end:
+                return
+
+        except (Unsupported, IndexError):
+            pass
+
+        # Can't see what this statement computes, so nothing it mentions may stay a narrow int
+        for k in range(start, end):
+            key = self.resolve(scope, self.tokens[k][1]) if isinstance(self.tokens[k][1], str) else None
+            if key is not None:
+                self.widened.add(key)
+            function = self.function(scope, self.tokens[k][1]) if isinstance(self.tokens[k][1], str) else None
+            if function is not None:
+                self.widened.add(("return", function))
+
+    def binary(self, k: int, end: int, scope, level: int):
+        # Precedence climbing: parses operators binding at least as tightly as BINARY[level]
+        tokens = self.tokens
+        left, k = self.unary(k, end, scope)
+
+        while k < end and tokens[k][0] == "OP":
+            op, after = tokens[k][1], k + 1
+            if (op == "not" and after < end and tokens[after] == ("OP", "in")) or (op == "is" and after < end and tokens[after] == ("OP", "not")):
+                op, after = "in", after + 1
+
+            oplevel = PRECEDENCE.get(op)
+            if oplevel is None or oplevel < level:
+                break
+
+            right, k = self.binary(after, end, scope, oplevel + 1)
+            left = self.combine(op, left, right)
+
+        return left, k
+
+    def combine(self, op: str, left: Value, right: Value):
+        keys = left.keys | right.keys
+
+        if op in COMPARISONS or op in ("and", "or"):
+            return Value("bool", (0, 1), "bool", keys)
+
+        result = promote(left.type, right.type)
+        if result in INTEGRAL:
+            bounds = arithmetic(op, left.range, right.range)
+            ctype = max(left.ctype or "int", right.ctype or "int", "int", key=NUMERIC.index)
+
+            if self.checking and ctype in ("int", "int64_t") and not within(bounds, INT64):
+                # One pyint operand is enough to compute it exactly, and the 64-bit one is the likelier to need it.
+                # That may be a container's element, which makes the container store pyints (see assign())
+                wide = [operand.keys for operand in (left, right) if operand.ctype == "int64_t" and operand.keys]
+                self.bigints.update(wide[0] if wide else keys)
+            elif self.checking and ctype == "int" and not within(bounds, INT32):
+                self.widened.update(keys)
+
+            return Value(result, bounds, ctype, keys)
+
+        if containerparts(result) is not None:
+            # Concatenating or repeating lists and combining sets keeps what the operands hold
+            contents = [operand.range for operand in (left, right) if containerparts(operand.type) is not None]
+            bounds = contents[0] if len(contents) == 1 else hullparts(*contents)
+            return Value(result, bounds if isinstance(bounds, Parts) else (None, None), result, keys)
+
+        return Value(result, None if result is None else (None, None), result, keys)
+
+    def unary(self, k: int, end: int, scope):
+        token = self.tokens[k]
+
+        if token == ("OP", "not"):
+            operand, k = self.unary(k + 1, end, scope)
+            return Value("bool", (0, 1), "bool", operand.keys), k
+
+        if token in (("OP", "SUB"), ("OP", "PLUS"), ("OP", "BITFLIP")):
+            operand, k = self.unary(k + 1, end, scope)
+            if operand.type in INTEGRAL and operand.range is not None:
+                lo, hi = operand.range
+                if token[1] == "SUB":
+                    operand = Value(operand.type, (None if hi is None else -hi, None if lo is None else -lo), operand.ctype, operand.keys)
+                elif token[1] == "BITFLIP":
+                    operand = Value(operand.type, (None if hi is None else ~hi, None if lo is None else ~lo), operand.ctype, operand.keys)
+            return operand, k
+
+        return self.primary(k, end, scope)
+
+    def primary(self, k: int, end: int, scope):
+        tokens = self.tokens
+        kind, value = tokens[k]
+
+        if tokens[k] == ("OP", "LPAREN"):
+            close = self.parens.get(k)
+            if close is None or close >= end:
+                raise Unsupported()
+            inner, after = self.binary(k + 1, close, scope, 0)
+            if after != close:
+                raise Unsupported()
+            return inner, close + 1
+
+        if kind == "INT":
+            number = int(value)
+            ctype = "int" if INT32[0] <= number <= INT32[1] else "int64_t"
+            return Value("int" if INT64[0] <= number <= INT64[1] else "pyint", (number, number), ctype), k + 1
+
+        if kind == "FLOAT":
+            return Value("double", ctype="double"), k + 1
+
+        if kind == "STRING":
+            # f-strings have already become fmt::format() calls, which give std::string rather than pystring
+            found = "pystring" if value.startswith('"') else AUTO
+            return Value(found, ctype=found), k + 1
+
+        if tokens[k] in (("KW", "True"), ("KW", "False")):
+            return Value("bool", (int(value == "True"),) * 2, "bool"), k + 1
+
+        if kind == "LAMBDA":
+            # A lambda stands for what its body gives, which is what map() and key= want to know of it
+            close = self.lambdas.get(k)
+            if close is None or close >= end:
+                raise Unsupported()
+            body, after = self.binary(k + 1, close, lambdascope(scope, k), 0)
+            if after != close:
+                raise Unsupported()
+            return body, close + 1
+
+        if kind in ("NAME", "FUNCREF", "TYPE") and k + 1 < end and tokens[k+1] == ("OP", "LPAREN"):
+            close = self.parens.get(k + 1)
+            if close is None or close >= end:
+                raise Unsupported()
+
+            arguments = []
+            for argstart, argend in self.arguments(k + 1):
+                argument, after = self.binary(argstart, argend, scope, 0)
+                if after != argend:
+                    raise Unsupported()
+                arguments.append(argument)
+
+            function = self.function(scope, value)
+            if function is not None:
+                return self.trailers(close + 1, end, scope, self.current(("return", function)))
+
+            if value == "pypow":
+                result = power(arguments)
+                if self.checking and result.type == "double" and all(argument.type in INTEGRAL or argument.type == "pyint" for argument in arguments):
+                    self.floatpowers.add(k)
+                return self.trailers(close + 1, end, scope, result)
+
+            if value in ("dict", "set") and not arguments:
+                found = "pydict" if value == "dict" else "pyset"
+                return self.trailers(close + 1, end, scope, Value(found, (None, None), found))
+
+            if value == "set" and len(arguments) == 1:
+                bounds = elementbounds(arguments[0].type, arguments[0].range)
+                found = container("pyset", [stored(elementof(arguments[0].type), bounds)])
+                return self.trailers(close + 1, end, scope, Value(found, None if found is None else Parts([bounds]), found, arguments[0].keys))
+
+            if value == "range":
+                # Bounded only where a for loop reads it (fortype); as an iterable anywhere else it gives any int
+                return self.trailers(close + 1, end, scope, Value("pyiter<int>", (None, None), "pyiter<int>"))
+
+            if value in ITERATORBUILTINS and arguments:
+                found = self.iterated(value, arguments, [tokens[argstart] for argstart, _ in self.arguments(k + 1)])
+                bounds = None if found is None else (None, None)
+                if value == "map" and len(arguments) == 2 and found is not None:
+                    bounds = Parts([arguments[0].range])
+                elif value == "filter" and found is not None:
+                    bounds = Parts([elementbounds(arguments[-1].type, arguments[-1].range)])
+                elif value in ("min", "max") and len(arguments) == 1 + (tokens[self.arguments(k + 1)[-1][0]] == ("NAME", "pyiter::key")) and found in INTEGRAL:
+                    bounds = elementbounds(arguments[0].type, arguments[0].range)
+                return self.trailers(close + 1, end, scope, Value(found, bounds, found))
+
+            found = BUILTINRETURNS.get(value, AUTO)
+            return self.trailers(close + 1, end, scope, Value(found, (0, None) if value == "len" else (None, None), found))
+
+        if kind in ("NAME", "VARREF", "PARAM", "VAR", "IMPORTREF"):
+            key = self.resolve(scope, value)
+            result = self.current(key) if key is not None else Value(AUTO, (None, None), AUTO)
+            return self.trailers(k + 1, end, scope, result)
+
+        if tokens[k] == ("OP", "LCPAREN"):
+            close = self.braces.get(k)
+            if close is None or close >= end:
+                raise Unsupported()
+            return self.trailers(close + 1, end, scope, self.literal(k, close, scope))
+
+        if tokens[k] == ("OP", "LSPAREN"):
+            close = self.squares.get(k)
+            if close is None or close >= end:
+                raise Unsupported()
+            return self.trailers(close + 1, end, scope, self.literal(k, close, scope))
+
+        raise Unsupported()
+
+    def iterated(self, name: str, arguments: list, firsts: list):
+        # Type of a call of one of pyiter.hpp's builtins, given its arguments' values and first tokens
+        if name == "map":
+            return container("pyiter", [arguments[0].type])
+        if name == "filter":
+            # Pairs and tuples stay typed part by part, for the names they're unpacked into
+            parts = containerparts(arguments[-1].type)
+            if parts is not None and parts[0] in ("pyenumerate", "pyzip", "pydictitems"):
+                return None if parts[1] is None else container("pyzip", parts[1])
+            return container("pyiter", [elementof(arguments[-1].type)])
+        if name == "enumerate":
+            return container("pyenumerate", ["int64_t", elementof(arguments[0].type)])
+        if name == "zip":
+            return container("pyzip", [elementof(argument.type) for argument in arguments])
+        if name == "sum":
+            found = elementof(arguments[0].type)
+            if len(arguments) == 2:
+                found = promote(found, arguments[1].type)
+            # Integers add up exactly, however many there are (pyiter::total)
+            return "pyint" if found in INTEGRAL else found
+
+        # min() and max(): of an iterable's elements, or of their arguments; key= doesn't change what's picked from
+        if firsts[-1] == ("NAME", "pyiter::key"):
+            arguments = arguments[:-1]
+        if len(arguments) == 1:
+            return elementof(arguments[0].type)
+        found = None
+        for argument in arguments:
+            if argument.type is None:
+                return None
+            found = unify(found, argument.type)
+        return found
+
+    def literal(self, opening: int, close: int, scope):
+        # Value of a list, dict or set literal; lowerdicts has made a dict's entries bracketed [key, value] pairs
+        tokens = self.tokens
+        if close == opening + 1:
+            found = "pylist" if tokens[opening] == ("OP", "LSPAREN") else "pydict"
+            return Value(found, (None, None), found)
+
+        entries = [(start, end) for start, end in compiler.toplevelsplit(tokens, opening + 1, close, (("SIG", "COMMA"),)) if end > start]
+        pairs = [compiler.toplevelsplit(tokens, start + 1, end - 1, (("SIG", "COMMA"),)) for start, end in entries
+                 if tokens[start] == ("OP", "LSPAREN") and self.squares.get(start) == end - 1]
+        if tokens[opening] == ("OP", "LSPAREN"):
+            family, columns = "pylist", [entries]
+        elif len(pairs) == len(entries) and all(len(pair) == 2 for pair in pairs):
+            family, columns = "pydict", [[pair[0] for pair in pairs], [pair[1] for pair in pairs]]
+        else:
+            family, columns = "pyset", [entries]
+
+        parts = []
+        bounds = []
+        keys = frozenset()
+        for spans in columns:
+            found = None
+            column = None
+            for start, end in spans:
+                value, after = self.binary(start, end, scope, 0)
+                if after != end:
+                    raise Unsupported()
+                found = unify(found, stored(value.type, value.range))
+                if value.type in INTEGRAL or value.type == "pyint":
+                    column = hull(column, value.range if value.range is not None else (None, None))
+                keys |= value.keys
+            parts.append(found)
+            bounds.append(column)
+
+        found = container(family, parts)
+        return Value(found, None if found is None else Parts(bounds), found, keys)
+
+    def trailers(self, k: int, end: int, scope, result: Value):
+        # Indexing, attribute access and method calls on a value give something this pass doesn't type, except for
+        # the lookups and views of dicts and sets
+        tokens = self.tokens
+        receiver = result
+        while k < end and (tokens[k] in (("OP", "LSPAREN"), ("SIG", "DOT"), ("OP", "LPAREN")) or tokens[k][0] == "METHOD"):
+            if tokens[k] == ("OP", "LSPAREN"):
+                close = self.squares.get(k)
+            elif tokens[k] == ("OP", "LPAREN"):
+                close = self.parens.get(k)
+            else:
+                close = k
+            if close is None or close >= end:
+                raise Unsupported()
+            arguments = []
+            if close > k + 1:
+                for argstart, argend in self.arguments(k) if tokens[k] == ("OP", "LPAREN") else [(k + 1, close)]:
+                    argument, after = self.binary(argstart, argend, scope, 0)
+                    if after != argend:
+                        raise Unsupported()
+                    arguments.append(argument)
+
+            if tokens[k] == ("SIG", "DOT"):
+                receiver = result
+            if tokens[k] == ("OP", "LPAREN") and tokens[k-1][0] == "METHOD":
+                result = self.method(receiver, tokens[k-1][1], arguments)
+            elif tokens[k] == ("OP", "LSPAREN") and (result.type is None or containerparts(result.type) is not None and containerparts(result.type)[0] == "pydict"):
+                if self.checking and result.type is not None:
+                    self.lookups.add(k)
+                result = self.method(result, "at", arguments)
+            elif tokens[k] == ("OP", "LSPAREN") and tokens[k+1] == ("NAME", "pyslice") and (result.type == "pystring" or containerparts(result.type) is not None and containerparts(result.type)[0] == "pylist"):
+                # A slice is a view, which is copied into a list or string of its own when it's stored
+                result = Value(result.type, result.range, result.type, result.keys)
+            elif tokens[k] == ("OP", "LSPAREN") and containerparts(result.type) is not None and tokens[k+1] != ("NAME", "pyslice"):
+                result = self.method(result, "at", arguments)
+            else:
+                result = Value(AUTO, (None, None), AUTO)
+            k = close + 1
+
+        return result, k
+
+    def method(self, receiver: Value, name: str, arguments: list):
+        # Value of `receiver.name(arguments)` for what strings, lists, dicts and sets return; `at` stands for indexing
+        if receiver.type is None:
+            return Value(None)
+
+        found = AUTO
+        bounds = None
+        parts = containerparts(receiver.type)
+        family, types = parts if parts is not None else (None, None)
+        if family == "pylist" and types is None:
+            found = None
+        elif family == "pylist" and name in ("at", "pop_back"):
+            found, bounds = types[0], elementbounds(receiver.type, receiver.range)
+        elif family == "pylist" and name in ("index", "count"):
+            found = "int64_t"
+        elif family == "pylist" and name == "copy":
+            found, bounds = receiver.type, receiver.range
+        elif family == "pydict" and name in ("get", "setdefault") and len(arguments) == 2:
+            # With the default, the result is the dict's value type, which an empty dict learns from the default
+            found = types[1] if types is not None else stored(arguments[1].type, arguments[1].range)
+            bounds = hull(elementbounds(receiver.type, receiver.range, 1), arguments[1].range) if types is not None else arguments[1].range
+        elif family == "pydict" and types is None:
+            found = None
+        elif family == "pydict" and name in ("at", "setdefault"):
+            found, bounds = types[1], elementbounds(receiver.type, receiver.range, 1)
+        elif family == "pydict" and name in ("keys", "values", "items"):
+            # The views keep the dict's types, and so its contents' ranges
+            found, bounds = container(f"pydict{name}", types), receiver.range
+        elif family in ("pydict", "pyset") and name == "copy":
+            found, bounds = receiver.type, receiver.range
+        elif receiver.type == "pystring" and name in STRINGMETHODS:
+            found = STRINGMETHODS[name]
+
+        keys = receiver.keys.union(*(argument.keys for argument in arguments))
+        if found in INTEGRAL:
+            # An element is as wide as the container stores it, whatever picked it out, in the range stored into it
+            return Value(found, bounds if within(bounds, INT64) else storedbounds(found), found, receiver.keys if family is not None else keys)
+        if bounds is None:
+            bounds = None if found is None else (None, None)
+        return Value(found, bounds, found, keys)
+
+    def fortype(self, start: int, end: int, scope):
+        # Type and range of the loop variable of `for <var> in <start:end>`
+        tokens = self.tokens
+        if tokens[start] == ("OP", "in"):
+            start += 1
+
+        if tokens[start] == ("NAME", "range") and tokens[start+1] == ("OP", "LPAREN") and self.parens.get(start + 1) == end - 1:
+            values = [self.evaluate(argstart, argend, scope) for argstart, argend in self.arguments(start + 1) or []]
+            if not values or any(value.type not in (None, "bool", "int", "int64_t") for value in values):
+                return AUTO, None
+            if any(value.type is None or value.range is None for value in values):
+                return None, None
+
+            # Counted loops keep start, stop and stop + step (where the counter ends up) in the induction
+            # variable's type, so its range has to cover all three
+            if len(values) == 1:
+                bounds = hull((0, 0), values[0].range)
+            else:
+                bounds = hull(values[0].range, values[1].range)
+            if len(values) == 3:
+                bounds = hull(bounds, arithmetic("PLUS", values[1].range, values[2].range))
+
+            return "int", bounds
+
+        if end == start + 1 and tokens[start][0] in ("NAME", "VARREF"):
+            key = self.resolve(scope, tokens[start][1])
+            if key is None:
+                return AUTO, storedbounds(AUTO)
+            return elementof(self.types[key]), elementbounds(self.types[key], self.ranges.get(key))
+
+        # Otherwise only the views of a dict are typed, `for k in d.keys()` and the like
+        iterable = self.evaluate(start, end, scope)
+        if iterable.type is None or containerparts(iterable.type) is not None:
+            return elementof(iterable.type), elementbounds(iterable.type, iterable.range)
+
+        return AUTO, None
+
+    def assign(self, types: dict, ranges: dict, key, found, bounds):
+        if key in self.bigints and containerparts(found) is not None:
+            found = found.replace("int64_t", "pyint")
+        types[key] = unify(types.get(key), found)
+        if types[key] in INTEGRAL:
+            ranges[key] = hull(ranges.get(key), bounds if bounds is not None else None)
+        elif containerparts(types[key]) is not None and containerparts(types[key])[1] is not None:
+            # A container filled from somewhere whose contents aren't known may hold anything its type does
+            if not isinstance(bounds, Parts) and containerparts(found) is not None and containerparts(found)[1] is not None:
+                bounds = Parts([(None, None)] * len(containerparts(types[key])[1]))
+            ranges[key] = hullparts(ranges.get(key), bounds)
+
+    def filled(self, target, kind: str, data, scope):
+        # Type the container `target` has to be for `d[key] = value`, or a call of append, insert, extend, add,
+        # setdefault or update, to store into it, and the Parts that stores; None when that says nothing new
+        parts = containerparts(self.types[target])
+        if parts is None:
+            return None, None
+        family, types = parts
+
+        if kind == "item":
+            (keystart, keyend), (valuestart, valueend), op = data
+            if family != "pydict":
+                return None, None
+            key = self.evaluate(keystart, keyend, scope)
+            value = self.evaluate(valuestart, valueend, scope)
+            found, bounds = value.type, value.range
+            if op != "ASSIGN":
+                found = promote(types[1] if types is not None else None, found)
+                bounds = arithmetic(op.removesuffix("AND"), elementbounds(self.types[target], self.ranges.get(target), 1), bounds)
+            return container("pydict", [stored(key.type, key.range), stored(found, bounds)]), Parts([key.range, bounds])
+
+        method, lparen = data
+        arguments = [self.evaluate(start, end, scope) for start, end in self.arguments(lparen) or []]
+        if family == "pylist" and method in ("push_back", "insert") and len(arguments) == (1 if method == "push_back" else 2):
+            return container("pylist", [stored(arguments[-1].type, arguments[-1].range)]), Parts([arguments[-1].range])
+        if family == "pyset" and method == "add" and len(arguments) == 1:
+            return container("pyset", [stored(arguments[0].type, arguments[0].range)]), Parts([arguments[0].range])
+        if family in ("pylist", "pyset") and method == ("extend" if family == "pylist" else "update") and len(arguments) == 1:
+            bounds = elementbounds(arguments[0].type, arguments[0].range)
+            return container(family, [stored(elementof(arguments[0].type), bounds)]), Parts([bounds])
+        if family == "pydict" and method == "setdefault" and len(arguments) == 2:
+            return container("pydict", [stored(argument.type, argument.range) for argument in arguments]), Parts(argument.range for argument in arguments)
+        if family == "pydict" and method == "update" and len(arguments) == 1 and containerparts(arguments[0].type) is not None:
+            if containerparts(arguments[0].type)[0] != "pydict":
+                return AUTO, None
+            return arguments[0].type, arguments[0].range
+
+        return None, None
+
+    def widen(self, key, bounds, previous):
+        # `bounds` as of this round, or unbounded once they've kept moving for too long
+        if key in self.unbounded:
+            return (None, None)
+        if previous is not None and bounds != previous:
+            self.changes[key] = self.changes.get(key, 0) + 1
+            if self.changes[key] > WIDENAFTER:
+                self.unbounded.add(key)
+                return (None, None)
+
+        return bounds
+
+    def solve(self):
+        # One round of propagation; returns whether anything changed
+        types = {key: None for key in self.types}
+        ranges = {}
+
+        for key, kind, data, scope in self.sources:
+            if kind == "augmented":
+                # The target must also hold `target <op> value`; a loop repeating it keeps growing the range until
+                # widening drops the bound
+                target = self.resolve(scope, key)
+                if target is not None:
+                    start, end, op = data
+                    value = self.evaluate(start, end, scope)
+                    if containerparts(self.types[target]) is not None:
+                        bounds = self.combine(op.removesuffix("AND"), self.current(target), value).range
+                    else:
+                        bounds = arithmetic(op.removesuffix("AND"), self.ranges.get(target), value.range)
+                    self.assign(types, ranges, target, promote(self.types[target], value.type), bounds)
+            elif kind == "reassigned":
+                # A later `x = value` can widen x's type (an int that becomes a float or a bigger int) and adds to its
+                # range, so `y = y * 2` in a loop grows until widening drops the bound
+                target = self.resolve(scope, key)
+                if target is not None:
+                    value = self.evaluate(*data, scope)
+                    if value.type in NUMERIC and self.types[target] in NUMERIC:
+                        self.assign(types, ranges, target, value.type, value.range)
+                    # Except that a value already computed in 64 bits can't be narrowed to fit
+                    if value.ctype == "int64_t":
+                        self.widened.add(target)
+            elif kind == "for":
+                found, bounds = self.fortype(*data, scope)
+                self.assign(types, ranges, key, found, bounds)
+            elif kind == "unpack":
+                # One name of `for a, b in d.items()`, or of enumerate() or zip()
+                start, end, position = data
+                iterable = self.evaluate(start, end, scope)
+                parts = containerparts(iterable.type)
+                if parts is not None and parts[0] in ("pydictitems", "pyenumerate", "pyzip") and parts[1] is not None and position < len(parts[1]):
+                    found = parts[1][position]
+                else:
+                    found = None if iterable.type is None or parts is not None and parts[1] is None else AUTO
+                self.assign(types, ranges, key, found, elementbounds(iterable.type, iterable.range, position))
+            elif kind in ("item", "member"):
+                target = self.resolve(scope, key)
+                if target is not None:
+                    self.assign(types, ranges, target, *self.filled(target, kind, data, scope))
+            elif kind == "annotation":
+                self.assign(types, ranges, key, self.annotated(data), (None, None))
+            elif kind == "expr":
+                value = self.evaluate(*data, scope)
+                self.assign(types, ranges, key, value.type, value.range)
+            else:
+                types[key] = AUTO
+
+        for function, params in self.params.items():
+            for key, annotation, default in params:
+                if annotation is not None and annotation not in compiler.genericannotations:
+                    types[key] = self.annotated(annotation)
+                elif annotation is not None and function.rsplit(".", 1)[-1] in self.escaped:
+                    types[key] = self.annotated(annotation)
+                elif function.rsplit(".", 1)[-1] in self.escaped:
+                    types[key] = AUTO
+                elif default is not None:
+                    value = self.evaluate(*default, function)
+                    self.assign(types, ranges, key, value.type, value.range)
+
+        for name, arguments, scope in self.calls:
+            function = self.function(scope, name)
+            if function is None:
+                continue
+
+            params = self.params[function]
+            if len(arguments) > len(params):
+                for key, _, _ in params:
+                    types[key] = AUTO
+                continue
+
+            for (key, annotation, _), (start, end) in zip(params, arguments):
+                if annotation is None or annotation in compiler.genericannotations:
+                    value = self.evaluate(start, end, scope)
+                    self.assign(types, ranges, key, value.type, value.range)
+
+        for function, sources in self.returns.items():
+            key = ("return", function)
+            types[key] = None
+            if function in self.annotatedreturns:
+                types[key] = self.annotated(self.annotatedreturns[function])
+                if self.annotatedreturns[function] not in compiler.genericannotations:
+                    continue
+
+            for source in sources:
+                if source is None:
+                    types[key] = AUTO
+                else:
+                    value = self.evaluate(*source, function)
+                    self.assign(types, ranges, key, value.type, value.range)
+
+        for key, bounds in ranges.items():
+            if isinstance(bounds, Parts):
+                # Each part of a container widens on its own, so a dict of counts keeps its keys narrow
+                previous = self.ranges.get(key) if isinstance(self.ranges.get(key), Parts) else Parts([None] * len(bounds))
+                ranges[key] = Parts(self.widen((key, part), bounds[part], previous[part] if part < len(previous) else None)
+                                    for part in range(len(bounds)))
+            else:
+                ranges[key] = self.widen(key, bounds, self.ranges.get(key))
+
+        changed = types != self.types or ranges != self.ranges
+        self.types, self.ranges = types, ranges
+
+        return changed
@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from pycom import cache
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+	monkeypatch.setattr(cache, "CACHEDIR", str(tmp_path / "cache"))
+	return tmp_path
+
+
+def write_binary(path, size):
+	with open(path, "wb") as f:
+		f.write(b"\0" * size)
+
+
+def lookup_miss_test(cache_dir):
+	assert not cache.lookup("missing", str(cache_dir / "out"))
+
+
+def store_then_lookup_test(cache_dir):
+	built = cache_dir / "built"
+	write_binary(built, 16)
+	cache.store("key", str(built))
+
+	out = cache_dir / "out"
+	assert cache.lookup("key", str(out))
+	assert out.read_bytes() == built.read_bytes()
+
+
+def cachekey_test():
+	assert cache.cachekey("int main(){}", "g++ 12", "-O2") == cache.cachekey("int main(){}", "g++ 12", "-O2")
+	assert cache.cachekey("int main(){}", "g++ 12", "-O2") != cache.cachekey("int main(){}", "g++ 12", "-O3")
+	assert cache.cachekey("int main(){}", "g++ 12", "-O2") != cache.cachekey("int main(){return 1;}", "g++ 12", "-O2")
+
+
+def evict_least_recently_used_test(cache_dir):
+	bindir = cache.cachedir("bin")
+	for age, name in enumerate(["old", "used", "new"]):
+		write_binary(os.path.join(bindir, name), 10)
+		os.utime(os.path.join(bindir, name), ns=(age * 10**9, age * 10**9))
+
+	# Looking an entry up marks it as the most recently used
+	assert cache.lookup("used", str(cache_dir / "out"))
+
+	cache.evict(maxsize=20)
+
+	assert sorted(os.listdir(bindir)) == ["new", "used"]
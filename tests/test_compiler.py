@@ -0,0 +1,218 @@
+import pytest
+
+from pycom import compiler
+from pycom import tokenise
+
+
+def matchingbrackets_nested_test():
+	tokens = [("NAME", "xs"), ("OP", "LSPAREN"), ("NAME", "ys"), ("OP", "LSPAREN"), ("INT", "1"), ("OP", "RSPAREN"), ("OP", "RSPAREN")]
+
+	assert compiler.matchingbrackets(tokens) == {1: 6, 3: 5}
+
+
+def functypepointers_own_header_only_test():
+	tokens = [
+		("KW", "def"), ("FUNC", "f"), ("OP", "LPAREN"), ("OP", "RPAREN"), ("SIG", "BLOCK_START"),
+		("KW", "def"), ("FUNC", "g"), ("OP", "LPAREN"), ("OP", "RPAREN"), ("SIG", "FUNCTYPEPOINTER"), ("TYPE", "int"), ("SIG", "BLOCK_START"),
+	]
+
+	# f has no annotation of its own and must not pick up g's
+	assert compiler.functypepointers(tokens) == {5: 9}
+
+
+def lastkeywords_test():
+	tokens = [("NAME", "x"), ("KW", "while"), ("KW", "True"), ("SIG", "BLOCK_START")]
+
+	assert tokenise.lastkeywords(tokens) == [None, ("KW", "while"), ("KW", "True"), ("KW", "True")]
+
+
+def checktokens_filters_test():
+	tokens = [
+		("KW", "import"), ("NAME", "x"), ("SIG", "NEWLINE"), ("SIG", "NEWLINE"), ("SIG", "BLANK"), ("SIG", "NEWLINE"),
+		("KW", "import"), ("IMPORT_MODULE", "math"), ("KW", "lambda"), ("CLASSREF", "C"),
+	]
+
+	# The orphan import, the repeated newline, the blank and the unsupported tokens are dropped in one pass
+	assert compiler.Compile(tokens, False, "test.py").oktokens == [
+		("NAME", "x"), ("SIG", "NEWLINE"), ("SIG", "NEWLINE"), ("KW", "import"), ("IMPORT_MODULE", "math"),
+	]
+
+
+def tokenstore_test():
+	store = tokenise.gettokens("test.py", False, source="import os\n\ndef main():\n    x = 1\n")
+
+	# Kinds are one byte each, but the store still reads as (kind, value) tuples; lines are the refactored source's
+	assert store.kinds[0] == tokenise.Kind.KW and store[0] == ("KW", "import")
+	assert store[store.values.index("x")] == ("VAR", "x")
+	assert store.lines[store.values.index("x")] == 4
+
+	store.retain(token[0] != "SIG" for token in store)
+	assert "NEWLINE" not in store.values and len(store.kinds) == len(store.values) == len(store.lines)
+
+
+def countedloopheader_test():
+	assert compiler.countedloopheader("int", "i", ["n"]) == "for(int i = 0, i_stop = n; i < i_stop; ++i)"
+	assert compiler.countedloopheader("int", "j", ["10", "0", " - 3"]) == "for(int j = 10, j_stop = 0; j > j_stop; j += - 3)"
+	# A step only known at runtime decides the comparison each iteration
+	assert "j_step > 0 ? j < j_stop : j > j_stop" in compiler.countedloopheader("int", "j", ["0", "n", "k"])
+	# ...and is checked for zero once, where Python would raise ValueError
+	assert "j_step = pystep(k);" in compiler.countedloopheader("int", "j", ["0", "n", "k"])
+
+
+def countedloop_zero_step_test(capsys):
+	for step in ("0", " - 0"):
+		with pytest.raises(SystemExit):
+			compiler.countedloopheader("int", "i", ["0", "10", step])
+
+		assert "range() arg 3 must not be zero" in capsys.readouterr().out
+
+
+def countedloop_wide_stop_test():
+	source = "def main():\n    n = 0\n    for i in range(2147483640, 2147483647 + 5):\n        n += 1\n    for j in range(2147483650, 2147483640, -1):\n        n += 1\n    print(n)\n"
+	code, _ = compiler.Compile(tokenise.gettokens("test.py", False, source=source), False, "test.py", pch=True).iteratetokens()
+
+	# The stop doesn't fit in int, so neither the counter nor the arithmetic computing the stop may be
+	assert "for(int64_t i = 2147483640, i_stop = int64_t(2147483647) + int64_t(5); i < i_stop; ++i)" in code
+	assert "for(int64_t j = 2147483650, j_stop = 2147483640; j > j_stop; j += - 1)" in code
+
+
+def lowercomprehensions_test():
+	code, _ = compiler.Compile(tokenise.gettokens("test.py", False, source="def main():\n    xs = [i * 2 for i in range(10) if i % 3 != 0]\n    print(xs[0])\n"), False, "test.py", pch=True).iteratetokens()
+
+	assert "xs.reserve(range(10).size());" in code
+	assert "if(i % 3 != 0){" in code
+	assert "xs.push_back(i * 2);}}" in code
+
+
+def nestedcomprehension_not_reserved_test():
+	code, _ = compiler.Compile(tokenise.gettokens("test.py", False, source="def main():\n    ps = [i + j for i in range(3) for j in range(i)]\n    print(ps[0])\n"), False, "test.py", pch=True).iteratetokens()
+
+	# The total length depends on the inner loop, so there's nothing sensible to reserve
+	assert "reserve" not in code
+	assert "ps.push_back(i + j);}}" in code
+
+
+def comprehension_of_comprehensions_test():
+	code, _ = compiler.Compile(tokenise.gettokens("test.py", False, source="def main():\n    m = [[i * j for j in range(3)] for i in range(3)]\n    print(m)\n"), False, "test.py", pch=True).iteratetokens()
+
+	# Each row is built in a temporary by its own loop, then stored
+	assert "pylist<pylist<int64_t>> m = {};" in code
+	assert "pylist<int64_t> pyelem_m = {};" in code
+	assert "pyelem_m.push_back(i * j);}\nm.push_back(pyelem_m);}" in code
+
+
+def readonly_params_by_reference_test():
+	source = "def total(xs: list, name: str) -> int:\n    print(name)\n    return len(xs)\n\ndef grow(ys: list):\n    ys.append(1)\n\ndef main():\n    print(total([1], \"a\"))\n"
+	code, _ = compiler.Compile(tokenise.gettokens("test.py", False, source=source), False, "test.py", pch=True).iteratetokens()
+
+	assert "pyint total(const intlist& xs,const pystring& name)" in code
+	# grow() appends to its list, so it keeps its own copy
+	assert "grow(intlist ys)" in code
+
+
+def printoptions_test():
+	source = 'import sys\n\ndef main():\n    print(1, 2, 3, sep="-", end="")\n    print("x", file=sys.stderr, flush=True)\n'
+	code, _ = compiler.Compile(tokenise.gettokens("test.py", False, source=source), False, "test.py", pch=True).iteratetokens()
+
+	# The middle argument used to be taken for a parameter of main()
+	assert 'print(1,2,3,pyio::sep("-"),pyio::end(""));' in code
+	assert 'print("x",pyio::file(sys.stderr),pyio::flush(true ));' in code
+
+
+def namespace_module_test():
+	code, _ = compiler.Compile(tokenise.gettokens("test.py", False, source="import math\n\ndef main():\n    print(math.sqrt(math.pi))\n"), False, "test.py", pch=True).iteratetokens()
+
+	# math is a namespace of inline functions, so there's no global object and attributes use '::'
+	assert "Math math;" not in code
+	assert "print(math::sqrt(math::pi));" in code
+
+
+def list_literal_argument_test():
+	code, _ = compiler.Compile(tokenise.gettokens("test.py", False, source="import math\n\ndef main():\n    print(math.fsum([0.1, 0.2, 0.3]))\n"), False, "test.py", pch=True).iteratetokens()
+
+	# The literal stays a braced list, which math::fsum takes as an initializer_list<double>
+	assert "print(math::fsum({0.1,0.2,0.3}));" in code
+
+
+def set_literal_operand_test():
+	source = "def main():\n    s = {1, 2}\n    t = s | {10}\n    print({5} - s, t ^ {1})\n    s |= {7}\n"
+	code, _ = compiler.Compile(tokenise.gettokens("test.py", False, source=source), False, "test.py", pch=True).iteratetokens()
+
+	# A braced list can't be an operand, so the literal becomes a pyset temporary; after |= it stays braced
+	assert "pyset<int64_t> t = s | pyset{10 } ;" in code
+	assert "print(pyset{5 }  - s,t ^ pyset{1 } );" in code
+	assert "s |=  { 7 } ;" in code
+
+
+def random_module_test():
+	code, _ = compiler.Compile(tokenise.gettokens("test.py", False, source="import random\n\ndef main():\n    random.seed(4)\n    print(random.random(), random.randint(1, 6))\n"), False, "test.py", pch=True).iteratetokens()
+
+	# Only the module becomes the `rnd` instance; its random() method keeps its name
+	assert "rnd.seed(4);" in code
+	assert "print(rnd.random(),rnd.randint(1,6));" in code
+
+
+def lowermembership_test():
+	source = "def main():\n    xs = [1, 2]\n    ys = [True]\n    print(1 in xs and 3 not in xs[1:], (2 in xs) in ys, 1 not in xs in ys)\n"
+	code, _ = compiler.Compile(tokenise.gettokens("test.py", False, source=source), False, "test.py", pch=True).iteratetokens()
+
+	# A test nested in another's operand is rewritten inside it, and a chained one tests what the first gives
+	assert "print(pyin(1,xs) && !pyin(3,xs[pyslice(1,std::nullopt,std::nullopt)]),pyin((pyin(2,xs)),ys),!pyin(pyin(1,xs),ys));" in code
+
+
+def lowerpowers_test():
+	code, _ = compiler.Compile(tokenise.gettokens("test.py", False, source="def main():\n    print(-2 ** 3 ** 2, (1 + 2) ** 2, pow(3, 200, 7))\n"), False, "test.py", pch=True).iteratetokens()
+
+	# ** binds tighter than unary minus and groups to the right
+	assert "print( - pypow(2,pypow(3,2)),pypow((1 + 2),2),pypow(3,200,7));" in code
+
+
+def numpy_calls_test():
+	source = "import numpy as np\n\ndef main():\n    m = np.zeros((3, 4), dtype=int)\n    print(m[1:, ::2], m[0, 1], m.reshape((4, 3)).astype(float))\n"
+	code, _ = compiler.Compile(tokenise.gettokens("test.py", False, source=source), False, "test.py", pch=True).iteratetokens()
+
+	# np is numpy under another name; tuples become braced shapes and dtype= a template argument
+	assert "numpy::zeros<int64_t>({3,4})" in code
+	assert "m(pyslice(1,std::nullopt,std::nullopt),pyslice(std::nullopt,std::nullopt,2))" in code
+	assert "m(0,1)" in code
+	assert "m.reshape({4,3}).astype<double>()" in code
+
+
+def lowersubscripts_test():
+	tokens = [("NAME", "xs"), ("OP", "LSPAREN"), ("SIG", "BLOCK_START"), ("NAME", "ys"), ("OP", "LSPAREN"), ("INT", "1"), ("OP", "RSPAREN"), ("OP", "RSPAREN")]
+
+	# Only the outer subscript is a slice; a bound can itself be indexed
+	assert compiler.lowersubscripts(tokens) == [
+		("NAME", "xs"), ("OP", "LSPAREN"), ("NAME", "pyslice"), ("OP", "LPAREN"), ("NAME", "std::nullopt"), ("SIG", "COMMA"),
+		("NAME", "ys"), ("OP", "LSPAREN"), ("INT", "1"), ("OP", "RSPAREN"), ("SIG", "COMMA"), ("NAME", "std::nullopt"), ("OP", "RPAREN"), ("OP", "RSPAREN")
+	]
+
+
+def pandas_calls_test():
+	source = 'import pandas as pd\n\ndef main():\n    df = pd.DataFrame({"a": [1, 2], "b": [0.5, 1.5]})\n    print(df[~(df["a"] > 1)])\n'
+	code, _ = compiler.Compile(tokenise.gettokens("test.py", False, source=source), False, "test.py", pch=True).iteratetokens()
+
+	# A dict literal of columns becomes a list of (name, column) pairs, and ~ is C++'s own operator
+	assert 'pandas::DataFrame({{"a",{1,2}},{"b",{0.5,1.5}}})' in code
+	assert 'df[ ~ (df["a"] > 1)]' in code
+
+
+def dicts_test():
+	source = 'def main():\n    ages = {"x": 1, "y": 2}\n    sq = {i: i * i for i in range(4)}\n    if "x" in ages and 3 not in sq:\n        print(ages["x"], sq)\n'
+	code, _ = compiler.Compile(tokenise.gettokens("test.py", False, source=source), False, "test.py", pch=True).iteratetokens()
+
+	# Entries become pairs for the initializer list, and membership a hash lookup; a read of a missing key raises
+	assert 'pydict<pystring, int64_t> ages =  { {"x",1},{"y",2} } ;' in code
+	assert "sq[i] = i * i;" in code
+	assert 'if(pyin("x",ages) && !pyin(3,sq)){' in code
+	assert 'print(ages.at("x"),sq);' in code
+
+
+def generators_test():
+	source = "def main():\n    xs = [1, 2, 3]\n    print(sum(x * x for x in xs if x % 2), max(xs, key=abs), sum(map(max, xs, xs)))\n"
+	code, _ = compiler.Compile(tokenise.gettokens("test.py", False, source=source), False, "test.py", pch=True).iteratetokens()
+
+	# The generator becomes lambdas over lazy adaptors, and a function passed by name a lambda calling it
+	assert "sum(map([&](int x) { return x * x; },filter([&](int x) { return x % 2; },xs)))" in code
+	assert "max(xs,pyiter::key([&](const auto& pyarg) { return abs(pyarg); }))" in code
+	assert "map([&](const auto& pyrow) { const auto& [pyarg0, pyarg1] = pyrow; return max(pyarg0,pyarg1); },zip(xs,xs))" in code
@@ -0,0 +1,55 @@
+import json
+import os
+import socket
+import stat
+import time
+
+import pytest
+
+from pycom import cache
+from pycom import client
+from pycom import daemon
+from pycom.main import makeparser
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+	monkeypatch.setattr(cache, "CACHEDIR", str(tmp_path / "cache"))
+	return tmp_path
+
+
+def token_file_private_test(cache_dir):
+	token = daemon.writetoken(7999)
+
+	path = client.tokenfile(7999)
+	assert open(path).read() == token
+	assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def request_without_token_refused_test(cache_dir):
+	ran = []
+	server, peer = socket.socketpair()
+	peer.sendall(json.dumps({"token": "guess", "cwd": "/", "argv": ["-o", "/tmp/x", "x.py"]}).encode("utf-8") + b"\n")
+
+	daemon.handle(server, makeparser(), ran.append, daemon.writetoken(7999))
+
+	# Nothing is parsed or compiled for a caller who can't read the token file
+	with peer, peer.makefile("rb") as reply:
+		assert json.loads(reply.readline())["code"] == 1
+	assert ran == []
+
+
+def idle_client_hung_up_on_test(cache_dir, monkeypatch):
+	monkeypatch.setattr(daemon, "REQUESTTIMEOUT", 0.2)
+	ran = []
+	server, peer = socket.socketpair()
+	peer.sendall(b'{"token": ')
+	started = time.monotonic()
+
+	daemon.handle(server, makeparser(), ran.append, daemon.writetoken(7999))
+
+	# A client that never finishes its request can't keep the daemon from serving others: it's hung up on, unanswered
+	assert time.monotonic() - started < 2
+	with peer:
+		assert peer.recv(1) == b""
+	assert ran == []
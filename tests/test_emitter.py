@@ -0,0 +1,38 @@
+import io
+
+from pycom import cache
+from pycom.emitter import Emitter
+
+
+def sections_in_order_test():
+	emitter = Emitter()
+	emitter.write("int main(){\n")
+	emitter.writeonce('#include "headers/builtins/pymath.hpp"\n', "includes")
+	emitter.writeonce('#include "headers/builtins/pymath.hpp"\n', "includes")
+	emitter.write("// prelude\n", "prelude")
+
+	stream = io.StringIO()
+	emitter.writeto(stream)
+
+	assert stream.getvalue() == emitter.getvalue() == '// prelude\n#include "headers/builtins/pymath.hpp"\nint main(){\n'
+
+
+def rewrite_earlier_fragment_test():
+	emitter = Emitter()
+	emitter.write("auto x")
+	start = emitter.mark()
+	emitter.write("f(")
+	emitter.write("y")
+	emitter.write(")")
+
+	emitter.rewrite(0, f"decltype({emitter.text(start, emitter.mark())}) x")
+
+	assert emitter.getvalue() == "decltype(f(y)) xf(y)"
+
+
+def cachekey_matches_joined_code_test():
+	emitter = Emitter()
+	emitter.write("a")
+	emitter.write("b", "globals")
+
+	assert cache.cachekey(emitter, "g++") == cache.cachekey("ba", "g++")
@@ -0,0 +1,14 @@
+import pytest
+
+from pycom.main import makeparser
+
+
+def jobs_at_least_one_test(capsys):
+	assert makeparser().parse_args(["-j", "2", "x.py"]).jobs == 2
+
+	# No builds at all can't run, so -j 0 is a usage error rather than a crash in the thread pool
+	for jobs in ("0", "-3", "many"):
+		with pytest.raises(SystemExit) as exited:
+			makeparser().parse_args(["-j", jobs, "x.py"])
+		assert exited.value.code == 2
+		assert "argument -j/--jobs" in capsys.readouterr().err
@@ -0,0 +1,46 @@
+from pycom import symbols
+from pycom import tokenise
+
+
+def scoped_lookup_test():
+	table = symbols.SymbolTable()
+	table.define("total", "var", "main")
+	table.define("helper", "func")
+
+	assert table.has("total", "var", "main")
+	assert table.has("total", "var", "main.inner")
+	assert not table.has("total", "var", "other")
+	assert not table.has("total", "var")
+	assert table.has("helper", "func", "main")
+
+
+def builtin_type_names_test():
+	assert symbols.SymbolTable().has("int", "var")
+
+
+def rawtokens_scope_test():
+	code = "def f(n):\n    x = n\n    return x;\ndef main():\n    y = 1\n    print(y);"
+	scopes = {token: scope for token, scope, _ in tokenise.rawtokens(code)}
+
+	assert scopes["def"] is None
+	assert scopes["x"] == "f"
+	assert scopes["y"] == "main"
+
+
+def names_do_not_leak_between_files_test(tmp_path):
+	first = tmp_path / "first.py"
+	first.write_text("def helper():\n    print(1)\n\ndef main():\n    helper()\n")
+	second = tmp_path / "second.py"
+	second.write_text("print(helper)\n")
+
+	tokenise.gettokens(filename=str(first), verbose=False)
+
+	assert ("FUNCREF", "helper") not in tokenise.gettokens(filename=str(second), verbose=False)
+
+
+def function_names_defined_whole_test():
+	tokens = tokenise.gettokens("test.py", False, source="def main():\n    a = 1\n    print(a)\n")
+
+	# 'a' used to be defined as a function, being the second character of "main"
+	assert ("VAR", "a") in tokens
+	assert ("FUNCREF", "a") not in tokens
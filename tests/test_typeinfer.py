@@ -0,0 +1,146 @@
+from pycom import compiler
+from pycom import tokenise
+
+
+def generated(source):
+	code, _ = compiler.Compile(tokenise.gettokens("test.py", False, source=source), False, "test.py", pch=True).iteratetokens()
+	return code
+
+
+def concrete_signature_test():
+	code = generated("def is_prime(n):\n    for i in range(2, n):\n        if n % i == 0:\n            return 0\n    return 1\n\ndef main():\n    print(is_prime(7))\n")
+
+	assert "int is_prime(int n)" in code
+	assert "for(int i = 2, i_stop = n; i < i_stop; ++i)" in code
+
+
+def overflow_widens_test():
+	code = generated("def main():\n    for i in range(1, 100000):\n        x = i * i\n        print(x)\n")
+
+	# i * i needs 64 bits, so i has to be 64-bit for the multiplication not to overflow
+	assert "for(int64_t i = 1, i_stop = 100000; i < i_stop; ++i)" in code
+	assert "int64_t x = i * i" in code
+
+
+def loop_carried_growth_is_pyint_test():
+	code = generated("def fact(n):\n    r = 1\n    for i in range(1, n + 1):\n        r = r * i\n    return r\n\ndef main():\n    print(fact(25))\n")
+
+	# fact(25) is 26 digits long; r's range grows every round, so no fixed width is proven to hold it
+	assert "pyint fact(int n)" in code
+	assert "pyint r = 1" in code
+
+
+def loop_doubling_is_pyint_test():
+	code = generated("def main():\n    y = 1\n    for i in range(0, 70):\n        y = y * 2\n    w = 1\n    for i in range(70):\n        w = 3 * w\n    print(y, w)\n")
+
+	assert "pyint y = 1" in code
+	assert "pyint w = 1" in code
+	assert "for(int i = 0, i_stop = 70; i < i_stop; ++i)" in code
+
+
+def while_doubling_is_pyint_test():
+	code = generated("def main():\n    z = 1\n    while True:\n        z = z + z\n        if z > 10 ** 30:\n            break\n    print(z)\n")
+
+	assert "pyint z = 1" in code
+
+
+def bounded_reassignment_stays_narrow_test():
+	code = generated("def main():\n    x = 12345\n    for i in range(10):\n        x = (x * 1103515245 + 12345) % 2147483648\n    print(x)\n")
+
+	# The remainder bounds x whatever the product, which only needs 64 bits
+	assert "int64_t x = 12345" in code
+
+
+def inconsistent_calls_stay_generic_test():
+	code = generated('def show(v):\n    print(v)\n\ndef main():\n    show(1)\n    show("a")\n')
+
+	assert "auto show(const auto& v)" in code
+
+
+def integer_power_is_pyint_test():
+	code = generated("def main():\n    x = 3\n    x **= 100\n    y = 2.0 ** 0.5\n    print(x, y)\n")
+
+	# An integer power can outgrow any fixed width, so x has to be able to hold it
+	assert "pyint x = 3" in code
+	assert "x = pypow(x,100)" in code
+	assert "double y = pypow(2.0,0.5)" in code
+
+
+def negative_power_is_double_test():
+	code = generated("def scale(n):\n    return 10 ** -n\n\ndef main():\n    y = 2 ** -1\n    print(y, scale(3))\n    for i in range(5):\n        print(2 ** i)\n")
+
+	# Python gives 0.5 for 2 ** -1, so an exponent that isn't provably non-negative computes in floating point
+	assert "double y = pyfloatpow(2, - 1)" in code
+	assert "double scale(int n)" in code
+	assert "return pyfloatpow(10, - n)" in code
+	assert "print(pypow(2,i))" in code
+
+
+def dict_filled_by_stores_test():
+	code = generated('def main():\n    words = ["a", "b", "a"]\n    counts = {}\n    seen = set()\n    for w in words:\n        counts[w] = counts.get(w, 0) + 1\n        seen.add(len(w))\n    for k, v in counts.items():\n        print(k, v)\n')
+
+	# An empty dict or set takes its types from what's stored into it later; a count that goes up by one every round
+	# has no proven bound, so it's stored as a pyint
+	assert "pydict<pystring, pyint> counts" in code
+	assert "pyset<pyint> seen = set();" in code
+	assert "for(auto [k, v]: counts.items())" in code
+
+
+def list_filled_by_appends_test():
+	code = generated('def main():\n    stack = []\n    names = ["x"]\n    for i in range(3):\n        stack.append(i * 2.5)\n    print(stack.pop(), names + ["y"])\n')
+
+	# An empty list takes its element type from what's appended to it, and a literal operand is a pylist temporary
+	assert "floatlist stack = {};" in code
+	assert "strlist names = {\"x\"};" in code
+	assert 'print(stack.pop_back(),names + pylist{"y"});' in code
+
+
+def slices_stored_as_copies_test():
+	code = generated('def main():\n    xs = [3, 1, 2]\n    s = "hello"\n    head = xs[:-1]\n    t = s[::-1]\n    print(head, t, xs[-1], xs[1:] == [1, 2])\n')
+
+	# A slice is a view, so a variable holding one gets a list or string of its own
+	assert "pylist<int64_t> head = xs[pyslice(std::nullopt, - 1,std::nullopt)];" in code
+	assert "pystring t = s[pyslice(std::nullopt,std::nullopt, - 1)];" in code
+	assert "xs[pyslice(1,std::nullopt,std::nullopt)] == pylist{1,2}" in code
+
+
+def string_comprehensions_test():
+	code = generated('def main():\n    names = ["ann", "bob"]\n    xs = [1, 2]\n    up = [w.upper() for w in names]\n    ss = [str(x) for x in xs]\n    ex = [w + "!" for w in names]\n    print(up, ss, ex)\n')
+
+	# str's methods, str() and concatenation all give strings
+	assert "strlist up = {};" in code
+	assert "strlist ss = {};" in code
+	assert "strlist ex = {};" in code
+
+
+def untyped_comprehension_test():
+	code = generated('def main():\n    names = ["ann", "bob"]\n    tags = [f"<{w}>" for w in names if w]\n    print(tags)\n')
+
+	# An f-string's type isn't known here, so the list's is deduced from its element inside the loop
+	assert 'pylist<std::decay_t<decltype([&] { for(pystring w: names){\nif(w){ return fmt::format("<{}>", w); }} throw; }())>> tags = {};' in code
+
+
+def element_arithmetic_is_pyint_test():
+	code = generated('def main():\n    xs = [3000000000, 4000000000]\n    t = 0\n    for x in xs:\n        t += x * x\n    d = {"a": 10000000000}\n    print(t, d["a"] * d["a"])\n')
+
+	# Elements whose squares outgrow int64_t make the list store pyints, and so does a dict whose values are multiplied
+	assert "for(pyint x: xs)" in code
+	assert "pyint t = 0;" in code
+	assert "pydict<pystring, pyint> d" in code
+
+
+def unproven_elements_are_pyint_test():
+	code = generated('def main():\n    xs = [1, 2, 3]\n    ys = []\n    n = 1\n    for i in range(70):\n        n = n * 3\n        ys.append(n)\n    d = {}\n    for i in range(100):\n        d[i % 7] = d.get(i % 7, 0) + 1\n    zs = [9000000000000000000, 9000000000000000000]\n    print(xs, ys, d, zs[0] + zs[1])\n')
+
+	# Only elements whose range is proven to fit are stored as int64_t; a dict's keys and values are told apart
+	assert "pylist<int64_t> xs" in code
+	assert "intlist ys" in code
+	assert "pydict<int64_t, pyint> d" in code
+	assert "intlist zs" in code
+
+
+def integer_sum_is_pyint_test():
+	code = generated('def main():\n    xs = [1, 2, 3]\n    total = sum(x * 4000000000000000000 for x in xs)\n    print(total)\n')
+
+	# However narrow the elements, enough of them add up to more than 64 bits hold
+	assert "pyint total = sum(" in code